@@ -0,0 +1,12 @@
+"""
+Benchmarks for shenfun using airspeed velocity (asv)
+
+Run from the ``benchmarks`` folder with, e.g.,::
+
+    asv run
+    asv continuous master HEAD
+    asv publish
+
+The results are stored in ``benchmarks/results`` for each commit, such that
+regressions show up when comparing commits.
+"""
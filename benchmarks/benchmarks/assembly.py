@@ -0,0 +1,59 @@
+"""
+Benchmarks for assembling forms with inner
+"""
+from shenfun import inner, div, grad, Dx, TestFunction, TrialFunction, Array, \
+    Function, Basis, TensorProductSpace
+from .common import comm, families, get_space, random_array
+
+
+class Assembly(object):
+    """Time assembly of bilinear and linear forms"""
+
+    params = (families, (1, 2), (32, 128))
+    param_names = ('family', 'dim', 'N')
+
+    def setup(self, family, dim, N):
+        self.T = get_space(family, N, dim, bc=True)
+        self.u = TrialFunction(self.T)
+        self.v = TestFunction(self.T)
+        self.f = Array(self.T)
+        self.f[:] = random_array(self.f.shape, self.f.dtype)
+        self.f_hat = Function(self.T)
+
+    def teardown(self, family, dim, N):
+        if dim > 1:
+            self.T.destroy()
+
+    def time_mass(self, family, dim, N):
+        inner(self.v, self.u)
+
+    def time_derivative(self, family, dim, N):
+        inner(self.v, Dx(self.u, 0, 1))
+
+    def time_laplace(self, family, dim, N):
+        inner(self.v, div(grad(self.u)))
+
+    def time_linear(self, family, dim, N):
+        inner(self.v, self.f, output_array=self.f_hat)
+
+
+class AssemblyBiharmonic(object):
+    """Time assembly of biharmonic form"""
+
+    params = (('C', 'L'), (1, 2), (32, 128))
+    param_names = ('family', 'dim', 'N')
+
+    def setup(self, family, dim, N):
+        SB = Basis(N, family, bc='Biharmonic')
+        self.T = SB
+        if dim == 2:
+            self.T = TensorProductSpace(comm, (SB, Basis(N, 'F', dtype='d')))
+        self.u = TrialFunction(self.T)
+        self.v = TestFunction(self.T)
+
+    def teardown(self, family, dim, N):
+        if dim > 1:
+            self.T.destroy()
+
+    def time_biharmonic(self, family, dim, N):
+        inner(self.v, div(grad(div(grad(self.u)))))
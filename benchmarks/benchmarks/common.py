@@ -0,0 +1,44 @@
+"""
+Helper functions for the benchmarks
+"""
+import numpy as np
+from mpi4py import MPI
+from shenfun import Basis, TensorProductSpace
+
+comm = MPI.COMM_WORLD
+
+families = ('F', 'C', 'L', 'La', 'H', 'J')
+
+def get_basis(family, N, dtype='D', padding_factor=1, bc=None):
+    """Return 1D basis of family, with homogeneous Dirichlet bcs if bc is True
+
+    The Fourier basis is returned with dtype, the remaining families are
+    real.
+    """
+    if family == 'F':
+        return Basis(N, 'F', dtype=dtype, padding_factor=padding_factor)
+    kw = {}
+    if bc:
+        kw['bc'] = (0, 0)
+    if padding_factor != 1:
+        kw['padding_factor'] = padding_factor
+    return Basis(N, family, **kw)
+
+def get_space(family, N, dim, padding_factor=1, bc=None):
+    """Return TensorProductSpace of dim dimensions
+
+    The first axis uses family, all others are Fourier, with the last
+    Fourier axis real-to-complex.
+    """
+    bases = [get_basis(family, N, padding_factor=padding_factor, bc=bc)]
+    for i in range(1, dim):
+        bases.append(get_basis('F', N, dtype='d' if i == dim-1 else 'D',
+                               padding_factor=padding_factor))
+    if dim == 1:
+        return bases[0]
+    return TensorProductSpace(comm, bases, axes=list(range(dim)))
+
+def random_array(shape, dtype=float):
+    """Return array of random numbers with fixed seed"""
+    np.random.seed(1)
+    return np.random.random(shape).astype(dtype)
@@ -0,0 +1,81 @@
+"""
+Benchmarks for evaluating Functions at points and for project
+"""
+import numpy as np
+from shenfun import Function, Array, Dx, project
+from .common import families, get_space, random_array
+
+
+class Eval1D(object):
+    """Time evaluation of 1D Function at random points"""
+
+    params = (families, (32, 128), (100, 10000))
+    param_names = ('family', 'N', 'points')
+
+    def setup(self, family, N, points):
+        self.T = get_space(family, N, 1, bc=True)
+        self.u_hat = Function(self.T)
+        self.u_hat[:] = random_array(self.u_hat.shape, self.u_hat.dtype)
+        self.x = self.T.map_true_domain(random_array(points)*2-1)
+        if family == 'F':
+            self.x = random_array(points)*2*np.pi
+
+    def time_eval(self, family, N, points):
+        self.T.eval(self.x, self.u_hat)
+
+
+class EvalTensor(object):
+    """Time TensorProductSpace.eval for all methods"""
+
+    params = (('F', 'C', 'L'), (2, 3), (0, 1, 2))
+    param_names = ('family', 'dim', 'method')
+    N = 24
+    points = 1000
+
+    def setup(self, family, dim, method):
+        self.T = get_space(family, self.N, dim, bc=True)
+        self.u_hat = Function(self.T)
+        self.u_hat[:] = random_array(self.u_hat.shape, self.u_hat.dtype)
+        self.x = random_array((dim, self.points))*2*np.pi
+        if family != 'F':
+            self.x[0] = self.x[0]/np.pi-1
+        self.out = np.zeros(self.points, dtype=self.T.forward.input_array.dtype)
+
+    def teardown(self, family, dim, method):
+        self.T.destroy()
+
+    def time_eval(self, family, dim, method):
+        self.T.eval(self.x, self.u_hat, output_array=self.out, method=method)
+
+
+class Project(object):
+    """Time project of derivatives, Arrays and sympy functions"""
+
+    params = (('F', 'C', 'L'), (1, 2), (32, 128))
+    param_names = ('family', 'dim', 'N')
+
+    def setup(self, family, dim, N):
+        import sympy as sp
+        self.T = get_space(family, N, dim, bc=True)
+        self.u_hat = Function(self.T)
+        self.u_hat[:] = random_array(self.u_hat.shape, self.u_hat.dtype)
+        self.u = Array(self.T)
+        self.u[:] = random_array(self.u.shape, self.u.dtype)
+        self.T0 = get_space(family, N, dim)
+        self.out = Function(self.T0)
+        x = sp.symbols('x,y')[:dim]
+        self.f = sp.sin(x[0])*sp.cos(x[-1])
+
+    def teardown(self, family, dim, N):
+        if dim > 1:
+            self.T.destroy()
+            self.T0.destroy()
+
+    def time_derivative(self, family, dim, N):
+        project(Dx(self.u_hat, 0, 1), self.T0, output_array=self.out)
+
+    def time_array(self, family, dim, N):
+        project(self.u, self.T, output_array=self.u_hat)
+
+    def time_sympy(self, family, dim, N):
+        project(self.f, self.T0, output_array=self.out)
@@ -0,0 +1,37 @@
+"""
+Benchmarks for the time it takes to import shenfun
+
+Each benchmark runs in a fresh interpreter, such that nothing is cached in
+``sys.modules``.
+"""
+
+class Import(object):
+    """Time imports of shenfun and the modules used by typical jobs"""
+
+    def timeraw_import_shenfun(self):
+        return "import shenfun"
+
+    def timeraw_fourier_job(self):
+        return """
+        from shenfun import Basis, TensorProductSpace, Array, comm
+        T = TensorProductSpace(comm, (Basis(8, 'F', dtype='D'), Basis(8, 'F', dtype='d')))
+        u = Array(T)
+        u_hat = u.forward()
+        """
+
+    def timeraw_chebyshev_job(self):
+        return """
+        from shenfun import Basis, TensorProductSpace, Array, comm
+        T = TensorProductSpace(comm, (Basis(8, 'C', bc=(0, 0)), Basis(8, 'F', dtype='d')))
+        u = Array(T)
+        u_hat = u.forward()
+        """
+
+    def track_modules_fourier_job(self):
+        import subprocess
+        import sys
+        code = ("import sys; from shenfun import Basis; "
+                "B = Basis(8, 'F', dtype='D'); print(len(sys.modules))")
+        return int(subprocess.check_output([sys.executable, '-c', code]))
+
+    track_modules_fourier_job.unit = 'modules'
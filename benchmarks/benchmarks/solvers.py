@@ -0,0 +1,143 @@
+"""
+Benchmarks for linear algebra solvers
+"""
+import importlib
+import numpy as np
+from shenfun import inner, div, grad, TestFunction, TrialFunction, Array, \
+    Function, Basis, TensorProductSpace, VectorTensorProductSpace, \
+    MixedTensorProductSpace, BlockMatrix, la
+from .common import comm, get_space, random_array
+
+
+class Helmholtz(object):
+    """Time setup and solve of Helmholtz solvers in chebyshev.la and legendre.la"""
+
+    params = (('chebyshev', 'legendre'), (1, 2, 3), (32, 128))
+    param_names = ('family', 'dim', 'N')
+
+    def setup(self, family, dim, N):
+        if dim == 3 and N > 32:
+            raise NotImplementedError
+        self.Solver = importlib.import_module('.'.join(('shenfun', family))).la.Helmholtz
+        self.T = get_space(family, N, dim, bc=True)
+        u = TrialFunction(self.T)
+        v = TestFunction(self.T)
+        if dim == 1:
+            self.matrices = [inner(v, -div(grad(u))), inner(v, 2*u)]
+        else:
+            self.matrices = inner(v, div(grad(u)))
+        self.H = self.Solver(*self.matrices)
+        self.f_hat = Function(self.T)
+        self.f_hat[:] = random_array(self.f_hat.shape, self.f_hat.dtype)
+        self.u_hat = Function(self.T)
+
+    def teardown(self, family, dim, N):
+        if dim > 1:
+            self.T.destroy()
+
+    def time_init(self, family, dim, N):
+        self.Solver(*self.matrices)
+
+    def time_solve(self, family, dim, N):
+        self.H(self.u_hat, self.f_hat)
+
+
+class Biharmonic(object):
+    """Time setup and solve of Biharmonic solvers in chebyshev.la and legendre.la"""
+
+    params = (('chebyshev', 'legendre'), (1, 2), (32, 128))
+    param_names = ('family', 'dim', 'N')
+
+    def setup(self, family, dim, N):
+        self.Solver = importlib.import_module('.'.join(('shenfun', family))).la.Biharmonic
+        self.T = Basis(N, family, bc='Biharmonic')
+        if dim == 2:
+            self.T = TensorProductSpace(comm, (self.T, Basis(N, 'F', dtype='d')))
+        u = TrialFunction(self.T)
+        v = TestFunction(self.T)
+        self.matrices = inner(v, div(grad(div(grad(u)))) + div(grad(u)) + u)
+        self.H = self.Solver(*self.matrices)
+        self.f_hat = Function(self.T)
+        self.f_hat[:] = random_array(self.f_hat.shape, self.f_hat.dtype)
+        self.u_hat = Function(self.T)
+
+    def teardown(self, family, dim, N):
+        if dim > 1:
+            self.T.destroy()
+
+    def time_init(self, family, dim, N):
+        self.Solver(*self.matrices)
+
+    def time_solve(self, family, dim, N):
+        self.H(self.u_hat, self.f_hat)
+
+
+class BandedSolvers(object):
+    """Time the generic solvers in la.py for 1D and 2D arrays"""
+
+    params = (('C', 'L'), (1, 2), (32, 128, 512))
+    param_names = ('family', 'dim', 'N')
+
+    def setup(self, family, dim, N):
+        SD = Basis(N, family, bc=(0, 0))
+        SB = Basis(N, family, bc='Biharmonic')
+        shape = (N,) if dim == 1 else (N, N)
+        self.b = random_array(shape)
+        self.u = np.zeros(shape)
+        self.tdma = la.TDMA(inner(TestFunction(SD), TrialFunction(SD)))
+        self.pdma = la.PDMA(inner(TestFunction(SB), TrialFunction(SB)))
+        A = inner(TestFunction(SD), div(grad(TrialFunction(SD))))
+        self.solve = la.Solve(A, SD)
+        self.A = A
+        self.tdma(self.b.copy())
+        self.pdma(self.b.copy())
+
+    def time_TDMA(self, family, dim, N):
+        self.tdma(self.b, self.u)
+
+    def time_PDMA(self, family, dim, N):
+        self.pdma(self.b, self.u)
+
+    def time_Solve(self, family, dim, N):
+        self.solve(self.b, self.u)
+
+    def time_SparseMatrix_solve(self, family, dim, N):
+        self.A.solve(self.b, self.u)
+
+
+class BlockMatrixSolve(object):
+    """Time BlockMatrix.solve for the mixed Poisson problem"""
+
+    params = (('chebyshev', 'legendre'), (24, 48))
+    param_names = ('family', 'N')
+
+    def setup(self, family, N):
+        K0 = Basis(N, 'Fourier', dtype='d')
+        SD = Basis(N, family, bc=(0, 0))
+        ST = Basis(N, family)
+        TD = TensorProductSpace(comm, (K0, SD), axes=(1, 0))
+        TT = TensorProductSpace(comm, (K0, ST), axes=(1, 0))
+        VT = VectorTensorProductSpace(TT)
+        self.Q = MixedTensorProductSpace([VT, TD])
+        self.spaces = (TD, TT)
+        g, u = TrialFunction(self.Q)
+        p, q = TestFunction(self.Q)
+        A00 = inner(p, g)
+        if family == 'legendre':
+            A01 = inner(div(p), u)
+        else:
+            A01 = inner(p, -grad(u))
+        A10 = inner(q, div(g))
+        self.M = BlockMatrix(A00+A01+A10)
+        fj = Array(TD)
+        fj[:] = random_array(fj.shape)
+        self.vf_hat = Function(self.Q)
+        inner(q, fj, output_array=self.vf_hat[1])
+        self.M.solve(self.vf_hat)
+
+    def teardown(self, family, N):
+        for T in self.spaces:
+            T.destroy()
+
+    def time_solve(self, family, N):
+        self.M.solve(self.vf_hat)
@@ -0,0 +1,47 @@
+"""
+Benchmarks for forward and backward transforms
+"""
+from shenfun import Array, Function
+from .common import families, get_space, random_array
+
+
+class _Transforms(object):
+    """Time forward and backward transforms of family along first axis"""
+
+    params = (families, (1, 1.5), (64,))
+    param_names = ('family', 'padding_factor', 'N')
+    dim = 1
+
+    def setup(self, family, padding_factor, N):
+        if family in ('La', 'H', 'J') and N > 256:
+            raise NotImplementedError # Not numerically stable
+        self.T = get_space(family, N, self.dim, padding_factor=padding_factor)
+        self.u = Array(self.T)
+        self.u[:] = random_array(self.u.shape, self.u.dtype)
+        self.u_hat = Function(self.T)
+        self.T.forward(self.u, self.u_hat)
+
+    def teardown(self, family, padding_factor, N):
+        if self.dim > 1:
+            self.T.destroy()
+
+    def time_forward(self, family, padding_factor, N):
+        self.T.forward(self.u, self.u_hat)
+
+    def time_backward(self, family, padding_factor, N):
+        self.T.backward(self.u_hat, self.u)
+
+
+class Transforms1D(_Transforms):
+    params = (families, (1, 1.5), (64, 256, 1024))
+    dim = 1
+
+
+class Transforms2D(_Transforms):
+    params = (families, (1, 1.5), (32, 128))
+    dim = 2
+
+
+class Transforms3D(_Transforms):
+    params = (families, (1, 1.5), (16, 32))
+    dim = 3
@@ -0,0 +1,126 @@
+"""
+Strong and weak scaling of parallel transforms using a local mpirun
+
+Run, e.g.::
+
+    python mpi_scaling.py --procs 1 2 4 8 --N 64 --dim 3 --family C --scaling strong
+    python mpi_scaling.py --procs 1 2 4 8 --N 32 --dim 3 --family F --scaling weak
+
+For each number of processors the script launches itself through
+``mpirun -np p``. The timings (min over repeats of the max over
+processors) of forward and backward transforms, along with the per-stage
+timings of :meth:`.TensorProductSpace.timings`, are appended to a json
+file (default ``results/mpi_scaling.json``) together with the current git
+commit, such that results may be compared across commits.
+"""
+from __future__ import print_function
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+def get_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--procs', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--N', type=int, default=64,
+                        help='Size in each direction (for one processor if weak scaling)')
+    parser.add_argument('--dim', type=int, default=3)
+    parser.add_argument('--family', default='C', choices=('F', 'C', 'L'))
+    parser.add_argument('--scaling', default='strong', choices=('strong', 'weak'))
+    parser.add_argument('--slab', action='store_true')
+    parser.add_argument('--padding_factor', type=float, default=1)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--mpirun', default='mpirun')
+    parser.add_argument('--output', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results', 'mpi_scaling.json'))
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+def run(args):
+    """Time transforms on all processors of MPI.COMM_WORLD"""
+    import numpy as np
+    from mpi4py import MPI
+    from shenfun import Basis, TensorProductSpace, Array, Function
+    comm = MPI.COMM_WORLD
+    N = args.N
+    if args.scaling == 'weak':
+        N = int(np.round(N*comm.Get_size()**(1./args.dim)))
+    bases = []
+    for i in range(args.dim):
+        if i == 0 and args.family != 'F':
+            bases.append(Basis(N, args.family, bc=(0, 0),
+                               padding_factor=args.padding_factor))
+        else:
+            bases.append(Basis(N, 'F', dtype='d' if i == args.dim-1 else 'D',
+                               padding_factor=args.padding_factor))
+    T = TensorProductSpace(comm, bases, slab=args.slab)
+    u = Array(T)
+    u[:] = np.random.random(u.shape)
+    u_hat = Function(T)
+    T.forward(u, u_hat)
+    T.backward(u_hat, u)
+    T.profile()
+    results = {}
+    for name, func in (('forward', lambda: T.forward(u, u_hat)),
+                       ('backward', lambda: T.backward(u_hat, u))):
+        times = []
+        for _ in range(args.repeats):
+            comm.Barrier()
+            t0 = MPI.Wtime()
+            func()
+            times.append(comm.allreduce(MPI.Wtime()-t0, op=MPI.MAX))
+        results[name] = min(times)
+    results['stages'] = T.timings(reduce=True)
+    results['N'] = N
+    results['procs'] = comm.Get_size()
+    results['grid'] = [c.Get_size() for c in T.subcomm]
+    T.destroy()
+    if comm.Get_rank() == 0:
+        print(json.dumps(results))
+
+def main(args):
+    """Launch run for all number of processors and store results"""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        commit = commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    options = []
+    for key in ('N', 'dim', 'family', 'scaling', 'padding_factor', 'repeats'):
+        options += ['--'+key, str(getattr(args, key))]
+    if args.slab:
+        options.append('--slab')
+    runs = []
+    for p in args.procs:
+        cmd = args.mpirun.split() + ['-np', str(p), sys.executable,
+                                     os.path.abspath(__file__), '--run'] + options
+        out = subprocess.check_output(cmd).decode()
+        result = json.loads(out.strip().splitlines()[-1])
+        print('procs={procs:4d} N={N:5d} grid={grid} forward={forward:.4e} backward={backward:.4e}'.format(**result))
+        runs.append(result)
+    record = {'commit': commit,
+              'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+              'options': dict((key, getattr(args, key)) for key in
+                              ('N', 'dim', 'family', 'scaling', 'slab',
+                               'padding_factor', 'repeats')),
+              'runs': runs}
+    records = []
+    if os.path.exists(args.output):
+        with open(args.output, 'r') as f:
+            records = json.load(f)
+    records.append(record)
+    if not os.path.exists(os.path.dirname(args.output)):
+        os.makedirs(os.path.dirname(args.output))
+    with open(args.output, 'w') as f:
+        json.dump(records, f, indent=1)
+
+if __name__ == '__main__':
+    args = get_args()
+    if args.run:
+        run(args)
+    else:
+        main(args)
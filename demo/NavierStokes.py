@@ -30,6 +30,8 @@ W = Array(TV)
 curl_ = Array(TV)
 X = T.local_mesh(True)
 A = inner(grad(u), grad(v))
+curl_projector = Projector(curl(U_hat), TV)
+W_projector = Projector(W, TV)
 
 def LinearRHS(self, **params):
     # Note that L is a diagonal TPmatrix with scale of shape (N[0], N[1], N[2]//2+1),
@@ -39,11 +41,11 @@ def LinearRHS(self, **params):
 
 def NonlinearRHS(self, U, U_hat, dU, **params):
     global TV, curl_hat, curl_, P_hat, W
-    curl_hat = project(curl(U_hat), TV, output_array=curl_hat)
+    curl_hat = curl_projector(U_hat, output_array=curl_hat)
     curl_ = TV.backward(curl_hat, curl_)
     U = U_hat.backward(U)
     W[:] = np.cross(U, curl_, axis=0)     # Nonlinear term in physical space
-    dU = project(W, TV, output_array=dU)             # dU = W.forward(dU)
+    dU = W_projector(W, output_array=dU)               # dU = W.forward(dU)
     P_hat = A.solve(inner(div(dU), v), P_hat)
     dU += inner(grad(P_hat), TestFunction(TV))
     return dU
@@ -20,6 +20,12 @@ def has_flag(compiler, flagname):
     p.communicate("")
     return True if p.returncode == 0 else False
 
+# Build the threaded kernels (cython.parallel.prange) with OpenMP by setting
+# SHENFUN_OPENMP=1. The number of threads is chosen at runtime with
+# shenfun.optimization.set_num_threads
+use_openmp = os.environ.get("SHENFUN_OPENMP", "0").lower() in ("1", "true", "yes")
+openmp_extensions = ("Matvec", "la")
+
 class build_ext_subclass(build_ext):
     def build_extensions(self):
         extra_compile_args = ['-g0']
@@ -30,9 +36,13 @@ class build_ext_subclass(build_ext):
                 if has_flag(self.compiler, c):
                     extra_compile_args.append(c)
 
+        openmp = use_openmp and has_flag(self.compiler, '-fopenmp')
         for e in self.extensions:
             e.extra_compile_args += extra_compile_args
             e.include_dirs.extend([get_include()])
+            if openmp and e.name.split('.')[-1] in openmp_extensions:
+                e.extra_compile_args.append('-fopenmp')
+                e.extra_link_args.append('-fopenmp')
         build_ext.build_extensions(self)
 
 def get_extensions():
@@ -43,8 +53,7 @@ def get_extensions():
                              sources=[os.path.join(cdir, '{0}.pyx'.format(s))],
                              language="c++"))  # , define_macros=define_macros
     [e.extra_link_args.extend(["-std=c++11"]) for e in ext]
-    #[e.extra_link_args.extend(["-std=c++11", "-fopenmp"]) for e in ext]
-    for s in ("Cheb", "convolve", "outer", "applymask"):
+    for s in ("Cheb", "convolve", "outer", "applymask", "quadrature"):
         ext.append(Extension("shenfun.optimization.cython.{0}".format(s),
                              libraries=['m'],
                              sources=[os.path.join(cdir, '{0}.pyx'.format(s))]))
@@ -91,6 +100,7 @@ if __name__ == '__main__':
                     "shenfun.chebyshev",
                     "shenfun.fourier",
                     "shenfun.jacobi",
+                    "shenfun.ensemble",
                     "shenfun.forms",
                     "shenfun.utilities",
                     "shenfun.io"
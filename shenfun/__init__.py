@@ -28,22 +28,59 @@ routines to `Cython <https://cython.org/>`_.
 __version__ = '2.1.0'
 __author__ = 'Mikael Mortensen'
 
+import sys
+import importlib
 import numpy as np
 from mpi4py import MPI
-from . import chebyshev
-from . import legendre
-from . import laguerre
-from . import hermite
 from . import fourier
-from . import jacobi
 from . import matrixbase
-from . import la
 from .fourier import energy_fourier
-from .io import *
 from .matrixbase import *
 from .forms import *
 from .tensorproductspace import *
 from .utilities import *
-from .utilities.lagrangian_particles import *
-from .utilities.integrators import *
 comm = MPI.COMM_WORLD
+
+# The families other than Fourier, the linear algebra solvers, io,
+# integrators, Lagrangian particles and parameter sweeps are imported on
+# first access, such that, e.g., a Fourier-only job does not import sympy,
+# scipy.sparse, h5py or quadpy. The lazy names map to the module they are
+# found in.
+_lazy_modules = {name: name for name in ('chebyshev', 'legendre', 'laguerre',
+                                         'hermite', 'jacobi', 'ensemble',
+                                         'la', 'io')}
+_lazy_attributes = {}
+for _name in ('HDF5File', 'NCFile', 'ShenfunFile'):
+    _lazy_attributes[_name] = 'io'
+for _name in ('RK4', 'ETDRK4', 'ETD'):
+    _lazy_attributes[_name] = 'utilities.integrators'
+_lazy_attributes['LagrangianParticles'] = 'utilities.lagrangian_particles'
+for _name in ('Descriptor', 'parameter_sweep'):
+    _lazy_attributes[_name] = 'utilities.sweep'
+
+# The public names of shenfun are exported by ``from shenfun import *``,
+# together with ``np``, ``MPI`` and ``comm`` that scripts have always relied on.
+__all__ = ['np', 'MPI', 'comm', 'fourier', 'matrixbase', 'energy_fourier']
+__all__ += list(matrixbase.__all__)
+__all__ += list(forms.__all__)
+__all__ += list(tensorproductspace.__all__)
+__all__ += list(utilities.__all__)
+__all__ += list(_lazy_modules) + list(_lazy_attributes)
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        return importlib.import_module('.'+_lazy_modules[name], __name__)
+    if name in _lazy_attributes:
+        mod = importlib.import_module('.'+_lazy_attributes[name], __name__)
+        attr = getattr(mod, name)
+        globals()[name] = attr
+        return attr
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+    return sorted(__all__)
+
+if sys.version_info < (3, 7): # pragma: no cover
+    # Module level __getattr__ requires Python 3.7
+    for _name in list(_lazy_modules) + list(_lazy_attributes):
+        globals()[_name] = __getattr__(_name)
@@ -8,11 +8,13 @@ from numpy.polynomial import chebyshev as n_cheb
 import sympy
 from scipy.special import eval_chebyt
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, work, Transform, FuncWrap, \
-    islicedict, slicedict
-from shenfun.optimization.cython import Cheb
+from shenfun.spectralbase import SpectralBase, work, work_pool, fftw_plans, \
+    Transform, FuncWrap, islicedict, slicedict
+from shenfun.optimization import optimized_module
 from shenfun.utilities import inheritdocstrings
 
+Cheb = optimized_module('Cheb')
+
 __all__ = ['ChebyshevBase', 'Basis', 'ShenDirichletBasis',
            'ShenNeumannBasis', 'ShenBiharmonicBasis',
            'SecondNeumannBasis', 'BCBasis', 'BCBiharmonicBasis']
@@ -170,12 +172,18 @@ class ChebyshevBase(SpectralBase):
             axis = axis[-1]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         plan_fwd = self._xfftn_fwd
         plan_bck = self._xfftn_bck
+        # Real dtype of the same precision, since dct works on real data
+        rdtype = np.dtype(dtype).char.lower()
 
         if 'builders' in self._xfftn_fwd.func.__module__: #pragma: no cover
             opts = dict(
@@ -188,7 +196,7 @@ class ChebyshevBase(SpectralBase):
             )
             opts.update(options)
 
-            U = fftw.aligned(shape, dtype=np.float)
+            U = fftw.aligned(shape, dtype=rdtype)
             xfftn_fwd = plan_fwd(U, axis=axis, **opts)
             V = xfftn_fwd.output_array
             xfftn_bck = plan_bck(V, axis=axis, **opts)
@@ -208,18 +216,19 @@ class ChebyshevBase(SpectralBase):
                      fftw.flag_dict[opts['overwrite_input']])
             threads = opts['threads']
 
-            U = fftw.aligned(shape, dtype=np.float)
+            U = fftw.aligned(shape, dtype=rdtype)
 
-            xfftn_fwd = plan_fwd(U, axes=(axis,), threads=threads, flags=flags)
+            xfftn_fwd = fftw_plans.plan(plan_fwd, U, axes=(axis,), threads=threads, flags=flags)
             V = xfftn_fwd.output_array
-            xfftn_bck = plan_bck(V, axes=(axis,), threads=threads, flags=flags, output_array=U)
+            xfftn_bck = fftw_plans.plan(plan_bck, V, axes=(axis,), threads=threads, flags=flags,
+                                        output_array=U)
             V.fill(0)
             U.fill(0)
 
-        if np.dtype(dtype) is np.dtype('complex'):
+        if np.issubdtype(dtype, np.complexfloating):
             # dct only works on real data, so need to wrap it
-            U = fftw.aligned(shape, dtype=np.complex)
-            V = fftw.aligned(shape, dtype=np.complex)
+            U = fftw.aligned(shape, dtype=dtype)
+            V = fftw.aligned(shape, dtype=dtype)
             U.fill(0)
             V.fill(0)
             xfftn_fwd = DCTWrap(xfftn_fwd, U, V)
@@ -238,6 +247,7 @@ class ChebyshevBase(SpectralBase):
         self.scalar_product = Transform(self.scalar_product, xfftn_fwd, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
     def get_orthogonal(self):
         return Basis(self.N, quad=self.quad, domain=self.domain)
@@ -318,6 +328,16 @@ class Basis(ChebyshevBase):
         fd = self.backward(ck)
         return fd.copy()
 
+    def _derivative_recurrence(self, N):
+        # T_n = T'_{n+1}/(2(n+1)) - T'_{n-1}/(2(n-1)) for n > 1
+        n = np.arange(N+1, dtype=float)
+        A = np.zeros(N+1)
+        A[2:] = -1/(2*(n[2:]-1))
+        B = np.zeros(N)
+        C = 1/(2*(n[:N]+1))
+        C[0] = 1
+        return A, B, C
+
     def apply_inverse_mass(self, array):
         array *= (2/np.pi)
         array[self.si[0]] /= 2
@@ -562,7 +582,8 @@ class ShenDirichletBasis(ChebyshevBase):
             axis = axis[-1]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -788,7 +809,8 @@ class ShenNeumannBasis(ChebyshevBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -1019,7 +1041,8 @@ class ShenBiharmonicBasis(ChebyshevBase):
             axis = axis[-1]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -1197,7 +1220,8 @@ class SecondNeumannBasis(ChebyshevBase): #pragma: no cover
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -2,12 +2,13 @@
 
 from copy import copy
 import numpy as np
-from shenfun.optimization import optimizer
-from shenfun.optimization.cython import la
+from shenfun.optimization import optimizer, optimized_module
 from shenfun.la import TDMA as la_TDMA
 from shenfun.utilities import inheritdocstrings
 from shenfun.matrixbase import TPMatrix
 
+la = optimized_module('la')
+
 @inheritdocstrings
 class TDMA(la_TDMA):
 
@@ -68,13 +68,15 @@ from __future__ import division
 #__all__ = ['mat']
 
 import numpy as np
-from shenfun.optimization import cython
+from shenfun.optimization import optimized_module
 from shenfun.matrixbase import SpectralMatrix
 from shenfun.utilities import inheritdocstrings
 from shenfun.la import TDMA as neumann_TDMA
 from .la import TDMA
 from . import bases
 
+Matvec = optimized_module('Matvec')
+
 # Short names for instances of bases
 CB = bases.Basis
 SD = bases.ShenDirichletBasis
@@ -140,15 +142,15 @@ class BDDmat(SpectralMatrix):
 
         if format == 'cython' and v.ndim == 3:
             ld = self[-2]*np.ones(M-2)
-            cython.Matvec.Tridiagonal_matvec3D_ptr(v, c, ld, self[0], ld, axis)
+            Matvec.Tridiagonal_matvec3D_ptr(v, c, ld, self[0], ld, axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
             ld = self[-2]*np.ones(M-2)
-            cython.Matvec.Tridiagonal_matvec2D_ptr(v, c, ld, self[0], ld, axis)
+            Matvec.Tridiagonal_matvec2D_ptr(v, c, ld, self[0], ld, axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
             ld = self[-2]*np.ones(M-2)
-            cython.Matvec.Tridiagonal_matvec(v, c, ld, self[0], ld)
+            Matvec.Tridiagonal_matvec(v, c, ld, self[0], ld)
             self.scale_array(c)
         elif format == 'self':
             if axis > 0:
@@ -251,13 +253,13 @@ class BDNmat(SpectralMatrix):
         if not M == N:
             format = 'csr'
         if format == 'cython' and v.ndim == 3:
-            cython.Matvec.BDN_matvec3D_ptr(v, c, self[-2], self[0], self[2], axis)
+            Matvec.BDN_matvec3D_ptr(v, c, self[-2], self[0], self[2], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.BDN_matvec2D_ptr(v, c, self[-2], self[0], self[2], axis)
+            Matvec.BDN_matvec2D_ptr(v, c, self[-2], self[0], self[2], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.BDN_matvec1D_ptr(v, c, self[-2], self[0], self[2])
+            Matvec.BDN_matvec1D_ptr(v, c, self[-2], self[0], self[2])
             self.scale_array(c)
         else:
             c = super(BDNmat, self).matvec(v, c, format=format, axis=axis)
@@ -576,17 +578,17 @@ class BBBmat(SpectralMatrix):
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 3:
-            cython.Matvec.Pentadiagonal_matvec3D_ptr(v, c, self[-4], self[-2], self[0],
+            Matvec.Pentadiagonal_matvec3D_ptr(v, c, self[-4], self[-2], self[0],
                                               self[2], self[4], axis)
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.Pentadiagonal_matvec2D_ptr(v, c, self[-4], self[-2], self[0],
+            Matvec.Pentadiagonal_matvec2D_ptr(v, c, self[-4], self[-2], self[0],
                                               self[2], self[4], axis)
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.Pentadiagonal_matvec(v, c, self[-4], self[-2], self[0],
+            Matvec.Pentadiagonal_matvec(v, c, self[-4], self[-2], self[0],
                                         self[2], self[4])
             self.scale_array(c)
         else:
@@ -645,13 +647,13 @@ class BBDmat(SpectralMatrix):
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 3:
-            cython.Matvec.BBD_matvec3D_ptr(v, c, self[-2], self[0], self[2], self[4], axis)
+            Matvec.BBD_matvec3D_ptr(v, c, self[-2], self[0], self[2], self[4], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.BBD_matvec2D_ptr(v, c, self[-2], self[0], self[2], self[4], axis)
+            Matvec.BBD_matvec2D_ptr(v, c, self[-2], self[0], self[2], self[4], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.BBD_matvec1D_ptr(v, c, self[-2], self[0], self[2], self[4])
+            Matvec.BBD_matvec1D_ptr(v, c, self[-2], self[0], self[2], self[4])
             self.scale_array(c)
         else:
             c = super(BBDmat, self).matvec(v, c, format=format, axis=axis)
@@ -689,13 +691,13 @@ class CDNmat(SpectralMatrix):
 
     def matvec(self, v, c, format='cython', axis=0):
         if format == 'cython' and v.ndim == 3:
-            cython.Matvec.CDN_matvec3D_ptr(v, c, self[-1], self[1], axis)
+            Matvec.CDN_matvec3D_ptr(v, c, self[-1], self[1], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.CDN_matvec2D_ptr(v, c, self[-1], self[1], axis)
+            Matvec.CDN_matvec2D_ptr(v, c, self[-1], self[1], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.CDN_matvec1D_ptr(v, c, self[-1], self[1])
+            Matvec.CDN_matvec1D_ptr(v, c, self[-1], self[1])
             self.scale_array(c)
         else:
             c = super(CDNmat, self).matvec(v, c, format=format, axis=axis)
@@ -745,13 +747,13 @@ class CDDmat(SpectralMatrix):
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 3:
-            cython.Matvec.CDD_matvec3D_ptr(v, c, self[-1], self[1], axis)
+            Matvec.CDD_matvec3D_ptr(v, c, self[-1], self[1], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.CDD_matvec2D_ptr(v, c, self[-1], self[1], axis)
+            Matvec.CDD_matvec2D_ptr(v, c, self[-1], self[1], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.CDD_matvec1D_ptr(v, c, self[-1], self[1])
+            Matvec.CDD_matvec1D_ptr(v, c, self[-1], self[1])
             self.scale_array(c)
         else:
             c = super(CDDmat, self).matvec(v, c, format=format, axis=axis)
@@ -895,13 +897,13 @@ class CBDmat(SpectralMatrix):
                 v = np.moveaxis(v, 0, axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 3:
-            cython.Matvec.CBD_matvec3D_ptr(v, c, self[-1], self[1], self[3], axis)
+            Matvec.CBD_matvec3D_ptr(v, c, self[-1], self[1], self[3], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.CBD_matvec2D_ptr(v, c, self[-1], self[1], self[3], axis)
+            Matvec.CBD_matvec2D_ptr(v, c, self[-1], self[1], self[3], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.CBD_matvec(v, c, self[-1], self[1], self[3])
+            Matvec.CBD_matvec(v, c, self[-1], self[1], self[3])
             self.scale_array(c)
         else:
             c = super(CBDmat, self).matvec(v, c, format=format, axis=axis)
@@ -951,13 +953,13 @@ class CDBmat(SpectralMatrix):
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 3:
-            cython.Matvec.CDB_matvec3D_ptr(v, c, self[-3], self[-1], self[1], axis)
+            Matvec.CDB_matvec3D_ptr(v, c, self[-3], self[-1], self[1], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.CDB_matvec2D_ptr(v, c, self[-3], self[-1], self[1], axis)
+            Matvec.CDB_matvec2D_ptr(v, c, self[-3], self[-1], self[1], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.CDB_matvec(v, c, self[-3], self[-1], self[1])
+            Matvec.CDB_matvec(v, c, self[-3], self[-1], self[1])
             self.scale_array(c)
         else:
             c = super(CDBmat, self).matvec(v, c, format=format, axis=axis)
@@ -1010,13 +1012,13 @@ class ABBmat(SpectralMatrix):
             self.scale_array(c)
 
         elif format == 'cython' and v.ndim == 3:
-            cython.Matvec.Tridiagonal_matvec3D_ptr(v, c, self[-2], self[0], self[2], axis)
+            Matvec.Tridiagonal_matvec3D_ptr(v, c, self[-2], self[0], self[2], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.Tridiagonal_matvec2D_ptr(v, c, self[-2], self[0], self[2], axis)
+            Matvec.Tridiagonal_matvec2D_ptr(v, c, self[-2], self[0], self[2], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.Tridiagonal_matvec(v, c, self[-2], self[0], self[2])
+            Matvec.Tridiagonal_matvec(v, c, self[-2], self[0], self[2])
             self.scale_array(c)
 
         else:
@@ -1060,13 +1062,13 @@ class ADDmat(SpectralMatrix):
     def matvec(self, v, c, format='cython', axis=0):
         c.fill(0)
         if format == 'cython' and v.ndim == 3:
-            cython.Matvec.ADD_matvec3D_ptr(v, c, self[0], axis)
+            Matvec.ADD_matvec3D_ptr(v, c, self[0], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.ADD_matvec2D_ptr(v, c, self[0], axis)
+            Matvec.ADD_matvec2D_ptr(v, c, self[0], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.ADD_matvec(v, c, self[0])
+            Matvec.ADD_matvec(v, c, self[0])
             self.scale_array(c)
         else:
             c = super(ADDmat, self).matvec(v, c, format=format, axis=axis)
@@ -1269,13 +1271,13 @@ class SBBmat(SpectralMatrix):
     def matvec(self, v, c, format='cython', axis=0):
         c.fill(0)
         if format == 'cython' and v.ndim == 3:
-            cython.Matvec.SBB_matvec3D_ptr(v, c, self[0], axis)
+            Matvec.SBB_matvec3D_ptr(v, c, self[0], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 2:
-            cython.Matvec.SBB_matvec2D_ptr(v, c, self[0], axis)
+            Matvec.SBB_matvec2D_ptr(v, c, self[0], axis)
             self.scale_array(c)
         elif format == 'cython' and v.ndim == 1:
-            cython.Matvec.SBBmat_matvec(v, c, self[0])
+            Matvec.SBBmat_matvec(v, c, self[0])
             self.scale_array(c)
 
         else:
@@ -0,0 +1,2 @@
+from .bases import *
+from .matrices import *
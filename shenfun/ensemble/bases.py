@@ -0,0 +1,170 @@
+"""
+Module for the basis of an ensemble of independent problems
+"""
+import numpy as np
+from mpi4py_fft import fftw
+from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict, \
+    work_pool
+from shenfun.utilities import inheritdocstrings
+
+__all__ = ['EnsembleBasis']
+
+#pylint: disable=method-hidden,no-else-return,not-callable,abstract-method,no-member,cyclic-import
+
+
+@inheritdocstrings
+class EnsembleBasis(SpectralBase):
+    """Basis for the members of an ensemble of independent problems
+
+    Used in a :class:`.TensorProductSpace` the basis adds a batch axis to
+    all Functions and Arrays, with one index for each member of the
+    ensemble. The ensemble axis is never transformed, such that the serial
+    transforms of the other axes are planned for, and executed on, all
+    members at once. By default all processors share the ensemble axis, and
+    the other axes are not distributed. Likewise, the solvers of
+    :mod:`.chebyshev.la` and :mod:`.legendre.la` solve for all members in
+    one call, treating the ensemble axis like a periodic axis.
+
+    All derivatives along the ensemble axis vanish, and the coordinate of
+    the ensemble axis is the parameter ``values`` of the members. A
+    coefficient that varies with the parameter is thus given as a function
+    of the coordinate of the ensemble axis, see :func:`.inner`.
+
+    Parameters
+    ----------
+        N : int
+            Number of members
+        values : array, optional
+            Parameter values of the members, used as mesh. Defaults to
+            range(N).
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> import sympy as sp
+    >>> from mpi4py import MPI
+    >>> from shenfun import Basis, TensorProductSpace, TestFunction, \\
+    ...     TrialFunction, inner, div, grad
+    >>> from shenfun.legendre.la import Helmholtz
+    >>> x = sp.Symbol('x')
+    >>> E = Basis(100, 'Ensemble', values=np.linspace(1, 2, 100))
+    >>> SD = Basis(16, 'L', bc=(0, 0))
+    >>> T = TensorProductSpace(MPI.COMM_SELF, (E, SD))
+    >>> u = TrialFunction(T)
+    >>> v = TestFunction(T)
+    >>> H = Helmholtz(*inner(v, x*u - div(grad(u))))
+
+    Here ``x`` is the parameter of each member, and H solves the
+    Helmholtz problems of all 100 members in one call.
+    """
+
+    def __init__(self, N, values=None):
+        values = np.arange(N, dtype=float) if values is None else np.asarray(values)
+        assert values.shape == (N,)
+        SpectralBase.__init__(self, N, domain=(values[0], values[-1]))
+        self.values = values
+
+    @staticmethod
+    def family():
+        return 'ensemble'
+
+    def reference_domain(self):
+        return self.domain
+
+    def domain_factor(self):
+        return 1
+
+    def get_refined(self, N):
+        return self
+
+    def get_dealiased(self, padding_factor=1.5, dealias_direct=False):
+        return self
+
+    def points_and_weights(self, N=None, map_true_domain=False, weighted=True, **kw):
+        assert N is None or N == self.N
+        return self.values, np.ones(self.N)
+
+    def mesh(self, bcast=True, map_true_domain=True, uniform=False):
+        X = self.values
+        if bcast is True:
+            X = self.broadcast_to_ndims(X)
+        return X
+
+    def wavenumbers(self, bcast=True, **kw):
+        k = np.zeros(self.N)
+        if bcast is True:
+            k = self.broadcast_to_ndims(k)
+        return k
+
+    def evaluate_basis_all(self, x=None, argument=0):
+        return np.eye(self.N)
+
+    def evaluate_basis_derivative_all(self, x=None, k=0, argument=0):
+        return np.eye(self.N) if k == 0 else np.zeros((self.N, self.N))
+
+    def evaluate_scalar_product(self, input_array, output_array, fast_transform=False):
+        output_array[...] = input_array
+
+    def evaluate_expansion_all(self, input_array, output_array, fast_transform=False):
+        output_array[...] = input_array
+
+    def vandermonde_evaluate_expansion_all(self, input_array, output_array, x=None):
+        output_array[...] = input_array
+
+    def apply_inverse_mass(self, array):
+        return array
+
+    def apply_derivative(self, input_array, output_array, k=1):
+        output_array[...] = 0
+        return output_array
+
+    def eval(self, x, u, output_array=None):
+        x = np.atleast_1d(x)
+        if output_array is None:
+            output_array = np.zeros(x.shape, dtype=u.dtype)
+        # Exact lookup, since the values need not be sorted
+        order = np.argsort(self.values, kind='stable')
+        i = np.minimum(np.searchsorted(self.values, x, sorter=order), self.N-1)
+        i = order[i]
+        missing = self.values[i] != x
+        if np.any(missing):
+            raise ValueError('{} are not values of the ensemble'.format(x[missing]))
+        output_array[:] = u[i]
+        return output_array
+
+    @property
+    def is_orthogonal(self):
+        return True
+
+    def get_orthogonal(self):
+        return self
+
+    def plan(self, shape, axis, dtype, options):
+        if isinstance(axis, tuple):
+            assert len(axis) == 1
+            axis = axis[0]
+
+        if isinstance(self.forward, Transform):
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
+                # Already planned
+                return
+
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
+        U = fftw.aligned(shape, dtype=dtype)
+        V = fftw.aligned(shape, dtype=dtype)
+        U.fill(0)
+        V.fill(0)
+        self.axis = axis
+        self.forward = Transform(self.forward, None, U, V, V)
+        self.backward = Transform(self.backward, None, V, V, U)
+        self.backward_uniform = Transform(self.backward_uniform, None, V, V, U)
+        self.scalar_product = Transform(self.scalar_product, None, U, V, V)
+        self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
+        self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
+
+    def __hash__(self):
+        return hash((self.N, self.family(), self.values.tobytes()))
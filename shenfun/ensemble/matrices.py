@@ -0,0 +1,35 @@
+"""
+Module for the diagonal matrices of the ensemble axis
+"""
+from shenfun.matrixbase import SpectralMatrix
+from shenfun.utilities import inheritdocstrings
+
+__all__ = ['mat']
+
+
+@inheritdocstrings
+class _Ensemblematrix(SpectralMatrix):
+    """Identity, or zero for derivatives, since the members are independent"""
+    def __init__(self, test, trial):
+        d = {0: 1.0 if test[1] == 0 and trial[1] == 0 else 0.0}
+        SpectralMatrix.__init__(self, d, test, trial)
+
+    def solve(self, b, u=None, axis=0):
+        if u is None:
+            u = b
+        else:
+            u[:] = b
+        u /= self.scale*self[0]
+        return u
+
+
+class _EnsembleMatDict(dict):
+    """Dictionary of inner product matrices. All matrices are diagonal."""
+
+    def __missing__(self, key):
+        c = _Ensemblematrix
+        self[key] = c
+        return c
+
+
+mat = _EnsembleMatDict({})
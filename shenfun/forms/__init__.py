@@ -1,8 +1,18 @@
 #pylint: disable=missing-docstring
 from .project import *
+from .derivative import *
 from .inner import *
 from .operators import *
 from .arguments import *
+from .project import __all__ as _project_all
+from .derivative import __all__ as _derivative_all
+from .inner import __all__ as _inner_all
+from .operators import __all__ as _operators_all
+from .arguments import __all__ as _arguments_all
+
+__all__ = (list(_project_all) + list(_derivative_all) + list(_inner_all)
+           + list(_operators_all) + list(_arguments_all)
+           + ['extract_bc_matrices'])
 
 def extract_bc_matrices(mats):
     """Extract boundary matrices from list of ``mats``
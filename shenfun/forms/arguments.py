@@ -1,8 +1,10 @@
 from numbers import Number, Integral
 import numpy as np
-from shenfun.optimization.cython import evaluate
+from shenfun.optimization import optimized_module
 from mpi4py_fft import DistArray
 
+evaluate = optimized_module('evaluate')
+
 __all__ = ('Expr', 'BasisFunction', 'TestFunction', 'TrialFunction', 'Function',
            'Array', 'Basis')
 
@@ -23,6 +25,8 @@ def Basis(N, family='Fourier', bc=None, dtype='d', quad=None, domain=None,
         - ``Fourier`` or ``F``,
         - ``Laguerre`` or ``La``,
         - ``Hermite`` or ``H``
+        - ``Ensemble`` or ``E`` - Batch axis of independent members, see
+          :class:`.EnsembleBasis`. Takes the keyword ``values``.
 
     bc : str or two-tuple, optional
         Choose one of
@@ -219,10 +223,19 @@ def Basis(N, family='Fourier', bc=None, dtype='d', quad=None, domain=None,
 
         return B(N, **par)
 
+    elif family.lower() in ('ensemble', 'e'):
+        from shenfun import ensemble
+        assert bc is None
+        return ensemble.bases.EnsembleBasis(N, **kw)
+
     else:
         raise NotImplementedError
 
 
+def _multiply_coefficient(sc, a):
+    """Return scales sc multiplied by sympy Expr a, as array of objects"""
+    return np.array([[a*s for s in row] for row in sc], dtype=object)
+
 class Expr(object):
     r"""
     Class for spectral Galerkin forms
@@ -264,7 +277,12 @@ class Expr(object):
         second direction, etc.
 
     scales :  Numpy array of shape == terms.shape[:2]
-        Representing a scalar multiply of each inner product
+        Representing a scalar multiply of each inner product. A scale may
+        also be a sympy Expr of the coordinates x, y and z, i.e., a
+        variable coefficient of the term, like in ``f*Dx(u, 0, 1)``.
+        Operators applied later differentiate the coefficients with the
+        product rule, such that ``Dx(f*u, 0, 1)`` equals
+        ``f.diff(x)*u + f*Dx(u, 0, 1)``.
 
     indices : Numpy array of shape == terms.shape[:2]
         Index into MixedTensorProductSpace. Only used when basis of form has
@@ -463,8 +481,12 @@ class Expr(object):
 
     def __mul__(self, a):
         if self.expr_rank() == 0:
-            assert isinstance(a, Number)
-            sc = self.scales().copy()*a
+            assert isinstance(a, Number) or hasattr(a, 'free_symbols')
+            sc = self.scales().copy()
+            if hasattr(a, 'free_symbols') or sc.dtype.char == 'O':
+                sc = _multiply_coefficient(sc, a)
+            else:
+                sc = sc*a
         else:
             sc = self.scales().copy()
             if isinstance(a, tuple):
@@ -473,9 +495,12 @@ class Expr(object):
                     assert isinstance(a[i], Number)
                     sc[i] = sc[i]*a[i]
 
-            elif isinstance(a, Number):
+            elif isinstance(a, Number) and sc.dtype.char != 'O':
                 sc *= a
 
+            elif isinstance(a, Number) or hasattr(a, 'free_symbols'):
+                sc = _multiply_coefficient(sc, a)
+
             else:
                 raise NotImplementedError
             #elif isinstance(a, np.ndarray):
@@ -801,12 +826,10 @@ class ShenfunBaseArray(DistArray):
 
         if cls.__name__ == 'Function':
             forward_output = True
-            p0 = space.forward.output_pencil
-            dtype = space.forward.output_array.dtype
         elif cls.__name__ == 'Array':
             forward_output = False
-            p0 = space.backward.output_pencil
-            dtype = space.forward.input_array.dtype
+        p0 = space.get_pencil(forward_output)
+        dtype = space.dtype(forward_output)
 
         # Evaluate sympy function on entire mesh
         if hasattr(buffer, 'free_symbols'):
@@ -0,0 +1,113 @@
+import numpy as np
+from shenfun.tensorproductspace import TensorProductSpace
+from .arguments import Function
+
+__all__ = ('Derivative',)
+
+class Derivative(object):
+    r"""Derivative of Functions computed directly from expansion coefficients
+
+    The derivative of a :class:`.Function` in ``space`` is returned as a
+    :class:`.Function` in the orthogonal space ``space.get_orthogonal()``.
+    Composite bases are first mapped to the orthogonal basis using the fast
+    ``to_ortho``, and the derivative is then computed with recurrences that
+    cost O(N) operations for each line along the axis. As opposed to
+    ``project(Dx(u, axis, k), T)``, no matrices are assembled and no mass
+    matrix is inverted, and all work arrays are allocated once, such that the
+    operator is well suited for time loops.
+
+    Parameters
+    ----------
+    space : :class:`.SpectralBase` or :class:`.TensorProductSpace`
+        The space of the Functions to take the derivative of
+    axis : int, optional
+        The axis to take the derivative along
+    k : int, optional
+        The order of the derivative
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> from mpi4py import MPI
+    >>> from shenfun import Basis, TensorProductSpace, Function, Derivative
+    >>> D0 = Basis(16, 'C', bc=(0, 0))
+    >>> F1 = Basis(16, 'F', dtype='d')
+    >>> T = TensorProductSpace(MPI.COMM_WORLD, (D0, F1))
+    >>> grad = [Derivative(T, axis) for axis in range(2)]
+    >>> u_hat = Function(T)
+    >>> du = [Function(d.output_space) for d in grad]
+    >>> for d, du_hat in zip(grad, du):
+    ...     du_hat = d(u_hat, du_hat)
+
+    Note
+    ----
+    For Fourier bases the Nyquist frequency is eliminated for derivatives of
+    odd order.
+    """
+    def __init__(self, space, axis=0, k=1):
+        self.space = space
+        self.axis = axis
+        self.k = k
+        self.output_space = space if space.is_orthogonal else space.get_orthogonal()
+        if isinstance(space, TensorProductSpace):
+            self.base = self.output_space.bases[axis]
+            self._composite = [(i, base) for i, base in enumerate(space.bases)
+                               if not base.is_orthogonal]
+        else:
+            self.base = self.output_space
+            self._composite = [(0, space)] if not space.is_orthogonal else []
+        self._ortho = [Function(self.output_space)
+                       for _ in range(min(2, len(self._composite)))]
+        self._transfer = {}
+        for i, base in self._composite + [(axis, self.base)]:
+            self._transfer[i] = self._get_transfer(i, base)
+
+    def _get_transfer(self, axis, base):
+        """Return transfer and work arrays if axis is distributed, else None"""
+        if not isinstance(self.space, TensorProductSpace) or base.family() == 'fourier':
+            return None
+        pencil = self.output_space.get_pencil(True)
+        if pencil.subshape[axis] == pencil.shape[axis]:
+            return None
+        dtype = self.output_space.dtype(True)
+        transfer = pencil.transfer(pencil.pencil(axis), dtype.char)
+        return (transfer, np.zeros(transfer.subshapeB, dtype=dtype),
+                np.zeros(transfer.subshapeB, dtype=dtype))
+
+    def _apply(self, axis, method, input_array, output_array):
+        # Apply method along axis, with all data along axis local
+        if self._transfer[axis] is None:
+            return method(input_array, output_array)
+        transfer, a, c = self._transfer[axis]
+        transfer.forward(np.asarray(input_array), a)
+        c.fill(0)
+        method(a, c)
+        transfer.backward(c, np.asarray(output_array))
+        return output_array
+
+    def __call__(self, u_hat, output_array=None):
+        """Return derivative of u_hat
+
+        Parameters
+        ----------
+        u_hat : :class:`.Function`
+            Expansion coefficients in self.space
+        output_array : :class:`.Function`, optional
+            Return array of derivative in self.output_space. May be the same
+            array as u_hat if self.space is orthogonal.
+
+        Returns
+        -------
+        :class:`.Function`
+            Expansion coefficients of derivative in self.output_space
+        """
+        if output_array is None:
+            output_array = Function(self.output_space)
+        for i, (axis, base) in enumerate(self._composite):
+            w_hat = self._ortho[i % 2]
+            w_hat.fill(0)
+            u_hat = self._apply(axis, base.to_ortho, u_hat, w_hat)
+        self._apply(self.axis,
+                    lambda a, c: self.base.apply_derivative(a, c, self.k),
+                    u_hat, output_array)
+        return output_array
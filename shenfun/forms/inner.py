@@ -5,7 +5,7 @@ weighted inner product.
 from numbers import Number
 import numpy as np
 from shenfun.spectralbase import inner_product, SpectralBase, MixedBasis
-from shenfun.matrixbase import TPMatrix
+from shenfun.matrixbase import TPMatrix, CoefficientOperator
 from shenfun.tensorproductspace import TensorProductSpace, MixedTensorProductSpace
 from shenfun.utilities import dx
 from .arguments import Expr, Function, BasisFunction, Array
@@ -83,7 +83,9 @@ def inner(expr0, expr1, output_array=None, level=0):
         for bilinear 1D forms.
 
         :class:`.TPMatrix` or list of :class:`.TPMatrix`
-        for bilinear multidimensional forms.
+        for bilinear multidimensional forms. Terms with variable coefficients
+        that cannot be assembled as a :class:`.TPMatrix` are returned as
+        matrix-free :class:`.CoefficientOperator`.
 
         Number, for non-weighted integral where either one of the arguments
         is a number.
@@ -108,6 +110,17 @@ def inner(expr0, expr1, output_array=None, level=0):
     >>> [np.all(abs(B[k]-v) < 1e-7) for k, v in d.items()]
     [True, True, True]
 
+    Forms may have variable coefficients, given as sympy expressions of the
+    coordinates x, y and z. Coefficients that are products of one function
+    for each non-periodic direction are assembled as banded matrices, see
+    :func:`.get_banded_matrix`:
+
+    >>> import sympy as sp
+    >>> x = sp.symbols('x')
+    >>> A = inner(v, (1-x**2)*u)
+    >>> sorted(A.keys())
+    [-2, 0, 2]
+
     """
     # Wrap a pure numpy array in Array
     if isinstance(expr0, np.ndarray) and not isinstance(expr0, (Array, Function)):
@@ -229,13 +242,12 @@ def inner(expr0, expr1, output_array=None, level=0):
         uh = trial.base
 
     A = []
+    F = []
     for vec, (base_test, base_trial, test_ind, trial_ind) in enumerate(zip(test.terms(), trial.terms(), test.indices(), trial.indices())): # vector/scalar
         for test_j, b0 in enumerate(base_test):              # second index test
             for trial_j, b1 in enumerate(base_trial):        # second index trial
-                sc = test_scale[vec, test_j]*trial_scale[vec, trial_j]
-                scb = sc
-                M = []
-                DM = []
+                sc0, sc1 = test_scale[vec, test_j], trial_scale[vec, trial_j]
+                sc = sc1*sc0 if hasattr(sc1, 'free_symbols') else sc0*sc1
                 assert len(b0) == len(b1)
                 trial_sp = trialspace
                 if isinstance(trialspace, (MixedTensorProductSpace, MixedBasis)): # could operate on a vector, e.g., div(u), where u is vector
@@ -243,12 +255,28 @@ def inner(expr0, expr1, output_array=None, level=0):
                 test_sp = testspace
                 if isinstance(testspace, (MixedTensorProductSpace, MixedBasis)):
                     test_sp = testspace.flatten()[test_ind[test_j]]
+                if isinstance(test_sp, TensorProductSpace) and any(
+                        a+b > 0 for a, b, base in zip(b0, b1, test_sp.bases) if base.family() == 'ensemble'):
+                    # Derivatives along the ensemble axis vanish
+                    continue
+                sc, measures = _separate_coefficient(sc, test_sp)
+                if measures is None:
+                    # Not separable, use matrix-free operator
+                    if np.any(b0):
+                        raise NotImplementedError('Variable coefficient requires test function without derivatives')
+                    F.append(CoefficientOperator(test_sp, trial_sp, b1, sc,
+                                                 global_index=(test_ind[test_j], trial_ind[trial_j]),
+                                                 mixedbase=testspace))
+                    continue
+                scb = sc
+                M = []
+                DM = []
                 has_bcs = False
                 #assert test_sp.compatible_base(trial_sp)
                 for i, (a, b) in enumerate(zip(b0, b1)): # Third index, one inner for each dimension
                     ts = trial_sp[i]
                     sp = test_sp[i]
-                    AA = inner_product((sp, a), (ts, b))
+                    AA = inner_product((sp, a), (ts, b), measures[i])
                     M.append(AA)
                     # Take care of domains of not standard size
                     if not sp.domain_factor() == 1:
@@ -262,7 +290,7 @@ def inner(expr0, expr1, output_array=None, level=0):
                             (ts.boundary_condition() == 'Biharmonic' and not ts.family() in ('jacobi',))):
                         if ts.bc.has_nonhomogeneous_bcs():
                             tsc = ts.get_bc_basis()
-                            BB = inner_product((sp, a), (tsc, b))
+                            BB = inner_product((sp, a), (tsc, b), measures[i])
                             if not abs(BB.scale-1.) < 1e-8:
                                 scb *= BB.scale
                                 BB.scale = 1.0
@@ -323,14 +351,14 @@ def inner(expr0, expr1, output_array=None, level=0):
     # where they are called ADDmat and BDDmat, respectively.
 
     if level == 2 and trial.argument == 1: # No processing of matrices
-        return A
+        return A + F
 
     for tpmat in A:
         if isinstance(tpmat, TPMatrix):
             tpmat.simplify_fourier_matrices()
 
     # Add equal matrices
-    B = [A[0]]
+    B = A[:1]
     for a in A[1:]:
         found = False
         for b in B:
@@ -340,7 +368,7 @@ def inner(expr0, expr1, output_array=None, level=0):
         if not found:
             B.append(a)
 
-    A = B
+    A = B + F
 
     if trial.argument == 1:
         return A[0] if len(A) == 1 else A
@@ -354,3 +382,41 @@ def inner(expr0, expr1, output_array=None, level=0):
         output_array += wh
         wh.fill(0)
     return output_array
+
+def _separate_coefficient(sc, space):
+    """Return scale and coefficient of each axis for scale sc of a term
+
+    Parameters
+    ----------
+    sc : number or sympy Expr
+        The scale of a term, possibly a variable coefficient
+    space : :class:`.SpectralBase` or :class:`.TensorProductSpace`
+        The test space of the term
+
+    Returns
+    -------
+    2-tuple
+        The number scaling the term and the coefficient of each axis, or, if
+        the coefficient cannot be assembled along each axis, the full
+        coefficient and None.
+    """
+    ndim = space.dimensions
+    if not hasattr(sc, 'free_symbols'):
+        return sc, [1]*ndim
+    if not sc.free_symbols:
+        sc = complex(sc)
+        return sc.real if sc.imag == 0 else sc, [1]*ndim
+    import sympy
+    xyz = sympy.symbols('x,y,z')[:ndim]
+    if not sc.free_symbols.issubset(xyz):
+        raise ValueError('Coefficients must be functions of {}'.format(xyz))
+    if ndim == 1:
+        return 1, [sc]
+    d = sympy.separatevars(sc, symbols=xyz, dict=True)
+    if d is None:
+        return sc, None
+    for axis, sym in enumerate(xyz):
+        if d.get(sym, 1) != 1 and space.bases[axis].family() == 'fourier':
+            return sc, None
+    c, measures = _separate_coefficient(d.pop('coeff'), space)
+    return c, [d.get(sym, 1) for sym in xyz]
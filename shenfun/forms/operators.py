@@ -27,6 +27,14 @@ def div(test):
     ind = test.indices().copy()
 
     ndim = test.dimensions
+    if sc.dtype.char == 'O':
+        # Variable coefficients are differentiated with the product rule
+        comps = [_product_rule(v[i], sc[i], ind[i], i%ndim, 1) for i in range(v.shape[0])]
+        comps = [tuple(np.concatenate(c, axis=0) for c in zip(*comps[j:j+ndim]))
+                 for j in range(0, len(comps), ndim)]
+        test._terms, test._scales, test._indices = _stack(comps)
+        return test
+
     if ndim == 1:      # 1D
         v += 1
 
@@ -60,6 +68,13 @@ def grad(test):
     ind = test.indices()
 
     ndim = test.dimensions
+    if sc.dtype.char == 'O':
+        # Variable coefficients are differentiated with the product rule
+        test._terms, test._scales, test._indices = _stack(
+            [_product_rule(t, s, i, axis, 1) for t, s, i in zip(terms, sc, ind)
+             for axis in range(ndim)])
+        return test
+
     #assert test.num_components() == 1       # allow only gradient of scalar
     test._terms = np.repeat(terms, ndim, axis=0)       # Create vector
     test._scales = np.repeat(sc, ndim, axis=0)
@@ -86,11 +101,70 @@ def Dx(test, x, k=1):
     if isinstance(test, BasisFunction):
         test = Expr(test)
 
+    if test.scales().dtype.char == 'O':
+        # Variable coefficients are differentiated with the product rule
+        test._terms, test._scales, test._indices = _stack(
+            [_product_rule(t, s, i, x, k) for t, s, i in
+             zip(test.terms(), test.scales(), test.indices())])
+        return test
+
     v = test.terms().copy()
     v[:, :, x] += k
     test._terms = v
     return test
 
+def _product_rule(terms, scales, indices, x, k):
+    r"""Return terms, scales and indices of the k'th derivative in direction x
+    of one component of an Expr with variable coefficients
+
+    The coefficients are differentiated with the product rule
+
+    .. math::
+
+        \frac{d^k (a u)}{dx^k} = \sum_{l=0}^k \binom{k}{l} \frac{d^l a}{dx^l}
+            \frac{d^{k-l} u}{dx^{k-l}}
+
+    Terms with vanishing coefficients are left out.
+    """
+    import sympy
+    xs = sympy.symbols('x,y,z')[x]
+    t, s, ind = [], [], []
+    for term, sc, i in zip(terms, scales, indices):
+        for l in range(k+1):
+            c = sc if l == 0 else sympy.binomial(k, l)*sympy.diff(sympy.sympify(sc), xs, l)
+            if c == 0:
+                continue
+            tl = term.copy()
+            tl[x] += k-l
+            t.append(tl)
+            s.append(c)
+            ind.append(i)
+    if len(t) == 0:
+        t, s, ind = [terms[0].copy()], [0], [indices[0]]
+        t[0][x] += k
+    return np.array(t), s, np.array(ind)
+
+def _stack(components):
+    """Return terms, scales and indices of Expr with given components
+
+    Components with fewer terms than the others are padded with terms that
+    have zero scale.
+    """
+    m = max(len(c[1]) for c in components)
+    ndim = components[0][0].shape[1]
+    terms = np.zeros((len(components), m, ndim), dtype=int)
+    scales = np.zeros((len(components), m), dtype=object)
+    indices = np.zeros((len(components), m), dtype=int)
+    for j, (t, s, ind) in enumerate(components):
+        n = len(s)
+        terms[j, :n] = t
+        terms[j, n:] = t[0]
+        indices[j, :n] = ind
+        indices[j, n:] = ind[0]
+        for i, si in enumerate(s):
+            scales[j, i] = si
+    return terms, scales, indices
+
 
 def curl(test):
     """Return curl of test
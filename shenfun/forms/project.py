@@ -1,13 +1,13 @@
 from copy import copy
 import numpy as np
-import sympy as sp
 from shenfun.tensorproductspace import TensorProductSpace, MixedTensorProductSpace
 from shenfun.matrixbase import TPMatrix
+from shenfun.spectralbase import SpectralBase
 from .arguments import Expr, TestFunction, TrialFunction, BasisFunction, \
     Function, Array
 from .inner import inner
 
-__all__ = ('project',)
+__all__ = ('project', 'Projector')
 
 def project(uh, T, output_array=None, fill=True, use_to_ortho=True, use_assign=True):
     r"""
@@ -67,87 +67,202 @@ def project(uh, T, output_array=None, fill=True, use_to_ortho=True, use_assign=T
 
     """
 
-    if output_array is None:
+    projector = Projector(uh, T, use_to_ortho=use_to_ortho, use_assign=use_assign)
+    return projector(output_array=output_array, fill=fill)
+
+
+class Projector(object):
+    r"""
+    Projection of ``uh`` to tensor product space ``T``, planned once
+
+    Same as :func:`.project`, but everything that does not depend on the
+    data of ``uh`` is computed once, on creation. This includes the
+    lambdified sympy functions, the mesh, the matrices of the linear form
+    ``inner(v, uh)``, the mass matrix with its solvers, the transfer
+    objects between pencils and the work arrays. Calling the Projector
+    then only performs matrix vector products, transforms and solves, and
+    is for this reason well suited for time loops.
+
+    Parameters
+    ----------
+    uh : Instance of either one of
+        - :class:`.Expr`
+        - :class:`.BasisFunction`
+        - :class:`.Array`
+        - A sympy function
+        The template of the projection. If ``uh`` is an :class:`.Expr`, then
+        the form is linear in a :class:`.Function`, and the same form can be
+        projected later for any data in this Function's space.
+    T : :class:`.TensorProductSpace` or :class:`.MixedTensorProductSpace`
+    use_to_ortho : bool, optional
+        Whether to use fast `to_ortho` method for projection of Functions
+        to orthogonal space.
+    use_assign : bool, optional
+        Whether to use fast `assign` method for projection of Function to
+        a denser space of the same kind.
+
+    Example
+    -------
+    >>> from mpi4py import MPI
+    >>> from shenfun import Basis, Projector, TensorProductSpace, Function, Dx
+    >>> T0 = Basis(16, 'C')
+    >>> K0 = Basis(16, 'F', dtype='d')
+    >>> T = TensorProductSpace(MPI.COMM_WORLD, (T0, K0))
+    >>> u = Function(T)
+    >>> du = Function(T)
+    >>> dudx = Projector(Dx(u, 0, 1), T)
+    >>> du = dudx(output_array=du) # Same as du = project(Dx(u, 0, 1), T, du)
+    >>> w = Function(T)
+    >>> du = dudx(w, du) # Same as du = project(Dx(w, 0, 1), T, du)
+
+    """
+    def __init__(self, uh, T, use_to_ortho=True, use_assign=True):
+        self.T = T
+        self.uh = uh
+        self._mats = None
+        self._func = None
+
+        if hasattr(uh, 'evalf'):
+            # lambdify sympy function for fast execution
+            import sympy as sp
+            x, y, z = sp.symbols("x,y,z")
+            uh = ({1: lambda a: sp.lambdify((x,), a, 'numpy'),
+                   2: lambda a: sp.lambdify((x, y), a, 'numpy'),
+                   3: lambda a: sp.lambdify((x, y, z), a, 'numpy')}[len(T)])(uh)
+
+        if hasattr(uh, '__call__') and not isinstance(uh, (Expr, BasisFunction)):
+            # Evaluate function on entire mesh on each call
+            self._func = uh
+            if isinstance(T, (TensorProductSpace, MixedTensorProductSpace)):
+                self._mesh = T.local_mesh(True)
+            else:
+                self._mesh = (T.mesh(),)
+            self.uh = uh = Array(T)
+
+        self.method = 'inner'
+        if isinstance(uh, Function):
+            W = uh.function_space()
+            if W == T:
+                self.method = 'copy'
+            else:
+                assert W.rank == T.rank
+                if (not W.compatible_base(T)) and use_assign and _same_bases(W, T):
+                    self.method = 'assign'
+                elif T.is_orthogonal and use_to_ortho and _same_bases(W, T, True):
+                    self.method = 'to_ortho'
+
+        elif isinstance(uh, np.ndarray):
+            if not isinstance(uh, Array):
+                assert np.all(uh.shape == T.shape(False))
+                self.uh = uh = Array(T, buffer=uh)
+            if not uh.function_space().compatible_base(T):
+                raise RuntimeError('Provided Array not the same shape as space projected into')
+            self.method = 'forward'
+
+        if self.method == 'inner':
+            self._setup_inner()
+
+    def _setup_inner(self):
+        """Assemble matrices of linear form and mass matrix"""
+        T = self.T
+        expr = self.uh
+        if isinstance(expr, BasisFunction):
+            expr = Expr(expr)
+        assert isinstance(expr, Expr)
+
+        # The linear form inner(v, uh) is computed as matrix vector products
+        # of the bilinear form, where the Function is replaced by a TrialFunction
+        basis = expr.basis()
+        self._base = expr.base
+        trial = TrialFunction(self._base.function_space())
+        if basis is not self._base:
+            trial = TrialFunction(basis.function_space(), 0, trial.function_space(),
+                                  basis.offset(), trial)
+        v = TestFunction(T)
+        A = inner(v, Expr(trial, expr.terms(), expr.scales(), expr.indices()))
+        self._mats = A if isinstance(A, list) else [A]
+        self._B = B = inner(v, TrialFunction(T))
+
         output_array = Function(T)
-    elif fill:
-        output_array.fill(0)
-
-    if hasattr(uh, 'evalf'):
-        # lambdify sympy function for fast execution
-        x, y, z = sp.symbols("x,y,z")
-        uh = ({1: lambda a: sp.lambdify((x,), a, 'numpy'),
-               2: lambda a: sp.lambdify((x, y), a, 'numpy'),
-               3: lambda a: sp.lambdify((x, y, z), a, 'numpy')}[len(T)])(uh)
-
-    if hasattr(uh, '__call__'):
-        # Evaluate sympy function on entire mesh
-        if isinstance(T, (TensorProductSpace, MixedTensorProductSpace)):
-            uh = Array(T, buffer=uh(*T.local_mesh(True)).astype(T.forward.input_array.dtype))
-        else:
-            uh = Array(T, buffer=uh(T.mesh()).astype(T.forward.input_array.dtype))
+        self._wh = np.zeros_like(output_array.v[0] if T.rank > 0 else output_array)
+        self._transfer = None
+        if isinstance(T, TensorProductSpace):
+            if len(T.get_nonperiodic_axes()) > 2:
+                raise NotImplementedError
+
+            if len(T.get_nonperiodic_axes()) == 2:
+                # Means we have two non-periodic directions
+                B = [B] if isinstance(B, TPMatrix) else B
+                npaxes = copy(B[0].naxes)
+                assert len(npaxes) == 2
+
+                pencilA = T.forward.output_pencil
+                axis = pencilA.axis
+                npaxes.remove(axis)
+                second_axis = npaxes[0]
+                pencilB = pencilA.pencil(second_axis)
+                transAB = pencilA.transfer(pencilB, output_array.dtype.char)
+                self._transfer = (transAB, axis, second_axis,
+                                  np.zeros(transAB.subshapeB, dtype=output_array.dtype),
+                                  np.zeros(transAB.subshapeB, dtype=output_array.dtype))
+
+    def __call__(self, uh=None, output_array=None, fill=True):
+        """Return projection
+
+        Parameters
+        ----------
+        uh : :class:`.Function` or :class:`.Array`, optional
+            Data to project, replacing the data of the template. If the
+            template is an :class:`.Expr`, then this is a Function in the
+            same space as the template's Function. If None, then project the
+            current data of the template.
+        output_array : :class:`.Function`, optional
+            Return array
+        fill : bool, optional
+            Whether to fill the `output_array` with zeros before projection
+
+        Returns
+        -------
+        Function
+            The projection in T
+        """
+        T = self.T
+        if output_array is None:
+            output_array = Function(T)
+        elif fill:
+            output_array.fill(0)
+
+        if self._func is not None:
+            self.uh[...] = self._func(*self._mesh)
+        if uh is None:
+            uh = self.uh if self._mats is None else self._base
 
-    if isinstance(uh, Function):
-        W = uh.function_space()
-        if W == T:
+        if self.method == 'copy':
             output_array[:] = uh
             return output_array
 
-        assert W.rank == T.rank
-        compatible_bases = W.compatible_base(T)
-        if (not compatible_bases) and use_assign:
-            # If the underlysing bases are the same, but of different size,
-            # then use assign to simply copy to the new space
-            try:
-                uh.assign(output_array)
-                return output_array
-            except:
-                pass
-
-        elif T.is_orthogonal and use_to_ortho:
-            # Try to use fast to_ortho for projection to orthogonal space
-            try:
-                output_array = uh.to_ortho(output_array)
-                return output_array
-            except:
-                pass
-
-    if isinstance(uh, np.ndarray) and not isinstance(uh, (Array, Function)):
-        assert np.all(uh.shape == T.shape(False))
-        uh = Array(T, buffer=uh)
-
-    if isinstance(uh, Array):
-        if uh.function_space().compatible_base(T):
-            # Project is just regular forward transform
+        if self.method == 'forward':
             output_array = T.forward(uh, output_array)
             return output_array
-        else:
-            raise RuntimeError('Provided Array not the same shape as space projected into')
-
-    assert isinstance(uh, (Expr, BasisFunction))
-
-    v = TestFunction(T)
-    u = TrialFunction(T)
-    output_array = inner(v, uh, output_array=output_array)
-    B = inner(v, u)
-
-    if isinstance(T, TensorProductSpace):
-        if len(T.get_nonperiodic_axes()) > 2:
-            raise NotImplementedError
-
-        if len(T.get_nonperiodic_axes()) == 2:
-            # Means we have two non-periodic directions
-            B = [B] if isinstance(B, TPMatrix) else B
-            npaxes = copy(B[0].naxes)
-            assert len(npaxes) == 2
-
-            pencilA = T.forward.output_pencil
-            axis = pencilA.axis
-            npaxes.remove(axis)
-            second_axis = npaxes[0]
-            pencilB = pencilA.pencil(second_axis)
-            transAB = pencilA.transfer(pencilB, output_array.dtype.char)
-            output_arrayB = np.zeros(transAB.subshapeB, dtype=output_array.dtype)
-            output_arrayB2 = np.zeros(transAB.subshapeB, dtype=output_array.dtype)
+
+        if self.method == 'assign':
+            uh.assign(output_array)
+            return output_array
+
+        if self.method == 'to_ortho':
+            output_array = uh.to_ortho(output_array)
+            return output_array
+
+        wh = self._wh
+        for b in self._mats:
+            x = output_array.v[b.global_index[0]] if T.rank > 0 else output_array
+            wh.fill(0)
+            wh = b.matvec(uh.v[b.global_index[1]] if uh.rank > 0 else uh, wh)
+            x += wh
+
+        if self._transfer is not None:
+            B = [self._B] if isinstance(self._B, TPMatrix) else self._B
+            transAB, axis, second_axis, output_arrayB, output_arrayB2 = self._transfer
             b = B[0].pmat[axis]
             output_array = b.solve(output_array, output_array, axis=axis)
             transAB.forward(output_array, output_arrayB)
@@ -156,10 +271,49 @@ def project(uh, T, output_array=None, fill=True, use_to_ortho=True, use_assign=T
             transAB.backward(output_arrayB2, output_array)
             return output_array
 
-    # Just zero or one non-periodic direction
-    if v.rank == 0:
-        output_array = B.solve(output_array, output_array)
-    else:
-        for oa, b in zip(output_array, B):
-            oa = b.solve(oa, oa)
-    return output_array
+        # Just zero or one non-periodic direction
+        if T.rank == 0:
+            output_array = self._B.solve(output_array, output_array)
+        else:
+            for oa, b in zip(output_array, self._B):
+                oa = b.solve(oa, oa)
+        return output_array
+
+def _same_bases(W, T, ortho=False):
+    """Return whether the bases of spaces W and T are of the same kind
+
+    Parameters
+    ----------
+    W, T : Function spaces of the same rank
+    ortho : bool, optional
+        If True, then return whether the bases of T are the orthogonal bases
+        of W, of the same size, and all bases of W implement ``to_ortho``
+        along axes that are not distributed, such that a Function in W can
+        be projected to T with :meth:`.Function.to_ortho`. Otherwise, return whether all
+        bases are of the same class, such that a Function in W can be
+        projected to T with :meth:`.Function.assign`.
+    """
+    W = W.flatten() if W.rank > 0 else [W]
+    T = T.flatten() if T.rank > 0 else [T]
+    if len(W) != len(T):
+        return False
+    for Wi, Ti in zip(W, T):
+        bases0 = getattr(Wi, 'bases', [Wi])
+        bases1 = getattr(Ti, 'bases', [Ti])
+        if len(bases0) != len(bases1):
+            return False
+        subcomm = Wi.get_pencil(True).subcomm if hasattr(Wi, 'get_pencil') else None
+        for axis, (base0, base1) in enumerate(zip(bases0, bases1)):
+            if ortho and not base0.is_orthogonal:
+                if type(base0).to_ortho is SpectralBase.to_ortho:
+                    return False
+                # to_ortho needs all coefficients along the axis
+                if subcomm is not None and subcomm[axis].Get_size() > 1:
+                    return False
+            if ortho:
+                base0 = base0.get_orthogonal()
+                if base0.N != base1.N:
+                    return False
+            if base0.__class__ is not base1.__class__:
+                return False
+    return True
@@ -1,12 +1,14 @@
 """
 Module for defining bases in the Fourier family
 """
-import sympy as sp
 import numpy as np
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict
+from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict, \
+    work_pool, fftw_plans
 from shenfun.utilities import inheritdocstrings
-from shenfun.optimization.cython import convolve
+from shenfun.optimization import optimized_module
+
+convolve = optimized_module('convolve')
 
 __all__ = ['FourierBase', 'R2CBasis', 'C2CBasis']
 
@@ -105,6 +107,7 @@ class FourierBase(SpectralBase):
         return points, np.array([2*np.pi/N])
 
     def sympy_basis(self, i=0):
+        import sympy as sp
         x = sp.symbols('x')
         return sp.exp(1j*i*x)
 
@@ -207,6 +210,15 @@ class FourierBase(SpectralBase):
     def get_orthogonal(self):
         return self
 
+    def apply_derivative(self, input_array, output_array, k=1):
+        # Diagonal, so the local wavenumbers suffice also for distributed
+        # axes. The Nyquist frequency is eliminated for odd derivatives.
+        w = self.wavenumbers(scaled=True, eliminate_highest_freq=k % 2 == 1)
+        if self.tensorproductspace is not None:
+            w = w[self.sl[self.tensorproductspace.local_slice(True)[self.axis]]]
+        np.multiply(input_array, (1j*w)**k, out=output_array)
+        return output_array
+
     def mask_nyquist(self, u_hat, mask=None):
         """Return array `u_hat` with zero Nyquist coefficients
 
@@ -230,10 +242,14 @@ class FourierBase(SpectralBase):
         s = list(np.take(shape, axis))
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and axis == self._planned_axes:
+            if (self.forward.input_array.shape == shape and axis == self._planned_axes and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         plan_fwd = self._xfftn_fwd
         plan_bck = self._xfftn_bck
 
@@ -274,13 +290,14 @@ class FourierBase(SpectralBase):
                      fftw.flag_dict[opts['overwrite_input']])
 
             U = fftw.aligned(shape, dtype=dtype)
-            xfftn_fwd = plan_fwd(U, s=s, axes=axis, threads=threads, flags=flags)
+            xfftn_fwd = fftw_plans.plan(plan_fwd, U, s=s, axes=axis, threads=threads, flags=flags)
             V = xfftn_fwd.output_array
 
             if np.issubdtype(dtype, np.floating):
                 flags = (fftw.flag_dict[opts['planner_effort']],)
 
-            xfftn_bck = plan_bck(V, s=s, axes=axis, threads=threads, flags=flags, output_array=U)
+            xfftn_bck = fftw_plans.plan(plan_bck, V, s=s, axes=axis, threads=threads, flags=flags,
+                                        output_array=U)
             V.fill(0)
             U.fill(0)
             self._M = xfftn_fwd.get_normalization()
@@ -300,6 +317,7 @@ class FourierBase(SpectralBase):
         self.scalar_product = Transform(self.scalar_product, xfftn_fwd, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
 
 class R2CBasis(FourierBase):
@@ -365,7 +383,7 @@ class R2CBasis(FourierBase):
         shape = list(shape)
         shape[self.axis] = int(shape[self.axis] / self.padding_factor)
         shape[self.axis] = shape[self.axis]//2 + 1
-        return fftw.aligned(shape, dtype=dtype)
+        return work_pool.aligned(shape, dtype, ('trunc', self.axis))
 
     def slice(self):
         return slice(0, self.N//2+1)
@@ -4,8 +4,10 @@ import numpy as np
 from numpy.polynomial import hermite
 from scipy.special import eval_hermite, factorial
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict
+from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict, \
+    work_pool
 from shenfun.utilities import inheritdocstrings
+from shenfun.utilities.quadrature import hermite_gauss
 
 #pylint: disable=method-hidden,no-else-return,not-callable,abstract-method,no-member,cyclic-import
 
@@ -53,6 +55,7 @@ class Basis(SpectralBase):
         self.forward = functools.partial(self.forward, fast_transform=False)
         self.backward = functools.partial(self.backward, fast_transform=False)
         self.scalar_product = functools.partial(self.scalar_product, fast_transform=False)
+        self._derivative_work = {}
         self.plan(int(N*padding_factor), 0, np.float, {})
 
     @staticmethod
@@ -85,9 +88,7 @@ class Basis(SpectralBase):
         if N is None:
             N = self.N
         if self.quad == "HG":
-            points, weights = hermite.hermgauss(N)
-            if weighted:
-                weights *= np.exp(points**2)
+            points, weights = hermite_gauss(N, scaled=weighted)
         else:
             raise NotImplementedError
 
@@ -162,10 +163,14 @@ class Basis(SpectralBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         U = fftw.aligned(shape, dtype=dtype)
         V = fftw.aligned(shape, dtype=dtype)
         U.fill(0)
@@ -183,6 +188,7 @@ class Basis(SpectralBase):
         self.scalar_product = Transform(self.scalar_product, None, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
     def eval(self, x, u, output_array=None):
         x = np.atleast_1d(x)
@@ -199,3 +205,29 @@ class Basis(SpectralBase):
 
     def get_orthogonal(self):
         return self
+
+    def apply_derivative(self, input_array, output_array, k=1):
+        # Use k additional modes, such that the result equals the projection
+        # of the exact derivative
+        shape = list(input_array.shape)
+        N = shape[self.axis]
+        shape[self.axis] += k
+        a = self._derivative_work.get((tuple(shape), input_array.dtype))
+        if a is None:
+            a = np.zeros(shape, dtype=input_array.dtype)
+            self._derivative_work[(tuple(shape), input_array.dtype)] = a
+        a[self.sl[slice(0, N)]] = input_array
+        a[self.sl[slice(N, None)]] = 0
+        SpectralBase.apply_derivative(self, a, a, k)
+        output_array[...] = a[self.sl[slice(0, N)]]
+        return output_array
+
+    def _derivative(self, input_array, output_array):
+        # H_n' = sqrt(n/2) H_{n-1} - sqrt((n+1)/2) H_{n+1}
+        N = input_array.shape[self.axis]
+        k = self.broadcast_to_ndims(np.sqrt(np.arange(1, N)/2))
+        s0 = self.sl[slice(0, -1)]
+        s1 = self.sl[slice(1, None)]
+        output_array[s0] = k*input_array[s1]
+        output_array[self.si[-1]] = 0
+        output_array[s1] -= k*input_array[s0]
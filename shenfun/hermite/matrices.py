@@ -1,10 +1,12 @@
 import numpy as np
 from shenfun.matrixbase import SpectralMatrix
-from shenfun.optimization.cython import Matvec
+from shenfun.optimization import optimized_module
 from shenfun.utilities import inheritdocstrings
 from shenfun.la import TDMA
 from . import bases
 
+Matvec = optimized_module('Matvec')
+
 HB = bases.Basis
 
 @inheritdocstrings
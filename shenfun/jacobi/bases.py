@@ -32,10 +32,12 @@ import os
 import functools
 import numpy as np
 import sympy as sp
-from scipy.special import eval_jacobi, roots_jacobi #, gamma
+from scipy.special import eval_jacobi #, gamma
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict
+from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict, \
+    work_pool
 from shenfun.utilities import inheritdocstrings
+from shenfun.utilities.quadrature import jacobi_gauss
 
 try:
     import quadpy
@@ -118,7 +120,7 @@ class JacobiBase(SpectralBase):
         if N is None:
             N = self.N
         assert self.quad == "JG"
-        points, weights = roots_jacobi(N, self.alpha, self.beta)
+        points, weights = jacobi_gauss(N, self.alpha, self.beta)
         if map_true_domain is True:
             points = self.map_true_domain(points)
         return points, weights
@@ -197,10 +199,14 @@ class JacobiBase(SpectralBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         U = fftw.aligned(shape, dtype=dtype)
         V = fftw.aligned(shape, dtype=dtype)
         U.fill(0)
@@ -212,6 +218,7 @@ class JacobiBase(SpectralBase):
         self.scalar_product = Transform(self.scalar_product, None, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
     def get_orthogonal(self):
         return Basis(self.N, alpha=self.alpha, beta=self.beta, domain=self.domain)
@@ -260,6 +267,21 @@ class Basis(JacobiBase):
         x = sp.symbols('x')
         return sp.jacobi(i, self.alpha, self.beta, x)
 
+    def _derivative_recurrence(self, N):
+        # See, e.g., Shen, Tang and Wang, Spectral Methods, Springer (2011),
+        # Eq. (3.119)
+        a, b = float(self.alpha), float(self.beta)
+        n = np.arange(N+1, dtype=float)
+        s = 2*n+a+b
+        A = np.zeros(N+1)
+        A[2:] = -2*(n[2:]+a)*(n[2:]+b)/((n[2:]+a+b)*s[2:]*(s[2:]+1))
+        B = np.zeros(N)
+        B[1:] = 2*(a-b)/(s[1:N]*(s[1:N]+2))
+        C = np.zeros(N)
+        C[0] = 2/(a+b+2)
+        C[1:] = 2*(n[1:N]+a+b+1)/((s[1:N]+1)*(s[1:N]+2))
+        return A, B, C
+
 
 class ShenDirichletBasis(JacobiBase):
     """Jacobi basis for Dirichlet boundary conditions
@@ -366,7 +388,7 @@ class ShenDirichletBasis(JacobiBase):
         if N is None:
             N = self.N
         assert self.quad == "JG"
-        points, weights = roots_jacobi(N, self.alpha+1, self.beta+1)
+        points, weights = jacobi_gauss(N, self.alpha+1, self.beta+1)
         if map_true_domain is True:
             points = self.map_true_domain(points)
         return points, weights
@@ -485,7 +507,7 @@ class ShenBiharmonicBasis(JacobiBase):
         if N is None:
             N = self.N
         assert self.quad == "JG"
-        points, weights = roots_jacobi(N, 0, 0)
+        points, weights = jacobi_gauss(N, 0, 0)
         if map_true_domain is True:
             points = self.map_true_domain(points)
         return points, weights
@@ -598,7 +620,7 @@ class ShenOrder6Basis(JacobiBase):
         if N is None:
             N = self.N
         assert self.quad == "JG"
-        points, weights = roots_jacobi(N, 0, 0)
+        points, weights = jacobi_gauss(N, 0, 0)
         if map_true_domain is True:
             points = self.map_true_domain(points)
         return points, weights
@@ -1,9 +1,13 @@
 r"""
-This module contains linear algebra solvers for SparseMatrixes
+This module contains linear algebra solvers for SparseMatrixes,
+matrix-free Krylov solvers and preconditioners for sums of tensor
+product matrices, and generalized eigenvalue solvers
 """
+from numbers import Number
 import numpy as np
 import scipy.sparse as sp
 from scipy.sparse.linalg import spsolve
+from mpi4py import MPI
 from shenfun.optimization import optimizer
 from shenfun.matrixbase import SparseMatrix
 
@@ -249,36 +253,14 @@ class Solve(object):
         else:
             assert u.shape == b.shape
 
-        # Move axis to first
-        if axis > 0:
-            u = np.moveaxis(u, axis, 0)
-            if u is not b:
-                b = np.moveaxis(b, axis, 0)
-
-        s = self.s
-        assert self.A.shape[0] == b[s].shape[0]
-        A = self.A.diags('csr')
-        if b.ndim == 1:
-            u[s] = spsolve(A, b[s])
-        else:
-            N = b[s].shape[0]
-            P = np.prod(b[s].shape[1:])
-            br = b[s].reshape((N, P))
-
-            if b.dtype is np.dtype('complex'):
-                u.real[s] = spsolve(A, br.real).reshape(u[s].shape)
-                u.imag[s] = spsolve(A, br.imag).reshape(u[s].shape)
-            else:
-                u[s] = spsolve(A, br).reshape(u[s].shape)
+        s = [slice(None)]*b.ndim
+        s[axis] = self.s
+        s = tuple(s)
+        assert self.A.shape[0] == b[s].shape[axis]
+        SparseMatrix.solve(self.A, b[s], u[s], axis=axis)
         if self.test.has_nonhomogeneous_bcs:
             self.test.bc.set_boundary_dofs(u, True)
 
-        if axis > 0:
-            u = np.moveaxis(u, 0, axis)
-            if u is not b:
-                b = np.moveaxis(b, 0, axis)
-
-        #u /= self.A.scale
         return u
 
 class NeumannSolve(object):
@@ -545,3 +527,973 @@ class TDMA_O(object):
 
         u /= self.mat.scale
         return u
+
+
+class LinearOperator(object):
+    """Matrix-free operator for a sum of tensor product matrices
+
+    The operator is applied through the matvec methods of the individual
+    matrices, and the global matrix is never assembled. The operator is used
+    by the distributed Krylov solvers :class:`.CG`, :class:`.GMRES` and
+    :class:`.BiCGStab`.
+
+    The operator also has the attributes ``shape`` and ``dtype``, and the
+    matvec method accepts flattened arrays, such that on a single processor
+    it may be used with the iterative solvers in :mod:`scipy.sparse.linalg`,
+    e.g., ``gmres(A, b.ravel())``, or ``aslinearoperator(A)``.
+
+    Parameters
+    ----------
+    mats : :class:`.TPMatrix`, :class:`.SparseMatrix`, :class:`.BlockMatrix`,
+        :class:`.MatrixSum` or sequence of :class:`.TPMatrix` or
+        :class:`.SparseMatrix`
+        The matrices of the form. If the matrices belong to different blocks
+        of a mixed space, then they are collected in a :class:`.BlockMatrix`.
+    """
+    def __init__(self, mats):
+        from shenfun.matrixbase import BlockMatrix, MatrixSum
+        from shenfun.forms.arguments import Function
+        if isinstance(mats, MatrixSum):
+            mats = mats.evaluate()
+        if not isinstance(mats, (BlockMatrix, list, tuple)):
+            mats = [mats]
+        if isinstance(mats, (list, tuple)):
+            blocks = set([getattr(m, 'global_index', None) for m in mats])
+            if len(blocks) > 1:
+                mats = BlockMatrix(list(mats))
+        if isinstance(mats, BlockMatrix):
+            self.space = mats.mixedbase
+        elif isinstance(mats[0], SparseMatrix):
+            self.space = mats[0].testfunction[0]
+        else:
+            self.space = mats[0].space
+        self.mats = mats
+        self.comm = getattr(self.space, 'comm', MPI.COMM_SELF)
+        self._w = Function(self.space)
+        n = self._w.size
+        self.shape = (n, n)
+        self.dtype = self._w.dtype
+
+    def matvec(self, u, c=None):
+        """Return matrix vector product c = A u
+
+        Parameters
+        ----------
+        u : :class:`.Function` or array
+            Function in self.space, or a flattened array of the same size
+        c : :class:`.Function` or array, optional
+            Return array of the same shape as u
+
+        Returns
+        -------
+        c : :class:`.Function` or array
+        """
+        from shenfun.forms.arguments import Function
+        shape = u.shape
+        if c is None:
+            c = np.zeros_like(u)
+        if not shape == self._w.shape:
+            # Flattened array, e.g., from scipy.sparse.linalg
+            u = Function(self.space, buffer=np.asarray(u).reshape(self._w.shape))
+            c = Function(self.space, buffer=c.reshape(self._w.shape))
+        if isinstance(self.mats, (list, tuple)):
+            c.fill(0)
+            w = self._w
+            for m in self.mats:
+                w.fill(0)
+                w = m.matvec(u, w)
+                c += w
+        else:
+            c = self.mats.matvec(u, c)
+        return c.reshape(shape)
+
+    def dot(self, a, b):
+        """Return distributed inner product of a and b, conjugating a"""
+        return self.comm.allreduce(np.vdot(a, b))
+
+    def norm(self, a):
+        """Return distributed l2-norm of a"""
+        return np.sqrt(self.comm.allreduce(np.vdot(a, a).real))
+
+    def __call__(self, u, c=None):
+        return self.matvec(u, c)
+
+
+class KrylovSolver(object):
+    """Base class for distributed and matrix-free Krylov solvers
+
+    The solvers need only the matrix vector product of the operator, and
+    all dot products are computed with a global ``allreduce``, such that the
+    solvers work on distributed Functions without ever forming the global
+    matrix.
+
+    Parameters
+    ----------
+    A : :class:`.LinearOperator`, :class:`.BlockMatrix` or sequence of
+        :class:`.TPMatrix`
+        The operator
+    M : callable, optional
+        Preconditioner. Called as ``M(b, u)``, and should return an
+        approximation to the solution u of ``Au = b``
+    tol : number, optional
+        Relative tolerance for the l2-norm of the residual
+    maxiter : int, optional
+        Maximum number of iterations. Defaults to the size of the global
+        problem.
+
+    Note
+    ----
+    After solving, the number of iterations and the relative residual are
+    stored in the attributes ``iterations`` and ``residual``.
+    """
+    def __init__(self, A, M=None, tol=1e-8, maxiter=None):
+        self.A = A if isinstance(A, LinearOperator) else LinearOperator(A)
+        self.M = M
+        self.tol = tol
+        self.maxiter = maxiter
+        self.iterations = 0
+        self.residual = 0
+        self._work = {}
+
+    def work(self, b, i):
+        """Return work array number i of same shape and type as b"""
+        key = (b.shape, b.dtype, i)
+        if key not in self._work:
+            self._work[key] = np.zeros_like(b)
+        return self._work[key]
+
+    def axpy(self, a, x, y):
+        """Return y += a*x, computed in place without temporary arrays"""
+        t = self.work(y, 'axpy')
+        np.multiply(x, a, out=t)
+        y += t
+        return y
+
+    def precondition(self, r, z):
+        """Return z = M^{-1} r"""
+        if self.M is None:
+            z[...] = r
+            return z
+        z.fill(0)
+        return self.M(r, z)
+
+    def __call__(self, b, u=None):
+        """Solve matrix problem Au = b
+
+        Parameters
+        ----------
+        b : array
+            Array of right hand side on entry and solution on exit unless
+            u is provided.
+        u : array, optional
+            Output array. The content of u is used as initial guess.
+
+        Note
+        ----
+        If u is not provided, then b is overwritten with the solution and
+        returned, using zero as initial guess.
+        """
+        rhs = self.work(b, 'b')
+        rhs[...] = b
+        if u is None:
+            u = b
+            u.fill(0)
+        else:
+            assert u.shape == b.shape
+        maxiter = self.maxiter
+        if maxiter is None:
+            maxiter = self.A.comm.allreduce(b.size)
+        bnorm = self.A.norm(rhs)
+        self.iterations = 0
+        self.residual = 0
+        if bnorm == 0:
+            u.fill(0)
+            return u
+        return self.solve(rhs, u, self.tol*bnorm, maxiter, bnorm)
+
+    def solve(self, b, u, tol, maxiter, bnorm):
+        """Iterate until the l2-norm of the residual is below tol"""
+        raise NotImplementedError
+
+
+class CG(KrylovSolver):
+    """Preconditioned conjugate gradient method
+
+    For Hermitian positive definite operators, like, e.g., the Legendre
+    Helmholtz operator. See :class:`.KrylovSolver` for parameters.
+    """
+    def solve(self, b, u, tol, maxiter, bnorm):
+        A = self.A
+        r, z, p, Ap = [self.work(b, i) for i in range(4)]
+        r = A.matvec(u, r)
+        r *= -1
+        r += b
+        z = self.precondition(r, z)
+        p[...] = z
+        rz = A.dot(r, z)
+        rnorm = A.norm(r)
+        while rnorm > tol and self.iterations < maxiter:
+            Ap = A.matvec(p, Ap)
+            alpha = rz/A.dot(p, Ap)
+            u = self.axpy(alpha, p, u)
+            r = self.axpy(-alpha, Ap, r)
+            rnorm = A.norm(r)
+            self.iterations += 1
+            if rnorm <= tol:
+                break
+            z = self.precondition(r, z)
+            rz_new = A.dot(r, z)
+            p *= rz_new/rz
+            p += z
+            rz = rz_new
+        self.residual = rnorm/bnorm
+        return u
+
+
+class BiCGStab(KrylovSolver):
+    """Right preconditioned biconjugate gradient stabilized method
+
+    For general operators. See :class:`.KrylovSolver` for parameters.
+    """
+    def solve(self, b, u, tol, maxiter, bnorm):
+        A = self.A
+        r, r0, p, v, ph, s, sh, t = [self.work(b, i) for i in range(8)]
+        r = A.matvec(u, r)
+        r *= -1
+        r += b
+        r0[...] = r
+        p.fill(0)
+        v.fill(0)
+        rho = alpha = omega = 1
+        rnorm = A.norm(r)
+        while rnorm > tol and self.iterations < maxiter:
+            rho_new = A.dot(r0, r)
+            beta = (rho_new/rho)*(alpha/omega)
+            rho = rho_new
+            p = self.axpy(-omega, v, p)
+            p *= beta
+            p += r
+            ph = self.precondition(p, ph)
+            v = A.matvec(ph, v)
+            alpha = rho/A.dot(r0, v)
+            s[...] = r
+            s = self.axpy(-alpha, v, s)
+            self.iterations += 1
+            if A.norm(s) <= tol:
+                u = self.axpy(alpha, ph, u)
+                r[...] = s
+                rnorm = A.norm(r)
+                break
+            sh = self.precondition(s, sh)
+            t = A.matvec(sh, t)
+            omega = A.dot(t, s)/A.dot(t, t)
+            u = self.axpy(alpha, ph, u)
+            u = self.axpy(omega, sh, u)
+            r[...] = s
+            r = self.axpy(-omega, t, r)
+            rnorm = A.norm(r)
+        self.residual = rnorm/bnorm
+        return u
+
+
+class GMRES(KrylovSolver):
+    """Right preconditioned and restarted generalized minimal residual method
+
+    For general operators. See :class:`.KrylovSolver` for parameters.
+
+    Parameters
+    ----------
+    restart : int, optional
+        Number of iterations between restarts, which is also the number of
+        Krylov vectors stored
+    """
+    def __init__(self, A, M=None, tol=1e-8, maxiter=None, restart=20):
+        KrylovSolver.__init__(self, A, M=M, tol=tol, maxiter=maxiter)
+        self.restart = restart
+
+    def solve(self, b, u, tol, maxiter, bnorm):
+        A = self.A
+        m = self.restart
+        r, z = self.work(b, 'r'), self.work(b, 'z')
+        V = [self.work(b, i) for i in range(m+1)]
+        dtype = np.result_type(b.dtype, np.float64)
+        H = np.zeros((m+1, m), dtype=dtype)
+        g = np.zeros(m+1, dtype=dtype)
+        cs = np.zeros(m)
+        sn = np.zeros(m, dtype=dtype)
+        r = A.matvec(u, r)
+        r *= -1
+        r += b
+        rnorm = A.norm(r)
+        while rnorm > tol and self.iterations < maxiter:
+            V[0][...] = r
+            V[0] /= rnorm
+            g.fill(0)
+            g[0] = rnorm
+            H.fill(0)
+            for j in range(m):
+                z = self.precondition(V[j], z)
+                w = V[j+1]
+                w = A.matvec(z, w)
+                for i in range(j+1): # modified Gram-Schmidt
+                    H[i, j] = A.dot(V[i], w)
+                    w = self.axpy(-H[i, j], V[i], w)
+                H[j+1, j] = A.norm(w)
+                if H[j+1, j] != 0:
+                    w /= H[j+1, j]
+                for i in range(j): # Apply previous Givens rotations
+                    h0, h1 = H[i, j], H[i+1, j]
+                    H[i, j] = cs[i]*h0 + sn[i]*h1
+                    H[i+1, j] = -np.conj(sn[i])*h0 + cs[i]*h1
+                h0, h1 = H[j, j], H[j+1, j].real
+                d = np.sqrt(abs(h0)**2 + h1**2)
+                if abs(h0) == 0:
+                    cs[j], sn[j] = 0, 1
+                else:
+                    cs[j], sn[j] = abs(h0)/d, (h0/abs(h0))*h1/d
+                H[j, j] = cs[j]*h0 + sn[j]*h1
+                H[j+1, j] = 0
+                g[j+1] = -np.conj(sn[j])*g[j]
+                g[j] = cs[j]*g[j]
+                self.iterations += 1
+                if abs(g[j+1]) <= tol or self.iterations >= maxiter:
+                    break
+            k = j+1
+            y = np.zeros(k, dtype=dtype)
+            for i in range(k-1, -1, -1):
+                y[i] = (g[i] - np.dot(H[i, i+1:k], y[i+1:k]))/H[i, i]
+            r.fill(0)
+            for i in range(k):
+                r = self.axpy(y[i], V[i], r)
+            z = self.precondition(r, z)
+            u += z
+            r = A.matvec(u, r)
+            r *= -1
+            r += b
+            rnorm = A.norm(r)
+        self.residual = rnorm/bnorm
+        return u
+
+
+def _diagonal_blocks(mats, cls, **kw):
+    """Return preconditioners for the diagonal blocks of BlockMatrix mats"""
+    blocks = []
+    for i in range(mats.dims):
+        mij = mats.mats[i][i]
+        blocks.append(None if isinstance(mij, Number) else cls(mij, **kw))
+    return blocks
+
+def _apply_blocks(blocks, b, u):
+    """Apply block diagonal preconditioner, using identity for empty blocks"""
+    for i, P in enumerate(blocks):
+        if P is None:
+            u.v[i] = b.v[i]
+        else:
+            u.v[i] = P(b.v[i], u.v[i])
+    return u
+
+def _apply_along_axis(P, c, axis):
+    """Return dense matrix P applied to array c along axis"""
+    return np.moveaxis(np.tensordot(P, c, axes=(1, axis)), 0, axis)
+
+def _assembled(mats):
+    """Return the assembled matrices in mats, skipping matrix-free operators"""
+    from shenfun.matrixbase import CoefficientOperator
+    return [m for m in mats if not isinstance(m, CoefficientOperator)]
+
+def _space_and_axes(mats):
+    """Return test space, non-periodic axes and scale of each matrix in mats"""
+    m = mats[0]
+    if isinstance(m, SparseMatrix):
+        return m.testfunction[0], [0], [m.scale for m in mats]
+    return m.space, m.space.get_nonperiodic_axes(), [m.scale for m in mats]
+
+def _axis_matrix(m, axis):
+    return m if isinstance(m, SparseMatrix) else m.mats[axis]
+
+def _separable_approximation(mats, naxes):
+    """Return the terms of mats using, along each non-periodic axis, only the
+    matrices of lowest and highest order"""
+    order = lambda mat: mat.testfunction[1]+mat.trialfunction[1]
+    for axis in naxes:
+        distinct = {}
+        for m in mats:
+            mat = _axis_matrix(m, axis)
+            distinct.setdefault(mat.get_key(), mat)
+        if len(distinct) > 2:
+            keys = sorted(distinct, key=lambda key: order(distinct[key]))
+            mats = [m for m in mats if _axis_matrix(m, axis).get_key() in (keys[0], keys[-1])]
+    return mats
+
+
+class FastDiagonalization(object):
+    r"""Fast diagonalization solver for separable forms
+
+    The form is the sum of tensor product matrices
+
+    .. math::
+
+        \sum_k s_k A^0_k \otimes A^1_k \otimes \ldots
+
+    where, along each non-periodic axis, there are at most two different
+    matrices, e.g., a mass matrix :math:`B` and a stiffness matrix :math:`A`.
+    The generalized eigenvalue problem :math:`AV = BV\Lambda` is solved once
+    for each non-periodic axis, and the form is then solved by dense matrix
+    products along each non-periodic axis and a pointwise division. The
+    scales :math:`s_k` may vary along periodic directions.
+
+    The solver is exact for forms with constant coefficients, like the
+    Helmholtz and Poisson forms with one or two non-periodic directions. For
+    other forms it can be used as a preconditioner for the Krylov solvers
+    :class:`.CG`, :class:`.GMRES` and :class:`.BiCGStab`, using the matrices
+    of a separable approximation.
+
+    Parameters
+    ----------
+    mats : sequence of :class:`.TPMatrix` or :class:`.SparseMatrix`,
+        :class:`.BlockMatrix` or :class:`.LinearOperator`
+        The form. For a :class:`.BlockMatrix`, the preconditioner is block
+        diagonal, using the diagonal blocks.
+    approximate : bool, optional
+        Whether to use a separable approximation of a form that is not
+        separable. The approximation keeps only the terms that, along each
+        non-periodic axis, use the matrix of lowest (mass) or highest
+        (stiffness) order, and leaves out matrix-free terms. If False, then
+        a non-separable form raises NotImplementedError.
+
+    Note
+    ----
+    All non-periodic axes must be aligned, i.e., not distributed, in
+    spectral space.
+    """
+    def __init__(self, mats, approximate=False):
+        from shenfun.matrixbase import BlockMatrix
+        from scipy.linalg import eig, inv
+        if isinstance(mats, LinearOperator):
+            mats = mats.mats
+        self.blocks = None
+        if isinstance(mats, BlockMatrix):
+            self.blocks = _diagonal_blocks(mats, FastDiagonalization,
+                                           approximate=approximate)
+            return
+        mats = list(mats) if isinstance(mats, (list, tuple)) else [mats]
+        space, self.naxes = _space_and_axes(mats)[:2]
+        if hasattr(space, 'get_pencil'):
+            pencil = space.get_pencil(True)
+            for axis in self.naxes:
+                if pencil.subshape[axis] != pencil.shape[axis]:
+                    raise NotImplementedError('Axis {} is distributed'.format(axis))
+        if approximate:
+            mats = _separable_approximation(_assembled(mats), self.naxes)
+        elif len(_assembled(mats)) < len(mats):
+            raise NotImplementedError('Form has matrix-free terms')
+        scales = _space_and_axes(mats)[2]
+        self.s = [slice(None)]*len(scales[0].shape) if np.ndim(scales[0]) else [slice(None)]
+        self.V = {}
+        self.Q = {}
+        D = 0
+        diagonals = []
+        for axis in self.naxes:
+            distinct = {}
+            for m in mats:
+                mat = _axis_matrix(m, axis)
+                distinct.setdefault(mat.get_key(), mat)
+            if len(distinct) > 2:
+                raise NotImplementedError('Form is not separable along axis {}'.format(axis))
+            mass = [mat for mat in distinct.values()
+                    if mat.testfunction[1] == 0 and mat.trialfunction[1] == 0]
+            B = mass[0] if mass else list(distinct.values())[0]
+            self.s[axis] = B.testfunction[0].slice()
+            Bd = B.diags('csr').toarray()
+            V = np.eye(B.shape[0])
+            for key, mat in distinct.items():
+                if mat is not B:
+                    lam, V = eig(mat.diags('csr').toarray(), Bd)
+                    if np.all(abs(lam.imag) <= 1e-12*abs(lam).max()):
+                        V = V.real
+            self.V[axis] = V
+            self.Q[axis] = Q = inv(Bd.dot(V))
+            # Diagonal representation of each distinct matrix
+            d = {}
+            for key, mat in distinct.items():
+                x = np.diag(Q.dot(mat.diags('csr').toarray()).dot(V))
+                d[key] = x.real if np.all(abs(x.imag) <= 1e-12*abs(x).max()) else x
+            diagonals.append(d)
+        for m, scale in zip(mats, scales):
+            sc = scale
+            for axis, d in zip(self.naxes, diagonals):
+                x = d[_axis_matrix(m, axis).get_key()]
+                shape = [1]*len(self.s)
+                shape[axis] = x.shape[0]
+                sc = sc*x.reshape(shape)
+            D = D + sc
+        with np.errstate(divide='ignore'):
+            D = 1./D
+        self.Dinv = np.where(np.isfinite(D), D, 0)
+        self.s = tuple(self.s)
+
+    def __call__(self, b, u=None):
+        """Solve matrix problem Au = b
+
+        Parameters
+        ----------
+        b : array
+            Array of right hand side on entry and solution on exit unless
+            u is provided.
+        u : array, optional
+            Output array
+
+        Note
+        ----
+        If u is not provided, then b is overwritten with the solution and returned
+        """
+        if u is None:
+            u = b
+        else:
+            assert u.shape == b.shape
+        if self.blocks is not None:
+            return _apply_blocks(self.blocks, b, u)
+        c = b[self.s]
+        for axis in self.naxes:
+            c = _apply_along_axis(self.Q[axis], c, axis)
+        c = c*self.Dinv
+        for axis in self.naxes:
+            c = _apply_along_axis(self.V[axis], c, axis)
+        u.fill(0)
+        u[self.s] = c if np.iscomplexobj(u) else c.real
+        return u
+
+
+class PMultigrid(object):
+    """Polynomial (p-) multigrid V-cycle
+
+    A hierarchy of spaces is created with ``get_refined``, halving the
+    number of quadrature points in the non-periodic directions for each level.
+    The matrices of the form are recomputed for each coarser level,
+    restriction is truncation and prolongation is padding of the expansion
+    coefficients, both through :meth:`.Function.assign`. Since the test
+    functions of a coarse level are also test functions of the finer level,
+    this is a Galerkin hierarchy. The coarsest level is solved with
+    :class:`.FastDiagonalization`, or by smoothing if the form is not
+    separable.
+
+    A V-cycle, with zero initial guess, is used as a preconditioner for
+    the Krylov solvers :class:`.CG`, :class:`.GMRES` and :class:`.BiCGStab`.
+
+    Parameters
+    ----------
+    mats : sequence of :class:`.TPMatrix` or :class:`.SparseMatrix`,
+        :class:`.BlockMatrix` or :class:`.LinearOperator`
+        The form on the finest level. For a :class:`.BlockMatrix`, the
+        preconditioner is block diagonal, using the diagonal blocks.
+    levels : int, optional
+        Number of levels. Default is to coarsen as long as all non-periodic
+        directions have at least ``min_size`` quadrature points.
+    smoother : str or callable, optional
+        Either 'jacobi' for damped Jacobi, or a function returning a
+        preconditioner for given matrices of a level, e.g.,
+        :class:`.FastDiagonalization`. The smoother is used as preconditioner
+        in a damped Richardson iteration. The Jacobi diagonal leaves out
+        matrix-free terms of the form. Jacobi smoothing leads to bounded
+        iteration counts for forms with one non-periodic direction. With
+        more non-periodic directions use a smoother based on a separable
+        approximation of the form, e.g.,
+        ``lambda mats: FastDiagonalization(mats, approximate=True)``.
+    presmooth, postsmooth : int, optional
+        Number of smoothing iterations before and after coarse correction
+    omega : number, optional
+        Damping factor of the smoother
+    min_size : int, optional
+        The minimum number of quadrature points of the coarsest level
+    """
+    def __init__(self, mats, levels=None, smoother='jacobi', presmooth=3,
+                 postsmooth=3, omega=0.5, min_size=8):
+        from shenfun.matrixbase import BlockMatrix
+        from shenfun.forms.arguments import Function
+        if isinstance(mats, LinearOperator):
+            mats = mats.mats
+        self.blocks = None
+        if isinstance(mats, BlockMatrix):
+            self.blocks = _diagonal_blocks(mats, PMultigrid, levels=levels,
+                                           smoother=smoother, presmooth=presmooth,
+                                           postsmooth=postsmooth, omega=omega,
+                                           min_size=min_size)
+            return
+        mats = list(mats) if isinstance(mats, (list, tuple)) else [mats]
+        self.presmooth = presmooth
+        self.postsmooth = postsmooth
+        self.omega = omega
+        space, naxes = _space_and_axes(_assembled(mats))[:2]
+        self.levels = []
+        while True:
+            self.levels.append(self._create_level(space, mats, smoother))
+            if levels is not None and len(self.levels) == levels:
+                break
+            N = self._coarse_size(space, naxes)
+            if min([N[axis] for axis in naxes]) < min_size:
+                break
+            space = space.get_refined(N if len(N) > 1 else N[0])
+            mats = [self._coarsen(m, space) for m in mats]
+        coarsest = self.levels[-1]
+        try:
+            coarsest['solve'] = FastDiagonalization(coarsest['mats'])
+        except NotImplementedError:
+            coarsest['solve'] = None
+        self._b = Function(self.levels[0]['space'])
+
+    @staticmethod
+    def _coarse_size(space, naxes):
+        bases = space.bases if hasattr(space, 'bases') else [space]
+        return [base.N//2 if axis in naxes else base.N for axis, base in enumerate(bases)]
+
+    @staticmethod
+    def _coarsen(m, space):
+        """Return matrix m recomputed for coarse test space"""
+        from shenfun.spectralbase import inner_product
+        from shenfun.matrixbase import TPMatrix, CoefficientOperator
+        def coarse_matrix(mat, base):
+            test, trial = mat.testfunction, mat.trialfunction
+            trial_base = trial[0].get_refined(base.N)
+            mc = inner_product((base, test[1]), (trial_base, trial[1]),
+                               getattr(mat, 'measure', 1))
+            mc.scale = mat.scale
+            return mc
+        if isinstance(m, CoefficientOperator):
+            return m.get_refined(space)
+        if isinstance(m, SparseMatrix):
+            return coarse_matrix(m, space)
+        mc = [coarse_matrix(mat, space.bases[axis]) if axis in m.naxes else mat
+              for axis, mat in enumerate(m.mats)]
+        mc = TPMatrix(mc, space, m.scale, m.global_index, m.mixedbase)
+        mc.naxes = m.naxes
+        mc.pmat = mc.mats[m.naxes[0]] if len(m.naxes) == 1 else mc.mats
+        return mc
+
+    def _create_level(self, space, mats, smoother):
+        from shenfun.forms.arguments import Function
+        level = {'space': space, 'mats': mats, 'A': LinearOperator(mats),
+                 'r': Function(space), 'e': Function(space),
+                 'b': Function(space), 'u': Function(space)}
+        mask = Function(space)
+        assembled = _assembled(mats)
+        naxes = _space_and_axes(assembled)[1]
+        s = [slice(None)]*mask.ndim
+        for axis in naxes:
+            s[axis] = _axis_matrix(assembled[0], axis).testfunction[0].slice()
+        mask[tuple(s)] = 1
+        level['mask'] = mask
+        if smoother == 'jacobi':
+            d = 0
+            for m, scale in zip(assembled, _space_and_axes(assembled)[2]):
+                sc = scale
+                for axis in naxes:
+                    x = _axis_matrix(m, axis).diags('csr').diagonal()
+                    shape = [1]*mask.ndim
+                    shape[axis] = x.shape[0]
+                    sc = sc*x.reshape(shape)
+                d = d + sc
+            dinv = np.zeros_like(mask)
+            with np.errstate(divide='ignore'):
+                dinv[tuple(s)] = 1./d
+            dinv[~np.isfinite(dinv)] = 0
+            level['smoother'] = lambda b, u, dinv=dinv: np.multiply(b, dinv, out=u)
+        else:
+            level['smoother'] = smoother(mats)
+        return level
+
+    def smooth(self, level, b, u, iterations):
+        """Damped Richardson iterations for level, using level's smoother"""
+        A, r, e = level['A'], level['r'], level['e']
+        for _ in range(iterations):
+            r = A.matvec(u, r)
+            r *= -1
+            r += b
+            e = level['smoother'](r, e)
+            e *= self.omega
+            u += e
+        return u
+
+    def cycle(self, i, b, u):
+        """Return u after one V-cycle starting from level i"""
+        level = self.levels[i]
+        if i == len(self.levels)-1:
+            if level['solve'] is not None:
+                return level['solve'](b, u)
+            return self.smooth(level, b, u, 20)
+        u = self.smooth(level, b, u, self.presmooth)
+        A, r, e = level['A'], level['r'], level['e']
+        r = A.matvec(u, r)
+        r *= -1
+        r += b
+        coarse = self.levels[i+1]
+        bc = r.assign(coarse['b'])
+        bc *= coarse['mask']
+        uc = coarse['u']
+        uc.fill(0)
+        uc = self.cycle(i+1, bc, uc)
+        e = uc.assign(e)
+        e *= level['mask']
+        u += e
+        u = self.smooth(level, b, u, self.postsmooth)
+        return u
+
+    def __call__(self, b, u=None):
+        """Return approximation to solution of Au = b using one V-cycle
+
+        Parameters
+        ----------
+        b : array
+            Array of right hand side on entry and solution on exit unless
+            u is provided.
+        u : array, optional
+            Output array
+
+        Note
+        ----
+        If u is not provided, then b is overwritten with the solution and returned
+        """
+        if u is None:
+            u = b
+        else:
+            assert u.shape == b.shape
+        if self.blocks is not None:
+            return _apply_blocks(self.blocks, b, u)
+        self._b[...] = b
+        u[...] = 0
+        u0 = self.levels[0]['u']
+        u0.fill(0)
+        u0 = self.cycle(0, self._b, u0)
+        u[...] = u0
+        return u
+
+
+def _assemble(mats, it):
+    """Return scipy sparse matrix of the form mats for periodic indices it"""
+    from shenfun.matrixbase import BlockMatrix
+    if isinstance(mats, BlockMatrix):
+        return mats.diags(it, format='csc')
+    M = 0
+    for m in mats:
+        if isinstance(m, SparseMatrix):
+            M = M + m.diags('csc')
+            continue
+        sc = m.scale
+        if np.ndim(sc) > 0:
+            sc = sc[tuple(np.where(np.array(sc.shape) == 1, 0, it))]
+        d = m.mats[m.naxes[0]].diags('csc')
+        for axis in m.naxes[1:]:
+            d = sp.kron(d, m.mats[axis].diags('csc'))
+        M = M + sc*d
+    return sp.csc_matrix(M)
+
+
+class EigenSolver(object):
+    r"""Solver for generalized eigenvalue problems
+
+    .. math::
+
+        A x = \lambda B x
+
+    where A and B are banded matrices of spectral Galerkin forms, like the
+    Orr-Sommerfeld or Rayleigh-Benard stability problems. The k eigenvalues
+    closest to the shift :math:`\sigma` are computed with shift-invert
+    Arnoldi, using a sparse LU factorization of :math:`A-\sigma B`. The
+    assembled matrices and the factorization of the most recent wavenumber
+    and shift are kept and reused for repeated calls. With ``k=None`` all eigenvalues
+    are computed with the dense QZ algorithm, which is also used if Arnoldi
+    fails to converge, e.g., for eigenvalues clustered far from the shift.
+
+    For tensor product forms the periodic directions decouple, and the
+    problem is solved independently for each wavenumber. The wavenumbers
+    are distributed, such that :meth:`sweep` solves the problems of all
+    wavenumbers in parallel, each processor solving only for its own.
+
+    Parameters
+    ----------
+    A : :class:`.SparseMatrix`, :class:`.BlockMatrix` or sequence of
+        :class:`.SparseMatrix` or :class:`.TPMatrix`
+        The left hand side form
+    B : Same as A, optional
+        The right hand side form. Identity if not given.
+    k : int or None, optional
+        The number of eigenvalues. If None, compute all eigenvalues.
+    sigma : number, optional
+        The shift
+
+    Example
+    -------
+    Eigenvalues of the Dirichlet problem :math:`-u''=\lambda u`
+
+    >>> import numpy as np
+    >>> from shenfun import Basis, TrialFunction, TestFunction, inner, div, grad
+    >>> from shenfun.la import EigenSolver
+    >>> SD = Basis(32, 'L', bc=(0, 0))
+    >>> u = TrialFunction(SD)
+    >>> v = TestFunction(SD)
+    >>> E = EigenSolver(inner(v, -div(grad(u))), inner(v, u), k=3)
+    >>> np.allclose(E().real, (np.pi/2)**2*np.array([1, 4, 9]))
+    True
+
+    Note
+    ----
+    All non-periodic axes must be aligned, i.e., not distributed, in
+    spectral space.
+    """
+    def __init__(self, A, B=None, k=6, sigma=0):
+        from shenfun.matrixbase import BlockMatrix
+        self.A, self.B = [M if isinstance(M, (BlockMatrix, list, tuple)) or M is None
+                          else [M] for M in (A, B)]
+        self.k = k
+        self.sigma = sigma
+        self.space = None
+        self.naxes = []
+        m = self.A.get_mats(True) if isinstance(self.A, BlockMatrix) else self.A[0]
+        if not isinstance(m, SparseMatrix):
+            self.space = m.space
+            self.naxes = list(m.naxes)
+            pencil = m.space.get_pencil(True)
+            for axis in self.naxes:
+                if pencil.subshape[axis] != pencil.shape[axis]:
+                    raise NotImplementedError('Axis {} is distributed'.format(axis))
+        self._lu = None
+
+    def assemble(self, it=None):
+        """Return A and B in scipy sparse format for given wavenumber
+
+        Parameters
+        ----------
+        it : n-tuple of ints, optional
+            Local index in the periodic directions of the spectral space.
+            Not used for one-dimensional forms.
+        """
+        it = (0,)*len(self.space.bases) if it is None and self.space else it
+        A = _assemble(self.A, it)
+        B = sp.identity(A.shape[0], format='csc') if self.B is None else _assemble(self.B, it)
+        return A, B
+
+    def __call__(self, it=None, sigma=None, return_eigenvectors=False):
+        """Return eigenvalues, sorted by the distance to the shift
+
+        Parameters
+        ----------
+        it : n-tuple of ints, optional
+            Local index in the periodic directions of the spectral space.
+            Not used for one-dimensional forms.
+        sigma : number, optional
+            Shift. Overloads the shift given to the constructor.
+        return_eigenvectors : bool, optional
+            Whether to return the eigenvectors as well
+
+        Returns
+        -------
+        lmbda : array
+            The eigenvalues
+        V : array
+            The eigenvectors ``V[:, i]``, in the coefficient ordering of the
+            trial space(s). Only returned if return_eigenvectors is True.
+        """
+        from scipy.linalg import eig
+        from scipy.sparse.linalg import eigs, splu, ArpackNoConvergence
+        from scipy.sparse.linalg import LinearOperator as ScipyOperator
+        sigma = self.sigma if sigma is None else sigma
+        key = (it, sigma)
+        if self._lu is not None and self._lu[0] == key:
+            A, B, lu = self._lu[1:]
+        else:
+            A, B = self.assemble(it)
+            lu = None
+        n = A.shape[0]
+        k = n if self.k is None else self.k
+        lmbda = None
+        if k < n-1:
+            if lu is None:
+                lu = splu(sp.csc_matrix(A - sigma*B))
+                self._lu = (key, A, B, lu)
+            dtype = np.result_type(A.dtype, B.dtype, np.array(sigma).dtype)
+            OP = ScipyOperator((n, n), matvec=lambda x: lu.solve(np.asarray(B.dot(x), dtype=dtype)),
+                               dtype=dtype)
+            v0 = np.random.RandomState(1).random_sample(n).astype(dtype)
+            try:
+                mu, V = eigs(OP, k=k, which='LM', v0=v0, ncv=min(n-1, max(2*k+1, 20)))
+                with np.errstate(divide='ignore'):
+                    lmbda = sigma + 1./mu
+            except ArpackNoConvergence:
+                # Clustered eigenvalues, far from the shift
+                pass
+        if lmbda is None:
+            lmbda, V = eig(A.toarray(), B.toarray())
+        index = np.argsort(abs(lmbda-sigma))[:k]
+        if return_eigenvectors:
+            return lmbda[index], V[:, index]
+        return lmbda[index]
+
+    def sweep(self, sigma=None):
+        """Return eigenvalues for all local wavenumbers
+
+        Parameters
+        ----------
+        sigma : number, optional
+            Shift. Overloads the shift given to the constructor.
+
+        Returns
+        -------
+        lmbda : array
+            Array of the same shape as the local spectral space, except
+            that the first non-periodic axis holds the eigenvalues of each
+            wavenumber. The remaining non-periodic axes have length 1.
+        """
+        if self.space is None:
+            return self(sigma=sigma)
+        shape = list(self.space.shape(True))
+        for axis in self.naxes:
+            shape[axis] = 1
+        lmbda = None
+        for it in np.ndindex(*shape):
+            lam = self(it, sigma)
+            if lmbda is None:
+                s = list(shape)
+                s[self.naxes[0]] = len(lam)
+                lmbda = np.zeros(s, dtype=lam.dtype)
+            ii = list(it)
+            ii[self.naxes[0]] = slice(None)
+            lmbda[tuple(ii)] = lam
+        return lmbda
+
+
+def eigen_sweep(assemble, params, k=6, sigma=0, comm=MPI.COMM_WORLD):
+    """Return eigenvalues of generalized eigenvalue problems for a sweep
+    over parameters
+
+    The parameters are distributed over the processors of comm, and each
+    problem is solved with :class:`.EigenSolver` on one processor only.
+
+    Parameters
+    ----------
+    assemble : callable
+        Returns the forms A and B of :class:`.EigenSolver` for given
+        parameter, called as ``assemble(*p)`` for tuples p, or ``assemble(p)``
+        otherwise. Any spaces created must use ``MPI.COMM_SELF``.
+    params : sequence
+        The parameters, e.g., tuples of wavenumbers and Reynolds numbers
+    k : int or None, optional
+        The number of eigenvalues. If None, compute all eigenvalues.
+    sigma : number or callable, optional
+        The shift. If callable, it is called with the parameter, like
+        assemble, and should return the shift.
+    comm : MPI communicator, optional
+
+    Returns
+    -------
+    lmbda : list of arrays
+        The eigenvalues for each parameter, available on all processors
+    """
+    local = {}
+    for i in range(comm.Get_rank(), len(params), comm.Get_size()):
+        p = params[i] if isinstance(params[i], tuple) else (params[i],)
+        s = sigma(*p) if callable(sigma) else sigma
+        A, B = assemble(*p)
+        local[i] = EigenSolver(A, B, k=k, sigma=s)()
+    result = {}
+    for d in comm.allgather(local):
+        result.update(d)
+    return [result[i] for i in range(len(params))]
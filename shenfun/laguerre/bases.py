@@ -4,8 +4,10 @@ import numpy as np
 from numpy.polynomial import laguerre as lag
 from scipy.special import eval_laguerre
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, work, Transform, islicedict, slicedict
+from shenfun.spectralbase import SpectralBase, work, work_pool, Transform, \
+    islicedict, slicedict
 from shenfun.utilities import inheritdocstrings
+from shenfun.utilities.quadrature import laguerre_gauss
 
 #pylint: disable=method-hidden,no-else-return,not-callable,abstract-method,no-member,cyclic-import
 
@@ -62,9 +64,7 @@ class LaguerreBase(SpectralBase):
         if N is None:
             N = self.N
         if self.quad == "LG":
-            points, weights = lag.laggauss(N)
-            if weighted:
-                weights *= np.exp(points)
+            points, weights = laguerre_gauss(N, scaled=weighted)
         else:
             raise NotImplementedError
 
@@ -127,10 +127,14 @@ class LaguerreBase(SpectralBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         U = fftw.aligned(shape, dtype=dtype)
         V = fftw.aligned(shape, dtype=dtype)
         U.fill(0)
@@ -141,6 +145,7 @@ class LaguerreBase(SpectralBase):
         self.scalar_product = Transform(self.scalar_product, None, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
     def get_refined(self, N):
         return self.__class__(N,
@@ -207,6 +212,14 @@ class Basis(LaguerreBase):
     def get_orthogonal(self):
         return self
 
+    def _derivative(self, input_array, output_array):
+        # L_n' = -L_n/2 - sum_{k<n} L_k, so the coefficients of the
+        # derivative are c_k = a_k/2 - sum_{j>=k} a_j
+        rev = self.sl[slice(None, None, -1)]
+        np.cumsum(input_array[rev], axis=self.axis, out=output_array[rev])
+        output_array *= -1
+        output_array += 0.5*input_array
+
 @inheritdocstrings
 class ShenDirichletBasis(LaguerreBase):
     """Shen Laguerre basis for Dirichlet boundary conditions
@@ -282,7 +295,8 @@ class ShenDirichletBasis(LaguerreBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
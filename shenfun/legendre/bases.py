@@ -9,10 +9,10 @@ import numpy as np
 from numpy.polynomial import legendre as leg
 from scipy.special import eval_legendre
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, work, Transform, islicedict, \
+from shenfun.spectralbase import SpectralBase, work, work_pool, Transform, islicedict, \
     slicedict
 from shenfun.utilities import inheritdocstrings
-from .lobatto import legendre_lobatto_nodes_and_weights
+from shenfun.utilities.quadrature import legendre_gauss, legendre_lobatto
 
 __all__ = ['LegendreBase', 'Basis', 'ShenDirichletBasis',
            'ShenBiharmonicBasis', 'ShenNeumannBasis', 'BCBasis']
@@ -61,9 +61,9 @@ class LegendreBase(SpectralBase):
         if N is None:
             N = self.N
         if self.quad == "LG":
-            points, weights = leg.leggauss(N)
+            points, weights = legendre_gauss(N)
         elif self.quad == "GL":
-            points, weights = legendre_lobatto_nodes_and_weights(N)
+            points, weights = legendre_lobatto(N)
         else:
             raise NotImplementedError
 
@@ -125,10 +125,14 @@ class LegendreBase(SpectralBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         U = fftw.aligned(shape, dtype=dtype)
         V = fftw.aligned(shape, dtype=dtype)
         U.fill(0)
@@ -146,6 +150,7 @@ class LegendreBase(SpectralBase):
         self.scalar_product = Transform(self.scalar_product, None, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
     def get_orthogonal(self):
         return Basis(self.N, quad=self.quad, domain=self.domain)
@@ -188,6 +193,11 @@ class Basis(LegendreBase):
     def is_orthogonal(self):
         return True
 
+    def _derivative_recurrence(self, N):
+        # L_n = (L'_{n+1} - L'_{n-1})/(2n+1)
+        n = np.arange(N+1, dtype=float)
+        return -1/(2*n+1), np.zeros(N), 1/(2*n[:N]+1)
+
 @inheritdocstrings
 class ShenDirichletBasis(LegendreBase):
     """Shen Legendre basis for Dirichlet boundary conditions
@@ -344,7 +354,8 @@ class ShenDirichletBasis(LegendreBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -496,7 +507,8 @@ class ShenNeumannBasis(LegendreBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -675,7 +687,8 @@ class ShenBiharmonicBasis(LegendreBase):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
@@ -2,12 +2,13 @@
 
 import numpy as np
 import scipy.linalg as scipy_la
-from shenfun.optimization import optimizer
-from shenfun.optimization.cython import la
+from shenfun.optimization import optimizer, optimized_module
 from shenfun.utilities import inheritdocstrings
 from shenfun.la import TDMA as la_TDMA
 from shenfun.matrixbase import TPMatrix
 
+la = optimized_module('la')
+
 @inheritdocstrings
 class TDMA(la_TDMA):
     """Tridiagonal matrix solver
@@ -363,7 +364,7 @@ class Biharmonic(object):
                 B_scale *= self.B.pmat.scale
                 S_scale *= self.S.pmat.scale
         elif len(args) == 6:
-            S_scale = np.asscalar(args[3])
+            S_scale = np.asarray(args[3]).item()
             A_scale = args[4]
             B_scale = args[5]
 
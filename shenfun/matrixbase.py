@@ -141,20 +141,66 @@ Jacobi basis:
 
 """
 from __future__ import division
-from copy import deepcopy
+from copy import copy, deepcopy
 from numbers import Number, Integral
 import numpy as np
-from scipy.sparse import bmat, dia_matrix, kron, diags as sp_diags
-from scipy.sparse.linalg import spsolve
 from mpi4py import MPI
 from .utilities import inheritdocstrings
+from .optimization import optimizer
 
 __all__ = ['SparseMatrix', 'SpectralMatrix', 'extract_diagonal_matrix',
-           'check_sanity', 'get_dense_matrix', 'TPMatrix', 'BlockMatrix',
-           'Identity']
+           'check_sanity', 'get_dense_matrix', 'get_banded_matrix', 'TPMatrix',
+           'BlockMatrix', 'Identity', 'CoefficientOperator', 'MatrixSum']
 
 comm = MPI.COMM_WORLD
 
+@optimizer
+def Banded_matvec(ab, kl, ku, v, c):
+    """Add matrix vector product along the middle axis of 3D arrays to c
+
+    Parameters
+    ----------
+    ab : 2D array
+        Matrix of shape (N, M) in LAPACK banded storage, see
+        :meth:`.SparseMatrix.banded`
+    kl, ku : int
+        Number of sub- and superdiagonals
+    v : 3D array of shape (P, M, Q)
+    c : 3D array of shape (P, N, Q)
+    """
+    N, M = c.shape[1], ab.shape[1]
+    for k in range(-kl, ku+1):
+        i0, i1 = max(0, -k), min(N, M-k)
+        if i1 > i0:
+            c[:, i0:i1] += ab[ku-k, i0+k:i1+k, np.newaxis]*v[:, i0+k:i1+k]
+
+def _folded_scale(scale):
+    """Return the part of scale that is folded into stored matrices
+
+    A scale with only one item is returned as a Number, whereas a scale that
+    is an array is not folded, and 1 is returned.
+    """
+    if np.size(scale) == 1:
+        return np.asarray(scale).item()
+    return 1
+
+def _same_scale(s0, s1):
+    """Return whether scales s0 and s1 are equal"""
+    if np.size(s0) == 1 and np.size(s1) == 1:
+        return np.asarray(s0).item() == np.asarray(s1).item()
+    return np.array_equal(s0, s1)
+
+def _same_diagonals(A, d):
+    """Return whether the diagonals of matrix A equal those of dictionary d"""
+    if len(A) != len(d):
+        return False
+    for key, val in A.items():
+        if key not in d:
+            return False
+        if not np.array_equal(val, d[key]):
+            return False
+    return True
+
 class SparseMatrix(dict):
     r"""Base class for sparse matrices.
 
@@ -196,9 +242,47 @@ class SparseMatrix(dict):
     def __init__(self, d, shape, scale=1.0):
         dict.__init__(self, d)
         self.shape = shape
-        self._diags = dia_matrix((1, 1))
+        self._banded = None
+        self._shared = set()
         self.scale = scale
 
+    def __getitem__(self, key):
+        val = dict.__getitem__(self, key)
+        if key in getattr(self, '_shared', ()):
+            # Copy on write. The diagonal is shared with another matrix, and
+            # the caller may modify it in place
+            self._shared.discard(key)
+            if isinstance(val, np.ndarray):
+                val = val.copy()
+                dict.__setitem__(self, key, val)
+        return val
+
+    def __setitem__(self, key, val):
+        dict.__setitem__(self, key, val)
+        getattr(self, '_shared', set()).discard(key)
+        self._banded = None
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        getattr(self, '_shared', set()).discard(key)
+        self._banded = None
+
+    def _share(self, keys):
+        """Mark diagonals as shared with another matrix
+
+        Shared diagonals are copied on first access through indexing, such
+        that modifying a diagonal in place, like ``A[0] *= 2``, never
+        changes another matrix.
+        """
+        self._shared.update(keys)
+
+    def _copy(self, scale):
+        """Return copy of self with given scale, sharing the diagonals"""
+        f = SparseMatrix(dict(self), self.shape, scale)
+        self._share(self.keys())
+        f._share(f.keys())
+        return f
+
     def matvec(self, v, c, format='dia', axis=0):
         """Matrix vector product
 
@@ -215,18 +299,33 @@ class SparseMatrix(dict):
 
              - csr - Compressed sparse row format
              - dia - Sparse matrix with DIAgonal storage
+             - banded - LAPACK banded storage, see :meth:`banded`
              - python - Use numpy and vectorization
              - self - To be implemented in subclass
              - cython - Cython implementation that may be implemented in subclass
+
+             Formats not implemented fall back on 'csr'.
         axis : int, optional
             The axis over which to take the matrix vector product
 
+        Note
+        ----
+        A scale that is an array is broadcast against c.
+
         """
         #assert v.shape == c.shape
         N, M = self.shape
         c.fill(0)
 
+        if format == 'banded':
+            if self._matvec_banded(v, c, axis):
+                return c
+            format = 'python'
+        elif format not in ('csr', 'dia', 'python'): # Fallback on 'csr'
+            format = 'csr'
+
         # Roll relevant axis to first
+        c0 = c
         if axis > 0:
             v = np.moveaxis(v, axis, 0)
             c = np.moveaxis(c, axis, 0)
@@ -239,22 +338,119 @@ class SparseMatrix(dict):
                     c[-key:min(N, M-key)] += val*v[:min(M, N+key)]
                 else:
                     c[:min(N, M-key)] += val*v[key:min(M, N+key)]
-            c *= self.scale
+            self.scale_array(c0)
 
         else:
-            if format not in ('csr', 'dia'): # Fallback on 'csr'. Should probably throw warning
-                format = 'csr'
             diags = self.diags(format=format)
             P = int(np.prod(v.shape[1:]))
             y = diags.dot(v[:M].reshape(M, P)).squeeze()
             d = tuple([slice(0, m) for m in y.shape])
             c[d] = y.reshape(c[d].shape)
+            if np.size(self.scale) > 1:
+                c0 *= self.scale
 
-        if axis > 0:
-            c = np.moveaxis(c, 0, axis)
-            v = np.moveaxis(v, 0, axis)
+        return c0
 
-        return c
+    def _matvec_banded(self, v, c, axis):
+        """Compute c = dot(self, v) along axis using banded storage
+
+        The arrays are viewed as 3D arrays of shape (P, N, Q), where N is the
+        length of axis, such that the product is computed without moving axes
+        or copying data. Returns False, and computes nothing, if c cannot be
+        viewed like this, or if its dtype is not suitable.
+        """
+        if len(self) == 0:
+            return False
+        dtype = c.dtype
+        if not (np.can_cast(self._band_dtype(), dtype, 'same_kind') and
+                np.can_cast(v.dtype, dtype, 'same_kind') and
+                np.can_cast(np.result_type(self.scale), dtype, 'same_kind')):
+            return False
+        P = int(np.prod(c.shape[:axis]))
+        Q = int(np.prod(c.shape[axis+1:]))
+        c3 = c.reshape((P, c.shape[axis], Q))
+        if not np.may_share_memory(c3, c):
+            return False
+        v3 = v.astype(dtype, copy=False).reshape((P, v.shape[axis], Q))
+        ab, kl, ku = self.banded(dtype)
+        N, M = self.shape
+        Banded_matvec(ab, kl, ku, v3[:, :M], c3[:, :N])
+        if np.size(self.scale) > 1:
+            c *= self.scale
+        return True
+
+    def _band_cache(self):
+        """Return dictionary of cached storage and factorizations of self
+
+        The cache is valid as long as the shape, the scale and the diagonals
+        of self are unchanged. The diagonals are compared with copies taken
+        when the cache was created, such that also diagonals modified in
+        place, e.g., with ``A[2][:] = 1``, are detected. A scale that is an
+        array is not part of the cached matrices.
+        """
+        scale = _folded_scale(self.scale)
+        cache = self._banded
+        if (cache is None or cache['scale'] != scale or
+                cache['shape'] != self.shape or
+                not _same_diagonals(self, cache['diagonals'])):
+            diagonals = {key: val.copy() if isinstance(val, np.ndarray) else val
+                         for key, val in self.items()}
+            cache = {'scale': scale, 'shape': self.shape, 'diagonals': diagonals}
+            self._banded = cache
+        return cache
+
+    def _band_dtype(self):
+        cache = self._band_cache()
+        if 'dtype' not in cache:
+            cache['dtype'] = np.result_type(np.asarray(cache['scale']),
+                                            *[np.asarray(val) for val in self.values()])
+        return cache['dtype']
+
+    def banded(self, dtype=None):
+        """Return matrix in LAPACK banded storage
+
+        The diagonal with offset k is stored in row ku-k of the returned
+        array ab, such that ``ab[ku+i-j, j] = self[i, j]``, where kl and ku
+        are the number of sub- and superdiagonals. The array has shape
+        (kl+ku+1, M) for a matrix of shape (N, M). The storage is computed
+        only once and reused.
+
+        Parameters
+        ----------
+        dtype : numpy dtype, optional
+            The dtype of the returned array. Defaults to the dtype of the
+            diagonals.
+
+        Returns
+        -------
+        ab : array
+            The diagonals in banded storage
+        kl : int
+            The number of subdiagonals
+        ku : int
+            The number of superdiagonals
+
+        Note
+        ----
+        The returned array is scaled by self.scale, unless the scale is an
+        array.
+
+        """
+        cache = self._band_cache()
+        dtype = np.dtype(self._band_dtype() if dtype is None else dtype)
+        if ('ab', dtype) not in cache:
+            N, M = self.shape
+            keys = list(self.keys())
+            kl, ku = max(0, -min(keys)), max(0, max(keys))
+            ab = np.zeros((kl+ku+1, M), dtype=dtype)
+            for key, val in self.items():
+                i0, i1 = max(0, -key), min(N, M-key)
+                if i1 > i0:
+                    ab[ku-key, i0+key:i1+key] = val if np.ndim(val) == 0 else val[:i1-i0]
+            if cache['scale'] != 1:
+                ab *= cache['scale']
+            cache['ab', dtype] = (ab, kl, ku)
+        return cache['ab', dtype]
 
     def diags(self, format='dia'):
         """Return a regular sparse matrix of specified format
@@ -269,18 +465,17 @@ class SparseMatrix(dict):
 
         Note
         ----
-        This method returns the matrix scaled by self.scale.
+        This method returns the matrix scaled by self.scale, unless the
+        scale is an array.
 
         """
-        if self._diags.shape != self.shape or self._diags.format != format:
-            self._diags = sp_diags(list(self.values()), list(self.keys()),
-                                   shape=self.shape, format=format)
-            scale = self.scale
-            if isinstance(scale, np.ndarray):
-                scale = np.atleast_1d(scale).item()
-            self._diags *= scale
-
-        return self._diags
+        cache = self._band_cache()
+        if ('diags', format) not in cache:
+            from scipy.sparse import diags as sp_diags
+            A = sp_diags(list(self.values()), list(self.keys()),
+                         shape=self.shape, format=format)
+            cache['diags', format] = A*cache['scale']
+        return cache['diags', format]
 
     def __eq__(self, a):
         if self.shape != a.shape:
@@ -289,7 +484,7 @@ class SparseMatrix(dict):
             return False
         if (np.abs(self.diags('csr') - a.diags('csr')) >= 2e-8).nnz > 0:
             return False
-        if self.scale != a.scale:
+        if not _same_scale(self.scale, a.scale):
             return False
         return True
 
@@ -299,14 +494,17 @@ class SparseMatrix(dict):
     def __imul__(self, y):
         """self.__imul__(y) <==> self*=y"""
         assert isinstance(y, Number)
-        self.scale *= y
+        self.scale = self.scale*y
         return self
 
     def __mul__(self, y):
-        """Returns copy of self.__mul__(y) <==> self*y"""
+        """Returns copy of self.__mul__(y) <==> self*y
+
+        The copy shares the diagonals with self until either matrix modifies
+        them, see :meth:`__getitem__`.
+        """
         if isinstance(y, Number):
-            return SparseMatrix(deepcopy(dict(self)), self.shape,
-                                scale=self.scale*y)
+            return self._copy(self.scale*y)
         elif isinstance(y, np.ndarray):
             c = np.empty_like(y)
             c = self.matvec(y, c)
@@ -326,8 +524,7 @@ class SparseMatrix(dict):
 
         """
         if isinstance(y, Number):
-            return SparseMatrix(deepcopy(dict(self)), self.shape,
-                                scale=self.scale/y)
+            return self._copy(self.scale/y)
         elif isinstance(y, np.ndarray):
             b = np.zeros_like(y)
             b = self.solve(y, b)
@@ -339,89 +536,124 @@ class SparseMatrix(dict):
         """Returns copy self.__div__(y) <==> self/y"""
         return self.__div__(y)
 
-    def __add__(self, d):
-        """Return copy of self.__add__(y) <==> self+d"""
-        if self == d:
-            f = SparseMatrix(deepcopy(dict(self)), self.shape,
-                             self.scale+d.scale)
+    def _combine(self, d, sign):
+        """Return diagonals and scale of self + sign*d
+
+        Diagonals are scaled and added into new arrays, and diagonals that
+        need no arithmetic are shared. The diagonals of self and d are never
+        modified.
+
+        Returns
+        -------
+        3-tuple or None
+            The diagonals in a new dictionary, the scale, and the shared
+            diagonals as a list of 2-tuples (matrix, key). Returns None if
+            the sum cannot be represented by one matrix, which is the case
+            for matrices with different array scales.
+        """
+        s0, s1 = self.scale, d.scale
+        if np.size(s0) == 1 and np.size(s1) == 1:
+            s0, s1, scale = _folded_scale(s0), sign*_folded_scale(s1), 1
+        elif _same_scale(s0, s1):
+            s0, s1, scale = 1, sign, s0
         else:
-            f = SparseMatrix(deepcopy(dict(self)), self.shape)
-            assert isinstance(d, dict)
-            for key, val in d.items():
-                if key in f:
-                    # Check if symmetric and make copy if necessary
-                    if -key in f:
-                        if id(f[key]) == id(f[-key]):
-                            f[-key] = deepcopy(f[key])
-                    f[key] = self.scale*f[key] + d.scale*val
+            return None
+        f = {}
+        shared = []
+        for key, val in self.items():
+            if key in d:
+                f[key] = s0*val + s1*dict.__getitem__(d, key)
+            elif s0 == 1:
+                f[key] = val
+                shared.append((self, key))
+            else:
+                f[key] = s0*val
+        for key, val in d.items():
+            if key not in f:
+                if s1 == 1:
+                    f[key] = val
+                    shared.append((d, key))
                 else:
-                    f[key] = d.scale*val
-
-        return f
+                    f[key] = s1*val
+        return f, scale, shared
 
-    def __iadd__(self, d):
-        """self.__iadd__(d) <==> self += d"""
-        assert isinstance(d, dict)
+    def _sum(self, d, sign):
+        """Return copy of self + sign*d"""
+        if self == d:
+            return self._copy(self.scale+sign*d.scale)
+        comb = self._combine(d, sign)
+        if comb is None:
+            return MatrixSum((self, d), (1, sign))
+        f, scale, shared = comb
+        A = SparseMatrix(f, self.shape, scale)
+        for mat, key in shared:
+            mat._share((key,))
+            A._share((key,))
+        return A
+
+    def _isum(self, d, sign):
+        """Add sign*d to self in place"""
         assert d.shape == self.shape
         if self == d:
-            self.scale += d.scale
-        else:
-            for key, val in d.items():
-                if key in self:
-                    # Check if symmetric and make copy if necessary
-                    self[key] = self[key]*self.scale
-                    if -key in self:
-                        if id(self[key]) == id(self[-key]):
-                            self[-key] = deepcopy(self[key])
-                    self[key] += d.scale*val
-                else:
-                    self[key] = d.scale*val
-            self.scale = 1
+            self.scale = self.scale + sign*d.scale
+            return self
+        comb = self._combine(d, sign)
+        if comb is None:
+            return MatrixSum((self, d), (1, sign))
+        f, scale, shared = comb
+        kept = self._shared
+        dict.clear(self)
+        dict.update(self, f)
+        self.scale = scale
+        self._banded = None
+        self._shared = set()
+        for mat, key in shared:
+            if mat is not self:
+                mat._share((key,))
+                self._share((key,))
+            elif key in kept:
+                self._share((key,))
         return self
 
+    def __add__(self, d):
+        """Return copy of self.__add__(y) <==> self+d"""
+        if isinstance(d, MatrixSum):
+            return NotImplemented
+        assert isinstance(d, dict)
+        return self._sum(d, 1)
+
+    def __iadd__(self, d):
+        """self.__iadd__(d) <==> self += d
+
+        Returns a :class:`.MatrixSum` if d cannot be added to self, which is
+        the case for matrices with different array scales.
+        """
+        if isinstance(d, MatrixSum):
+            return NotImplemented
+        assert isinstance(d, dict)
+        return self._isum(d, 1)
+
     def __sub__(self, d):
         """Return copy of self.__sub__(d) <==> self-d"""
+        if isinstance(d, MatrixSum):
+            return NotImplemented
         assert isinstance(d, dict)
-        if self == d:
-            f = SparseMatrix(deepcopy(dict(self)), self.shape,
-                             self.scale-d.scale)
-        else:
-            f = SparseMatrix(deepcopy(dict(self)), self.shape, 1.0)
-            for key, val in d.items():
-                if key in f:
-                    # Check if symmetric and make copy if necessary
-                    if -key in f:
-                        if id(f[key]) == id(f[-key]):
-                            f[-key] = deepcopy(f[key])
-                    f[key] = self.scale*f[key] - d.scale*val
-                else:
-                    f[key] = -d.scale*val
-
-        return f
+        return self._sum(d, -1)
 
     def __isub__(self, d):
-        """self.__isub__(d) <==> self -= d"""
+        """self.__isub__(d) <==> self -= d
+
+        Returns a :class:`.MatrixSum` if d cannot be subtracted from self,
+        which is the case for matrices with different array scales.
+        """
+        if isinstance(d, MatrixSum):
+            return NotImplemented
         assert isinstance(d, dict)
-        assert d.shape == self.shape
-        if self == d:
-            self.scale -= d.scale
-        else:
-            for key, val in d.items():
-                if key in self:
-                    self[key] = self[key]*self.scale
-                    # Check if symmetric and make copy if necessary
-                    if -key in self:
-                        if id(self[key]) == id(self[-key]):
-                            self[-key] = deepcopy(self[key])
-                    self[key] -= d.scale*val
-                else:
-                    self[key] = -d.scale*val
-            self.scale = 1
-        return self
+        return self._isum(d, -1)
 
     def __neg__(self):
         """self.__neg__() <==> self *= -1"""
-        self.scale *= -1
+        self.scale = -self.scale
         return self
 
     def __hash__(self):
@@ -462,7 +694,9 @@ class SparseMatrix(dict):
 
         Note
         ----
-        Vectors may be one- or multidimensional.
+        Vectors may be one- or multidimensional. The matrix is factorized
+        in LAPACK banded storage on the first call, and the factorization is
+        reused as long as the matrix is not modified.
 
         """
         assert self.shape[0] == self.shape[1]
@@ -473,25 +707,66 @@ class SparseMatrix(dict):
         else:
             assert u.shape == b.shape
 
-        # Roll relevant axis to first
-        if axis > 0:
-            u = np.moveaxis(u, axis, 0)
-            if u is not b:
-                b = np.moveaxis(b, axis, 0)
+        # View all lines along axis as columns of a 2D array
+        N = self.shape[0]
+        br = np.moveaxis(b, axis, 0).reshape((N, -1))
+        x = self._solve_banded(br)
+        if x is None:
+            from scipy.sparse.linalg import spsolve
+            x = spsolve(self.diags('csc'), br)
+        um = np.moveaxis(u, axis, 0)
+        um[...] = x.reshape(um.shape)
+        if np.size(self.scale) > 1:
+            u /= self.scale
+        return u
 
-        if b.ndim == 1:
-            u[:] = spsolve(self.diags('csr'), b)
-        else:
-            N = b.shape[0]
-            P = np.prod(b.shape[1:])
-            u[:] = spsolve(self.diags('csr'), b.reshape((N, P))).reshape(u.shape)
+    def _band_factor(self):
+        """Return cached LAPACK factorization of square matrix
 
-        if axis > 0:
-            u = np.moveaxis(u, 0, axis)
-            if u is not b:
-                b = np.moveaxis(b, 0, axis)
-        u /= self.scale
-        return u
+        Symmetric positive definite real matrices are factorized with a
+        banded Cholesky (pbtrf), and all other matrices with a banded LU
+        decomposition (gbtrf). Returns None if the matrix is singular.
+        """
+        cache = self._band_cache()
+        if 'lu' not in cache:
+            from scipy.linalg.lapack import get_lapack_funcs
+            ab, kl, ku = self.banded()
+            N = self.shape[0]
+            lu = None
+            if kl == ku and not np.iscomplexobj(ab) and np.all(
+                    [np.allclose(ab[ku-k, k:], ab[ku+k, :N-k]) for k in range(1, ku+1)]):
+                pbtrf, = get_lapack_funcs(('pbtrf',), (ab,))
+                cb, info = pbtrf(ab[:ku+1], lower=0)
+                if info == 0:
+                    lu = ('pbtrs', cb)
+            if lu is None:
+                gbtrf, = get_lapack_funcs(('gbtrf',), (ab,))
+                ab2 = np.zeros((2*kl+ku+1, N), dtype=ab.dtype)
+                ab2[kl:] = ab
+                lub, piv, info = gbtrf(ab2, kl, ku, overwrite_ab=1)
+                if info == 0:
+                    lu = ('gbtrs', lub, kl, ku, piv)
+            cache['lu'] = lu
+        return cache['lu']
+
+    def _solve_banded(self, b):
+        """Solve for all columns of 2D array b using the cached factorization
+
+        Returns None if the matrix is singular.
+        """
+        lu = self._band_factor()
+        if lu is None:
+            return None
+        if np.iscomplexobj(b) and not np.iscomplexobj(lu[1]):
+            return self._solve_banded(b.real) + 1j*self._solve_banded(b.imag)
+        from scipy.linalg.lapack import get_lapack_funcs
+        trs, = get_lapack_funcs((lu[0],), (lu[1],))
+        if lu[0] == 'pbtrs':
+            x, info = trs(lu[1], b, lower=0)
+        else:
+            x, info = trs(lu[1], lu[2], lu[3], b, lu[4])
+        assert info == 0
+        return x
 
     def isdiagonal(self):
         if len(self) == 1:
@@ -534,6 +809,9 @@ class SpectralMatrix(SparseMatrix):
         As trial, but representing matrix row.
     scale : number, optional
         Scale matrix with this number
+    measure : number, sympy Expr or :class:`.Function`, optional
+        Variable coefficient :math:`f` of the inner product
+        :math:`(\phi_k, f \phi_j)_w`. See :func:`get_banded_matrix`.
 
     Examples
     --------
@@ -574,23 +852,46 @@ class SpectralMatrix(SparseMatrix):
     average value.
 
     """
-    def __init__(self, d, test, trial, scale=1.0):
+    def __init__(self, d, test, trial, scale=1.0, measure=1):
         assert isinstance(test[1], (int, np.integer))
         assert isinstance(trial[1], (int, np.integer))
         self.testfunction = test
         self.trialfunction = trial
+        if isinstance(measure, Number):
+            scale = scale*measure
+            measure = 1
+        self.measure = measure
         shape = (test[0].dim(), trial[0].dim())
         if d == {}:
-            D = get_dense_matrix(test, trial)[:shape[0], :shape[1]]
-            d = extract_diagonal_matrix(D)
+            if isinstance(measure, Number):
+                D = get_dense_matrix(test, trial)[:shape[0], :shape[1]]
+                d = extract_diagonal_matrix(D)
+            else:
+                d = get_banded_matrix(test, trial, measure)
         SparseMatrix.__init__(self, d, shape, scale)
-        if shape[0] == shape[1]:
+        self._solver = None
+
+    @property
+    def solver(self):
+        """Return solver for square matrix
+
+        The solver is created on first access, such that the linear algebra
+        module (and scipy.sparse) is only imported when needed.
+        """
+        if self.shape[0] != self.shape[1]:
+            raise AttributeError('Solver only available for square matrices')
+        if getattr(self, '_solver', None) is None:
             #if test[0].__class__.__name__ == 'ShenNeumannBasis':
             #    from shenfun.la import NeumannSolve
-            #    self.solver = NeumannSolve(self, test[0])
+            #    self._solver = NeumannSolve(self, test[0])
             #else:
             from shenfun.la import Solve
-            self.solver = Solve(self, test[0])
+            self._solver = Solve(self, self.testfunction[0])
+        return self._solver
+
+    @solver.setter
+    def solver(self, solver):
+        self._solver = solver
 
     def matvec(self, v, c, format='csr', axis=0):
         u = self.trialfunction[0]
@@ -638,8 +939,12 @@ class SpectralMatrix(SparseMatrix):
         return self.testfunction[0].axis
 
     def __hash__(self):
-        return hash(((self.testfunction[0].__class__, self.testfunction[1]),
-                     (self.trialfunction[0].__class__, self.trialfunction[1])))
+        key = ((self.testfunction[0].__class__, self.testfunction[1]),
+               (self.trialfunction[0].__class__, self.trialfunction[1]))
+        measure = getattr(self, 'measure', 1)
+        if isinstance(measure, Number):
+            return hash(key)
+        return hash(key + (measure if hasattr(measure, 'free_symbols') else id(measure),))
 
     def get_key(self):
         if self.__class__.__name__.endswith('mat'):
@@ -656,63 +961,57 @@ class SpectralMatrix(SparseMatrix):
             return False
         return self.get_key() == a.get_key()
 
+    def _copy(self, scale):
+        """Return copy of self with given scale, sharing the diagonals"""
+        f = SpectralMatrix(dict(self), self.testfunction, self.trialfunction,
+                           scale, measure=self.measure)
+        self._share(self.keys())
+        f._share(f.keys())
+        return f
+
     def __mul__(self, y):
         """Returns copy of self.__mul__(y) <==> self*y"""
-        if isinstance(y, Number):
-            f = SpectralMatrix(deepcopy(dict(self)), self.testfunction,
-                               self.trialfunction, self.scale*y)
-        elif isinstance(y, np.ndarray):
-            f = SparseMatrix.__mul__(self, y)
-
-        return f
+        return SparseMatrix.__mul__(self, y)
 
     def __div__(self, y):
         """Returns copy self.__div__(y) <==> self/y"""
-        if isinstance(y, Number):
-            f = SpectralMatrix(deepcopy(dict(self)), self.testfunction,
-                               self.trialfunction, self.scale/y)
-        elif isinstance(y, np.ndarray):
-            f = SparseMatrix.__div__(self, y)
-
-        return f
+        return SparseMatrix.__div__(self, y)
 
     def __add__(self, y):
         """Return copy of self.__add__(y) <==> self+y"""
+        if isinstance(y, MatrixSum):
+            return NotImplemented
         assert isinstance(y, dict)
-        # Check is the same matrix
-        if self == y:
-            f = SpectralMatrix(deepcopy(dict(self)), self.testfunction,
-                               self.trialfunction, self.scale+y.scale)
-        else:
-            f = SparseMatrix.__add__(self, y)
-        return f
+        return SparseMatrix._sum(self, y, 1)
 
     def __iadd__(self, d):
         """self.__iadd__(d) <==> self += d"""
-        SparseMatrix.__iadd__(self, d)
+        if isinstance(d, MatrixSum):
+            return NotImplemented
         if self == d:
-            return self
-        else: # downcast
-            return SparseMatrix(dict(self), self.shape)
+            return SparseMatrix.__iadd__(self, d)
+        f = SparseMatrix.__iadd__(self, d)
+        if f is self: # downcast
+            return SparseMatrix._copy(self, self.scale)
+        return f
 
     def __sub__(self, y):
         """Return copy of self.__sub__(y) <==> self-y"""
+        if isinstance(y, MatrixSum):
+            return NotImplemented
         assert isinstance(y, dict)
-        # Check is the same matrix
-        if self == y:
-            f = SpectralMatrix(deepcopy(dict(self)), self.testfunction,
-                               self.trialfunction, self.scale-y.scale)
-        else:
-            f = SparseMatrix.__sub__(self, y)
-        return f
+        return SparseMatrix._sum(self, y, -1)
 
     def __isub__(self, y):
         """self.__isub__(d) <==> self -= y"""
-        SparseMatrix.__isub__(self, y)
+        if isinstance(y, MatrixSum):
+            return NotImplemented
         if self == y:
-            return self
-        else: # downcast
-            return SparseMatrix(dict(self), self.shape)
+            return SparseMatrix.__isub__(self, y)
+        f = SparseMatrix.__isub__(self, y)
+        if f is self: # downcast
+            return SparseMatrix._copy(self, self.scale)
+        return f
 
 
 class Identity(SparseMatrix):
@@ -917,6 +1216,7 @@ class BlockMatrix(object):
             The format of the returned matrix. See `Scipy sparse matrices <https://docs.scipy.org/doc/scipy/reference/sparse.html>`_
 
         """
+        from scipy.sparse import bmat, kron
         from .spectralbase import MixedBasis
         bm = []
         for mi in self.mats:
@@ -1187,7 +1487,7 @@ class TPMatrix(object):
         for axis, mat in enumerate(self.mats):
             if not mat:
                 continue
-            if self.space[axis].family() == 'fourier':
+            if self.space[axis].family() in ('fourier', 'ensemble'):
                 if self.dimensions == 1: # Don't bother with the 1D case
                     continue
                 else:
@@ -1304,8 +1604,7 @@ class TPMatrix(object):
     def __mul__(self, a):
         """Returns copy of self.__mul__(a) <==> self*a"""
         if isinstance(a, Number):
-            TPMatrix(self.mats, self.space, self.scale*a,
-                     self.global_index, self.mixedbase)
+            return self._copy(self.scale*a)
 
         elif isinstance(a, np.ndarray):
             c = np.empty_like(a)
@@ -1330,8 +1629,7 @@ class TPMatrix(object):
     def __div__(self, a):
         """Returns copy self.__div__(a) <==> self/a"""
         if isinstance(a, Number):
-            return TPMatrix(self.mats, self.space, self.scale/a,
-                            self.global_index, self.mixedbase)
+            return self._copy(self.scale/a)
         elif isinstance(a, np.ndarray):
             b = np.zeros_like(a)
             b = self.solve(a, b)
@@ -1362,35 +1660,415 @@ class TPMatrix(object):
     def __ne__(self, a):
         return not self.__eq__(a)
 
+    def _copy(self, scale):
+        # Return copy of self with new scale. The matrices are shared.
+        f = copy(self)
+        f.scale = scale
+        return f
+
     def __add__(self, a):
-        """Return copy of self.__add__(a) <==> self+a"""
+        """Return copy of self.__add__(a) <==> self+a
+
+        If the matrices of a are not the same as those of self, then the
+        lazy sum :class:`.MatrixSum` is returned.
+        """
+        if isinstance(a, MatrixSum):
+            return NotImplemented
         assert isinstance(a, TPMatrix)
-        assert self == a
-        return TPMatrix(self.mats, self.space, self.scale+a.scale,
-                        self.global_index, self.mixedbase)
+        if self != a:
+            return MatrixSum((self, a))
+        return self._copy(self.scale+a.scale)
 
     def __iadd__(self, a):
         """self.__iadd__(a) <==> self += a"""
-        assert isinstance(a, TPMatrix)
-        assert self == a
+        if isinstance(a, MatrixSum) or self != a:
+            return self.__add__(a)
         self.scale = self.scale + a.scale
         return self
 
     def __sub__(self, a):
-        """Return copy of self.__sub__(a) <==> self-a"""
+        """Return copy of self.__sub__(a) <==> self-a
+
+        If the matrices of a are not the same as those of self, then the
+        lazy sum :class:`.MatrixSum` is returned.
+        """
+        if isinstance(a, MatrixSum):
+            return NotImplemented
         assert isinstance(a, TPMatrix)
-        assert self == a
-        return TPMatrix(self.mats, self.space, self.scale-a.scale,
-                        self.global_index, self.mixedbase)
+        if self != a:
+            return MatrixSum((self, a), (1, -1))
+        return self._copy(self.scale-a.scale)
 
     def __isub__(self, a):
         """self.__isub__(a) <==> self -= a"""
-        assert isinstance(a, TPMatrix)
-        assert self == a
+        if isinstance(a, MatrixSum) or self != a:
+            return self.__sub__(a)
         self.scale = self.scale - a.scale
         return self
 
 
+class MatrixSum(object):
+    r"""Lazy linear combination of matrices
+
+    The sum :math:`\sum_i c_i A_i` of the matrices :math:`A_i`, with
+    coefficients :math:`c_i`, is not computed when created, and the matrices
+    are neither copied nor modified. The sum is evaluated only when needed by
+    :meth:`matvec`, :meth:`solve`, :meth:`diags` or :meth:`banded`, and the
+    evaluated matrix, with its banded storage and factorization, is reused
+    until the coefficients or the matrices change. As such, operators like
+    :math:`B - \Delta t A` are cheap to rebuild whenever the time step
+    changes, by creating a new sum or by modifying the coefficients.
+
+    The sum of :class:`.SparseMatrix` terms is evaluated as one
+    :class:`.SparseMatrix`, such that the matrix vector product is computed
+    in one pass over the input array. Terms with different array scales
+    cannot be collected like this, and such sums are only available for
+    :meth:`matvec`. The sum of :class:`.TPMatrix` terms is
+    evaluated as a list of :class:`.TPMatrix`, where all terms with the same
+    matrices are collected into one term by adding their scales. This list
+    may be used with the solvers in :mod:`.la`.
+
+    Parameters
+    ----------
+    mats : sequence of :class:`.SparseMatrix` or :class:`.TPMatrix`
+        The matrices of the sum
+    coefficients : sequence, optional
+        The coefficient of each matrix. Numbers, or arrays that broadcast
+        with the scale of the matrix. Defaults to one for all matrices.
+
+    Example
+    -------
+    >>> from shenfun import Basis, TestFunction, TrialFunction, inner, div, \
+    ...     grad, MatrixSum
+    >>> SD = Basis(8, 'L', bc=(0, 0))
+    >>> u = TrialFunction(SD)
+    >>> v = TestFunction(SD)
+    >>> B = inner(v, u)
+    >>> A = inner(v, div(grad(u)))
+    >>> H = MatrixSum((B, A), (1, -0.1))
+    >>> H.coefficients[1] = -0.05   # New time step
+    >>> H = B - 0.05*MatrixSum((A,))  # Same operator
+    >>> H.shape
+    (6, 6)
+    """
+    def __init__(self, mats, coefficients=None):
+        self.mats = list(mats)
+        assert len(self.mats) > 0
+        if coefficients is None:
+            coefficients = [1]*len(self.mats)
+        self.coefficients = list(coefficients)
+        assert len(self.coefficients) == len(self.mats)
+        self._matrix = None
+        self._key = None
+
+    @property
+    def shape(self):
+        """Return shape of matrix"""
+        return getattr(self.mats[0], 'shape', None)
+
+    def is_tensorproduct(self):
+        """Return whether the matrices are instances of :class:`.TPMatrix`"""
+        return isinstance(self.mats[0], TPMatrix)
+
+    def evaluate(self):
+        """Return the evaluated sum
+
+        Returns
+        -------
+        :class:`.SparseMatrix` or list of :class:`.TPMatrix`
+        """
+        if self.is_tensorproduct():
+            assert all(isinstance(m, TPMatrix) for m in self.mats)
+            mats = []
+            for c, m in zip(self.coefficients, self.mats):
+                for f in mats:
+                    if f == m:
+                        f.scale = f.scale + c*m.scale
+                        break
+                else:
+                    mats.append(m._copy(c*m.scale))
+            return mats
+
+        mats = self._evaluate_sparse()
+        if len(mats) > 1:
+            raise ValueError('Sum of matrices with different array scales cannot be evaluated as one matrix')
+        return mats[0]
+
+    def _evaluate_sparse(self):
+        """Return the evaluated sum of :class:`.SparseMatrix` terms
+
+        Terms with scales that are numbers are collected into one matrix,
+        and so are terms with the same array scale. Returns a list of
+        :class:`.SparseMatrix`, with one item unless the terms have different
+        array scales.
+        """
+        assert all(isinstance(m, SparseMatrix) for m in self.mats)
+        # The band caches of the matrices are replaced whenever the matrices
+        # are modified, and they are kept alive here so their ids are unique
+        caches = [m._band_cache() for m in self.mats]
+        scales = [c*m.scale for c, m in zip(self.coefficients, self.mats)]
+        key = [(id(m), id(b)) for m, b in zip(self.mats, caches)]
+        if (self._matrix is None or self._key[0] != key or
+                not all(_same_scale(s0, s1) for s0, s1 in zip(self._key[2], scales))):
+            groups = []
+            for c, m in zip(self.coefficients, self.mats):
+                # Split the scale into a number and a common array
+                if np.size(c) == 1 and np.size(m.scale) == 1:
+                    scale, common = np.asarray(c*m.scale).item(), 1
+                elif np.size(c) == 1:
+                    scale, common = np.asarray(c).item(), m.scale
+                elif np.size(m.scale) == 1:
+                    scale, common = np.asarray(m.scale).item(), c
+                else:
+                    scale, common = 1, c*m.scale
+                for g in groups:
+                    if _same_scale(g[0], common):
+                        d = g[1]
+                        break
+                else:
+                    d = {}
+                    groups.append((common, d))
+                for k, val in m.items():
+                    d[k] = d[k] + scale*val if k in d else scale*val
+            self._matrix = [SparseMatrix(d, self.shape, scale=common)
+                            for common, d in groups]
+            self._key = (key, caches, scales)
+        return self._matrix
+
+    def matvec(self, v, c, format='csr', axis=0):
+        """Matrix vector product
+
+        Returns c = dot(self, v)
+
+        Parameters
+        ----------
+        v : array
+            Numpy input array
+        c : array
+            Numpy output array of same shape as v
+        format : str, optional
+            Choice for computation, see :meth:`.SparseMatrix.matvec`. Not
+            used for :class:`.TPMatrix`.
+        axis : int, optional
+            The axis over which to take the matrix vector product. Not used
+            for :class:`.TPMatrix`.
+        """
+        if self.is_tensorproduct():
+            mats = self.evaluate()
+            kw = {}
+        else:
+            mats = self._evaluate_sparse()
+            kw = {'format': format, 'axis': axis}
+            if len(mats) == 1:
+                return mats[0].matvec(v, c, **kw)
+        c.fill(0)
+        w = np.zeros_like(c)
+        for m in mats:
+            w = m.matvec(v, w, **kw)
+            c += w
+        return c
+
+    def solve(self, b, u=None, axis=0):
+        """Solve matrix system Au = b
+
+        where A is the evaluated sum
+
+        Parameters
+        ----------
+        b : array
+            Array of right hand side on entry and solution on exit unless
+            u is provided.
+        u : array, optional
+            Output array
+        axis : int, optional
+            The axis over which to solve for if b and u are multidimensional.
+            Not used for :class:`.TPMatrix`.
+
+        Note
+        ----
+        A sum of :class:`.TPMatrix` with different matrices must be solved
+        with one of the solvers in :mod:`.la`, using the list of matrices
+        returned by :meth:`evaluate`.
+        """
+        if not self.is_tensorproduct():
+            return self.evaluate().solve(b, u=u, axis=axis)
+        mats = self.evaluate()
+        if len(mats) > 1:
+            raise NotImplementedError('Use a solver from shenfun.la with the matrices of evaluate()')
+        return mats[0].solve(b, u=u)
+
+    def diags(self, format='dia'):
+        """Return the evaluated sum as a regular scipy sparse matrix
+
+        Parameters
+        ----------
+        format : str, optional
+            Choice of matrix type (see scipy.sparse.diags)
+        """
+        return self.evaluate().diags(format=format)
+
+    def banded(self, dtype=None):
+        """Return the evaluated sum in LAPACK banded storage
+
+        See :meth:`.SparseMatrix.banded`
+        """
+        return self.evaluate().banded(dtype)
+
+    def __add__(self, a):
+        """Return copy of self.__add__(a) <==> self+a"""
+        if isinstance(a, MatrixSum):
+            return MatrixSum(self.mats+a.mats, self.coefficients+a.coefficients)
+        return MatrixSum(self.mats+[a], self.coefficients+[1])
+
+    def __radd__(self, a):
+        """Return copy of self.__radd__(a) <==> a+self"""
+        return MatrixSum([a]+self.mats, [1]+self.coefficients)
+
+    def __iadd__(self, a):
+        """self.__iadd__(a) <==> self += a"""
+        if isinstance(a, MatrixSum):
+            self.mats += a.mats
+            self.coefficients += a.coefficients
+        else:
+            self.mats.append(a)
+            self.coefficients.append(1)
+        return self
+
+    def __sub__(self, a):
+        """Return copy of self.__sub__(a) <==> self-a"""
+        if isinstance(a, MatrixSum):
+            return MatrixSum(self.mats+a.mats,
+                             self.coefficients+[-c for c in a.coefficients])
+        return MatrixSum(self.mats+[a], self.coefficients+[-1])
+
+    def __rsub__(self, a):
+        """Return copy of self.__rsub__(a) <==> a-self"""
+        return MatrixSum([a]+self.mats, [1]+[-c for c in self.coefficients])
+
+    def __isub__(self, a):
+        """self.__isub__(a) <==> self -= a"""
+        if isinstance(a, MatrixSum):
+            self.mats += a.mats
+            self.coefficients += [-c for c in a.coefficients]
+        else:
+            self.mats.append(a)
+            self.coefficients.append(-1)
+        return self
+
+    def __mul__(self, y):
+        """Returns copy of self.__mul__(y) <==> self*y, or the matrix vector
+        product if y is an array"""
+        if isinstance(y, Number):
+            return MatrixSum(self.mats, [c*y for c in self.coefficients])
+        elif isinstance(y, np.ndarray):
+            c = np.zeros_like(y)
+            return self.matvec(y, c)
+        raise NotImplementedError
+
+    def __rmul__(self, y):
+        """Returns copy of self.__rmul__(y) <==> y*self"""
+        return self.__mul__(y)
+
+    def __imul__(self, y):
+        """self.__imul__(y) <==> self*=y"""
+        assert isinstance(y, Number)
+        self.coefficients = [c*y for c in self.coefficients]
+        return self
+
+    def __div__(self, y):
+        """Returns copy of self.__div__(y) <==> self/y, or the solution of
+        the linear system if y is an array"""
+        if isinstance(y, Number):
+            return MatrixSum(self.mats, [c/y for c in self.coefficients])
+        elif isinstance(y, np.ndarray):
+            b = np.zeros_like(y)
+            return self.solve(y, b)
+        raise NotImplementedError
+
+    def __truediv__(self, y):
+        """Returns copy self.__div__(y) <==> self/y"""
+        return self.__div__(y)
+
+    def __neg__(self):
+        """self.__neg__() <==> self *= -1"""
+        self.coefficients = [-c for c in self.coefficients]
+        return self
+
+
+class CoefficientOperator(object):
+    r"""Matrix-free operator for a form with a variable coefficient
+
+    The operator represents :math:`(v, f \partial^{\alpha} u)_w` for a
+    coefficient :math:`f` that is not a product of coefficients for each
+    direction, or that varies along a periodic direction, such that the form
+    cannot be assembled as a :class:`.TPMatrix`. The product with expansion
+    coefficients :math:`\hat{u}` is computed pseudospectrally: the
+    derivatives with :class:`.Derivative`, then a backward transform, a
+    multiplication with :math:`f` on the quadrature mesh and, finally, the
+    scalar product with the test functions. The operator may be used in
+    place of a matrix in linear forms and in :class:`.LinearOperator`.
+
+    Parameters
+    ----------
+    test : :class:`.TensorProductSpace`
+        The test space
+    trial : :class:`.TensorProductSpace`
+        The trial space
+    k : sequence of ints
+        The number of derivatives of the trial function along each axis
+    measure : sympy Expr or :class:`.Array`
+        The coefficient :math:`f`, either a function of x, y and z or an
+        Array of the coefficient on the quadrature mesh
+    scale : number, optional
+        Scale operator with this number
+    global_index : 2-tuple, optional
+        Indices (test, trial) into mixed space :class:`.MixedTensorProductSpace`.
+    mixedbase : :class:`.MixedTensorProductSpace`, optional
+         Instance of the base space
+    """
+    def __init__(self, test, trial, k, measure, scale=1.0, global_index=(0, 0),
+                 mixedbase=None):
+        from .forms.arguments import Array, Function
+        from .forms.derivative import Derivative
+        self.space = test
+        self.trialspace = trial
+        self.k = tuple(k)
+        self.measure = measure
+        self.scale = scale
+        self.global_index = global_index
+        self.mixedbase = mixedbase
+        self.derivatives = []
+        space = trial
+        for axis, ki in enumerate(k):
+            if ki > 0:
+                D = Derivative(space, axis, ki)
+                self.derivatives.append((D, Function(D.output_space)))
+                space = D.output_space
+        self._u = Array(space)
+        if hasattr(measure, 'free_symbols'):
+            import sympy
+            xyz = sympy.symbols('x,y,z')[:space.dimensions]
+            measure = sympy.lambdify(xyz, measure, 'numpy')(*space.local_mesh(True))
+        self._f = np.broadcast_to(measure, self._u.shape)*scale
+
+    def matvec(self, v, c):
+        from .forms.arguments import Function
+        if not isinstance(v, Function):
+            v = Function(self.trialspace, buffer=v)
+        for D, w in self.derivatives:
+            v = D(v, w)
+        u = v.backward(self._u)
+        u *= self._f
+        c = self.space.scalar_product(u, c)
+        return c
+
+    def get_refined(self, test):
+        """Return operator for test space ``test`` of different size"""
+        trial = self.trialspace.get_refined([base.N for base in test.bases])
+        return CoefficientOperator(test, trial, self.k, self.measure,
+                                   self.scale, self.global_index, self.mixedbase)
+
+
 def check_sanity(A, test, trial):
     """Sanity check for matrix.
 
@@ -1447,6 +2125,133 @@ def get_dense_matrix(test, trial):
     u = trial[0].evaluate_basis_derivative_all(x=x, k=trial[1])
     return np.dot(v.T*w[np.newaxis, :], np.conj(u))
 
+def get_banded_matrix(test, trial, measure, reltol=1e-12):
+    r"""Return diagonals of matrix with variable coefficient
+
+    The matrix :math:`(\phi_k^{(l)}, f \phi_j^{(m)})_w` is computed for a
+    coefficient :math:`f` that is expanded in the orthogonal polynomials of
+    the test basis, and truncated after the last significant coefficient, of
+    degree :math:`M`. Basis function :math:`k` contains polynomials of
+    degree :math:`k` to :math:`k+N-dim`, and the product with :math:`f`
+    widens this range by :math:`M` on both sides, such that the bandwidth of
+    the matrix is known in advance. Only diagonals within the band are
+    computed, using Gauss quadrature with :math:`N+M/2+1` points, which is
+    exact for the truncated coefficient, at a cost of :math:`\mathcal{O}(NM)`
+    per diagonal. Derivatives of basis functions contain all lower degrees,
+    and all diagonals on that side are then computed, before insignificant
+    diagonals are discarded.
+
+    The orthogonal Laguerre and Hermite bases are functions that decay at
+    infinity, and cannot represent a polynomial coefficient. For these
+    families the coefficient is instead evaluated at :math:`2N` quadrature
+    points, and all diagonals are computed.
+
+    Parameters
+    ----------
+    test : 2-tuple of (basis, int)
+        The basis is an instance of a class for one of the non-periodic bases.
+        The int represents the number of times the test function
+        should be differentiated. Representing matrix row.
+    trial : 2-tuple of (basis, int)
+        As test, but representing matrix column.
+    measure : sympy Expr or :class:`.Function`
+        The coefficient. A sympy Expr is a function of one coordinate of the
+        true domain, whereas a :class:`.Function` may be an expansion in any
+        1D basis.
+    reltol : float, optional
+        Only diagonals with max(:math:`|d|`)/max(:math:`|A|`) > reltol are
+        kept in the returned dictionary
+
+    Returns
+    -------
+    dict
+        The diagonals, with diagonal offsets as keys
+    """
+    base = test[0]
+    if base.family() == 'fourier':
+        raise NotImplementedError('Variable coefficients require non-periodic bases')
+    if base.family() == 'ensemble':
+        # Diagonal, with the coefficient of each member
+        if test[1] or trial[1]:
+            return {0: 0}
+        if hasattr(measure, 'free_symbols'):
+            import sympy
+            measure = sympy.lambdify(tuple(measure.free_symbols), measure, 'numpy')(base.values)
+        return {0: np.broadcast_to(np.asarray(measure), (base.N,)).copy()}
+    N = base.N
+    shape = (test[0].dim(), trial[0].dim())
+    lo, hi = 1-shape[0], shape[1]-1
+    if base.family() in ('laguerre', 'hermite'):
+        # The orthogonal bases are decaying functions, that cannot represent
+        # a polynomial coefficient. Evaluate f at the quadrature points, and
+        # compute all diagonals.
+        x, w = base.points_and_weights(2*N)
+        f = _measure_function(measure)(x)
+        M = None
+    else:
+        ortho, fh = _expand_measure(base, measure, 2*N-2)
+        M = fh.shape[0]-1
+        x, w = base.points_and_weights(N+M//2+1)
+        f = ortho.evaluate_basis_all(x=x)[:, :M+1].dot(fh)
+    V = test[0].evaluate_basis_derivative_all(x=x, k=test[1])[:, :shape[0]]
+    U = trial[0].evaluate_basis_derivative_all(x=x, k=trial[1])[:, :shape[1]]
+    U = (w*f)[:, np.newaxis]*U
+    if M is not None:
+        # Basis function k is a polynomial with degrees from k to k+N-dim, and
+        # derivatives have degrees from 0. The product with f adds M on both
+        # sides.
+        if test[1] == 0:
+            lo = max(lo, trial[1]-(trial[0].N-shape[1])-M)
+        if trial[1] == 0:
+            hi = min(hi, base.N-shape[0]-test[1]+M)
+    d = {}
+    for k in range(lo, hi+1):
+        i0, i1 = max(0, -k), min(shape[0], shape[1]-k)
+        d[k] = np.einsum('qi,qi->i', V[:, i0:i1], U[:, i0+k:i1+k])
+    dmax = max([abs(val).max() for val in d.values()])
+    return {k: val for k, val in d.items() if abs(val).max() > reltol*dmax}
+
+def _measure_function(measure):
+    """Return measure as a function of one coordinate"""
+    from .forms.arguments import Array, Function
+    if isinstance(measure, Array):
+        measure = measure.forward()
+    if isinstance(measure, Function):
+        return measure.eval
+    import sympy
+    sym = list(measure.free_symbols)
+    if len(sym) > 1:
+        raise ValueError('Coefficient must be a function of one coordinate')
+    return sympy.lambdify(sym, measure, 'numpy')
+
+def _expand_measure(base, measure, maxdegree, tol=1e-13):
+    """Return orthogonal basis and expansion coefficients of measure
+
+    The coefficient is interpolated on successively finer meshes until
+    resolved, and the expansion is truncated after the last significant
+    coefficient, but at most at degree ``maxdegree``.
+    """
+    from .forms.arguments import Array
+    func = _measure_function(measure)
+    ortho = base.get_orthogonal()
+    N = 16
+    while True:
+        B = ortho.get_refined(N)
+        fj = Array(B)
+        f = func(B.mesh())
+        fj[:] = np.real(f)
+        fh = fj.forward().copy()
+        if np.iscomplexobj(f):
+            fj[:] = np.imag(f)
+            fh = fh + 1j*fj.forward()
+        fmax = abs(fh).max()
+        if fmax == 0 or abs(fh[N//2:]).max() <= tol*fmax or N > 2*maxdegree:
+            break
+        N *= 2
+    M = np.nonzero(abs(fh) > tol*fmax)[0]
+    M = min(M[-1] if len(M) else 0, maxdegree)
+    return B, np.array(fh[:M+1])
+
 def extract_diagonal_matrix(M, abstol=1e-8, reltol=1e-12):
     """Return SparseMatrix version of dense matrix ``M``
 
@@ -9,23 +9,136 @@ from within the regular Python modules.
 import os
 import importlib
 from functools import wraps
+from .kernels import Kernel, kernels, get_kernel, register_variant, \
+    set_kernel_backend, clear_kernel_cache, is_double
 
 def optimizer(func):
-    """Decorator used to wrap calls to optimized versions of functions."""
-
-    mod = os.environ.get('SHENFUN_OPTIMIZATION', 'cython')
-    if mod.lower() not in ('cython', 'numba'):
-        # Use python function
-        #print(func.__name__ + ' not optimized')
-        return func
-    mod = importlib.import_module('shenfun.optimization.'+mod.lower())
-    fun = getattr(mod, func.__name__, func)
-    #if fun is func:
-    #    print(fun.__name__ + ' not optimized')
+    """Decorator used to wrap calls to optimized versions of functions.
+
+    The function is registered as a :class:`.Kernel`, and calls are
+    dispatched to the variant chosen by ``SHENFUN_OPTIMIZATION``, by a per
+    kernel override, or by autotuning. See :mod:`.kernels`.
+    """
+    kernel = Kernel(func)
+    kernels[kernel.name] = kernel
 
     @wraps(func)
     def wrapped_function(*args, **kwargs):
-        u0 = fun(*args, **kwargs)
+        u0 = kernel(*args, **kwargs)
         return u0
 
+    wrapped_function.kernel = kernel
     return wrapped_function
+
+def optimized_module(name):
+    """Return module of optimized functions
+
+    The Numba and Cython implementations use the same module and function
+    names, such that callers may use the returned module regardless of which
+    implementation is chosen through the environment variable
+    ``SHENFUN_OPTIMIZATION``. Cython is used unless Numba is chosen, since
+    there is no pure Python fallback for these modules.
+
+    The Cython functions are compiled for double precision only, so the
+    Cython module is wrapped in a :class:`.PrecisionModule` that forwards
+    calls with single precision arrays to the Numba module.
+
+    Parameters
+    ----------
+    name : str
+        Name of module, e.g., 'Matvec', 'la', 'evaluate', 'Cheb' or 'convolve'
+    """
+    mod = os.environ.get('SHENFUN_OPTIMIZATION', 'cython').lower()
+    if mod == 'numba':
+        return importlib.import_module('shenfun.optimization.numba.'+name)
+    return PrecisionModule(name)
+
+class PrecisionModule(object):
+    """Cython module forwarding single precision calls to Numba
+
+    Parameters
+    ----------
+    name : str
+        Name of module, e.g., 'Matvec', 'la', 'evaluate', 'Cheb' or 'convolve'
+    """
+    def __init__(self, name):
+        self.__name__ = 'shenfun.optimization.cython.'+name
+        self._module = importlib.import_module(self.__name__)
+        self._name = name
+        self._numba = None
+
+    def _single(self, fun_name):
+        if self._numba is None:
+            try:
+                self._numba = importlib.import_module('shenfun.optimization.numba.'+self._name)
+            except ImportError:
+                raise TypeError('Single precision requires Numba, since the Cython '
+                                'function {} is compiled for double precision only'.format(fun_name))
+        return getattr(self._numba, fun_name)
+
+    def __getattr__(self, fun_name):
+        fun = getattr(self._module, fun_name)
+        if not callable(fun):
+            return fun
+
+        @wraps(fun)
+        def dispatch(*args, **kwargs):
+            if is_double(args, kwargs):
+                return fun(*args, **kwargs)
+            return self._single(fun_name)(*args, **kwargs)
+
+        # Cache such that the dispatcher is only created once
+        setattr(self, fun_name, dispatch)
+        return dispatch
+
+def set_num_threads(n):
+    """Set the number of threads used by the threaded kernels
+
+    The 2D and 3D banded solvers and matvecs loop over independent lines in
+    parallel if shenfun is compiled with OpenMP (``SHENFUN_OPENMP=1 python
+    setup.py build_ext``). Without OpenMP the Cython kernels run serially
+    regardless of the number of threads. The Numba kernels are always
+    parallel, and the number of Numba threads is also set if Numba is the
+    chosen optimization, or if the kernels are autotuned. The default number
+    of threads is taken from the environment variable ``SHENFUN_NUM_THREADS``,
+    and is otherwise 1. Only the Numba threads are set if the Cython
+    extensions are not compiled.
+
+    Parameters
+    ----------
+    n : int
+        Number of threads
+    """
+    if os.environ.get('SHENFUN_OPTIMIZATION', 'cython').lower() in ('numba', 'autotune'):
+        try:
+            import numba
+            numba.set_num_threads(min(n, numba.config.NUMBA_NUM_THREADS))
+        except ImportError: # pragma: no cover
+            pass
+    try:
+        from .cython import la, Matvec
+    except ImportError: # pragma: no cover
+        return
+    la.set_num_threads(n)
+    Matvec.set_num_threads(n)
+
+def get_num_threads():
+    """Return number of threads used by the threaded Cython kernels
+
+    Returns 1 if the Cython kernels are not available.
+    """
+    try:
+        from .cython import la
+    except ImportError: # pragma: no cover
+        return 1
+    return la.get_num_threads()
+
+def openmp_enabled():
+    """Return whether the Cython kernels are compiled with OpenMP"""
+    try:
+        from .cython import la
+    except ImportError: # pragma: no cover
+        return False
+    return la.openmp_enabled()
+
+set_num_threads(int(os.environ.get('SHENFUN_NUM_THREADS', 1)))
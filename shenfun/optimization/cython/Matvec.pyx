@@ -15,11 +15,21 @@ ctypedef fused T:
     real_t
     complex_t
 
+# Number of threads used by the prange loops. Only effective if the module is
+# compiled with OpenMP (see setup.py), and otherwise the loops run serially.
+cdef int _num_threads = 1
+
+def set_num_threads(int n):
+    global _num_threads
+    _num_threads = max(n, 1)
+
+def get_num_threads():
+    return _num_threads
+
 def imult(T[:, :, ::1] array, real_t scale):
     cdef int i, j, k
 
-    #for i in prange(array.shape[0], nogil=True, num_threads=1):
-    for i in range(array.shape[0]):
+    for i in prange(array.shape[0], nogil=True, num_threads=_num_threads):
         for j in range(array.shape[1]):
             for k in range(array.shape[2]):
                 array[i, j, k] *= scale
@@ -496,7 +506,7 @@ cdef void Tridiagonal_matvec_ptr(T* v,
                                  real_t* dd,
                                  real_t* ud,
                                  int N,
-                                 int st):
+                                 int st) nogil:
     cdef:
         int i
 
@@ -523,12 +533,12 @@ def Tridiagonal_matvec2D_ptr(T[:, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             v_ptr = &v[0, j]
             b_ptr = &b[0, j]
             Tridiagonal_matvec_ptr(v_ptr, b_ptr, &ld[0], &dd[0], &ud[0], N, strides)
     elif axis == 1:
-        for i in range(v.shape[0]):
+        for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             v_ptr = &v[i, 0]
             b_ptr = &b[i, 0]
             Tridiagonal_matvec_ptr(v_ptr, b_ptr, &ld[0], &dd[0], &ud[0], N, strides)
@@ -547,19 +557,19 @@ def Tridiagonal_matvec3D_ptr(T[:, :, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[0, j, k]
                 b_ptr = &b[0, j, k]
                 Tridiagonal_matvec_ptr(v_ptr, b_ptr, &ld[0], &dd[0], &ud[0], N, strides)
     elif axis == 1:
-        for i in range(v.shape[0]):
+        for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[i, 0, k]
                 b_ptr = &b[i, 0, k]
                 Tridiagonal_matvec_ptr(v_ptr, b_ptr, &ld[0], &dd[0], &ud[0], N, strides)
     elif axis == 2:
-        for i in range(v.shape[0]):
+        for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(v.shape[1]):
                 v_ptr = &v[i, j, 0]
                 b_ptr = &b[i, j, 0]
@@ -617,7 +627,7 @@ cdef void Pentadiagonal_matvec_ptr(T* v,
                                    real_t* ud,
                                    real_t* udd,
                                    int N,
-                                   int st):
+                                   int st) nogil:
     cdef:
         int i
 
@@ -652,7 +662,7 @@ def Pentadiagonal_matvec3D_ptr(T[:, :, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[0, j, k]
                 b_ptr = &b[0, j, k]
@@ -660,7 +670,7 @@ def Pentadiagonal_matvec3D_ptr(T[:, :, ::1] v,
                                          &ud[0], &udd[0], N, strides)
 
     elif axis == 1:
-       for i in range(v.shape[0]):
+       for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[i, 0, k]
                 b_ptr = &b[i, 0, k]
@@ -668,7 +678,7 @@ def Pentadiagonal_matvec3D_ptr(T[:, :, ::1] v,
                                          &ud[0], &udd[0], N, strides)
 
     elif axis == 2:
-        for i in range(v.shape[0]):
+        for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(v.shape[1]):
                 v_ptr = &v[i, j, 0]
                 b_ptr = &b[i, j, 0]
@@ -691,14 +701,14 @@ def Pentadiagonal_matvec2D_ptr(T[:, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             v_ptr = &v[0, j]
             b_ptr = &b[0, j]
             Pentadiagonal_matvec_ptr(v_ptr, b_ptr, &ldd[0], &ld[0], &dd[0],
                                      &ud[0], &udd[0], N, strides)
 
     elif axis == 1:
-       for i in range(v.shape[0]):
+       for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             v_ptr = &v[i, 0]
             b_ptr = &b[i, 0]
             Pentadiagonal_matvec_ptr(v_ptr, b_ptr, &ldd[0], &ld[0], &dd[0],
@@ -1011,7 +1021,7 @@ cdef void Helmholtz_matvec_ptr(T* v,
                                real_t* ud,
                                real_t* bd,
                                int N,
-                               int st):
+                               int st) nogil:
     # b = (alfa*A + beta*B)*v
     # For B matrix ld = ud = -pi/2
     cdef:
@@ -1056,7 +1066,7 @@ def Helmholtz_matvec3D_ptr(T[:, :, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[0, j, k]
                 b_ptr = &b[0, j, k]
@@ -1064,7 +1074,7 @@ def Helmholtz_matvec3D_ptr(T[:, :, ::1] v,
                                      beta[0, j, k], &dd[0], &ud[0], &bd[0], N, strides)
 
     elif axis == 1:
-       for i in range(v.shape[0]):
+       for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[i, 0, k]
                 b_ptr = &b[i, 0, k]
@@ -1072,7 +1082,7 @@ def Helmholtz_matvec3D_ptr(T[:, :, ::1] v,
                                      beta[i, 0, k], &dd[0], &ud[0], &bd[0], N, strides)
 
     elif axis == 2:
-        for i in range(v.shape[0]):
+        for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(v.shape[1]):
                 v_ptr = &v[i, j, 0]
                 b_ptr = &b[i, j, 0]
@@ -1096,14 +1106,14 @@ def Helmholtz_matvec2D_ptr(T[:, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             v_ptr = &v[0, j]
             b_ptr = &b[0, j]
             Helmholtz_matvec_ptr(v_ptr, b_ptr, alfa[0, j],
                                  beta[0, j], &dd[0], &ud[0], &bd[0], N, strides)
 
     elif axis == 1:
-       for i in range(v.shape[0]):
+       for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             v_ptr = &v[i, 0]
             b_ptr = &b[i, 0]
             Helmholtz_matvec_ptr(v_ptr, b_ptr, alfa[i, 0],
@@ -1137,7 +1147,7 @@ cdef void Biharmonic_matvec_ptr(T* v,
                                 real_t* biu,
                                 real_t* biuu,
                                 int N,
-                                int st):
+                                int st) nogil:
     cdef:
         int i, j, k
         vector[double] ldd, ld, dd, ud, udd
@@ -1231,7 +1241,7 @@ def Biharmonic_matvec3D_ptr(T[:, :, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[0, j, k]
                 b_ptr = &b[0, j, k]
@@ -1240,7 +1250,7 @@ def Biharmonic_matvec3D_ptr(T[:, :, ::1] v,
                                       &aiu[0], &bill[0], &bil[0], &bii[0], &biu[0], &biuu[0], N, strides)
 
     elif axis == 1:
-       for i in range(v.shape[0]):
+       for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(v.shape[2]):
                 v_ptr = &v[i, 0, k]
                 b_ptr = &b[i, 0, k]
@@ -1249,7 +1259,7 @@ def Biharmonic_matvec3D_ptr(T[:, :, ::1] v,
                                       &aiu[0], &bill[0], &bil[0], &bii[0], &biu[0], &biuu[0], N, strides)
 
     elif axis == 2:
-        for i in range(v.shape[0]):
+        for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(v.shape[1]):
                 v_ptr = &v[i, j, 0]
                 b_ptr = &b[i, j, 0]
@@ -1285,7 +1295,7 @@ def Biharmonic_matvec2D_ptr(T[:, ::1] v,
 
     strides = v.strides[axis]/v.itemsize
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in prange(v.shape[1], nogil=True, num_threads=_num_threads):
             v_ptr = &v[0, j]
             b_ptr = &b[0, j]
             Biharmonic_matvec_ptr(v_ptr, b_ptr, a0, alfa[0, j],
@@ -1293,7 +1303,7 @@ def Biharmonic_matvec2D_ptr(T[:, ::1] v,
                                   &aiu[0], &bill[0], &bil[0], &bii[0], &biu[0], &biuu[0], N, strides)
 
     elif axis == 1:
-       for i in range(v.shape[0]):
+       for i in prange(v.shape[0], nogil=True, num_threads=_num_threads):
             v_ptr = &v[i, 0]
             b_ptr = &b[i, 0]
             Biharmonic_matvec_ptr(v_ptr, b_ptr, a0, alfa[i, 0],
@@ -1344,3 +1354,24 @@ def Biharmonic_matvec(v, b, a0, alfa, beta, sii, siu, siuu, ail, aii,
     elif v.ndim == 3:
         Biharmonic_matvec3D_ptr(v, b, a0, alfa, beta, sii, siu, siuu, ail, aii,
                                 aiu, bill, bil, bii, biu, biuu, axis)
+
+def Banded_matvec(T[:, ::1] ab,
+                  int kl,
+                  int ku,
+                  T[:, :, :] v,
+                  T[:, :, :] c):
+    cdef:
+        int p, i, k, q, k0, k1
+        int N = c.shape[1]
+        int M = ab.shape[1]
+        int Q = c.shape[2]
+        T a
+
+    for p in prange(c.shape[0], nogil=True, num_threads=_num_threads):
+        for i in range(N):
+            k0 = -i if i < kl else -kl
+            k1 = M-1-i if M-1-i < ku else ku
+            for k in range(k0, k1+1):
+                a = ab[ku-k, i+k]
+                for q in range(Q):
+                    c[p, i, q] = c[p, i, q] + a*v[p, i+k, q]
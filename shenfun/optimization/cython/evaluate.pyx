@@ -934,8 +934,8 @@ def _evaluate_lm_3D_crc1(np.ndarray[real_t, ndim=1] b,
         for k in range(u.shape[0]):
             for m in range(u.shape[2]):
                 for i in range(b.shape[0]):
-                    #p = (u[k, l, m] * P0[i] * exp(1j*(w0[k]*x0[i] + w1[m]*x2[i]))).real
-                    y2 = w0[k]*x0[i] + w1[m]*x2[i]
+                    #p = (u[k, l, m] * P0[i] * exp(1j*(w0[k]*x0[i] + w2[m]*x2[i]))).real
+                    y2 = w0[k]*x0[i] + w2[m]*x2[i]
                     yc = cos(y2)
                     ys = sin(y2)
                     ur = u[k, l, m].real
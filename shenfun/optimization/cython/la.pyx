@@ -7,6 +7,7 @@ cimport cython
 cimport numpy as np
 from libcpp.vector cimport vector
 from libcpp.algorithm cimport copy
+from cython.parallel import prange, parallel, threadid
 
 ctypedef fused T:
     np.float64_t
@@ -17,6 +18,24 @@ ctypedef np.float64_t real_t
 ctypedef np.int64_t int_t
 ctypedef double real
 
+# Number of threads used by the prange loops. Only effective if the module is
+# compiled with OpenMP (see setup.py), and otherwise the loops run serially.
+cdef int _num_threads = 1
+
+def set_num_threads(int n):
+    global _num_threads
+    _num_threads = max(n, 1)
+
+def get_num_threads():
+    return _num_threads
+
+def openmp_enabled():
+    """Return whether the module is compiled with OpenMP"""
+    cdef int i, nthreads = 0
+    for i in prange(2, nogil=True, num_threads=2, schedule='static', chunksize=1):
+        nthreads += threadid()
+    return nthreads > 0
+
 
 #def PDMA_SymLU(np.ndarray[np.float64_t, ndim=1, mode='c'] d,
                #np.ndarray[np.float64_t, ndim=1, mode='c'] e,
@@ -294,17 +313,17 @@ def PDMA_Symsolve3D_ptr(real_t[::1] d,
 
     strides = x.strides[axis]/x.itemsize
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in prange(x.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(x.shape[2]):
                 PDMA_SymSolve_ptr(&d[0], &e[0], &f[0], &x[0,j,k], n, strides)
 
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(x.shape[2]):
                 PDMA_SymSolve_ptr(&d[0], &e[0], &f[0], &x[i,0,k], n, strides)
 
     elif axis == 2:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(x.shape[1]):
                 PDMA_SymSolve_ptr(&d[0], &e[0], &f[0], &x[i,j,0], n, strides)
 
@@ -319,11 +338,11 @@ def PDMA_Symsolve2D_ptr(real_t[::1] d,
 
     strides = x.strides[axis]/x.itemsize
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in prange(x.shape[1], nogil=True, num_threads=_num_threads):
             PDMA_SymSolve_ptr(&d[0], &e[0], &f[0], &x[0,j], n, strides)
 
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             PDMA_SymSolve_ptr(&d[0], &e[0], &f[0], &x[i,0], n, strides)
 
 def TDMA_O_SymLU(real_t[::1] d,
@@ -433,7 +452,7 @@ cdef void TDMA_SymSolve_ptr(real_t* d,
                             real_t* l,
                             T* x,
                             int n,
-                            int st):
+                            int st) nogil:
     cdef:
         int i
 
@@ -460,11 +479,11 @@ def TDMA_SymSolve2D_ptr(real_t[::1] d,
 
     strides = x.strides[axis]/x.itemsize
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in prange(x.shape[1], nogil=True, num_threads=_num_threads):
             TDMA_SymSolve_ptr(&d[0], &a[0], &l[0], &x[0,j], n, strides)
 
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             TDMA_SymSolve_ptr(&d[0], &a[0], &l[0], &x[i,0], n, strides)
 
 def TDMA_SymSolve3D_ptr(real_t[::1] d,
@@ -482,17 +501,17 @@ def TDMA_SymSolve3D_ptr(real_t[::1] d,
 
     strides = x.strides[axis]/x.itemsize
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in prange(x.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(x.shape[2]):
                 TDMA_SymSolve_ptr(&d[0], &a[0], &l[0], &x[0,j,k], n, strides)
 
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(x.shape[2]):
                 TDMA_SymSolve_ptr(&d[0], &a[0], &l[0], &x[i,0,k], n, strides)
 
     elif axis == 2:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(x.shape[1]):
                 TDMA_SymSolve_ptr(&d[0], &a[0], &l[0], &x[i,j,0], n, strides)
 
@@ -635,24 +654,25 @@ def TDMA_SymSolve3D(real_t[::1] d,
         real_t d1
 
     if axis == 0:
-        for i in range(2, n):
-            for j in range(x.shape[1]):
-                for k in range(x.shape[2]):
-                    x[i, j, k] -= l[i-2]*x[i-2, j, k]
+        with nogil, parallel(num_threads=_num_threads):
+            for i in range(2, n):
+                for j in prange(x.shape[1]):
+                    for k in range(x.shape[2]):
+                        x[i, j, k] -= l[i-2]*x[i-2, j, k]
 
-        for j in range(x.shape[1]):
-            for k in range(x.shape[2]):
-                x[n-1, j, k] = x[n-1, j, k]/d[n-1]
-                x[n-2, j, k] = x[n-2, j, k]/d[n-2]
-
-        for i in range(n - 3, -1, -1):
-            d1 = 1./d[i]
-            for j in range(x.shape[1]):
+            for j in prange(x.shape[1]):
                 for k in range(x.shape[2]):
-                    x[i, j, k] = (x[i, j, k] - a[i]*x[i+2, j, k])*d1
+                    x[n-1, j, k] = x[n-1, j, k]/d[n-1]
+                    x[n-2, j, k] = x[n-2, j, k]/d[n-2]
+
+            for i in range(n - 3, -1, -1):
+                d1 = 1./d[i]
+                for j in prange(x.shape[1]):
+                    for k in range(x.shape[2]):
+                        x[i, j, k] = (x[i, j, k] - a[i]*x[i+2, j, k])*d1
 
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(2, n):
                 for k in range(x.shape[2]):
                     x[i, j, k] -= l[j-2]*x[i, j-2, k]
@@ -666,7 +686,7 @@ def TDMA_SymSolve3D(real_t[::1] d,
                     x[i, j, k] = (x[i, j, k] - a[j]*x[i, j+2, k])/d[j]
 
     elif axis == 2:
-        for i in range(x.shape[0]):
+        for i in prange(x.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(x.shape[1]):
                 for k in range(2, n):
                     x[i, j, k] -= l[k-2]*x[i, j, k-2]
@@ -1106,54 +1126,34 @@ def Solve_Helmholtz_3D_ptr(np.int64_t axis,
                            real_t[:,:,::1] d2,
                            real_t[:,:,::1] L):
     cdef:
-        T* fk_ptr
-        T* u_hat_ptr
-        real_t* d0_ptr
-        real_t* d1_ptr
-        real_t* d2_ptr
-        real_t* L_ptr
         vector[T] y
         int i, j, k, strides, N
 
     strides = fk.strides[axis]/fk.itemsize
     N = d0.shape[axis] - 2
-    y.resize(N)
+    # One work array for each thread
+    y.resize(N*_num_threads)
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in prange(d0.shape[1], nogil=True, num_threads=_num_threads):
             for k in range(d0.shape[2]):
-                fk_ptr = &fk[0,j,k]
-                u_hat_ptr = &u_hat[0,j,k]
-                d0_ptr = &d0[0,j,k]
-                d1_ptr = &d1[0,j,k]
-                d2_ptr = &d2[0,j,k]
-                L_ptr = &L[0,j,k]
-                Solve_Helmholtz_1D_ptr(fk_ptr, u_hat_ptr, neumann, d0_ptr,
-                                       d1_ptr, d2_ptr, L_ptr, &y[0], N,
+                Solve_Helmholtz_1D_ptr(&fk[0,j,k], &u_hat[0,j,k], neumann,
+                                       &d0[0,j,k], &d1[0,j,k], &d2[0,j,k],
+                                       &L[0,j,k], &y[threadid()*N], N,
                                        strides)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in prange(d0.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(d0.shape[2]):
-                fk_ptr = &fk[i,0,k]
-                u_hat_ptr = &u_hat[i,0,k]
-                d0_ptr = &d0[i,0,k]
-                d1_ptr = &d1[i,0,k]
-                d2_ptr = &d2[i,0,k]
-                L_ptr = &L[i,0,k]
-                Solve_Helmholtz_1D_ptr(fk_ptr, u_hat_ptr, neumann, d0_ptr,
-                                       d1_ptr, d2_ptr, L_ptr, &y[0], N,
+                Solve_Helmholtz_1D_ptr(&fk[i,0,k], &u_hat[i,0,k], neumann,
+                                       &d0[i,0,k], &d1[i,0,k], &d2[i,0,k],
+                                       &L[i,0,k], &y[threadid()*N], N,
                                        strides)
 
     elif axis == 2:
-        for i in range(d0.shape[0]):
+        for i in prange(d0.shape[0], nogil=True, num_threads=_num_threads):
             for j in range(d0.shape[1]):
-                fk_ptr = &fk[i,j,0]
-                u_hat_ptr = &u_hat[i,j,0]
-                d0_ptr = &d0[i,j,0]
-                d1_ptr = &d1[i,j,0]
-                d2_ptr = &d2[i,j,0]
-                L_ptr = &L[i,j,0]
-                Solve_Helmholtz_1D_ptr(fk_ptr, u_hat_ptr, neumann, d0_ptr,
-                                       d1_ptr, d2_ptr, L_ptr, &y[0], N,
+                Solve_Helmholtz_1D_ptr(&fk[i,j,0], &u_hat[i,j,0], neumann,
+                                       &d0[i,j,0], &d1[i,j,0], &d2[i,j,0],
+                                       &L[i,j,0], &y[threadid()*N], N,
                                        strides)
 
 def Solve_Helmholtz_2D_ptr(np.int64_t axis,
@@ -1165,40 +1165,22 @@ def Solve_Helmholtz_2D_ptr(np.int64_t axis,
                            real_t[:,::1] d2,
                            real_t[:,::1] L):
     cdef:
-        T* fk_ptr
-        T* u_hat_ptr
-        real_t* d0_ptr
-        real_t* d1_ptr
-        real_t* d2_ptr
-        real_t* L_ptr
         vector[T] y
         int i, j, strides, N
 
     strides = fk.strides[axis]/fk.itemsize
     N = d0.shape[axis] - 2
-    y.resize(N)
+    y.resize(N*_num_threads)
     if axis == 0:
-        for j in range(d0.shape[1]):
-            fk_ptr = &fk[0,j]
-            u_hat_ptr = &u_hat[0,j]
-            d0_ptr = &d0[0,j]
-            d1_ptr = &d1[0,j]
-            d2_ptr = &d2[0,j]
-            L_ptr = &L[0,j]
-            Solve_Helmholtz_1D_ptr(fk_ptr, u_hat_ptr, neumann, d0_ptr,
-                                    d1_ptr, d2_ptr, L_ptr, &y[0], N,
-                                    strides)
+        for j in prange(d0.shape[1], nogil=True, num_threads=_num_threads):
+            Solve_Helmholtz_1D_ptr(&fk[0,j], &u_hat[0,j], neumann, &d0[0,j],
+                                   &d1[0,j], &d2[0,j], &L[0,j],
+                                   &y[threadid()*N], N, strides)
     elif axis == 1:
-        for i in range(d0.shape[0]):
-            fk_ptr = &fk[i,0]
-            u_hat_ptr = &u_hat[i,0]
-            d0_ptr = &d0[i,0]
-            d1_ptr = &d1[i,0]
-            d2_ptr = &d2[i,0]
-            L_ptr = &L[i,0]
-            Solve_Helmholtz_1D_ptr(fk_ptr, u_hat_ptr, neumann, d0_ptr,
-                                    d1_ptr, d2_ptr, L_ptr, &y[0], N,
-                                    strides)
+        for i in prange(d0.shape[0], nogil=True, num_threads=_num_threads):
+            Solve_Helmholtz_1D_ptr(&fk[i,0], &u_hat[i,0], neumann, &d0[i,0],
+                                   &d1[i,0], &d2[i,0], &L[i,0],
+                                   &y[threadid()*N], N, strides)
 
 def LU_Biharmonic(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
                   bill, bil, bii, biu, biuu, u0, u1,
@@ -1565,56 +1547,57 @@ def Solve_Biharmonic_3D_n(np.int64_t axis,
         o2 = np.zeros((fk.shape[1], fk.shape[2]), dtype=fk.dtype)
 
         M = u0.shape[1]
-        for j in range(fk.shape[1]):
-            for k in range(fk.shape[2]):
-                y[0, j, k] = fk[0, j, k]
-                y[1, j, k] = fk[1, j, k]
-                y[2, j, k] = fk[2, j, k] - l0[0, 0, j, k]*y[0, j, k]
-                y[3, j, k] = fk[3, j, k] - l0[1, 0, j, k]*y[1, j, k]
-
-        for i in xrange(2, M):
-            ke = 2*i
-            ko = ke+1
-            for j in range(fk.shape[1]):
+        with nogil, parallel(num_threads=_num_threads):
+            for j in prange(fk.shape[1]):
                 for k in range(fk.shape[2]):
-                    y[ko, j, k] = fk[ko, j, k] - l0[1, i-1, j, k]*y[ko-2, j, k] - l1[1, i-2, j, k]*y[ko-4, j, k]
-                    y[ke, j, k] = fk[ke, j, k] - l0[0, i-1, j, k]*y[ke-2, j, k] - l1[0, i-2, j, k]*y[ke-4, j, k]
+                    y[0, j, k] = fk[0, j, k]
+                    y[1, j, k] = fk[1, j, k]
+                    y[2, j, k] = fk[2, j, k] - l0[0, 0, j, k]*y[0, j, k]
+                    y[3, j, k] = fk[3, j, k] - l0[1, 0, j, k]*y[1, j, k]
 
-        ke = 2*(M-1)
-        ko = ke+1
-        for j in range(fk.shape[1]):
-            for k in range(fk.shape[2]):
-                uk[ke, j, k] = y[ke, j, k] / u0[0, M-1, j, k]
-                uk[ko, j, k] = y[ko, j, k] / u0[1, M-1, j, k]
+            for i in xrange(2, M):
+                ke = 2*i
+                ko = ke+1
+                for j in prange(fk.shape[1]):
+                    for k in range(fk.shape[2]):
+                        y[ko, j, k] = fk[ko, j, k] - l0[1, i-1, j, k]*y[ko-2, j, k] - l1[1, i-2, j, k]*y[ko-4, j, k]
+                        y[ke, j, k] = fk[ke, j, k] - l0[0, i-1, j, k]*y[ke-2, j, k] - l1[0, i-2, j, k]*y[ke-4, j, k]
 
-        ke = 2*(M-2)
-        ko = ke+1
-        for j in range(fk.shape[1]):
-            for k in range(fk.shape[2]):
-                uk[ke, j, k] = (y[ke, j, k] - u1[0, M-2, j, k]*uk[ke+2, j, k]) / u0[0, M-2, j, k]
-                uk[ko, j, k] = (y[ko, j, k] - u1[1, M-2, j, k]*uk[ko+2, j, k]) / u0[1, M-2, j, k]
+            ke = 2*(M-1)
+            ko = ke+1
+            for j in prange(fk.shape[1]):
+                for k in range(fk.shape[2]):
+                    uk[ke, j, k] = y[ke, j, k] / u0[0, M-1, j, k]
+                    uk[ko, j, k] = y[ko, j, k] / u0[1, M-1, j, k]
 
-        ke = 2*(M-3)
-        ko = ke+1
-        for j in range(fk.shape[1]):
-            for k in range(fk.shape[2]):
-                uk[ke, j, k] = (y[ke, j, k] - u1[0, M-3, j, k]*uk[ke+2, j, k] - u2[0, M-3, j, k]*uk[ke+4, j, k]) / u0[0, M-3, j, k]
-                uk[ko, j, k] = (y[ko, j, k] - u1[1, M-3, j, k]*uk[ko+2, j, k] - u2[1, M-3, j, k]*uk[ko+4, j, k]) / u0[1, M-3, j, k]
+            ke = 2*(M-2)
+            ko = ke+1
+            for j in prange(fk.shape[1]):
+                for k in range(fk.shape[2]):
+                    uk[ke, j, k] = (y[ke, j, k] - u1[0, M-2, j, k]*uk[ke+2, j, k]) / u0[0, M-2, j, k]
+                    uk[ko, j, k] = (y[ko, j, k] - u1[1, M-2, j, k]*uk[ko+2, j, k]) / u0[1, M-2, j, k]
 
-        for kk in xrange(M-4, -1, -1):
-            ke = 2*kk
+            ke = 2*(M-3)
             ko = ke+1
-            je = ke+6
-            jo = ko+6
-            for j in range(fk.shape[1]):
+            for j in prange(fk.shape[1]):
                 for k in range(fk.shape[2]):
-                    ac = a0
-                    s1[j, k] += uk[je, j, k]/(je+3.)
-                    s2[j, k] += (uk[je, j, k]/(je+3.))*((je+2.)*(je+2.))
-                    uk[ke, j, k] = (y[ke, j, k] - u1[0, kk, j, k]*uk[ke+2, j, k] - u2[0, kk, j, k]*uk[ke+4, j, k] - a[0, kk, j, k]*ac*s1[j, k] - b[0, kk, j, k]*ac*s2[j, k]) / u0[0, kk, j, k]
-                    o1[j, k] += uk[jo, j, k]/(jo+3.)
-                    o2[j, k] += (uk[jo, j, k]/(jo+3.))*((jo+2.)*(jo+2.))
-                    uk[ko, j, k] = (y[ko, j, k] - u1[1, kk, j, k]*uk[ko+2, j, k] - u2[1, kk, j, k]*uk[ko+4, j, k] - a[1, kk, j, k]*ac*o1[j, k] - b[1, kk, j, k]*ac*o2[j, k]) / u0[1, kk, j, k]
+                    uk[ke, j, k] = (y[ke, j, k] - u1[0, M-3, j, k]*uk[ke+2, j, k] - u2[0, M-3, j, k]*uk[ke+4, j, k]) / u0[0, M-3, j, k]
+                    uk[ko, j, k] = (y[ko, j, k] - u1[1, M-3, j, k]*uk[ko+2, j, k] - u2[1, M-3, j, k]*uk[ko+4, j, k]) / u0[1, M-3, j, k]
+
+            for kk in xrange(M-4, -1, -1):
+                ke = 2*kk
+                ko = ke+1
+                je = ke+6
+                jo = ko+6
+                for j in prange(fk.shape[1]):
+                    for k in range(fk.shape[2]):
+                        ac = a0
+                        s1[j, k] += uk[je, j, k]/(je+3.)
+                        s2[j, k] += (uk[je, j, k]/(je+3.))*((je+2.)*(je+2.))
+                        uk[ke, j, k] = (y[ke, j, k] - u1[0, kk, j, k]*uk[ke+2, j, k] - u2[0, kk, j, k]*uk[ke+4, j, k] - a[0, kk, j, k]*ac*s1[j, k] - b[0, kk, j, k]*ac*s2[j, k]) / u0[0, kk, j, k]
+                        o1[j, k] += uk[jo, j, k]/(jo+3.)
+                        o2[j, k] += (uk[jo, j, k]/(jo+3.))*((jo+2.)*(jo+2.))
+                        uk[ko, j, k] = (y[ko, j, k] - u1[1, kk, j, k]*uk[ko+2, j, k] - u2[1, kk, j, k]*uk[ko+4, j, k] - a[1, kk, j, k]*ac*o1[j, k] - b[1, kk, j, k]*ac*o2[j, k]) / u0[1, kk, j, k]
 
     elif axis == 1:
         s1 = np.zeros((fk.shape[0], fk.shape[2]), dtype=fk.dtype)
@@ -1623,7 +1606,7 @@ def Solve_Biharmonic_3D_n(np.int64_t axis,
         o2 = np.zeros((fk.shape[0], fk.shape[2]), dtype=fk.dtype)
 
         M = u0.shape[2]
-        for j in range(fk.shape[0]):
+        for j in prange(fk.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(fk.shape[2]):
                 y[j, 0, k] = fk[j, 0, k]
                 y[j, 1, k] = fk[j, 1, k]
@@ -1677,7 +1660,7 @@ def Solve_Biharmonic_3D_n(np.int64_t axis,
         o2 = np.zeros((fk.shape[0], fk.shape[1]), dtype=fk.dtype)
 
         M = u0.shape[3]
-        for j in range(fk.shape[0]):
+        for j in prange(fk.shape[0], nogil=True, num_threads=_num_threads):
             for k in range(fk.shape[1]):
                 y[j, k, 0] = fk[j, k, 0]
                 y[j, k, 1] = fk[j, k, 1]
@@ -0,0 +1,114 @@
+#cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+
+import numpy as np
+cimport numpy as np
+from libc.math cimport sqrt, atan, log, fabs, sin, cos, M_PI
+
+ctypedef np.float64_t real_t
+
+def glr_march(real_t[:, ::1] coef,
+              real_t x0,
+              real_t u0,
+              real_t du0,
+              real_t direction,
+              real_t[:] x,
+              real_t[:] ld):
+    cdef:
+        int M = 200
+        int j, k, it, m, K = 10
+        real_t c, u, du, s, lscale, pc, rc, sc, th0, th1, th, xg, h
+        real_t k1, k2, k3, k4, H, t, f, df, dt
+        real_t[::1] b = np.zeros(M)
+
+    c, u, du = x0, u0, du0
+    s = sqrt(u*u+du*du)
+    u, du = u/s, du/s
+    lscale = log(s)
+    for j in range(x.shape[0]):
+        # Initial guess from the Prüfer transform
+        pc = coef[0, 0]+(coef[0, 1]+coef[0, 2]*c)*c
+        rc = coef[2, 0]+(coef[2, 1]+coef[2, 2]*c)*c
+        sc = sqrt(rc/pc)
+        th0 = atan(sc*u/du) if du != 0 else M_PI/2
+        if j > 0 or u == 0:
+            th1 = th0 + direction*M_PI
+        elif direction*th0 > 0:
+            th1 = direction*M_PI
+        else:
+            th1 = 0.
+        xg = c
+        h = (th1-th0)/K
+        th = th0
+        for k in range(K):
+            k1 = h*dxdth(coef, xg, th)
+            k2 = h*dxdth(coef, xg+k1/2, th+h/2)
+            k3 = h*dxdth(coef, xg+k2/2, th+h/2)
+            k4 = h*dxdth(coef, xg+k3, th+h)
+            xg += (k1+2*k2+2*k3+k4)/6
+            th += h
+        # Newton iterations with Taylor series around c
+        H = xg-c
+        m = taylor(coef, c, u, du, H, b)
+        t = 1.
+        for it in range(20):
+            horner(b, m, t, &f, &df)
+            dt = f/df
+            t -= dt
+            if fabs(dt) < 1e-15:
+                break
+        horner(b, m, t, &f, &df)
+        c = c + t*H
+        u, du = f, df/H
+        s = fabs(du)
+        u, du = u/s, du/s
+        lscale += log(s)
+        x[j] = c
+        ld[j] = lscale
+
+cdef void horner(real_t[::1] b, int m, real_t t, real_t* f, real_t* df):
+    cdef int k
+    f[0] = b[m-1]
+    df[0] = 0
+    for k in range(m-2, -1, -1):
+        df[0] = df[0]*t + f[0]
+        f[0] = f[0]*t + b[k]
+
+cdef real_t dxdth(real_t[:, ::1] coef, real_t x, real_t th):
+    cdef real_t p, dp, q, r, dr, s, w
+    p = coef[0, 0]+(coef[0, 1]+coef[0, 2]*x)*x
+    dp = coef[0, 1]+2*coef[0, 2]*x
+    q = coef[1, 0]+coef[1, 1]*x
+    r = coef[2, 0]+(coef[2, 1]+coef[2, 2]*x)*x
+    dr = coef[2, 1]+2*coef[2, 2]*x
+    s = sqrt(r/p)
+    w = (dr/r - dp/p)/2 + q/p
+    return 1/(s + w*sin(th)*cos(th))
+
+cdef int taylor(real_t[:, ::1] coef, real_t c, real_t u, real_t du, real_t H,
+                real_t[::1] b):
+    cdef:
+        int k, m, M = b.shape[0]
+        real_t p, dp, ddp, q, dq, r, dr, ddr, bk1, bk2, bmax
+    p = coef[0, 0]+(coef[0, 1]+coef[0, 2]*c)*c
+    dp = coef[0, 1]+2*coef[0, 2]*c
+    ddp = 2*coef[0, 2]
+    q = coef[1, 0]+coef[1, 1]*c
+    dq = coef[1, 1]
+    r = coef[2, 0]+(coef[2, 1]+coef[2, 2]*c)*c
+    dr = coef[2, 1]+2*coef[2, 2]*c
+    ddr = 2*coef[2, 2]
+    b[0] = u
+    b[1] = du*H
+    bmax = max(fabs(b[0]), fabs(b[1]))
+    m = M
+    for k in range(M-2):
+        bk2 = b[k-2] if k > 1 else 0.
+        bk1 = b[k-1] if k > 0 else 0.
+        b[k+2] = -((k*dp+q)*(k+1)*b[k+1]*H
+                   + (k*(k-1)/2.*ddp+k*dq+r)*b[k]*H*H
+                   + dr*bk1*H*H*H + ddr/2*bk2*H*H*H*H) / (p*(k+2)*(k+1))
+        bmax = max(bmax, fabs(b[k+2]))
+        if k > 2 and fabs(b[k+2])+fabs(b[k+1])+fabs(b[k]) < 1e-18*bmax:
+            m = k+3
+            break
+    return m
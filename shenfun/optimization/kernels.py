@@ -0,0 +1,386 @@
+"""
+Registry of optimized kernels with runtime autotuning
+
+Each function decorated with :func:`.optimizer` is registered here as a
+:class:`Kernel` that holds all available variants of the function, e.g., the
+pure Python version, the Cython version and the (threaded) Numba version.
+Other variants may be added with :func:`register_variant`.
+
+Which variant is used is decided as follows
+
+    1. A variant chosen explicitly for the kernel, either through
+       :func:`set_kernel_backend`, or through the environment variable
+       ``SHENFUN_KERNELS``, e.g.,
+       ``SHENFUN_KERNELS="TDMA_SymSolve=numba,Solve_Helmholtz=cython"``
+    2. If ``SHENFUN_OPTIMIZATION=autotune``, the fastest variant for the
+       shape-class and dtype of the arguments. All variants are timed on
+       copies of the arguments on first use, and the winner is stored both in
+       memory and in a json file on disk, such that later runs do not need to
+       tune again. The file is ``~/.cache/shenfun/kernels.json``, or the
+       file given by the environment variable ``SHENFUN_KERNELS_CACHE``. Set
+       ``SHENFUN_KERNELS_CACHE=""`` to disable the disk cache.
+    3. Otherwise the backend given by ``SHENFUN_OPTIMIZATION``, as before.
+
+The Cython variants are compiled for double precision only. Calls with single
+precision (float32/complex64) arrays are therefore dispatched to the Numba
+variant instead, or to the pure Python variant if Numba is not available.
+
+The shape-class of a call is the number of bits (rounded down base 2
+logarithm) of each dimension of the largest array argument, such that, e.g.,
+all 3D arrays with shape in the range (64-127, 64-127, 32-63) share the same
+choice of variant.
+"""
+import os
+import json
+import copy
+import warnings
+import importlib
+import numpy as np
+
+try:
+    from time import perf_counter as _timer
+except ImportError: # pragma: no cover
+    from time import time as _timer
+
+__all__ = ['Kernel', 'kernels', 'get_kernel', 'register_variant',
+           'set_kernel_backend', 'clear_kernel_cache', 'kernel_cache_file',
+           'is_double']
+
+#: All registered kernels
+kernels = {}
+
+_disk_cache = None
+
+def kernel_cache_file():
+    """Return path to json file storing tuned variants, or None if disabled"""
+    filename = os.environ.get('SHENFUN_KERNELS_CACHE')
+    if filename is None:
+        filename = os.path.join(os.path.expanduser('~'), '.cache', 'shenfun',
+                                'kernels.json')
+    return filename if filename else None
+
+def _load_disk_cache():
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = {}
+        filename = kernel_cache_file()
+        if filename is not None and os.path.exists(filename):
+            try:
+                with open(filename, 'r') as f:
+                    _disk_cache = json.load(f)
+            except (IOError, ValueError): # pragma: no cover
+                _disk_cache = {}
+    return _disk_cache
+
+def _store_disk_cache(key, backend):
+    cache = _load_disk_cache()
+    cache[key] = backend
+    filename = kernel_cache_file()
+    if filename is None:
+        return
+    try:
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        # Write to a temporary file first since several processes may tune
+        # simultaneously
+        tmp = '{}.{}'.format(filename, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(cache, f, indent=1, sort_keys=True)
+        os.rename(tmp, filename)
+    except (IOError, OSError): # pragma: no cover
+        pass
+
+def clear_kernel_cache(disk=False):
+    """Forget all tuned variants
+
+    Parameters
+    ----------
+    disk : bool, optional
+        Whether to also remove the disk cache
+    """
+    global _disk_cache
+    for kernel in kernels.values():
+        kernel.tuned.clear()
+    _disk_cache = None
+    filename = kernel_cache_file()
+    if disk and filename is not None and os.path.exists(filename):
+        os.remove(filename)
+
+def _overrides():
+    s = os.environ.get('SHENFUN_KERNELS', '')
+    d = {}
+    for item in s.split(','):
+        if '=' in item:
+            name, backend = item.split('=')
+            d[name.strip()] = backend.strip().lower()
+    return d
+
+def is_double(args, kwargs=None):
+    """Return whether all floating point array arguments are double precision
+
+    Parameters
+    ----------
+    args : sequence
+        Positional arguments of a kernel
+    kwargs : dict, optional
+        Keyword arguments of a kernel
+    """
+    values = list(args) if kwargs is None else list(args)+list(kwargs.values())
+    for a in values:
+        if isinstance(a, np.ndarray) and a.dtype.char in 'fFgGe':
+            return False
+    return True
+
+def _copy_args(args, kwargs):
+    return ([copy.copy(a) if isinstance(a, np.ndarray) else a for a in args],
+            dict((k, copy.copy(v) if isinstance(v, np.ndarray) else v)
+                 for k, v in kwargs.items()))
+
+def _variant_errors():
+    # Errors raised by variants that do not support the given arguments,
+    # e.g., a Cython buffer dtype mismatch or a Numba typing error
+    errors = (TypeError, ValueError, IndexError, AssertionError, NotImplementedError)
+    try:
+        from numba.core.errors import NumbaError
+    except ImportError:
+        return errors
+    return errors + (NumbaError,)
+
+def _outputs(a, kw, result):
+    return [v for v in a+list(kw.values())+[result]
+            if isinstance(v, (np.ndarray, np.number, float, complex))]
+
+def _same_outputs(out, ref):
+    if len(out) != len(ref):
+        return False
+    for x, y in zip(out, ref):
+        rtol = 1e-5 if is_double((x, y)) else 1e-3
+        if np.shape(x) != np.shape(y) or not np.allclose(x, y, rtol=rtol, equal_nan=True):
+            return False
+    return True
+
+
+class Kernel(object):
+    """A kernel with several interchangeable implementations (variants)
+
+    Parameters
+    ----------
+    func : function
+        The pure Python implementation. Its name is used to look up the
+        Cython and Numba variants.
+    name : str, optional
+        Unique name of kernel. Defaults to module and qualified name of func.
+    """
+    def __init__(self, func, name=None):
+        self.func = func
+        self.shortname = func.__name__
+        if name is None:
+            name = '.'.join((func.__module__,
+                             getattr(func, '__qualname__', func.__name__)))
+        self.name = name
+        self._variants = {'python': func}
+        self._loaded = set()
+        self.tuned = {}
+        self.fixed = None
+        self.autotune = False
+        self.reset()
+
+    def _load(self, mod):
+        # Compiled variants are imported only when needed
+        if mod in self._loaded or mod not in ('cython', 'numba'):
+            return
+        self._loaded.add(mod)
+        try:
+            fun = getattr(importlib.import_module('shenfun.optimization.'+mod),
+                          self.shortname, None)
+        except ImportError:
+            fun = None
+        if fun is not None:
+            self._variants[mod] = fun
+
+    @property
+    def variants(self):
+        """Return dictionary of all available variants"""
+        for mod in ('cython', 'numba'):
+            self._load(mod)
+        return self._variants
+
+    def get_variant(self, backend):
+        """Return variant with given name, or None if not available"""
+        self._load(backend)
+        return self._variants.get(backend)
+
+    def reset(self):
+        """Choose variant from the environment variables"""
+        overrides = _overrides()
+        backend = overrides.get(self.name, overrides.get(self.shortname))
+        mod = os.environ.get('SHENFUN_OPTIMIZATION', 'cython').lower()
+        self.autotune = mod == 'autotune'
+        if backend is not None and self.get_variant(backend) is not None:
+            self.fixed = self.get_variant(backend)
+        elif self.autotune:
+            self.fixed = None
+        else:
+            self.fixed = self.get_variant(mod) or self.func
+
+    def set_backend(self, backend):
+        """Use the given variant for all calls
+
+        Parameters
+        ----------
+        backend : str or None
+            Name of variant, e.g., 'python', 'cython' or 'numba'. If None,
+            then fall back on the choice made through environment variables.
+        """
+        if backend is None:
+            self.reset()
+            return
+        fun = self.get_variant(backend)
+        if fun is None:
+            raise KeyError('Kernel {} has no variant {}'.format(self.name, backend))
+        self.fixed = fun
+
+    def add_variant(self, backend, func):
+        """Add variant to kernel
+
+        Parameters
+        ----------
+        backend : str
+            Name of variant
+        func : function
+            Implementation with the same signature as the kernel
+        """
+        self._variants[backend] = func
+        self.tuned.clear()
+
+    @staticmethod
+    def shape_class(args, kwargs):
+        """Return shape-class and dtype of largest array argument"""
+        a = None
+        for b in list(args) + list(kwargs.values()):
+            if isinstance(b, np.ndarray) and (a is None or b.size > a.size):
+                a = b
+        if a is None:
+            return (), ''
+        return tuple(int(s).bit_length() for s in a.shape), a.dtype.char
+
+    def key(self, args, kwargs):
+        """Return key used to store tuned variant for the given arguments"""
+        shape, dtype = self.shape_class(args, kwargs)
+        return '{}|{}|{}'.format(self.name, 'x'.join(map(str, shape)), dtype)
+
+    def benchmark(self, *args, **kwargs):
+        """Return time used by each variant for given arguments
+
+        The variants are called on copies of the array arguments, since the
+        kernels usually modify some of their arguments inplace. The results
+        of each variant are compared with the results of the pure Python
+        variant, or, if the pure Python variant is not implemented for the
+        given arguments, with the results of the first variant that runs.
+        Variants that fail for the given arguments, or that compute a
+        different result, are left out with a warning.
+        """
+        repeats = int(os.environ.get('SHENFUN_KERNELS_REPEATS', 3))
+        errors = _variant_errors()
+        variants = self.variants
+        timings = {}
+        reference = None
+        for backend in ['python'] + [b for b in variants if b != 'python']:
+            fun = variants[backend]
+            try:
+                a, kw = _copy_args(args, kwargs)
+                # Warm up, e.g., Numba compiles on first call
+                out = _outputs(a, kw, fun(*a, **kw))
+                if reference is None:
+                    reference = out
+                elif not _same_outputs(out, reference):
+                    warnings.warn('Kernel {}: variant {} skipped, since its result differs '
+                                  'from the python variant'.format(self.name, backend),
+                                  RuntimeWarning)
+                    continue
+                t = []
+                for _ in range(repeats):
+                    a, kw = _copy_args(args, kwargs)
+                    t0 = _timer()
+                    fun(*a, **kw)
+                    t.append(_timer()-t0)
+                timings[backend] = min(t)
+            except errors as e:
+                warnings.warn('Kernel {}: variant {} skipped, since it failed with '
+                              '{}: {}'.format(self.name, backend, type(e).__name__, e),
+                              RuntimeWarning)
+        return timings
+
+    def tune(self, *args, **kwargs):
+        """Return the fastest variant for the given arguments"""
+        key = self.key(args, kwargs)
+        backend = _load_disk_cache().get(key)
+        if backend is None or self.get_variant(backend) is None:
+            timings = self.benchmark(*args, **kwargs)
+            if len(timings) == 0:
+                backend = 'python'
+            else:
+                backend = min(timings, key=timings.get)
+                _store_disk_cache(key, backend)
+        self.tuned[key] = self.get_variant(backend)
+        return self.tuned[key]
+
+    def __call__(self, *args, **kwargs):
+        fun = self.fixed
+        if fun is None:
+            fun = self.tuned.get(self.key(args, kwargs))
+            if fun is None:
+                fun = self.tune(*args, **kwargs)
+        if fun is self._variants.get('cython') and not is_double(args, kwargs):
+            fun = self.get_variant('numba') or self.func
+        return fun(*args, **kwargs)
+
+    def __repr__(self):
+        return 'Kernel({}, variants={})'.format(self.name, sorted(self.variants))
+
+
+def get_kernel(name):
+    """Return list of kernels with given short or full name
+
+    Parameters
+    ----------
+    name : str
+        Name of kernel, either just the name of the function, e.g.,
+        'TDMA_SymSolve', or the full name, e.g., 'shenfun.la.TDMA.TDMA_SymSolve'
+    """
+    return [k for k in kernels.values() if name in (k.name, k.shortname)]
+
+def register_variant(name, backend, func):
+    """Add variant of kernel(s) with given name
+
+    Parameters
+    ----------
+    name : str
+        Short or full name of kernel
+    backend : str
+        Name of new variant
+    func : function
+        Implementation with the same signature as the kernel
+    """
+    kernel_list = get_kernel(name)
+    if len(kernel_list) == 0:
+        raise KeyError('No kernel named {}'.format(name))
+    for kernel in kernel_list:
+        kernel.add_variant(backend, func)
+
+def set_kernel_backend(name, backend):
+    """Override choice of variant for kernel(s) with given name
+
+    Parameters
+    ----------
+    name : str
+        Short or full name of kernel
+    backend : str or None
+        Name of variant. If None, then the override is removed.
+    """
+    kernel_list = get_kernel(name)
+    if len(kernel_list) == 0:
+        raise KeyError('No kernel named {}'.format(name))
+    for kernel in kernel_list:
+        kernel.set_backend(backend)
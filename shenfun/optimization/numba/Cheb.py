@@ -0,0 +1,23 @@
+"""
+Numba versions of the Chebyshev routines in cython/Cheb.pyx
+"""
+import numba as nb
+
+__all__ = ['derivative_coefficients', 'derivative_coefficients_3D']
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def derivative_coefficients(fk, ck):
+    N = fk.shape[0]-1
+    ck[-1] = 0
+    ck[-2] = 2*N*fk[-1]
+    for k in range(N-2, 0, -1):
+        ck[k] = 2*(k+1)*fk[k+1]+ck[k+2]
+    ck[0] = fk[1] + 0.5*ck[2]
+    return ck
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def derivative_coefficients_3D(fk, ck):
+    for i in nb.prange(fk.shape[1]):
+        for j in range(fk.shape[2]):
+            derivative_coefficients(fk[:, i, j], ck[:, i, j])
+    return ck
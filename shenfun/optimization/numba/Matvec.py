@@ -0,0 +1,455 @@
+"""
+Numba versions of the matrix vector products in cython/Matvec.pyx
+
+All functions have the same names and signatures as their Cython
+counterparts. The 2D and 3D versions loop in parallel over the independent
+lines of the arrays.
+"""
+import numba as nb
+import numpy as np
+from .helmholtz import Helmholtz_matvec1D, Helmholtz_matvec2D, \
+    Helmholtz_matvec3D, Helmholtz_matvec
+from .biharmonic import Biharmonic_matvec1D, Biharmonic_matvec2D, \
+    Biharmonic_matvec3D, Biharmonic_matvec
+
+M_PI = np.pi
+
+__all__ = ['imult', 'CDN_matvec1D_ptr', 'CDN_matvec2D_ptr', 'CDN_matvec3D_ptr',
+           'BDN_matvec1D_ptr', 'BDN_matvec2D_ptr', 'BDN_matvec3D_ptr',
+           'CDD_matvec1D_ptr', 'CDD_matvec2D_ptr', 'CDD_matvec3D_ptr',
+           'SBB_matvec2D_ptr', 'SBB_matvec3D_ptr', 'SBBmat_matvec',
+           'ADDmat_matvec', 'ADD_matvec', 'ADD_matvec2D_ptr', 'ADD_matvec3D_ptr',
+           'Tridiagonal_matvec', 'Tridiagonal_matvec2D_ptr',
+           'Tridiagonal_matvec3D_ptr', 'Pentadiagonal_matvec',
+           'Pentadiagonal_matvec2D_ptr', 'Pentadiagonal_matvec3D_ptr',
+           'CBD_matvec', 'CBD_matvec2D_ptr', 'CBD_matvec3D_ptr',
+           'CDB_matvec', 'CDB_matvec2D_ptr', 'CDB_matvec3D_ptr',
+           'BBD_matvec1D_ptr', 'BBD_matvec2D_ptr', 'BBD_matvec3D_ptr',
+           'Helmholtz_matvec_1D', 'Helmholtz_matvec2D_ptr',
+           'Helmholtz_matvec3D_ptr', 'Helmholtz_matvec',
+           'Biharmonic_matvec_1D', 'Biharmonic_matvec2D_ptr',
+           'Biharmonic_matvec3D_ptr', 'Biharmonic_matvec', 'Banded_matvec']
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def imult(array, scale):
+    for i in nb.prange(array.shape[0]):
+        for j in range(array.shape[1]):
+            for k in range(array.shape[2]):
+                array[i, j, k] *= scale
+    return array
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def _CDN_matvec(v, b, ld, ud, N):
+    b[0] = ud[0]*v[1]
+    b[N-1] = ld[N-2]*v[N-2]
+    for i in range(1, N-1):
+        b[i] = ud[i]*v[i+1] + ld[i-1]*v[i-1]
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def CDN_matvec1D_ptr(v, b, ld, ud):
+    _CDN_matvec(v, b, ld, ud, v.shape[0]-2)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CDN_matvec2D_ptr(v, b, ld, ud, axis):
+    N = v.shape[axis]-2
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            _CDN_matvec(v[:, j], b[:, j], ld, ud, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            _CDN_matvec(v[i], b[i], ld, ud, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CDN_matvec3D_ptr(v, b, ld, ud, axis):
+    N = v.shape[axis]-2
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                _CDN_matvec(v[:, j, k], b[:, j, k], ld, ud, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                _CDN_matvec(v[i, :, k], b[i, :, k], ld, ud, N)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                _CDN_matvec(v[i, j], b[i, j], ld, ud, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def _BDN_matvec(v, b, ld, dd, ud, N):
+    b[0] = ud*v[2] + dd[0]*v[0]
+    b[1] = ud*v[3] + dd[1]*v[1]
+    b[N-2] = ld[N-4]*v[N-4] + dd[N-2]*v[N-2]
+    b[N-1] = ld[N-3]*v[N-3] + dd[N-1]*v[N-1]
+    for i in range(2, N-2):
+        b[i] = ud*v[i+2] + dd[i]*v[i] + ld[i-2]*v[i-2]
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def BDN_matvec1D_ptr(v, b, ld, dd, ud):
+    _BDN_matvec(v, b, ld, dd, ud, v.shape[0]-2)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def BDN_matvec2D_ptr(v, b, ld, dd, ud, axis):
+    N = v.shape[axis]-2
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            _BDN_matvec(v[:, j], b[:, j], ld, dd, ud, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            _BDN_matvec(v[i], b[i], ld, dd, ud, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def BDN_matvec3D_ptr(v, b, ld, dd, ud, axis):
+    N = v.shape[axis]-2
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                _BDN_matvec(v[:, j, k], b[:, j, k], ld, dd, ud, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                _BDN_matvec(v[i, :, k], b[i, :, k], ld, dd, ud, N)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                _BDN_matvec(v[i, j], b[i, j], ld, dd, ud, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def CDD_matvec1D_ptr(v, b, ld, ud):
+    _CDN_matvec(v, b, ld, ud, ud.shape[0]+1)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CDD_matvec2D_ptr(v, b, ld, ud, axis):
+    N = ud.shape[0]+1
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            _CDN_matvec(v[:, j], b[:, j], ld, ud, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            _CDN_matvec(v[i], b[i], ld, ud, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CDD_matvec3D_ptr(v, b, ld, ud, axis):
+    N = ud.shape[0]+1
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                _CDN_matvec(v[:, j, k], b[:, j, k], ld, ud, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                _CDN_matvec(v[i, :, k], b[i, :, k], ld, ud, N)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                _CDN_matvec(v[i, j], b[i, j], ld, ud, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def _SBB_matvec(v, b, dd, N):
+    j = N-1
+    s1 = 0.0
+    s2 = 0.0
+    o1 = 0.0
+    o2 = 0.0
+    b[j] = dd[j]*v[j]
+    b[j-1] = dd[j-1]*v[j-1]
+    for k in range(N-3, -1, -1):
+        j = k+2
+        p = k*dd[k]/(k+1)
+        r = 24*(k+1)*(k+2)*M_PI
+        d = v[j]/(j+3.)
+        if k % 2 == 0:
+            s1 += d
+            s2 += (j+2)*(j+2)*d
+            b[k] = dd[k]*v[k] + p*s1 + r*s2
+        else:
+            o1 += d
+            o2 += (j+2)*(j+2)*d
+            b[k] = dd[k]*v[k] + p*o1 + r*o2
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def SBBmat_matvec(v, b, dd):
+    _SBB_matvec(v, b, dd, v.shape[0]-4)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def SBB_matvec2D_ptr(v, b, dd, axis):
+    N = dd.shape[0]
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            _SBB_matvec(v[:, j], b[:, j], dd, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            _SBB_matvec(v[i], b[i], dd, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def SBB_matvec3D_ptr(v, b, dd, axis):
+    N = dd.shape[0]
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                _SBB_matvec(v[:, j, k], b[:, j, k], dd, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                _SBB_matvec(v[i, :, k], b[i, :, k], dd, N)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                _SBB_matvec(v[i, j], b[i, j], dd, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def _ADD_matvec(v, b, dd, N):
+    s1 = 0.0
+    s2 = 0.0
+    k = N-1
+    b[k] = dd[k]*v[k]
+    b[k-1] = dd[k-1]*v[k-1]
+    for k in range(N-3, -1, -1):
+        j = k+2
+        p = -4*(k+1)*M_PI
+        if j % 2 == 0:
+            s1 += v[j]
+            b[k] = dd[k]*v[k] + p*s1
+        else:
+            s2 += v[j]
+            b[k] = dd[k]*v[k] + p*s2
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def ADDmat_matvec(v, b, dd):
+    _ADD_matvec(v, b, dd, v.shape[0]-2)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def ADD_matvec(v, b, dd):
+    _ADD_matvec(v, b, dd, dd.shape[0])
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def ADD_matvec2D_ptr(v, b, dd, axis):
+    N = dd.shape[0]
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            _ADD_matvec(v[:, j], b[:, j], dd, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            _ADD_matvec(v[i], b[i], dd, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def ADD_matvec3D_ptr(v, b, dd, axis):
+    N = dd.shape[0]
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                _ADD_matvec(v[:, j, k], b[:, j, k], dd, N)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                _ADD_matvec(v[i, :, k], b[i, :, k], dd, N)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                _ADD_matvec(v[i, j], b[i, j], dd, N)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def Tridiagonal_matvec(v, b, ld, dd, ud):
+    N = dd.shape[0]
+    b[0] = dd[0]*v[0] + ud[0]*v[2]
+    b[1] = dd[1]*v[1] + ud[1]*v[3]
+    for i in range(2, N-2):
+        b[i] = ld[i-2]*v[i-2] + dd[i]*v[i] + ud[i]*v[i+2]
+    i = N-2
+    b[i] = ld[i-2]*v[i-2] + dd[i]*v[i]
+    i = N-1
+    b[i] = ld[i-2]*v[i-2] + dd[i]*v[i]
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Tridiagonal_matvec2D_ptr(v, b, ld, dd, ud, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            Tridiagonal_matvec(v[:, j], b[:, j], ld, dd, ud)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            Tridiagonal_matvec(v[i], b[i], ld, dd, ud)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Tridiagonal_matvec3D_ptr(v, b, ld, dd, ud, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                Tridiagonal_matvec(v[:, j, k], b[:, j, k], ld, dd, ud)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                Tridiagonal_matvec(v[i, :, k], b[i, :, k], ld, dd, ud)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                Tridiagonal_matvec(v[i, j], b[i, j], ld, dd, ud)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def Pentadiagonal_matvec(v, b, ldd, ld, dd, ud, udd):
+    N = dd.shape[0]
+    b[0] = dd[0]*v[0] + ud[0]*v[2] + udd[0]*v[4]
+    b[1] = dd[1]*v[1] + ud[1]*v[3] + udd[1]*v[5]
+    b[2] = ld[0]*v[0] + dd[2]*v[2] + ud[2]*v[4] + udd[2]*v[6]
+    b[3] = ld[1]*v[1] + dd[3]*v[3] + ud[3]*v[5] + udd[3]*v[7]
+    for i in range(4, N-4):
+        b[i] = ldd[i-4]*v[i-4] + ld[i-2]*v[i-2] + dd[i]*v[i] + ud[i]*v[i+2] + udd[i]*v[i+4]
+    i = N-4
+    b[i] = ldd[i-4]*v[i-4] + ld[i-2]*v[i-2] + dd[i]*v[i] + ud[i]*v[i+2]
+    i = N-3
+    b[i] = ldd[i-4]*v[i-4] + ld[i-2]*v[i-2] + dd[i]*v[i] + ud[i]*v[i+2]
+    i = N-2
+    b[i] = ldd[i-4]*v[i-4] + ld[i-2]*v[i-2] + dd[i]*v[i]
+    i = N-1
+    b[i] = ldd[i-4]*v[i-4] + ld[i-2]*v[i-2] + dd[i]*v[i]
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Pentadiagonal_matvec2D_ptr(v, b, ldd, ld, dd, ud, udd, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            Pentadiagonal_matvec(v[:, j], b[:, j], ldd, ld, dd, ud, udd)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            Pentadiagonal_matvec(v[i], b[i], ldd, ld, dd, ud, udd)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Pentadiagonal_matvec3D_ptr(v, b, ldd, ld, dd, ud, udd, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                Pentadiagonal_matvec(v[:, j, k], b[:, j, k], ldd, ld, dd, ud, udd)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                Pentadiagonal_matvec(v[i, :, k], b[i, :, k], ldd, ld, dd, ud, udd)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                Pentadiagonal_matvec(v[i, j], b[i, j], ldd, ld, dd, ud, udd)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def CBD_matvec(v, b, ld, ud, udd):
+    N = udd.shape[0]
+    b[0] = ud[0]*v[1] + udd[0]*v[3]
+    for i in range(1, N):
+        b[i] = ld[i-1]*v[i-1] + ud[i]*v[i+1] + udd[i]*v[i+3]
+    i = N
+    b[i] = ld[i-1]*v[i-1] + ud[i]*v[i+1]
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CBD_matvec2D_ptr(v, b, ld, ud, udd, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            CBD_matvec(v[:, j], b[:, j], ld, ud, udd)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            CBD_matvec(v[i], b[i], ld, ud, udd)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CBD_matvec3D_ptr(v, b, ld, ud, udd, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                CBD_matvec(v[:, j, k], b[:, j, k], ld, ud, udd)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                CBD_matvec(v[i, :, k], b[i, :, k], ld, ud, udd)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                CBD_matvec(v[i, j], b[i, j], ld, ud, udd)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def CDB_matvec(v, b, lld, ld, ud):
+    N = ud.shape[0]
+    b[0] = ud[0]*v[1]
+    for k in range(1, 3):
+        b[k] = ld[k-1]*v[k-1] + ud[k]*v[k+1]
+    for k in range(3, N):
+        b[k] = lld[k-3]*v[k-3] + ld[k-1]*v[k-1] + ud[k]*v[k+1]
+    for k in range(N, N+2):
+        b[k] = lld[k-3]*v[k-3] + ld[k-1]*v[k-1]
+    b[N+2] = lld[N-1]*v[N-1]
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CDB_matvec2D_ptr(v, b, lld, ld, ud, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            CDB_matvec(v[:, j], b[:, j], lld, ld, ud)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            CDB_matvec(v[i], b[i], lld, ld, ud)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def CDB_matvec3D_ptr(v, b, lld, ld, ud, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                CDB_matvec(v[:, j, k], b[:, j, k], lld, ld, ud)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                CDB_matvec(v[i, :, k], b[i, :, k], lld, ld, ud)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                CDB_matvec(v[i, j], b[i, j], lld, ld, ud)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def BBD_matvec1D_ptr(v, b, ld, dd, ud, uud):
+    N = uud.shape[0]
+    b[0] = dd[0]*v[0] + ud[0]*v[2] + uud[0]*v[4]
+    b[1] = dd[1]*v[1] + ud[1]*v[3] + uud[1]*v[5]
+    for k in range(2, N):
+        b[k] = ld*v[k-2] + dd[k]*v[k] + ud[k]*v[k+2] + uud[k]*v[k+4]
+    for k in range(N, N+2):
+        b[k] = ld*v[k-2] + dd[k]*v[k] + ud[k]*v[k+2]
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def BBD_matvec2D_ptr(v, b, ld, dd, ud, uud, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            BBD_matvec1D_ptr(v[:, j], b[:, j], ld, dd, ud, uud)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            BBD_matvec1D_ptr(v[i], b[i], ld, dd, ud, uud)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def BBD_matvec3D_ptr(v, b, ld, dd, ud, uud, axis):
+    if axis == 0:
+        for j in nb.prange(v.shape[1]):
+            for k in range(v.shape[2]):
+                BBD_matvec1D_ptr(v[:, j, k], b[:, j, k], ld, dd, ud, uud)
+    elif axis == 1:
+        for i in nb.prange(v.shape[0]):
+            for k in range(v.shape[2]):
+                BBD_matvec1D_ptr(v[i, :, k], b[i, :, k], ld, dd, ud, uud)
+    elif axis == 2:
+        for i in nb.prange(v.shape[0]):
+            for j in range(v.shape[1]):
+                BBD_matvec1D_ptr(v[i, j], b[i, j], ld, dd, ud, uud)
+
+Helmholtz_matvec_1D = Helmholtz_matvec1D
+Helmholtz_matvec2D_ptr = Helmholtz_matvec2D
+Helmholtz_matvec3D_ptr = Helmholtz_matvec3D
+
+def Biharmonic_matvec_1D(v, b, a0, alfa, beta,
+                         sii, siu, siuu, ail, aii, aiu,
+                         bill, bil, bii, biu, biuu, axis=0):
+    Biharmonic_matvec1D(v, b, a0, alfa[0], beta[0],
+                        sii, siu, siuu, ail, aii, aiu,
+                        bill, bil, bii, biu, biuu)
+
+Biharmonic_matvec2D_ptr = Biharmonic_matvec2D
+Biharmonic_matvec3D_ptr = Biharmonic_matvec3D
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Banded_matvec(ab, kl, ku, v, c):
+    N = c.shape[1]
+    M = ab.shape[1]
+    for p in nb.prange(c.shape[0]):
+        for i in range(N):
+            for k in range(max(-kl, -i), min(ku, M-1-i)+1):
+                a = ab[ku-k, i+k]
+                for q in range(c.shape[2]):
+                    c[p, i, q] += a*v[p, i+k, q]
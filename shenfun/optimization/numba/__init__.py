@@ -4,6 +4,8 @@ from .tdma import *
 from .pdma import *
 from .helmholtz import *
 from .biharmonic import *
+from .Matvec import Banded_matvec
+from .quadrature import glr_march
 
 @nb.jit(nopython=True, fastmath=True, cache=True)
 def outer2D(a, b, c, symmetric):
@@ -189,3 +191,37 @@ def apply_bxmask(u_hat, mask):
         else:
             u_hat *= mask
     return u_hat
+
+def derivative_recurrence(input_array, output_array, A, B, C, axis=0):
+    a = np.moveaxis(input_array, axis, 0)
+    c = np.moveaxis(output_array, axis, 0)
+    if a.ndim == 1:
+        derivative_recurrence_1D(a, c, A, B, C)
+    elif a.ndim == 2:
+        derivative_recurrence_2D(a, c, A, B, C)
+    elif a.ndim == 3:
+        derivative_recurrence_3D(a, c, A, B, C)
+    else:
+        for i in range(a.shape[1]):
+            derivative_recurrence(a[:, i], c[:, i], A, B, C)
+    return output_array
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def derivative_recurrence_1D(a, c, A, B, C):
+    N = a.shape[0]
+    c[N-1] = 0
+    if N > 1:
+        c[N-2] = a[N-1]/C[N-2]
+    for j in range(N-2, 0, -1):
+        c[j-1] = (a[j] - B[j]*c[j] - A[j+1]*c[j+1])/C[j-1]
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def derivative_recurrence_2D(a, c, A, B, C):
+    for i in range(a.shape[1]):
+        derivative_recurrence_1D(a[:, i], c[:, i], A, B, C)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def derivative_recurrence_3D(a, c, A, B, C):
+    for i in nb.prange(a.shape[1]):
+        for j in range(a.shape[2]):
+            derivative_recurrence_1D(a[:, i, j], c[:, i, j], A, B, C)
@@ -21,31 +21,31 @@ def LU_Biharmonic(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
                          bill, bil, bii, biu, biuu, u0, u1,
                          u2, l0, l1, axis)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def LU_Biharmonic_2D(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
                      bill, bil, bii, biu, biuu, u0, u1,
                      u2, l0, l1, axis):
     if axis == 0:
-        for j in range(l1.shape[2]):
+        for j in nb.prange(l1.shape[2]):
             LU_Biharmonic_1D(a0, alfa[0, j], beta[0, j],
                              sii, siu, siuu, ail, aii, aiu,
                              bill, bil, bii, biu, biuu,
                              u0[:, :, j], u1[:, :, j],
                              u2[:, :, j], l0[:, :, j], l1[:, :, j])
     elif axis == 1:
-        for i in range(l1.shape[1]):
+        for i in nb.prange(l1.shape[1]):
             LU_Biharmonic_1D(a0, alfa[i, 0], beta[i, 0],
                              sii, siu, siuu, ail, aii, aiu,
                              bill, bil, bii, biu, biuu,
                              u0[:, i], u1[:, i],
                              u2[:, i], l0[:, i], l1[:, i])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def LU_Biharmonic_3D(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
                      bill, bil, bii, biu, biuu, u0, u1,
                      u2, l0, l1, axis):
     if axis == 0:
-        for j in range(l1.shape[2]):
+        for j in nb.prange(l1.shape[2]):
             for k in range(l1.shape[3]):
                 LU_Biharmonic_1D(a0, alfa[0, j, k], beta[0, j, k],
                                  sii, siu, siuu, ail, aii, aiu,
@@ -53,7 +53,7 @@ def LU_Biharmonic_3D(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
                                  u0[:, :, j, k], u1[:, :, j, k],
                                  u2[:, :, j, k], l0[:, :, j, k], l1[:, :, j, k])
     elif axis == 1:
-        for i in range(l1.shape[1]):
+        for i in nb.prange(l1.shape[1]):
             for k in range(l1.shape[3]):
                 LU_Biharmonic_1D(a0, alfa[i, 0, k], beta[i, 0, k],
                                  sii, siu, siuu, ail, aii, aiu,
@@ -61,7 +61,7 @@ def LU_Biharmonic_3D(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
                                  u0[:, i, :, k], u1[:, i, :, k],
                                  u2[:, i, :, k], l0[:, i, :, k], l1[:, i, :, k])
     elif axis == 2:
-        for i in range(l1.shape[1]):
+        for i in nb.prange(l1.shape[1]):
             for j in range(l1.shape[2]):
                 LU_Biharmonic_1D(a0, alfa[i, j, 0], beta[i, j, 0],
                                  sii, siu, siuu, ail, aii, aiu,
@@ -176,17 +176,17 @@ def LU_oe_Biharmonic_1D(odd, a, b, c,
         if kk < M-2:
             u2[kk] = c0[kk+2]
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Biharmonic_factor_pr_3D(axis, a, b, l0, l1):
     if axis == 0:
-        for ii in range(a.shape[2]):
+        for ii in nb.prange(a.shape[2]):
             for jj in range(a.shape[3]):
                 Biharmonic_factor_pr_1D(a[:, :, ii, jj],
                                         b[:, :, ii, jj],
                                         l0[:, :, ii, jj],
                                         l1[:, :, ii, jj])
     elif axis == 1:
-        for ii in range(a.shape[1]):
+        for ii in nb.prange(a.shape[1]):
             for jj in range(a.shape[3]):
                 Biharmonic_factor_pr_1D(a[:, ii, :, jj],
                                         b[:, ii, :, jj],
@@ -194,23 +194,23 @@ def Biharmonic_factor_pr_3D(axis, a, b, l0, l1):
                                         l1[:, ii, :, jj])
 
     elif axis == 2:
-        for ii in range(a.shape[1]):
+        for ii in nb.prange(a.shape[1]):
             for jj in range(a.shape[2]):
                 Biharmonic_factor_pr_1D(a[:, ii, jj, :],
                                         b[:, ii, jj, :],
                                         l0[:, ii, jj, :],
                                         l1[:, ii, jj, :])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Biharmonic_factor_pr_2D(axis, a, b, l0, l1):
     if axis == 0:
-        for ii in range(a.shape[2]):
+        for ii in nb.prange(a.shape[2]):
             Biharmonic_factor_pr_1D(a[:, :, ii],
                                     b[:, :, ii],
                                     l0[:, :, ii],
                                     l1[:, :, ii])
     elif axis == 1:
-        for ii in range(a.shape[1]):
+        for ii in nb.prange(a.shape[1]):
             Biharmonic_factor_pr_1D(a[:, ii, :],
                                     b[:, ii, :],
                                     l0[:, ii, :],
@@ -295,77 +295,77 @@ def ForwardBsolve_L(y, l0, l1, fk):
     for i in range(2, N):
         y[i] = fk[i] - l0[i-1]*y[i-1] - l1[i-2]*y[i-2]
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Solve_Biharmonic_2D(axis, b, u, u0, u1, u2, l0, l1, ak, bk, a0):
     if axis == 0:
-        for j in range(b.shape[1]):
+        for j in nb.prange(b.shape[1]):
             Solve_Biharmonic_1D(b[:, j], u[:, j], u0[:, :, j], u1[:, :, j],
                                 u2[:, :, j], l0[:, :, j], l1[:, :, j],
                                 ak[:, :, j], bk[:, :, j], a0)
     elif axis == 1:
-        for i in range(b.shape[0]):
+        for i in nb.prange(b.shape[0]):
             Solve_Biharmonic_1D(b[i], u[i], u0[:, i], u1[:, i],
                                 u2[:, i], l0[:, i], l1[:, i],
                                 ak[:, i], bk[:, i], a0)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Solve_Biharmonic_3D(axis, b, u, u0, u1, u2, l0, l1, ak, bk, a0):
     if axis == 0:
-        for j in range(b.shape[1]):
+        for j in nb.prange(b.shape[1]):
             for k in range(b.shape[2]):
                 Solve_Biharmonic_1D(b[:, j, k], u[:, j, k], u0[:, :, j, k], u1[:, :, j, k],
                                     u2[:, :, j, k], l0[:, :, j, k], l1[:, :, j, k],
                                     ak[:, :, j, k], bk[:, :, j, k], a0)
     elif axis == 1:
-       for i in range(b.shape[0]):
+       for i in nb.prange(b.shape[0]):
             for k in range(b.shape[2]):
                 Solve_Biharmonic_1D(b[i, :, k], u[i, :, k], u0[:, i, :, k], u1[:, i, :, k],
                                     u2[:, i, :, k], l0[:, i, :, k], l1[:, i, :, k],
                                     ak[:, i, :, k], bk[:, i, :, k], a0)
     elif axis == 2:
-       for i in range(b.shape[0]):
+       for i in nb.prange(b.shape[0]):
             for j in range(b.shape[1]):
                 Solve_Biharmonic_1D(b[i, j], u[i, j], u0[:, i, j], u1[:, i, j],
                                     u2[:, i, j], l0[:, i, j], l1[:, i, j],
                                     ak[:, i, j], bk[:, i, j], a0)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Biharmonic_matvec2D(v, b, a0, alfa, beta,
                         sii, siu, siuu,
                         ail, aii, aiu,
                         bill, bil, bii, biu, biuu, axis):
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in nb.prange(v.shape[1]):
             Biharmonic_matvec1D(v[:, j], b[:, j], a0, alfa[0, j],
                                 beta[0, j], sii, siu, siuu,
                                 ail, aii, aiu,
                                 bill, bil, bii, biu, biuu)
     elif axis == 1:
-        for i in range(v.shape[0]):
+        for i in nb.prange(v.shape[0]):
             Biharmonic_matvec1D(v[i], b[i], a0, alfa[i, 0],
                                 beta[i, 0], sii, siu, siuu,
                                 ail, aii, aiu,
                                 bill, bil, bii, biu, biuu)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Biharmonic_matvec3D(v, b, a0, alfa, beta,
                         sii, siu, siuu,
                         ail, aii, aiu,
                         bill, bil, bii, biu, biuu, axis):
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in nb.prange(v.shape[1]):
             for k in range(v.shape[2]):
                 Biharmonic_matvec1D(v[:, j, k], b[:, j, k], a0, alfa[0, j, k],
                                     beta[0, j, k], sii, siu, siuu,
                                     ail, aii, aiu, bill, bil, bii, biu, biuu)
     elif axis == 1:
-        for i in range(v.shape[0]):
+        for i in nb.prange(v.shape[0]):
             for k in range(v.shape[2]):
                 Biharmonic_matvec1D(v[i, :, k], b[i, :, k], a0, alfa[i, 0, k],
                                     beta[i, 0, k], sii, siu, siuu,
                                     ail, aii, aiu, bill, bil, bii, biu, biuu)
     elif axis == 2:
-        for i in range(v.shape[0]):
+        for i in nb.prange(v.shape[0]):
             for j in range(v.shape[1]):
                 Biharmonic_matvec1D(v[i, j], b[i, j], a0, alfa[i, j, 0],
                                     beta[i, j, 0], sii, siu, siuu,
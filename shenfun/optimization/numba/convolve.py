@@ -0,0 +1,47 @@
+"""
+Numba versions of the Fourier convolutions in cython/convolve.pyx
+"""
+import numba as nb
+
+__all__ = ['convolve_1D', 'convolve_real_1D']
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def convolve_1D(u, v, uv, k):
+    N = u.shape[0]
+    for m in k:
+        for n in k:
+            p = m + n
+            if N % 2 == 0:
+                if abs(m) == N//2:
+                    um = u[m]*0.5
+                else:
+                    um = u[m]
+                if abs(n) == N//2:
+                    vn = v[n]*0.5
+                else:
+                    vn = v[n]
+            else:
+                um = u[m]
+                vn = v[n]
+            uv[p] = uv[p] + um*vn
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def convolve_real_1D(u, v, uv, k):
+    N = uv.shape[0]-1
+    for m in k:
+        for n in k:
+            p = m + n
+            if p >= 0:
+                if N % 2 == 0 and abs(m) == N//2:
+                    um = u[abs(m)]*0.5
+                elif m >= 0:
+                    um = u[m]
+                else:
+                    um = u[abs(m)].conjugate()
+                if N % 2 == 0 and abs(n) == N//2:
+                    vn = v[abs(n)]*0.5
+                elif n >= 0:
+                    vn = v[n]
+                else:
+                    vn = v[abs(n)].conjugate()
+                uv[p] = uv[p] + um*vn
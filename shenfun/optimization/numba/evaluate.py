@@ -0,0 +1,167 @@
+"""
+Numba versions of the routines in cython/evaluate.pyx
+
+The Cython module has one specialized kernel for each combination of
+Fourier and non-Fourier bases. Numba compiles one specialization for each
+combination of input dtypes automatically, so here all combinations are
+handled by the same kernels, looping in parallel over the points.
+"""
+import numba as nb
+import numpy as np
+
+__all__ = ['evaluate_2D', 'evaluate_3D', 'evaluate_lm_2D', 'evaluate_lm_3D']
+
+def evaluate_2D(b, u, P, r2c, M, start):
+    if r2c < 0:
+        return _evaluate_2D(b, u, P[0], P[1])
+    return _evaluate_2D_r2c(b, u, P[0], P[1], r2c, M, start)
+
+def evaluate_3D(b, u, P, r2c, M, start):
+    if r2c < 0:
+        return _evaluate_3D(b, u, P[0], P[1], P[2])
+    return _evaluate_3D_r2c(b, u, P[0], P[1], P[2], r2c, M, start)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_2D(b, u, P0, P1):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            for l in range(u.shape[1]):
+                b[i] += u[k, l] * P0[i, k] * P1[i, l]
+    return b
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_2D_r2c(b, u, P0, P1, r2c, M, start):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            for l in range(u.shape[1]):
+                p = (u[k, l] * P0[i, k] * P1[i, l]).real
+                b[i] += p
+                if r2c == 0:
+                    ii = k + start
+                else:
+                    ii = l + start
+                if ii > 0 & ii < M:
+                    b[i] += p
+    return b
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_3D(b, u, P0, P1, P2):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            for l in range(u.shape[1]):
+                p1 = P0[i, k] * P1[i, l]
+                for m in range(u.shape[2]):
+                    b[i] += u[k, l, m] * p1 * P2[i, m]
+    return b
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_3D_r2c(b, u, P0, P1, P2, r2c, M, start):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            for l in range(u.shape[1]):
+                p1 = P0[i, k] * P1[i, l]
+                for m in range(u.shape[2]):
+                    p = (u[k, l, m] * p1 * P2[i, m]).real
+                    b[i] += p
+                    if r2c == 0:
+                        ii = k + start
+                    elif r2c == 1:
+                        ii = l + start
+                    else:
+                        ii = m + start
+                    if ii > 0 & ii < M:
+                        b[i] += p
+    return b
+
+def _lm_basis(base, x, n):
+    """Return basis values of non-Fourier base and whether base is Fourier
+
+    The Fourier exponentials are computed on the fly by the kernels, whereas
+    the ``n`` first basis functions of all other bases are evaluated here.
+    """
+    if base.family() == 'fourier':
+        return np.zeros((0, 0)), True
+    P = np.zeros((x.shape[0], n))
+    for k in range(n):
+        P[:, k] = base.evaluate_basis(x, k, np.zeros(x.shape[0]))
+    return P, False
+
+def evaluate_lm_2D(bases, b, u, x0, x1, w0, w1, r2c, M, start):
+    P0, f0 = _lm_basis(bases[0], x0, u.shape[0])
+    P1, f1 = _lm_basis(bases[1], x1, u.shape[1])
+    if r2c < 0:
+        return _evaluate_lm_2D(b, u, x0, x1, w0, w1, P0, P1, f0, f1)
+    return _evaluate_lm_2D_r2c(b, u, x0, x1, w0, w1, P0, P1, f0, f1, r2c, M, start)
+
+def evaluate_lm_3D(bases, b, u, x0, x1, x2, w0, w1, w2, r2c, M, start):
+    P0, f0 = _lm_basis(bases[0], x0, u.shape[0])
+    P1, f1 = _lm_basis(bases[1], x1, u.shape[1])
+    P2, f2 = _lm_basis(bases[2], x2, u.shape[2])
+    if r2c < 0:
+        return _evaluate_lm_3D(b, u, x0, x1, x2, w0, w1, w2, P0, P1, P2,
+                               f0, f1, f2)
+    return _evaluate_lm_3D_r2c(b, u, x0, x1, x2, w0, w1, w2, P0, P1, P2,
+                               f0, f1, f2, r2c, M, start)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def _lm_factor(fourier, P, w, x, i, k):
+    if fourier:
+        return np.exp(1j*w[k]*x[i])
+    return P[i, k] + 0j
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_lm_2D(b, u, x0, x1, w0, w1, P0, P1, f0, f1):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            p0 = _lm_factor(f0, P0, w0, x0, i, k)
+            for l in range(u.shape[1]):
+                b[i] += u[k, l] * p0 * _lm_factor(f1, P1, w1, x1, i, l)
+    return b
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_lm_2D_r2c(b, u, x0, x1, w0, w1, P0, P1, f0, f1, r2c, M, start):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            p0 = _lm_factor(f0, P0, w0, x0, i, k)
+            for l in range(u.shape[1]):
+                p = (u[k, l] * p0 * _lm_factor(f1, P1, w1, x1, i, l)).real
+                b[i] += p
+                if r2c == 0:
+                    ii = k + start
+                else:
+                    ii = l + start
+                if ii > 0 & ii < M:
+                    b[i] += p
+    return b
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_lm_3D(b, u, x0, x1, x2, w0, w1, w2, P0, P1, P2, f0, f1, f2):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            p0 = _lm_factor(f0, P0, w0, x0, i, k)
+            for l in range(u.shape[1]):
+                p1 = p0 * _lm_factor(f1, P1, w1, x1, i, l)
+                for m in range(u.shape[2]):
+                    b[i] += u[k, l, m] * p1 * _lm_factor(f2, P2, w2, x2, i, m)
+    return b
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _evaluate_lm_3D_r2c(b, u, x0, x1, x2, w0, w1, w2, P0, P1, P2, f0, f1, f2,
+                        r2c, M, start):
+    for i in nb.prange(b.shape[0]):
+        for k in range(u.shape[0]):
+            p0 = _lm_factor(f0, P0, w0, x0, i, k)
+            for l in range(u.shape[1]):
+                p1 = p0 * _lm_factor(f1, P1, w1, x1, i, l)
+                for m in range(u.shape[2]):
+                    p = (u[k, l, m] * p1 * _lm_factor(f2, P2, w2, x2, i, m)).real
+                    b[i] += p
+                    if r2c == 0:
+                        ii = k + start
+                    elif r2c == 1:
+                        ii = l + start
+                    else:
+                        ii = m + start
+                    if ii > 0 & ii < M:
+                        b[i] += p
+    return b
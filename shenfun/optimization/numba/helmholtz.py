@@ -11,7 +11,7 @@ def LU_Helmholtz(A, B, A_s, B_s, neumann, d0, d1, d2, L, axis):
     A_0, A_2, A_4, B_m2, B_0, B_2 = preLU(A, B, neumann)
 
     if n == 1:
-        LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2, np.asscalar(A_s), np.asscalar(B_s), neumann, d0, d1, d2, L)
+        LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2, np.asarray(A_s).item(), np.asarray(B_s).item(), neumann, d0, d1, d2, L)
     elif n == 2:
         LU_Helmholtz_2D(A_0, A_2, A_4, B_m2, B_0, B_2, axis, A_s, B_s, neumann, d0, d1, d2, L)
     elif n == 3:
@@ -69,12 +69,12 @@ def LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2, A_scale, B_scale, neumann, d0
         if i < N-4:
             d2[i] = A_scale*A_4[i] - L[i-2]*d2[i-2]
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def LU_Helmholtz_3D(A_0, A_2, A_4, B_m2, B_0, B_2,
                     axis, A_scale, B_scale,
                     neumann, d0, d1, d2, L):
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in nb.prange(d0.shape[1]):
             for k in range(d0.shape[2]):
                 LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2,
                                 A_scale[0, j, k],
@@ -86,7 +86,7 @@ def LU_Helmholtz_3D(A_0, A_2, A_4, B_m2, B_0, B_2,
                                 L[:, j, k])
 
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
             for k in range(d0.shape[2]):
                 LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2,
                                 A_scale[i, 0, k],
@@ -98,7 +98,7 @@ def LU_Helmholtz_3D(A_0, A_2, A_4, B_m2, B_0, B_2,
                                 L[i, :, k])
 
     elif axis == 2:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
             for j in range(d0.shape[1]):
                 LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2,
                                 A_scale[i, j, 0],
@@ -109,12 +109,12 @@ def LU_Helmholtz_3D(A_0, A_2, A_4, B_m2, B_0, B_2,
                                 d2[i, j, :],
                                 L[i, j, :])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def LU_Helmholtz_2D(A_0, A_2, A_4, B_m2, B_0, B_2,
                     axis, A_scale, B_scale, neumann,
                     d0, d1, d2, L):
     if axis == 0:
-        for i in range(d0.shape[1]):
+        for i in nb.prange(d0.shape[1]):
             LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2,
                             A_scale[0, i],
                             B_scale[0, i],
@@ -125,7 +125,7 @@ def LU_Helmholtz_2D(A_0, A_2, A_4, B_m2, B_0, B_2,
                             L[:, i])
 
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
             LU_Helmholtz_1D(A_0, A_2, A_4, B_m2, B_0, B_2,
                             A_scale[i, 0],
                             B_scale[i, 0],
@@ -165,37 +165,42 @@ def Solve_Helmholtz_1D(fk, u_hat, neumann, d0, d1, d2, L, y):
         for i in range(1, N):
             u_hat[i] /= (i*i)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Solve_Helmholtz_2D(fk, u_hat, neumann, d0, d1, d2, L, y, axis):
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in nb.prange(d0.shape[1]):
+            yi = np.empty_like(y) # work array private to each thread
             Solve_Helmholtz_1D(fk[:, j], u_hat[:, j], neumann, d0[:, j],
-                               d1[:, j], d2[:, j], L[:, j], y)
+                               d1[:, j], d2[:, j], L[:, j], yi)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
+            yi = np.empty_like(y) # work array private to each thread
             Solve_Helmholtz_1D(fk[i], u_hat[i], neumann, d0[i], d1[i], d2[i],
-                               L[i], y)
+                               L[i], yi)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Solve_Helmholtz_3D(fk, u_hat, neumann, d0, d1, d2, L, y, axis):
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in nb.prange(d0.shape[1]):
+            yi = np.empty_like(y) # work array private to each thread
             for k in range(d0.shape[2]):
                 Solve_Helmholtz_1D(fk[:, j, k], u_hat[:, j, k], neumann,
                                    d0[:, j, k], d1[:, j, k], d2[:, j, k],
-                                   L[:, j, k], y)
+                                   L[:, j, k], yi)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
+            yi = np.empty_like(y) # work array private to each thread
             for k in range(d0.shape[2]):
                 Solve_Helmholtz_1D(fk[i, :, k], u_hat[i, :, k], neumann,
                                    d0[i, :, k], d1[i, :, k], d2[i, :, k],
-                                   L[i, :, k], y)
+                                   L[i, :, k], yi)
     elif axis == 2:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
+            yi = np.empty_like(y) # work array private to each thread
             for j in range(d0.shape[1]):
                 Solve_Helmholtz_1D(fk[i, j], u_hat[i, j], neumann,
                                    d0[i, j], d1[i, j], d2[i, j],
-                                   L[i, j], y)
+                                   L[i, j], yi)
 
 @nb.jit(nopython=True, fastmath=True, cache=True)
 def Helmholtz_matvec1D(v, b, alfa, beta, dd, ud, bd):
@@ -224,32 +229,32 @@ def Helmholtz_matvec1D(v, b, alfa, beta, dd, ud, bd):
     b[k] = (dd[k]*alfa + bd[k]*beta)*v[k] - M_PI_2*beta*v[k+2] + ud[k]*alfa*s1
     b[k-1] = (dd[k-1]*alfa + bd[k-1]*beta)*v[k-1] - M_PI_2*beta*v[k+1] + ud[k-1]*alfa*s2
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Helmholtz_matvec3D(v, b, alfa, beta, dd, ud, bd, axis):
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in nb.prange(v.shape[1]):
             for k in range(v.shape[2]):
                 Helmholtz_matvec1D(v[:, j, k], b[:, j, k], alfa[0, j, k],
                                    beta[0, j, k], dd, ud, bd)
     elif axis == 1:
-        for i in range(v.shape[0]):
+        for i in nb.prange(v.shape[0]):
             for k in range(v.shape[2]):
                Helmholtz_matvec1D(v[i, :, k], b[i, :, k], alfa[i, 0, k],
                                   beta[i, 0, k], dd, ud, bd)
     elif axis == 2:
-        for i in range(v.shape[0]):
+        for i in nb.prange(v.shape[0]):
             for j in range(v.shape[1]):
                 Helmholtz_matvec1D(v[i, j], b[i, j], alfa[i, j, 0],
                                    beta[i, j, 0], dd, ud, bd)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Helmholtz_matvec2D(v, b, alfa, beta, dd, ud, bd, axis):
     if axis == 0:
-        for j in range(v.shape[1]):
+        for j in nb.prange(v.shape[1]):
             Helmholtz_matvec1D(v[:, j], b[:, j], alfa[0, j],
                                beta[0, j], dd, ud, bd)
     elif axis == 1:
-        for i in range(v.shape[0]):
+        for i in nb.prange(v.shape[0]):
             Helmholtz_matvec1D(v[i], b[i], alfa[i, 0],
                                beta[i, 0], dd, ud, bd)
 
@@ -0,0 +1,147 @@
+"""
+Numba versions of the linear algebra routines in cython/la.pyx
+
+All functions have the same names and signatures as their Cython
+counterparts.
+"""
+import numba as nb
+from .tdma import *
+from .pdma import *
+from .helmholtz import *
+from .biharmonic import *
+
+__all__ = ['TDMA_SymLU', 'TDMA_SymSolve', 'TDMA_SymSolve2D', 'TDMA_SymSolve3D',
+           'TDMA_SymLU_VC', 'TDMA_SymSolve_VC', 'TDMA_O_SymLU', 'TDMA_O_SymSolve',
+           'PDMA_SymLU', 'PDMA_SymLU_VC', 'PDMA_SymSolve', 'PDMA_SymLU2D',
+           'PDMA_SymLU3D', 'PDMA_SymSolve_VC', 'LU_Helmholtz', 'Solve_Helmholtz',
+           'LU_Biharmonic', 'Biharmonic_factor_pr', 'Biharmonic_Solve',
+           'LU_Helmholtz_Biharmonic_1D', 'LU_Helmholtz_Biharmonic_3D',
+           'Solve_Helmholtz_Biharmonic_1D', 'Solve_Helmholtz_Biharmonic_1D_p',
+           'Solve_Helmholtz_Biharmonic_2D_ptr', 'Solve_Helmholtz_Biharmonic_3D_ptr']
+
+def LU_Helmholtz_Biharmonic_1D(A, B, A_scale, B_scale, l2, l1, d, u1, u2):
+    _LU_Helmholtz_Biharmonic_1D(A[0], A[2], A[-2], B[-4], B[-2], B[0], B[2],
+                                B[4], A_scale, B_scale, l2, l1, d, u1, u2)
+
+def LU_Helmholtz_Biharmonic_3D(A, B, axis, A_scale, B_scale, l2, l1, d, u1, u2):
+    _LU_Helmholtz_Biharmonic_3D(A[0], A[2], A[-2], B[-4], B[-2], B[0], B[2],
+                                B[4], axis, A_scale, B_scale, l2, l1, d, u1, u2)
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def _LU_Helmholtz_Biharmonic_1D(A_0, A_2, A_m2, B_m4, B_m2, B_0, B_2, B_4,
+                                A_scale, B_scale, l2, l1, d, u1, u2):
+    n = A_0.shape[0]
+    k = 2
+
+    # Set up matrix diagonals
+    l2[:] = B_scale*B_m4
+    l1[:] = A_scale*A_m2 + B_scale*B_m2
+    d[:] = A_scale*A_0 + B_scale*B_0
+    u1[:] = A_scale*A_2 + B_scale*B_2
+    u2[:] = B_scale*B_4
+
+    for i in range(n-2*k):
+        lam = l1[i]/d[i]
+        d[i+k] -= lam*u1[i]
+        u1[i+k] -= lam*u2[i]
+        l1[i] = lam
+        lam = l2[i]/d[i]
+        l1[i+k] -= lam*u1[i]
+        d[i+2*k] -= lam*u2[i]
+        l2[i] = lam
+
+    i = n-4
+    lam = l1[i]/d[i]
+    d[i+k] -= lam*u1[i]
+    l1[i] = lam
+    i = n-3
+    lam = l1[i]/d[i]
+    d[i+k] -= lam*u1[i]
+    l1[i] = lam
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def _LU_Helmholtz_Biharmonic_3D(A_0, A_2, A_m2, B_m4, B_m2, B_0, B_2, B_4,
+                                axis, A_scale, B_scale, l2, l1, d, u1, u2):
+    if axis == 0:
+        for j in nb.prange(d.shape[1]):
+            for k in range(d.shape[2]):
+                _LU_Helmholtz_Biharmonic_1D(A_0, A_2, A_m2, B_m4, B_m2, B_0,
+                                            B_2, B_4, A_scale[0, j, k],
+                                            B_scale[0, j, k], l2[:, j, k],
+                                            l1[:, j, k], d[:, j, k],
+                                            u1[:, j, k], u2[:, j, k])
+    elif axis == 1:
+        for i in nb.prange(d.shape[0]):
+            for k in range(d.shape[2]):
+                _LU_Helmholtz_Biharmonic_1D(A_0, A_2, A_m2, B_m4, B_m2, B_0,
+                                            B_2, B_4, A_scale[i, 0, k],
+                                            B_scale[i, 0, k], l2[i, :, k],
+                                            l1[i, :, k], d[i, :, k],
+                                            u1[i, :, k], u2[i, :, k])
+    elif axis == 2:
+        for i in nb.prange(d.shape[0]):
+            for j in range(d.shape[1]):
+                _LU_Helmholtz_Biharmonic_1D(A_0, A_2, A_m2, B_m4, B_m2, B_0,
+                                            B_2, B_4, A_scale[i, j, 0],
+                                            B_scale[i, j, 0], l2[i, j],
+                                            l1[i, j], d[i, j], u1[i, j],
+                                            u2[i, j])
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def Solve_Helmholtz_Biharmonic_1D_p(fk, u_hat, l2, l1, d, u1, u2):
+    n = fk.shape[0]-4
+    for k in range(n):
+        u_hat[k] = fk[k]
+
+    u_hat[2] -= l1[0]*u_hat[0]
+    u_hat[3] -= l1[1]*u_hat[1]
+    for k in range(4, n):
+        u_hat[k] -= (l1[k-2]*u_hat[k-2] + l2[k-4]*u_hat[k-4])
+
+    u_hat[n-1] /= d[n-1]
+    u_hat[n-2] /= d[n-2]
+    u_hat[n-3] /= d[n-3]
+    u_hat[n-3] -= u1[n-3]*u_hat[n-1]/d[n-3]
+    u_hat[n-4] /= d[n-4]
+    u_hat[n-4] -= u1[n-4]*u_hat[n-2]/d[n-4]
+    for k in range(n-5, -1, -1):
+        u_hat[k] /= d[k]
+        u_hat[k] -= (u1[k]*u_hat[k+2]/d[k] + u2[k]*u_hat[k+4]/d[k])
+
+def Solve_Helmholtz_Biharmonic_1D(fk, u_hat, l2, l1, d, u1, u2):
+    Solve_Helmholtz_Biharmonic_1D_p(fk.copy(), u_hat, l2, l1, d, u1, u2)
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Solve_Helmholtz_Biharmonic_2D_ptr(axis, fk, u_hat, l2, l1, d, u1, u2):
+    if axis == 0:
+        for j in nb.prange(d.shape[1]):
+            Solve_Helmholtz_Biharmonic_1D_p(fk[:, j], u_hat[:, j], l2[:, j],
+                                            l1[:, j], d[:, j], u1[:, j],
+                                            u2[:, j])
+    elif axis == 1:
+        for i in nb.prange(d.shape[0]):
+            Solve_Helmholtz_Biharmonic_1D_p(fk[i], u_hat[i], l2[i], l1[i],
+                                            d[i], u1[i], u2[i])
+
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
+def Solve_Helmholtz_Biharmonic_3D_ptr(axis, fk, u_hat, l2, l1, d, u1, u2):
+    if axis == 0:
+        for j in nb.prange(d.shape[1]):
+            for k in range(d.shape[2]):
+                Solve_Helmholtz_Biharmonic_1D_p(fk[:, j, k], u_hat[:, j, k],
+                                                l2[:, j, k], l1[:, j, k],
+                                                d[:, j, k], u1[:, j, k],
+                                                u2[:, j, k])
+    elif axis == 1:
+        for i in nb.prange(d.shape[0]):
+            for k in range(d.shape[2]):
+                Solve_Helmholtz_Biharmonic_1D_p(fk[i, :, k], u_hat[i, :, k],
+                                                l2[i, :, k], l1[i, :, k],
+                                                d[i, :, k], u1[i, :, k],
+                                                u2[i, :, k])
+    elif axis == 2:
+        for i in nb.prange(d.shape[0]):
+            for j in range(d.shape[1]):
+                Solve_Helmholtz_Biharmonic_1D_p(fk[i, j], u_hat[i, j], l2[i, j],
+                                                l1[i, j], d[i, j], u1[i, j],
+                                                u2[i, j])
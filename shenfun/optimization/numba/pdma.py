@@ -34,27 +34,27 @@ def PDMA_SymLU(d, e, f):
     d[n-1] -= lam*e[n-3]
     e[n-3] = lam
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def PDMA_SymLU2D(d, e, f, axis):
     if axis == 0:
-        for j in range(d.shape[1]):
+        for j in nb.prange(d.shape[1]):
             PDMA_SymLU(d[:-4, j], e[:-6, j], f[:-8, j])
     elif axis == 1:
-        for i in range(d.shape[0]):
+        for i in nb.prange(d.shape[0]):
             PDMA_SymLU(d[i, :-4], e[i, :-6], f[i, :-8])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def PDMA_SymLU3D(d, e, f, axis):
     if axis == 0:
-        for j in range(d.shape[1]):
+        for j in nb.prange(d.shape[1]):
             for k in range(d.shape[2]):
                 PDMA_SymLU(d[:-4, j, k], e[:-6, j, k], f[:-8, j, k])
     elif axis == 1:
-        for i in range(d.shape[0]):
+        for i in nb.prange(d.shape[0]):
             for k in range(d.shape[2]):
                 PDMA_SymLU(d[i, :-4, k], e[i, :-6, k], f[i, :-8, k])
     elif axis == 2:
-        for i in range(d.shape[0]):
+        for i in nb.prange(d.shape[0]):
             for j in range(d.shape[1]):
                 PDMA_SymLU(d[i, j, :-4], e[i, j, :-6], f[i, j, :-8])
 
@@ -94,50 +94,50 @@ def PDMA_SymSolve1D(d, e, f, b):
         b[k] /= d[k]
         b[k] -= (e[k]*b[k+2] + f[k]*b[k+4])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def PDMA_SymSolve2D(d, e, f, b, axis):
     if axis == 0:
-        for j in range(b.shape[1]):
+        for j in nb.prange(b.shape[1]):
             PDMA_SymSolve1D(d, e, f, b[:, j])
     elif axis == 1:
-        for i in range(b.shape[0]):
+        for i in nb.prange(b.shape[0]):
             PDMA_SymSolve1D(d, e, f, b[i])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def PDMA_SymSolve3D(d, e, f, b, axis):
     if axis == 0:
-        for j in range(b.shape[1]):
+        for j in nb.prange(b.shape[1]):
             for k in range(b.shape[2]):
                 PDMA_SymSolve1D(d, e, f, b[:, j, k])
     elif axis == 1:
-        for i in range(b.shape[0]):
+        for i in nb.prange(b.shape[0]):
             for k in range(b.shape[2]):
                 PDMA_SymSolve1D(d, e, f, b[i, :, k])
     elif axis == 2:
-        for i in range(b.shape[0]):
+        for i in nb.prange(b.shape[0]):
             for j in range(b.shape[1]):
                 PDMA_SymSolve1D(d, e, f, b[i, j])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def PDMA_SymSolve3D_VC(d, e, f, x, axis):
     if axis == 0:
-        for j in range(d.shape[1]):
+        for j in nb.prange(d.shape[1]):
             for k in range(d.shape[2]):
                 PDMA_SymSolve1D(d[:-4, j, k], e[:-6, j, k], f[:-8, j, k], x[:, j, k])
     elif axis == 1:
-        for i in range(d.shape[0]):
+        for i in nb.prange(d.shape[0]):
             for k in range(d.shape[2]):
                 PDMA_SymSolve1D(d[i, :-4, k], e[i, :-6, k], f[i, :-8, k], x[i, :, k])
     elif axis == 2:
-        for i in range(d.shape[0]):
+        for i in nb.prange(d.shape[0]):
             for j in range(d.shape[1]):
                 PDMA_SymSolve1D(d[i, j, :-4], e[i, j, :-6], f[i, j, :-8], x[i, j, :])
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def PDMA_SymSolve2D_VC(d, e, f, x, axis):
     if axis == 0:
-        for j in range(d.shape[1]):
+        for j in nb.prange(d.shape[1]):
             PDMA_SymSolve1D(d[:-4, j], e[:-6, j], f[:-8, j], x[:, j])
     elif axis == 1:
-        for i in range(d.shape[0]):
+        for i in nb.prange(d.shape[0]):
             PDMA_SymSolve1D(d[i, :-4], e[i, :-6], f[i, :-8], x[i, :])
@@ -0,0 +1,103 @@
+"""
+Numba version of the marching algorithm in shenfun/utilities/quadrature.py
+"""
+from math import sqrt, atan, log, pi, sin, cos
+import numba as nb
+import numpy as np
+
+__all__ = ['glr_march']
+
+@nb.jit(nopython=True, fastmath=False, cache=True)
+def glr_march(coef, x0, u0, du0, direction, x, ld):
+    M = 200
+    b = np.zeros(M)
+    c, u, du = x0, u0, du0
+    s = sqrt(u*u+du*du)
+    u, du = u/s, du/s
+    lscale = log(s)
+    for j in range(x.shape[0]):
+        pc = coef[0, 0]+(coef[0, 1]+coef[0, 2]*c)*c
+        rc = coef[2, 0]+(coef[2, 1]+coef[2, 2]*c)*c
+        sc = sqrt(rc/pc)
+        th0 = atan(sc*u/du) if du != 0 else pi/2
+        if j > 0 or u == 0:
+            th1 = th0 + direction*pi
+        elif direction*th0 > 0:
+            th1 = direction*pi
+        else:
+            th1 = 0.
+        xg = c
+        K = 10
+        h = (th1-th0)/K
+        th = th0
+        for k in range(K):
+            k1 = h*_dxdth(coef, xg, th)
+            k2 = h*_dxdth(coef, xg+k1/2, th+h/2)
+            k3 = h*_dxdth(coef, xg+k2/2, th+h/2)
+            k4 = h*_dxdth(coef, xg+k3, th+h)
+            xg += (k1+2*k2+2*k3+k4)/6
+            th += h
+        H = xg-c
+        m = _taylor(coef, c, u, du, H, b)
+        t = 1.
+        for it in range(20):
+            f, df = _horner(b, m, t)
+            dt = f/df
+            t -= dt
+            if abs(dt) < 1e-15:
+                break
+        f, df = _horner(b, m, t)
+        c = c + t*H
+        u, du = f, df/H
+        s = abs(du)
+        u, du = u/s, du/s
+        lscale += log(s)
+        x[j] = c
+        ld[j] = lscale
+
+@nb.jit(nopython=True, fastmath=False, cache=True)
+def _horner(b, m, t):
+    f = b[m-1]
+    df = 0.
+    for k in range(m-2, -1, -1):
+        df = df*t + f
+        f = f*t + b[k]
+    return f, df
+
+@nb.jit(nopython=True, fastmath=False, cache=True)
+def _dxdth(coef, x, th):
+    p = coef[0, 0]+(coef[0, 1]+coef[0, 2]*x)*x
+    dp = coef[0, 1]+2*coef[0, 2]*x
+    q = coef[1, 0]+coef[1, 1]*x
+    r = coef[2, 0]+(coef[2, 1]+coef[2, 2]*x)*x
+    dr = coef[2, 1]+2*coef[2, 2]*x
+    s = sqrt(r/p)
+    w = (dr/r - dp/p)/2 + q/p
+    return 1/(s + w*sin(th)*cos(th))
+
+@nb.jit(nopython=True, fastmath=False, cache=True)
+def _taylor(coef, c, u, du, H, b):
+    p = coef[0, 0]+(coef[0, 1]+coef[0, 2]*c)*c
+    dp = coef[0, 1]+2*coef[0, 2]*c
+    ddp = 2*coef[0, 2]
+    q = coef[1, 0]+coef[1, 1]*c
+    dq = coef[1, 1]
+    r = coef[2, 0]+(coef[2, 1]+coef[2, 2]*c)*c
+    dr = coef[2, 1]+2*coef[2, 2]*c
+    ddr = 2*coef[2, 2]
+    M = b.shape[0]
+    b[0] = u
+    b[1] = du*H
+    bmax = max(abs(b[0]), abs(b[1]))
+    m = M
+    for k in range(M-2):
+        bk2 = b[k-2] if k > 1 else 0.
+        bk1 = b[k-1] if k > 0 else 0.
+        b[k+2] = -((k*dp+q)*(k+1)*b[k+1]*H
+                   + (k*(k-1)/2*ddp+k*dq+r)*b[k]*H*H
+                   + dr*bk1*H**3 + ddr/2*bk2*H**4) / (p*(k+2)*(k+1))
+        bmax = max(bmax, abs(b[k+2]))
+        if k > 2 and abs(b[k+2])+abs(b[k+1])+abs(b[k]) < 1e-18*bmax:
+            m = k+3
+            break
+    return m
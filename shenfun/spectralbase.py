@@ -203,13 +203,16 @@ for computing the (weighted) scalar product.
 """
 #pylint: disable=unused-argument, not-callable, no-self-use, protected-access, too-many-public-methods, missing-docstring
 
+import os
 import importlib
 import warnings
-import sympy as sp
+import weakref
+from numbers import Number
 import numpy as np
 from mpi4py_fft import fftw
-from .utilities import CachedArrayDict
+from .utilities import CachedArrayDict, WorkArrayPool, derivative_recurrence
 work = CachedArrayDict()
+work_pool = WorkArrayPool()
 
 class SpectralBase(object):
     """Abstract base class for all spectral function spaces
@@ -594,6 +597,7 @@ class SpectralBase(object):
         if output_array is None:
             output_array = np.zeros(x.shape)
         x = np.atleast_1d(x)
+        import sympy as sp
         X = sp.symbols('x')
         basis = self.sympy_basis(i=i).diff(X, k)
         output_array[:] = sp.lambdify(X, basis, 'numpy')(x)
@@ -748,6 +752,60 @@ class SpectralBase(object):
         """
         raise NotImplementedError
 
+    def apply_derivative(self, input_array, output_array, k=1):
+        """Compute expansion coefficients of derivative along axis of self
+
+        The derivative is computed directly from the expansion coefficients
+        of an orthogonal basis, using O(N) operations for each line along
+        the axis. No matrices are assembled and no mass matrix is inverted.
+
+        Parameters
+        ----------
+            input_array : array
+                Expansion coefficients in orthogonal basis
+            output_array : array
+                Expansion coefficients of derivative in the same basis. May
+                be the same array as input_array.
+            k : int, optional
+                Order of derivative
+
+        Returns
+        -------
+            array
+                output_array
+
+        """
+        src = np.asarray(input_array)
+        out = np.asarray(output_array)
+        if np.may_share_memory(src, out):
+            src = work[(out, 3, False)]
+            src[...] = input_array
+        tmp = work[(out, 2, False)]
+        for i in range(1, k+1):
+            dst = out if (k-i) % 2 == 0 else tmp
+            self._derivative(src, dst)
+            src = dst
+        if self.domain_factor() != 1:
+            output_array *= self.domain_factor()**k
+        return output_array
+
+    def _derivative(self, input_array, output_array):
+        """Compute coefficients of first derivative in reference domain"""
+        A, B, C = self._derivative_recurrence(input_array.shape[self.axis])
+        derivative_recurrence(input_array, output_array, A, B, C, self.axis)
+
+    def _derivative_recurrence(self, N):
+        r"""Return recurrence coefficients A, B and C, such that
+
+        .. math::
+
+            p_n = A_n p'_{n-1} + B_n p'_n + C_n p'_{n+1}
+
+        for the orthogonal basis functions :math:`p_n`. A has length N+1,
+        whereas B and C have length N.
+        """
+        raise NotImplementedError
+
     def plan(self, shape, axis, dtype, options):
         """Plan transform
 
@@ -769,10 +827,14 @@ class SpectralBase(object):
             axis = axis[0]
 
         if isinstance(self.forward, Transform):
-            if self.forward.input_array.shape == shape and self.axis == axis:
+            if (self.forward.input_array.shape == shape and self.axis == axis and
+                    self.forward.input_array.dtype == dtype):
                 # Already planned
                 return
 
+        if work_pool.plan_like(self, shape, axis, dtype, options):
+            return
+
         plan_fwd = self._xfftn_fwd
         plan_bck = self._xfftn_bck
 
@@ -814,13 +876,14 @@ class SpectralBase(object):
 
             n = (shape[axis],)
             U = fftw.aligned(shape, dtype=dtype)
-            xfftn_fwd = plan_fwd(U, n, (axis,), threads=threads, flags=flags)
+            xfftn_fwd = fftw_plans.plan(plan_fwd, U, n, (axis,), threads=threads, flags=flags)
             V = xfftn_fwd.output_array
 
             if np.issubdtype(dtype, np.floating):
                 flags = (fftw.flag_dict[opts['planner_effort']],)
 
-            xfftn_bck = plan_bck(V, n, (axis,), threads=threads, flags=flags, output_array=U)
+            xfftn_bck = fftw_plans.plan(plan_bck, V, n, (axis,), threads=threads, flags=flags,
+                                        output_array=U)
             V.fill(0)
             U.fill(0)
             self._M = xfftn_fwd.get_normalization()
@@ -841,11 +904,40 @@ class SpectralBase(object):
         self.scalar_product = Transform(self.scalar_product, xfftn_fwd, U, V, V)
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        work_pool.add_plan(self, shape, axis, dtype, options)
 
     def _get_truncarray(self, shape, dtype):
         shape = list(shape) if np.ndim(shape) else [shape]
         shape[self.axis] = int(np.round(shape[self.axis] / self.padding_factor))
-        return fftw.aligned(shape, dtype=dtype)
+        return work_pool.aligned(shape, dtype, ('trunc', self.axis))
+
+    def plan_like(self, other):
+        """Plan transforms by sharing work arrays and plans of other
+
+        Parameters
+        ----------
+            other : instance of same class as self
+                Planned basis, with identical layout as the one requested
+                for self
+        """
+        for name in ('forward', 'backward', 'backward_uniform', 'scalar_product'):
+            t = getattr(other, name, None)
+            if not isinstance(t, Transform):
+                continue
+            func = getattr(self, name)
+            if isinstance(func, Transform):
+                func = func.func
+            if name == 'backward_uniform' and t is other.backward:
+                setattr(self, name, self.backward)
+                continue
+            setattr(self, name, Transform(func, t.xfftn, t.input_array,
+                                          t.tmp_array, t.output_array, shared=True))
+        for attr in ('_M', '_planned_axes'):
+            if attr in other.__dict__:
+                setattr(self, attr, getattr(other, attr))
+        self.axis = other.axis
+        self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
+        self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
 
     def get_normalization(self):
         return self._M
@@ -1046,6 +1138,37 @@ class SpectralBase(object):
     def __hash__(self):
         return hash((self.N, self.quad, self.family()))
 
+    def __copy__(self):
+        # Shallow copy that shares the planned transforms, see WorkArrayPool
+        base = self.__class__.__new__(self.__class__)
+        base.__dict__.update(self.__dict__)
+        return base
+
+    def __getstate__(self):
+        # Planned transforms and the link to a TensorProductSpace cannot be
+        # pickled. Store only the type of data, and plan again on unpickling.
+        # Bases of a TensorProductSpace are planned by the unpickled space.
+        state = self.__dict__.copy()
+        for key, val in self.__dict__.items():
+            if isinstance(val, FuncWrap):
+                while isinstance(val, FuncWrap):
+                    val = val.func
+                if getattr(val, '__self__', None) is self:
+                    del state[key]
+                else:
+                    state[key] = val
+        state['xfftn_fwd'] = state['xfftn_bck'] = None
+        state['_tensorproductspace'] = None
+        if isinstance(self.forward, Transform) and self.tensorproductspace is None:
+            state['_plan_dtype'] = self.forward.input_array.dtype
+        return state
+
+    def __setstate__(self, state):
+        dtype = state.pop('_plan_dtype', None)
+        self.__dict__.update(state)
+        if dtype is not None:
+            self.plan((int(np.floor(self.N*self.padding_factor)),), 0, dtype, {})
+
     def get_dealiased(self, padding_factor=1.5, dealias_direct=False):
         """Return space (otherwise as self) to be used for dealiasing
 
@@ -1281,7 +1404,7 @@ class slicedict(dict):
         return dict.__getitem__(self, self.__keytransform__(key))
 
 
-def inner_product(test, trial):
+def inner_product(test, trial, measure=1):
     """Return 1D inner product of bilinear form
 
     Parameters
@@ -1300,6 +1423,11 @@ def inner_product(test, trial):
             differentiated. The test represents the matrix row
         trial : 2-tuple of (Basis, integer)
             Like test
+        measure : number, sympy Expr or :class:`.Function`, optional
+            Coefficient of the form. A non-constant coefficient is a function
+            of one coordinate of the true domain, or an expansion in any 1D
+            basis. The matrix is then assembled with
+            :func:`.get_banded_matrix`.
 
     Note
     ----
@@ -1321,9 +1449,18 @@ def inner_product(test, trial):
     [True, True, True]
     """
     assert trial[0].__module__ == test[0].__module__
+    if hasattr(measure, 'free_symbols') and not measure.free_symbols:
+        measure = complex(measure)
+        measure = measure.real if measure.imag == 0 else measure
+    if not isinstance(measure, Number):
+        from shenfun.matrixbase import SpectralMatrix
+        return SpectralMatrix({}, test, trial, measure=measure)
     key = ((test[0].__class__, test[1]), (trial[0].__class__, trial[1]))
     mat = test[0]._get_mat()
-    return mat[key](test, trial)
+    mat = mat[key](test, trial)
+    if measure != 1:
+        mat.scale = mat.scale*measure
+    return mat
 
 class FuncWrap(object):
 
@@ -1353,16 +1490,25 @@ class FuncWrap(object):
         return self.func(input_array, output_array, **kw)
 
 class Transform(FuncWrap):
+    """Planned transform of a basis, with its work arrays
+
+    If the work arrays are shared with other bases through the
+    :class:`.WorkArrayPool`, then a call with an input array, but without
+    an output array, returns a copy of the work array holding the result.
+    A call without arguments works on, and returns, the work arrays.
+    """
 
     # pylint: disable=too-few-public-methods
 
     __slots__ = ('_xfftn', '_input_array', '_output_array',
-                 '_tmp_array')
+                 '_tmp_array', '_shared')
 
-    def __init__(self, func, xfftn, input_array, tmp_array, output_array):
+    def __init__(self, func, xfftn, input_array, tmp_array, output_array,
+                 shared=False):
         FuncWrap.__init__(self, func, input_array, output_array)
         object.__setattr__(self, '_xfftn', xfftn)
         object.__setattr__(self, '_tmp_array', tmp_array)
+        object.__setattr__(self, '_shared', shared)
 
     @property
     def tmp_array(self):
@@ -1371,3 +1517,164 @@ class Transform(FuncWrap):
     @property
     def xfftn(self):
         return object.__getattribute__(self, '_xfftn')
+
+    @property
+    def shared(self):
+        """Return whether the work arrays are shared through the pool"""
+        return object.__getattribute__(self, '_shared')
+
+    def share(self):
+        """Mark the work arrays as shared through the pool"""
+        object.__setattr__(self, '_shared', True)
+
+    def __call__(self, input_array=None, output_array=None, **kw):
+        result = self.func(input_array, output_array, **kw)
+        if self.shared and output_array is None and input_array is not None:
+            return result.copy()
+        return result
+
+
+class SharedFFT(FuncWrap):
+    """Planned FFTW transform bound to its own input and output arrays
+
+    The underlying plan (:class:`mpi4py_fft.fftw.fftw_xfftn.FFT`) may be
+    shared with other instances of :class:`.SharedFFT` bound to different
+    arrays of the same shape, type and alignment. The plan is executed
+    directly on the bound arrays (FFTW's new-array execute interface).
+
+    Parameters
+    ----------
+        fft : instance of :class:`mpi4py_fft.fftw.fftw_xfftn.FFT`
+            The planned transform
+        input_array : array
+        output_array : array
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ('__weakref__',)
+
+    def __call__(self, input_array=None, output_array=None, implicit=True,
+                 normalize=False, **kw):
+        if input_array is None:
+            input_array = self.input_array
+        elif implicit is False:
+            self.input_array[...] = input_array
+            input_array = self.input_array
+        if output_array is None:
+            output_array = self.output_array
+        return self.func(input_array, output_array, implicit=True,
+                         normalize=normalize)
+
+    def update_arrays(self, input_array, output_array):
+        object.__setattr__(self, '_input_array', input_array)
+        object.__setattr__(self, '_output_array', output_array)
+
+    def get_normalization(self):
+        return self.func.get_normalization()
+
+    def print_plan(self):
+        self.func.print_plan()
+
+    def destroy(self):
+        # The plan may be in use by other instances
+        pass
+
+
+class FFTWPlanRegistry(object):
+    """Process-wide registry of planned FFTW transforms
+
+    Planning with FFTW_MEASURE, or higher, is expensive. With the registry,
+    a transform that has already been planned in this process for arrays of
+    the same shape, strides, type and alignment, over the same axes and with
+    the same flags and number of threads, is not planned again. Instead, the
+    existing plan is returned bound to the new arrays, see
+    :class:`.SharedFFT`. This is used when planning all bases, such that,
+    e.g., the spaces returned by :meth:`.TensorProductSpace.get_refined` and
+    :meth:`.TensorProductSpace.get_dealiased` reuse the plans of identical
+    axes.
+
+    The registry only holds weak references, so a plan is forgotten when
+    no space uses it any longer. The registry is enabled by default.
+    Disable by setting the environment variable
+    ``SHENFUN_FFTW_PLAN_REGISTRY=0``, or with :meth:`enable`.
+
+    Note
+    ----
+    To reuse plans between runs, use FFTW wisdom, see
+    :func:`mpi4py_fft.fftw.export_wisdom` and
+    :func:`mpi4py_fft.fftw.import_wisdom`.
+    """
+    def __init__(self):
+        self.enabled = os.environ.get('SHENFUN_FFTW_PLAN_REGISTRY', '1') != '0'
+        self._plans = weakref.WeakValueDictionary()
+        self.hits = 0
+
+    def enable(self, enabled=True):
+        """Enable or disable reuse of plans"""
+        self.enabled = enabled
+
+    def clear(self):
+        """Forget all plans"""
+        self._plans.clear()
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._plans)
+
+    @staticmethod
+    def _array_key(a):
+        if a is None:
+            return None
+        return (a.shape, a.strides, a.dtype.char, fftw.get_alignment(a))
+
+    def key(self, planner, input_array, args, kwargs):
+        """Return key identifying the transform planned by
+        ``planner(input_array, *args, **kwargs)``"""
+        func = getattr(planner, 'func', planner)
+        kw = dict(getattr(planner, 'keywords', None) or {})
+        kw.update(kwargs)
+        output_array = kw.pop('output_array', None)
+        args = tuple([tuple(np.atleast_1d(a).tolist()) if a is not None else None
+                      for a in args])
+        kw = tuple(sorted((k, tuple(np.atleast_1d(v).tolist())) for k, v in kw.items()))
+        return (func.__module__, func.__name__, self._array_key(input_array),
+                self._array_key(output_array), output_array is input_array,
+                args, kw)
+
+    def plan(self, planner, input_array, *args, **kwargs):
+        """Return :class:`.SharedFFT` for ``planner(input_array, *args, **kwargs)``
+
+        Parameters
+        ----------
+            planner : callable
+                Function returning a planned transform, e.g.,
+                :func:`mpi4py_fft.fftw.rfftn`
+            input_array : array
+                Input array of the transform
+            args : positional arguments for planner
+            kwargs : keyword arguments for planner. If ``output_array`` is
+                not given, then a new output array is allocated if the plan
+                is reused.
+        """
+        if not self.enabled:
+            fft = planner(input_array, *args, **kwargs)
+            return SharedFFT(fft, fft.input_array, fft.output_array)
+        key = self.key(planner, input_array, args, kwargs)
+        shared = self._plans.get(key)
+        if shared is None:
+            fft = planner(input_array, *args, **kwargs)
+            shared = SharedFFT(fft, fft.input_array, fft.output_array)
+            self._plans[key] = shared
+            return shared
+        self.hits += 1
+        output_array = kwargs.get('output_array')
+        if output_array is None:
+            output_array = fftw.aligned_like(shared.output_array)
+            output_array.fill(0)
+        shared = SharedFFT(shared.func, input_array, output_array)
+        # Keep the plan alive for as long as the newest user
+        self._plans[key] = shared
+        return shared
+
+fftw_plans = FFTWPlanRegistry()
@@ -2,20 +2,28 @@
 Module for implementation of the :class:`.TensorProductSpace` class and
 related methods.
 """
+import os
+import json
+import functools
+import itertools
+from copy import deepcopy
 from numbers import Number
 import warnings
-import sympy
 import numpy as np
 from shenfun.fourier.bases import R2CBasis, C2CBasis
 from shenfun.utilities import apply_mask
 from shenfun.forms.arguments import Function, Array
-from shenfun.optimization.cython import evaluate
-from shenfun.spectralbase import slicedict, islicedict, SpectralBase
+from shenfun.optimization import optimized_module
+from shenfun.spectralbase import slicedict, islicedict, SpectralBase, FuncWrap, \
+    work_pool
+from mpi4py import MPI
 from mpi4py_fft.mpifft import Transform, PFFT
-from mpi4py_fft.pencil import Subcomm, Pencil
+from mpi4py_fft.pencil import Subcomm, Pencil, Transfer, _blockdist
+
+evaluate = optimized_module('evaluate')
 
 __all__ = ('TensorProductSpace', 'VectorTensorProductSpace',
-           'MixedTensorProductSpace', 'Convolve')
+           'MixedTensorProductSpace', 'Convolve', 'autotune_configuration')
 
 
 class TensorProductSpace(PFFT):
@@ -32,7 +40,9 @@ class TensorProductSpace(PFFT):
         List of 1D bases
     axes : tuple of ints, optional
         A tuple containing the order of which to perform transforms.
-        Last item is transformed first. Defaults to range(len(bases))
+        Last item is transformed first. Defaults to range(len(bases)),
+        leaving out the axes of any :class:`.EnsembleBasis`, which are
+        never transformed.
     dtype : data-type, optional
         Type of input data in real physical space. If not provided it
         will be inferred from the bases.
@@ -40,18 +50,51 @@ class TensorProductSpace(PFFT):
         Use 1D slab decomposition.
     collapse_fourier : bool, optional
         Collapse axes for Fourier bases if possible
+    grid : sequence of ints, optional
+        Define processor grid sizes. Non positive values act as wildcards to
+        allow MPI compute optimal decompositions. The sequence is padded with
+        ones to match the number of dimensions. The first axis to be
+        transformed must not be distributed. Cannot be used with ``slab``.
     backward_from_pencil : False or Pencil
         In case of Pencil configure the transform by starting from the
         Pencil distribution in spectral space. This is primarily intended
         for a padded space, where the spectral distribution must be
         equal to the non-padded space.
+    pipeline : bool, int or str, optional
+        Overlap the global transfers with the 1D transforms. The data is
+        split into this many chunks along a dimension that is neither
+        transformed nor redistributed in a stage, and the transfer of one
+        chunk is posted non-blocking while the next chunk is transformed.
+        If 'auto' (or True), then the number of chunks is chosen by
+        timing a few candidates at construction. See
+        :class:`.PipelinedTransform`.
+    autotune : bool or str, optional
+        Choose decomposition (slab or pencil and processor grid), order of
+        axes and collapsing of Fourier axes by timing short forward and
+        backward transforms of all candidate configurations. The first
+        axis to be transformed is kept fixed. If a str, then this is the
+        name of a cache file (json) where the decision is stored, and from
+        where it is read in later runs with the same bases and number of
+        processors. If True, then the cache file is given by the
+        environment variable SHENFUN_AUTOTUNE_CACHE, or no file is used if
+        this is not set. The arguments ``axes``, ``slab``,
+        ``collapse_fourier`` and ``grid`` are overruled by the autotuner.
+        See :func:`.autotune_configuration`.
+    lazy : bool, optional
+        Plan the transforms on first use of any of forward, backward,
+        scalar_product or backward_uniform, instead of on construction. The
+        layout (shapes, local slices and dtypes) is always computed
+        immediately. Use :meth:`plan` to plan a lazy space explicitly.
+        Spaces derived from this one, e.g., by :meth:`get_dealiased`, are
+        planned in the same way.
     kw : dict, optional
         Dictionary that can be used to plan transforms. Input to method
         `plan` for the bases.
 
     """
     def __init__(self, comm, bases, axes=None, dtype=None, slab=False,
-                 collapse_fourier=False, backward_from_pencil=False, **kw):
+                 collapse_fourier=False, backward_from_pencil=False,
+                 pipeline=False, grid=None, autotune=False, lazy=False, **kw):
         # Note do not call __init__ of super
         self.comm = comm
         self.bases = bases
@@ -59,10 +102,22 @@ class TensorProductSpace(PFFT):
         assert shape
         assert min(shape) > 0
 
+        self.timer = None
+        self.autotune = None
+        if autotune and not backward_from_pencil and not isinstance(comm, Subcomm):
+            cache = autotune if isinstance(autotune, str) else os.environ.get('SHENFUN_AUTOTUNE_CACHE')
+            self.autotune = autotune_configuration(comm, bases, axes=axes, dtype=dtype,
+                                                   cache=cache, **kw)
+            axes = self.autotune['axes']
+            grid = self.autotune['grid']
+            collapse_fourier = self.autotune['collapse_fourier']
+            slab = False
+
+        ensemble = [axis for axis, base in enumerate(bases) if base.family() == 'ensemble']
         if axes is not None:
             axes = list(axes) if np.ndim(axes) else [axes]
         else:
-            axes = list(range(len(shape)))
+            axes = [axis for axis in range(len(shape)) if axis not in ensemble]
 
         for i, ax in enumerate(axes):
             if isinstance(ax, (int, np.integer)):
@@ -105,7 +160,15 @@ class TensorProductSpace(PFFT):
             elif isinstance(bases[axes[-1][-1]], R2CBasis):
                 assert np.dtype(dtype).char in 'fdg'
 
-            if isinstance(comm, Subcomm):
+            if grid is not None:
+                assert not isinstance(comm, Subcomm)
+                assert slab is False
+                grid = tuple(grid)
+                assert len(grid) <= len(shape)
+                dims = list(grid) + [1] * (len(shape) - len(grid))
+                self.subcomm = Subcomm(comm, dims)
+                assert self.subcomm[axes[-1][-1]].Get_size() == 1
+            elif isinstance(comm, Subcomm):
                 assert slab is False
                 assert len(comm) == len(shape)
                 assert comm[axes[-1][-1]].Get_size() == 1
@@ -115,6 +178,9 @@ class TensorProductSpace(PFFT):
                     axis = (axes[-1][-1] + 1) % len(shape)
                     dims = [1] * len(shape)
                     dims[axis] = comm.Get_size()
+                elif ensemble:
+                    # Distribute only the members of the ensemble
+                    dims = [0 if ax in ensemble else 1 for ax in range(len(shape))]
                 else:
                     dims = [0] * len(shape)
                     for ax in axes[-1]:
@@ -140,56 +206,51 @@ class TensorProductSpace(PFFT):
                 self.axes = groups
             self.axes = tuple(map(tuple, self.axes))
 
-            # Configure all transforms
+            # Configure layout of all transforms. The serial transforms are
+            # planned later, see plan
+            self._from_spectral = False
+            self._plan_jobs = []
             axes = self.axes[-1]
             pencil = Pencil(self.subcomm, shape, axes[-1])
             self.xfftn.append(self.bases[axes[-1]])
-            self.xfftn[-1].plan(pencil.subshape, axes, dtype, kw)
+            self._add_plan_job(pencil.subshape, axes, dtype)
             self.pencil[0] = pencilA = pencil
-            if not shape[axes[-1]] == self.xfftn[-1].forward.output_array.shape[axes[-1]]:
-                dtype = self.xfftn[-1].forward.output_array.dtype
-                shape[axes[-1]] = self.xfftn[-1].forward.output_array.shape[axes[-1]]
+            n, dtypeB = self._plan_jobs[-1][3][axes[-1]], self._plan_jobs[-1][4]
+            if not shape[axes[-1]] == n:
+                dtype = dtypeB
+                shape[axes[-1]] = n
                 pencilA = Pencil(self.subcomm, shape, axes[-1])
 
             for i, axes in enumerate(reversed(self.axes[:-1])):
                 pencilB = pencilA.pencil(axes[-1])
                 transAB = pencilA.transfer(pencilB, dtype)
                 xfftn = self.bases[axes[-1]]
-                xfftn.plan(pencilB.subshape, axes, dtype, kw)
                 self.xfftn.append(xfftn)
+                self._add_plan_job(pencilB.subshape, axes, dtype)
                 self.transfer.append(transAB)
                 pencilA = pencilB
-                if not shape[axes[-1]] == xfftn.forward.output_array.shape[axes[-1]]:
-                    dtype = xfftn.forward.output_array.dtype
-                    shape[axes[-1]] = xfftn.forward.output_array.shape[axes[-1]]
+                n, dtypeB = self._plan_jobs[-1][3][axes[-1]], self._plan_jobs[-1][4]
+                if not shape[axes[-1]] == n:
+                    dtype = dtypeB
+                    shape[axes[-1]] = n
                     pencilA = Pencil(pencilB.subcomm, shape, axes[-1])
 
             self.pencil[1] = pencilA
 
-            self.forward = Transform(
-                [o.forward for o in self.xfftn],
-                [o.forward for o in self.transfer],
-                self.pencil)
-            self.backward = Transform(
-                [o.backward for o in self.xfftn[::-1]],
-                [o.backward for o in self.transfer[::-1]],
-                self.pencil[::-1])
-            self.scalar_product = Transform(
-                [o.scalar_product for o in self.xfftn],
-                [o.forward for o in self.transfer],
-                self.pencil)
-            self.backward_uniform = Transform(
-                [o.backward_uniform for o in self.xfftn[::-1]],
-                [o.backward for o in self.transfer[::-1]],
-                self.pencil[::-1])
-
         else:
             self.configure_backwards(backward_from_pencil, dtype, kw)
 
+        self._kw = kw
+        self._lazy = lazy
+        self.pipeline = pipeline
+        if not lazy:
+            self.plan()
+
         for i, base in enumerate(bases):
             base.axis = i
             if base.has_nonhomogeneous_bcs:
                 base.bc.set_tensor_bcs(base, self)
+        work_pool.register(self)
 
     def configure_backwards(self, pencil, dtype, kw):
         """Configure transforms starting from spectral space
@@ -210,6 +271,8 @@ class TensorProductSpace(PFFT):
         physical space. The distribution does not have to agree in physical
         space, because the padding is done only in the spectral.
         """
+        self._from_spectral = True
+        self._plan_jobs = []
         shape = list(self.global_shape(True))
         axes = self.axes[0]
         xfftn = self.bases[axes[-1]]
@@ -218,13 +281,12 @@ class TensorProductSpace(PFFT):
         subshape = list(pencil.subshape)
         if isinstance(xfftn, R2CBasis):
             subshape[axes[-1]] = int(np.floor(xfftn.N*xfftn.padding_factor))
-            dtype = np.float
+            dtype = np.dtype(dtype).char.lower()
         else:
             subshape[axes[-1]] = int(np.floor(subshape[axes[-1]]*xfftn.padding_factor))
-        self.xfftn[-1].plan(subshape, axes, dtype, kw)
-        if not shape[axes[-1]] == self.xfftn[-1].forward.input_array.shape[axes[-1]]:
-            dtype = self.xfftn[-1].forward.input_array.dtype
-            shape[axes[-1]] = self.xfftn[-1].forward.input_array.shape[axes[-1]]
+        self._add_plan_job(subshape, axes, dtype)
+        if not shape[axes[-1]] == subshape[axes[-1]]:
+            shape[axes[-1]] = subshape[axes[-1]]
         pencilA = Pencil(pencil.subcomm, shape, axes[0])
         self.pencil[0] = pencilA
         for axes in self.axes[1:]:
@@ -234,36 +296,180 @@ class TensorProductSpace(PFFT):
             subshape = list(pencilB.subshape)
             if isinstance(xfftn, R2CBasis):
                 subshape[axes[-1]] = int(np.floor(xfftn.N*xfftn.padding_factor))
-                dtype = np.float
+                dtype = np.dtype(dtype).char.lower()
             else:
                 subshape[axes[-1]] = int(np.floor(subshape[axes[-1]]*xfftn.padding_factor))
-            xfftn.plan(subshape, axes, dtype, kw)
             self.xfftn.append(xfftn)
+            self._add_plan_job(subshape, axes, dtype)
             self.transfer.append(transBA)
             pencilA = pencilB
-            if not shape[axes[-1]] == xfftn.forward.input_array.shape[axes[-1]]:
-                dtype = xfftn.forward.input_array.dtype
-                shape[axes[-1]] = xfftn.forward.input_array.shape[axes[-1]]
+            if not shape[axes[-1]] == subshape[axes[-1]]:
+                shape[axes[-1]] = subshape[axes[-1]]
                 pencilA = Pencil(pencilB.subcomm, shape, axes[-1])
 
         self.pencil[1] = pencilA
 
-        self.backward = Transform(
-            [o.backward for o in self.xfftn],
-            [o.forward for o in self.transfer],
-            self.pencil)
-        self.forward = Transform(
-            [o.forward for o in self.xfftn[::-1]],
-            [o.backward for o in self.transfer[::-1]],
-            self.pencil[::-1])
-        self.scalar_product = Transform(
-            [o.scalar_product for o in self.xfftn[::-1]],
-            [o.forward for o in self.transfer[::-1]],
-            self.pencil[::-1])
-        self.backward_uniform = Transform(
-            [o.backward_uniform for o in self.xfftn],
-            [o.forward for o in self.transfer],
-            self.pencil)
+    def _add_plan_job(self, shape, axes, dtype):
+        # Store arguments for planning self.xfftn[-1], along with the
+        # expected shape and type of its forward output
+        base = self.xfftn[-1]
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        out = list(shape)
+        out[axes[-1]] = base.shape(True)
+        dtype_out = dtype
+        if isinstance(base, R2CBasis):
+            dtype_out = np.result_type(dtype, np.complex64)
+        self._plan_jobs.append((shape, axes, dtype, tuple(out), dtype_out))
+
+    def plan(self):
+        """Plan all transforms
+
+        The pencil layout is computed when the space is created, but the
+        serial transforms (e.g., FFTW plans and work arrays) are created
+        on first use of any of the transforms forward, backward,
+        scalar_product or backward_uniform. Call this method to plan ahead
+        of time, e.g., before a time loop. Nothing is done if the space is
+        already planned.
+        """
+        if self.is_planned:
+            return
+        for xfftn, (shape, axes, dtype, out, dtype_out) in zip(self.xfftn, self._plan_jobs):
+            xfftn.plan(shape, axes, dtype, self._kw)
+            assert xfftn.forward.input_array.shape == shape
+            assert xfftn.forward.output_array.shape == out
+            assert xfftn.forward.output_array.dtype == dtype_out
+        for i, base in enumerate(self.bases):
+            base.axis = i
+
+        xfftn, transfer, pencil = self.xfftn, self.transfer, self.pencil
+        if self._from_spectral:
+            backward = (xfftn, [o.forward for o in transfer], pencil)
+            forward = (xfftn[::-1], [o.backward for o in transfer[::-1]], pencil[::-1])
+        else:
+            forward = (xfftn, [o.forward for o in transfer], pencil)
+            backward = (xfftn[::-1], [o.backward for o in transfer[::-1]], pencil[::-1])
+        self._forward = SpaceTransform([o.forward for o in forward[0]], *forward[1:])
+        self._backward = SpaceTransform([o.backward for o in backward[0]], *backward[1:])
+        self._scalar_product = SpaceTransform([o.scalar_product for o in forward[0]], *forward[1:])
+        self._backward_uniform = SpaceTransform([o.backward_uniform for o in backward[0]], *backward[1:])
+
+        if self.pipeline:
+            chunks = 'auto' if self.pipeline is True else self.pipeline
+            names = ['forward', 'backward']
+            if np.all([abs(base.padding_factor - 1.0) < 1e-6 for base in self.bases]):
+                # scalar_product and backward_uniform are not used by padded spaces
+                names += ['scalar_product', 'backward_uniform']
+            for name in names:
+                setattr(self, '_'+name, PipelinedTransform(getattr(self, '_'+name), self,
+                                                           chunks=chunks, options=self._kw))
+
+    @property
+    def is_planned(self):
+        """Return whether the transforms of self have been planned"""
+        return '_forward' in self.__dict__
+
+    @property
+    def forward(self):
+        """Return forward transform, planned on first use"""
+        self.plan()
+        return self._forward
+
+    @property
+    def backward(self):
+        """Return backward transform, planned on first use"""
+        self.plan()
+        return self._backward
+
+    @property
+    def scalar_product(self):
+        """Return scalar product transform, planned on first use"""
+        self.plan()
+        return self._scalar_product
+
+    @property
+    def backward_uniform(self):
+        """Return backward transform on uniform mesh, planned on first use"""
+        self.plan()
+        return self._backward_uniform
+
+    def destroy(self):
+        self.profile(False)
+        for name in ('forward', 'backward', 'scalar_product', 'backward_uniform'):
+            transform = self.__dict__.get('_'+name)
+            if isinstance(transform, PipelinedTransform):
+                transform.destroy()
+        PFFT.destroy(self)
+
+    def profile(self, enable=True):
+        """Turn on or off timing of the stages of the transforms
+
+        When turned on, the time spent in each serial transform, each
+        global redistribution (pencil transfer) and each padding or
+        truncation is accumulated for the transforms forward, backward,
+        scalar_product and backward_uniform. Nothing is timed when turned
+        off, which is the default. Turning on again resets the timings.
+
+        Parameters
+        ----------
+        enable : bool, optional
+            Turn on (True) or off (False)
+
+        See also
+        --------
+        :meth:`timings`, :meth:`dump_timings`
+        """
+        if self.timer is not None:
+            self.timer.restore()
+            self.timer = None
+        if enable:
+            self.timer = TransformTimer()
+            for name in ('forward', 'backward', 'scalar_product', 'backward_uniform'):
+                self.timer.instrument(getattr(self, name), name, self)
+            for base in self.bases:
+                self.timer.instrument_padding(base)
+
+    def timings(self, reduce=False):
+        """Return timings recorded after a call to :meth:`profile`
+
+        Parameters
+        ----------
+        reduce : bool, optional
+            If True, then return min, avg and max over all processors
+            of the time and the number of bytes. Must then be called
+            by all processors.
+
+        Returns
+        -------
+        dict
+            Nested dictionary. First key is the transform ('forward',
+            'backward', 'scalar_product', 'backward_uniform'), or
+            'padding'/'truncation'. Second key is the stage, e.g., 'axis 1'
+            or 'transfer 2->1'. Each stage holds the number of calls, the
+            accumulated time and, for transfers, the accumulated number of
+            bytes redistributed (the size of the local array sent).
+        """
+        assert self.timer is not None, 'Turn on timings with profile()'
+        return self.timer.as_dict(self.comm if reduce else None)
+
+    def dump_timings(self, filename, reduce=True):
+        """Store timings recorded after a call to :meth:`profile` in json file
+
+        Parameters
+        ----------
+        filename : str
+            Name of json file
+        reduce : bool, optional
+            If True, then store min, avg and max over all processors and
+            write the file only from rank 0. Otherwise, each processor
+            stores its own timings and filename should differ between
+            processors.
+        """
+        timings = self.timings(reduce)
+        if reduce and self.comm.Get_rank() > 0:
+            return
+        with open(filename, 'w') as f:
+            json.dump(timings, f, indent=2)
 
     def get_dealiased(self, padding_factor=1.5, dealias_direct=False):
         if isinstance(padding_factor, Number):
@@ -274,8 +480,9 @@ class TensorProductSpace(PFFT):
                                            dealias_direct=dealias_direct)
                         for axis, base in enumerate(self.bases)]
         return TensorProductSpace(self.comm, padded_bases,
-                                  dtype=self.forward.output_array.dtype,
-                                  backward_from_pencil=self.forward.output_pencil)
+                                  dtype=self.dtype(True),
+                                  backward_from_pencil=self.get_pencil(True),
+                                  pipeline=self.pipeline, lazy=self._lazy)
 
     def get_refined(self, N):
         if isinstance(N, Number):
@@ -284,7 +491,23 @@ class TensorProductSpace(PFFT):
             assert len(N) == len(self)
         refined_bases = [base.get_refined(N[axis])
                          for axis, base in enumerate(self.bases)]
-        return TensorProductSpace(self.comm, refined_bases, axes=self.axes)
+        return TensorProductSpace(self.comm, refined_bases, axes=self.axes,
+                                  lazy=self._lazy)
+
+    def __reduce__(self):
+        # The communicator and the planned transforms cannot be pickled. The
+        # unpickled space is created anew on MPI.COMM_SELF, e.g., in a worker
+        # process, and the transforms are planned again.
+        if self._from_spectral:
+            raise TypeError('Cannot pickle TensorProductSpace configured from a spectral pencil')
+        if self.comm.Get_size() > 1:
+            warnings.warn('Pickling a TensorProductSpace distributed on {} processors. '
+                          'The unpickled space is not distributed, but created on '
+                          'MPI.COMM_SELF with the global shape'.format(self.comm.Get_size()),
+                          RuntimeWarning)
+        kw = dict(self._kw, axes=self.axes, dtype=self.dtype(), pipeline=self.pipeline,
+                  lazy=self._lazy)
+        return (_unpickle_space, (self.__class__, self.bases, kw))
 
     def convolve(self, a_hat, b_hat, ab_hat):
         """Convolution of a_hat and b_hat
@@ -610,6 +833,60 @@ class TensorProductSpace(PFFT):
         return tuple([base.shape(forward_output) for base in self])
         #return self.shape(forward_output)
 
+    def shape(self, forward_output=True):
+        """The local (to each processor) shape of data
+
+        Parameters
+        ----------
+        forward_output : bool, optional
+            Return shape of output array (spectral space) if True, else return
+            shape of input array (physical space)
+        """
+        jobs = self._plan_jobs
+        if self._from_spectral:
+            return jobs[0][3] if forward_output is True else jobs[-1][0]
+        return jobs[-1][3] if forward_output is True else jobs[0][0]
+
+    def dtype(self, forward_output=False):
+        """The type of transformed arrays
+
+        Parameters
+        ----------
+        forward_output : bool, optional
+            If True then return dtype of an array that is the result of a
+            forward transform. Otherwise, return the dtype of an array that
+            is input to a forward transform.
+        """
+        jobs = self._plan_jobs
+        if self._from_spectral:
+            return jobs[0][4] if forward_output else jobs[-1][2]
+        return jobs[-1][4] if forward_output else jobs[0][2]
+
+    def get_pencil(self, forward_output=False):
+        """Return pencil describing the distribution of data
+
+        Parameters
+        ----------
+        forward_output : bool, optional
+            Return pencil of spectral space (output of forward transform) if
+            True, else return pencil of physical space
+        """
+        return self.pencil[int(bool(forward_output) != self._from_spectral)]
+
+    def local_slice(self, forward_output=True):
+        """The local view into the global data
+
+        Parameters
+        ----------
+        forward_output : bool, optional
+            Return local slices of output array (spectral space) if True, else
+            return local slices of input array (physical space)
+
+        """
+        p = self.get_pencil(forward_output is True)
+        return tuple([slice(start, start+shape) for start, shape in zip(p.substart,
+                                                                         p.subshape)])
+
     def mask_nyquist(self, u_hat, mask=None):
         """Return array `u_hat` with zero Nyquist coefficients
 
@@ -680,7 +957,7 @@ class TensorProductSpace(PFFT):
         """Return list of axes that are not periodic"""
         axes = []
         for axis, base in enumerate(self):
-            if not base.family() == 'fourier':
+            if not base.family() in ('fourier', 'ensemble'):
                 axes.append(axis)
         return axes
 
@@ -695,7 +972,8 @@ class TensorProductSpace(PFFT):
         ortho = []
         for base in self.bases:
             ortho.append(base.get_orthogonal())
-        return TensorProductSpace(self.subcomm, ortho, axes=self.axes)
+        return TensorProductSpace(self.subcomm, ortho, axes=self.axes,
+                                  lazy=self._lazy)
 
     def __getitem__(self, i):
         """Return instance of base i
@@ -729,6 +1007,537 @@ class TensorProductSpace(PFFT):
         return compatible
 
 
+def autotune_configuration(comm, bases, axes=None, dtype=None, cache=None,
+                           repeats=3, **kw):
+    """Return fastest configuration of a :class:`.TensorProductSpace`
+
+    All candidate processor grids (slabs and pencils), orders of axes and
+    collapsing of Fourier axes are tried, and the configuration with the
+    smallest (maximum over all processors) time for ``repeats`` forward and
+    backward transforms is returned. The first axis to be transformed is
+    kept fixed.
+
+    Parameters
+    ----------
+    comm : MPI communicator
+    bases : list
+        List of 1D bases. The bases are not modified.
+    axes : sequence of ints, optional
+        Only the last item, the first axis to be transformed, is used.
+    dtype : data-type, optional
+        Type of input data in real physical space.
+    cache : str, optional
+        Name of json file used for storing the decisions. Key is the
+        bases, the dtype, the number of processors and the planning
+        options ``kw``.
+    repeats : int, optional
+        Number of forward/backward transforms timed for each candidate
+    kw : dict, optional
+        Options for planning the 1D transforms
+
+    Returns
+    -------
+    dict
+        With keys 'axes', 'grid', 'collapse_fourier' and 'time'. The first
+        three may be used as arguments to :class:`.TensorProductSpace`.
+    """
+    shape = [base.shape(False) for base in bases]
+    ndim = len(bases)
+    if axes is None:
+        first = ndim-1
+    else:
+        first = axes if isinstance(axes, (int, np.integer)) else np.ravel(axes[-1])[-1]
+        first = int(first) % ndim
+    key = '{}:{}:{}:{}:{}:{}:{}'.format(
+        comm.Get_size(), ','.join([base.family()+'.'+base.__class__.__name__ for base in bases]),
+        ','.join([str(n) for n in shape]),
+        ','.join([str(base.padding_factor) for base in bases]),
+        'None' if dtype is None else np.dtype(dtype).char, first,
+        ','.join(['{}={}'.format(name, kw[name]) for name in sorted(kw)]))
+
+    config = None
+    if cache is not None and comm.Get_rank() == 0 and os.path.exists(cache):
+        with open(cache, 'r') as f:
+            config = json.load(f).get(key)
+    config = comm.bcast(config, root=0)
+    if config is not None:
+        return config
+
+    orders = [list(order)+[first] for order in
+              itertools.permutations([ax for ax in range(ndim) if ax != first])]
+    # Keep local arrays nonempty (R2C transform approximately halves first axis)
+    nmax = min([n for ax, n in enumerate(shape) if ax != first] + [shape[first]//2+1])
+    grids = [grid for grid in _processor_grids(comm.Get_size(), ndim)
+             if grid[first] == 1 and max(grid) <= nmax]
+    collapse = [False]
+    if len([base for base in bases if base.family() == 'fourier']) > 1:
+        collapse.append(True)
+
+    configs = []
+    for order, grid, collapse_fourier in itertools.product(orders, grids, collapse):
+        clones = [base.get_dealiased(padding_factor=base.padding_factor,
+                                     dealias_direct=base.dealias_direct)
+                  for base in bases]
+        T = TensorProductSpace(comm, clones, axes=order, dtype=dtype, grid=grid,
+                               collapse_fourier=collapse_fourier, **kw)
+        u = Array(T)
+        u[:] = 1
+        u_hat = T.forward(u)
+        T.backward(u_hat)
+        t0 = MPI.Wtime()
+        for _ in range(repeats):
+            u_hat = T.forward(u)
+            T.backward(u_hat)
+        t = comm.allreduce(MPI.Wtime()-t0, op=MPI.MAX)
+        T.destroy()
+        configs.append({'axes': order, 'grid': list(grid),
+                        'collapse_fourier': collapse_fourier, 'time': t})
+    config = configs[int(np.argmin([c['time'] for c in configs]))]
+
+    if cache is not None and comm.Get_rank() == 0:
+        decisions = {}
+        if os.path.exists(cache):
+            with open(cache, 'r') as f:
+                decisions = json.load(f)
+        decisions[key] = config
+        with open(cache, 'w') as f:
+            json.dump(decisions, f, indent=2)
+    return config
+
+def _processor_grids(size, ndim):
+    """Return all processor grids of ndim dimensions with size processors"""
+    if ndim == 1:
+        return [(size,)]
+    grids = []
+    for p in range(1, size+1):
+        if size % p == 0:
+            grids += [(p,)+grid for grid in _processor_grids(size//p, ndim-1)]
+    return grids
+
+
+class SpaceTransform(Transform):
+    """Parallel transform of a :class:`.TensorProductSpace`
+
+    As :class:`mpi4py_fft.mpifft.Transform`, except that the result is
+    copied if the work arrays of the last 1D transform are shared through
+    the :class:`.WorkArrayPool`, and the transform is called with an input
+    array, but without an output array.
+    """
+    def __init__(self, xfftn, transfer, pencil):
+        Transform.__init__(self, xfftn, transfer, pencil)
+        self._shared = getattr(self._xfftn[-1], 'shared', False)
+
+    def __call__(self, input_array=None, output_array=None, **kw):
+        result = Transform.__call__(self, input_array, output_array, **kw)
+        if self._shared and output_array is None and input_array is not None:
+            return result.copy()
+        return result
+
+
+class PipelinedTransform(SpaceTransform):
+    """Parallel transform overlapping global transfers with 1D transforms
+
+    In a regular :class:`mpi4py_fft.mpifft.Transform` each 1D transform is
+    followed by a blocking global transfer. Here each stage that is
+    followed by a transfer is split into chunks along an axis that is
+    neither transformed nor redistributed in that stage. The 1D transform
+    is executed chunk by chunk, and the non-blocking transfer of a chunk
+    is posted as soon as it has been transformed. As such, the transfer
+    of chunk k is performed while chunk k+1 is transformed. The transfers
+    use non-blocking point-to-point messages with the same subarray
+    datatypes as :class:`mpi4py_fft.pencil.Transfer`, restricted to the
+    chunk.
+
+    Parameters
+    ----------
+    transform : :class:`mpi4py_fft.mpifft.Transform`
+        The regular transform
+    space : :class:`.TensorProductSpace`
+        The space that ``transform`` belongs to
+    chunks : int or str, optional
+        The number of chunks. If 'auto', then choose the fastest of
+        the candidates 1, 2, 4 and 8 by timing a few transforms.
+    options : dict, optional
+        Options for planning the 1D transforms of the chunks
+
+    Note
+    ----
+    Stages where no chunking axis is available (e.g., in 2D), or where the
+    1D basis has nonhomogeneous boundary conditions, are executed as in
+    the regular transform.
+    """
+    def __init__(self, transform, space, chunks='auto', options=None):
+        SpaceTransform.__init__(self, transform._xfftn, transform._transfer,
+                                transform._pencil)
+        self.space = space
+        self.options = {} if options is None else options
+        if chunks == 'auto':
+            chunks = self._tune((1, 2, 4, 8))
+        self.chunks = chunks
+        self._stages = self._get_stages(chunks)
+
+    def _get_stages(self, chunks):
+        stages = []
+        for xfftn, transfer in zip(self._xfftn[:-1], self._transfer):
+            stage = None
+            if chunks > 1:
+                stage = _PipelinedStage.create(xfftn, transfer, self.space,
+                                               chunks, self.options)
+            stages.append(stage)
+        return stages
+
+    def _tune(self, candidates, repeats=3):
+        """Return fastest number of chunks out of candidates"""
+        comm = self.space.comm
+        timings = []
+        for chunks in candidates:
+            self._stages = self._get_stages(chunks)
+            self()
+            t0 = MPI.Wtime()
+            for _ in range(repeats):
+                self()
+            timings.append(comm.allreduce(MPI.Wtime()-t0, op=MPI.MAX))
+            for stage in self._stages:
+                if stage is not None:
+                    stage.destroy()
+        self.input_array.fill(0)
+        return candidates[int(np.argmin(timings))]
+
+    def __call__(self, input_array=None, output_array=None, **kw):
+        if input_array is not None:
+            self.input_array[...] = input_array
+
+        for i, stage in enumerate(self._stages):
+            arrayA = self._xfftn[i].output_array
+            arrayB = self._xfftn[i+1].input_array
+            if stage is None:
+                self._xfftn[i](**kw)
+                self._transfer[i](arrayA, arrayB)
+            else:
+                stage(self._xfftn[i].input_array, arrayA, arrayB, **kw)
+        self._xfftn[-1](**kw)
+
+        if output_array is not None:
+            output_array[...] = self.output_array
+            return output_array
+        if self._shared and input_array is not None:
+            return self.output_array.copy()
+        return self.output_array
+
+    def destroy(self):
+        for stage in self._stages:
+            if stage is not None:
+                stage.destroy()
+
+
+class _PipelinedStage(object):
+    """One chunked 1D transform followed by non-blocking global transfers
+
+    Parameters
+    ----------
+    method : str
+        Name of transform method of 1D basis, e.g., 'forward'
+    bases : dict
+        Copies of the 1D basis planned for the chunks. Keys are the chunk
+        lengths.
+    comm : MPI communicator
+        The communicator of the global transfer
+    axis : int
+        The axis that is chunked
+    chunks : list of 2-tuples
+        Length and start index of all chunks
+    sendtypes : list of sequences of MPI datatypes
+        Datatypes describing, for each chunk, the blocks to send
+    recvtypes : list of sequences of MPI datatypes
+        Datatypes describing, for each chunk, the blocks to receive
+    """
+    def __init__(self, method, bases, comm, axis, chunks, sendtypes, recvtypes):
+        self.method = method
+        self.bases = bases
+        self.comm = comm
+        self.axis = axis
+        self.chunks = chunks
+        self.sendtypes = sendtypes
+        self.recvtypes = recvtypes
+
+    @classmethod
+    def create(cls, xfftn, transfer, space, chunks, options):
+        """Return pipelined stage, or None if stage cannot be chunked
+
+        Parameters
+        ----------
+        xfftn : :class:`.spectralbase.Transform`
+            The 1D transform of the stage
+        transfer : bound method
+            The forward or backward method of a
+            :class:`mpi4py_fft.pencil.Transfer` instance
+        space : :class:`.TensorProductSpace`
+        chunks : int
+            Number of chunks
+        options : dict
+            Options for planning transforms of the chunks
+        """
+        base, method = _get_base_and_method(xfftn)
+        if base.has_nonhomogeneous_bcs:
+            return None
+        t = transfer.__self__
+        group = [ax for ax in space.axes if ax[-1] == base.axis][0]
+        shape = base.forward.input_array.shape
+        candidates = [ax for ax in range(len(shape))
+                      if ax not in group and ax not in (t.axisA, t.axisB)]
+        if len(candidates) == 0:
+            return None
+        axis = candidates[int(np.argmax([shape[ax] for ax in candidates]))]
+        chunks = min(chunks, shape[axis])
+        if chunks < 2:
+            return None
+        chunks = [_blockdist(shape[axis], chunks, k) for k in range(chunks)]
+
+        bases = {}
+        for n, _ in chunks:
+            if n in bases:
+                continue
+            chunkbase = base.get_dealiased(padding_factor=base.padding_factor,
+                                           dealias_direct=base.dealias_direct)
+            chunkbase.tensorproductspace = space
+            chunkshape = list(shape)
+            chunkshape[axis] = n
+            chunkbase.plan(chunkshape, group, base.forward.input_array.dtype, options)
+            bases[n] = chunkbase
+
+        if transfer.__name__ == 'forward':
+            send = (t.subshapeA, t.axisA)
+            recv = (t.subshapeB, t.axisB)
+        else:
+            send = (t.subshapeB, t.axisB)
+            recv = (t.subshapeA, t.axisA)
+        sendtypes = []
+        recvtypes = []
+        for chunk in chunks:
+            sendtypes.append(_chunked_subarraytypes(t.comm, t.shape, t.dtype,
+                                                    send[0], send[1], axis, chunk))
+            recvtypes.append(_chunked_subarraytypes(t.comm, t.shape, t.dtype,
+                                                    recv[0], recv[1], axis, chunk))
+        return cls(method, bases, t.comm, axis, chunks, sendtypes, recvtypes)
+
+    def __call__(self, input_array, arrayA, arrayB, **kw):
+        sl = [slice(None)]*arrayA.ndim
+        requests = []
+        for k, recvtypes in enumerate(self.recvtypes):
+            for p, datatype in enumerate(recvtypes):
+                requests.append(self.comm.Irecv([arrayB, 1, datatype], source=p, tag=k))
+        for k, (n, start) in enumerate(self.chunks):
+            sl[self.axis] = slice(start, start+n)
+            s = tuple(sl)
+            getattr(self.bases[n], self.method)(input_array[s], arrayA[s], **kw)
+            for p, datatype in enumerate(self.sendtypes[k]):
+                requests.append(self.comm.Isend([arrayA, 1, datatype], dest=p, tag=k))
+        MPI.Request.Waitall(requests)
+
+    def destroy(self):
+        for datatypes in self.sendtypes + self.recvtypes:
+            for datatype in datatypes:
+                if datatype:
+                    datatype.Free()
+
+
+def _get_base_and_method(xfftn):
+    """Return 1D basis and name of its method wrapped by xfftn"""
+    func = xfftn.func
+    while isinstance(func, (FuncWrap, functools.partial)):
+        func = func.func
+    return func.__self__, func.__name__
+
+def _chunked_subarraytypes(comm, shape, dtype, subshape, axis, chunk_axis, chunk):
+    """Return MPI datatypes for the blocks of one chunk in a global transfer
+
+    Like :func:`mpi4py_fft.pencil._subarraytypes`, but the subarrays are
+    further restricted to ``chunk`` along ``chunk_axis``.
+    """
+    N = shape[axis]
+    p = comm.Get_size()
+    datatype = MPI._typedict[np.dtype(dtype).char]
+    sizes = list(subshape)
+    subsizes = sizes[:]
+    substarts = [0] * len(sizes)
+    subsizes[chunk_axis], substarts[chunk_axis] = chunk
+    datatypes = []
+    for i in range(p):
+        n, s = _blockdist(N, p, i)
+        subsizes[axis] = n
+        substarts[axis] = s
+        newtype = datatype.Create_subarray(sizes, subsizes, substarts).Commit()
+        datatypes.append(newtype)
+    return tuple(datatypes)
+
+
+class TransformTimer(object):
+    """Accumulated timings of the stages of parallel transforms
+
+    The stages are timed by temporarily replacing the serial transforms and
+    the transfers of a :class:`mpi4py_fft.mpifft.Transform` with timed
+    wrappers, and by overloading the padding and truncation methods of the
+    1D bases. Use :meth:`restore` to remove all wrappers.
+    """
+    def __init__(self):
+        self.records = {}
+        self._restore = []
+
+    def add(self, name, stage, time, nbytes=None):
+        """Add one call of stage
+
+        Parameters
+        ----------
+        name : str
+            Name of transform
+        stage : str
+            Name of stage
+        time : float
+            Time spent in stage
+        nbytes : int or None, optional
+            Number of bytes communicated
+        """
+        record = self.records.setdefault(name, {}).setdefault(stage, {'calls': 0, 'time': 0.0})
+        record['calls'] += 1
+        record['time'] += time
+        if nbytes is not None:
+            record['bytes'] = record.get('bytes', 0) + nbytes
+
+    def instrument(self, transform, name, space):
+        """Replace stages of transform with timed wrappers
+
+        Parameters
+        ----------
+        transform : :class:`mpi4py_fft.mpifft.Transform`
+        name : str
+            Name used for the records of transform
+        space : :class:`.TensorProductSpace`
+            The space that ``transform`` belongs to
+        """
+        xfftn = []
+        for f in transform._xfftn:
+            base = _get_base_and_method(f)[0]
+            group = [ax for ax in space.axes if ax[-1] == base.axis][0]
+            stage = 'axis {}'.format(','.join([str(ax) for ax in group]))
+            xfftn.append(_TimedFunc(f, self, name, stage))
+        transfer = []
+        for f in transform._transfer:
+            t = f.__self__
+            axes = (t.axisA, t.axisB) if f.__name__ == 'forward' else (t.axisB, t.axisA)
+            stage = 'transfer {}->{}'.format(*axes)
+            transfer.append(_TimedTransfer(f, self, name, stage))
+        self._restore.append((transform, '_xfftn', transform._xfftn))
+        self._restore.append((transform, '_transfer', transform._transfer))
+        transform._xfftn = tuple(xfftn)
+        transform._transfer = tuple(transfer)
+        if isinstance(transform, PipelinedTransform):
+            stages = []
+            for i, stage in enumerate(transform._stages):
+                if stage is not None:
+                    stage = _TimedFunc(stage, self, name, '{} + {} (pipelined)'.format(
+                        xfftn[i]._stage, transfer[i]._stage))
+                stages.append(stage)
+            self._restore.append((transform, '_stages', transform._stages))
+            transform._stages = stages
+
+    def instrument_padding(self, base):
+        """Time padding and truncation of 1D basis
+
+        Parameters
+        ----------
+        base : instance of :class:`.SpectralBase`
+        """
+        for name, method in (('padding', '_padding_backward'),
+                             ('truncation', '_truncation_forward')):
+            stage = 'axis {}'.format(base.axis)
+            setattr(base, method, _TimedFunc(getattr(base, method), self, name, stage))
+            self._restore.append((base, method, None))
+
+    def restore(self):
+        """Remove all timed wrappers"""
+        for obj, attr, value in reversed(self._restore):
+            if value is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, value)
+        self._restore = []
+
+    def as_dict(self, comm=None):
+        """Return records as dictionary
+
+        Parameters
+        ----------
+        comm : MPI communicator, optional
+            If given, then return min, avg and max over all processors
+        """
+        if comm is None:
+            return {name: {stage: dict(record) for stage, record in stages.items()}
+                    for name, stages in self.records.items()}
+        keys = [(name, stage, key) for name in sorted(self.records)
+                for stage in sorted(self.records[name])
+                for key in ('time', 'bytes') if key in self.records[name][stage]]
+        values = np.array([self.records[name][stage][key] for name, stage, key in keys],
+                          dtype=float)
+        reduced = {}
+        for name, op in (('min', MPI.MIN), ('avg', MPI.SUM), ('max', MPI.MAX)):
+            reduced[name] = np.zeros_like(values)
+            comm.Allreduce(values, reduced[name], op=op)
+        reduced['avg'] /= comm.Get_size()
+        result = {}
+        for i, (name, stage, key) in enumerate(keys):
+            record = result.setdefault(name, {}).setdefault(
+                stage, {'calls': self.records[name][stage]['calls']})
+            record[key] = {op: float(val[i]) for op, val in reduced.items()}
+        return result
+
+
+class _TimedFunc(FuncWrap):
+    """Callable adding the time of each call of func to timer"""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ('_timer', '_name', '_stage')
+
+    def __init__(self, func, timer, name, stage):
+        FuncWrap.__init__(self, func, getattr(func, 'input_array', None),
+                          getattr(func, 'output_array', None))
+        object.__setattr__(self, '_timer', timer)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_stage', stage)
+
+    def __call__(self, *args, **kw):
+        t0 = MPI.Wtime()
+        result = self.func(*args, **kw)
+        self._timer.add(self._name, self._stage, MPI.Wtime()-t0)
+        return result
+
+
+class _TimedTransfer(_TimedFunc):
+    """Callable adding the time and size of each global transfer to timer"""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ()
+
+    def __init__(self, func, timer, name, stage):
+        _TimedFunc.__init__(self, func, timer, name, stage)
+        object.__setattr__(self, '_input_array', None)
+        object.__setattr__(self, '_output_array', None)
+
+    @property
+    def __self__(self):
+        return self.func.__self__
+
+    @property
+    def __name__(self):
+        return self.func.__name__
+
+    def __call__(self, arrayA, arrayB):
+        t0 = MPI.Wtime()
+        self.func(arrayA, arrayB)
+        self._timer.add(self._name, self._stage, MPI.Wtime()-t0, arrayA.nbytes)
+
+
 class MixedTensorProductSpace(object):
     """Class for composite tensorproductspaces.
 
@@ -736,14 +1545,59 @@ class MixedTensorProductSpace(object):
     ----------
     spaces : list
         List of TensorProductSpaces
+    batched : bool, optional
+        Whether to transform all components in one sweep, using one global
+        transfer per stage for all components (see
+        :class:`.BatchedTransform`). Only used if all spaces have the same
+        layout, otherwise the components are transformed one by one.
     """
 
-    def __init__(self, spaces):
+    def __init__(self, spaces, batched=False):
         self.spaces = spaces
-        self.forward = VectorTransform([space.forward for space in spaces])
-        self.backward = VectorTransform([space.backward for space in spaces])
-        self.backward_uniform = VectorTransform([space.backward_uniform for space in spaces])
-        self.scalar_product = VectorTransform([space.scalar_product for space in spaces])
+        self._batched = batched
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('forward', 'backward', 'backward_uniform', 'scalar_product'):
+            state.pop('_'+name, None)
+        return state
+
+    def plan(self):
+        """Plan transforms of all components
+
+        The transforms are otherwise planned on first use.
+        """
+        if '_forward' in self.__dict__:
+            return
+        spaces, batched = self.spaces, self._batched
+        self._forward = get_vector_transform([space.forward for space in spaces], batched)
+        self._backward = get_vector_transform([space.backward for space in spaces], batched)
+        self._backward_uniform = get_vector_transform([space.backward_uniform for space in spaces], batched)
+        self._scalar_product = get_vector_transform([space.scalar_product for space in spaces], batched)
+
+    @property
+    def forward(self):
+        """Return forward transform of all components"""
+        self.plan()
+        return self._forward
+
+    @property
+    def backward(self):
+        """Return backward transform of all components"""
+        self.plan()
+        return self._backward
+
+    @property
+    def scalar_product(self):
+        """Return scalar product transform of all components"""
+        self.plan()
+        return self._scalar_product
+
+    @property
+    def backward_uniform(self):
+        """Return backward transform on uniform mesh of all components"""
+        self.plan()
+        return self._backward_uniform
 
     def eval(self, points, coefficients, output_array=None, method=0):
         """Evaluate Function at points, given expansion coefficients
@@ -911,6 +1765,11 @@ class MixedTensorProductSpace(object):
     def get_refined(self, N):
         raise NotImplementedError
 
+    @property
+    def is_batched(self):
+        """Return whether all components are transformed in one sweep"""
+        return isinstance(self.forward, BatchedTransform)
+
     def __getitem__(self, i):
         return self.spaces[i]
 
@@ -935,16 +1794,19 @@ class VectorTensorProductSpace(MixedTensorProductSpace):
     ----------
     space : :class:`.TensorProductSpace`
         Space to create vector from
+    batched : bool, optional
+        Whether to transform all components in one sweep, using one global
+        transfer per stage for all components.
 
     """
 
-    def __init__(self, space):
+    def __init__(self, space, batched=False):
         if isinstance(space, list):
             warnings.warn("Use only the TensorProductSpace as argument", DeprecationWarning)
             spaces = space
         else:
             spaces = [space]*space.dimensions
-        MixedTensorProductSpace.__init__(self, spaces)
+        MixedTensorProductSpace.__init__(self, spaces, batched=batched)
 
     def num_components(self):
         """Return number of spaces in mixed space"""
@@ -972,10 +1834,15 @@ class VectorTensorProductSpace(MixedTensorProductSpace):
         return s
 
     def get_refined(self, N):
-        return VectorTensorProductSpace(self.spaces[0].get_refined(N))
+        return VectorTensorProductSpace(self.spaces[0].get_refined(N),
+                                        batched=self.is_batched)
 
     def get_dealiased(self, padding_factor=1.5, dealias_direct=False):
-        return VectorTensorProductSpace(self.spaces[0].get_dealiased(padding_factor, dealias_direct))
+        return VectorTensorProductSpace(self.spaces[0].get_dealiased(padding_factor, dealias_direct),
+                                        batched=self.is_batched)
+
+def _unpickle_space(cls, bases, kw):
+    return cls(MPI.COMM_SELF, bases, **kw)
 
 class VectorTransform(object):
 
@@ -1002,6 +1869,113 @@ class VectorTransform(object):
         return output_array
 
 
+class BatchedTransform(VectorTransform):
+    """Transform for all components of a mixed space in one sweep
+
+    Each stage of the parallel transform first executes the serial 1D
+    transforms for all components, and then redistributes all components
+    with one single global transfer. The number of global alltoallw
+    communications is thus reduced by a factor equal to the number of
+    components, as compared to :class:`.VectorTransform`.
+
+    Parameters
+    ----------
+    transforms : sequence of :class:`mpi4py_fft.mpifft.Transform`
+        The scalar transforms of each component. All transforms must have
+        the same layout, see :func:`is_batchable`.
+    """
+
+    __slots__ = ('_transfer', '_arraysA', '_arraysB')
+
+    def __init__(self, transforms):
+        VectorTransform.__init__(self, transforms)
+        transforms = self._transforms
+        assert is_batchable(transforms)
+        n = len(transforms)
+        t0 = transforms[0]
+        self._transfer = []
+        self._arraysA = []
+        self._arraysB = []
+        for i, trans in enumerate(t0._transfer):
+            # The transfers are bound methods (forward or backward) of Transfer
+            t = trans.__self__
+            batched = Transfer(t.comm, (n,)+tuple(t.shape), t.dtype,
+                               (n,)+tuple(t.subshapeA), t.axisA+1,
+                               (n,)+tuple(t.subshapeB), t.axisB+1)
+            self._transfer.append(getattr(batched, trans.__name__))
+            A = t0._xfftn[i].output_array
+            B = t0._xfftn[i+1].input_array
+            self._arraysA.append(np.zeros((n,)+A.shape, dtype=A.dtype))
+            self._arraysB.append(np.zeros((n,)+B.shape, dtype=B.dtype))
+
+    def __call__(self, input_array, output_array, **kw):
+        input_array = input_array.__array__()
+        output_array = output_array.__array__()
+        n = len(self._transfer)
+        for i in range(n):
+            arrayA = self._arraysA[i]
+            arrayB = input_array if i == 0 else self._arraysB[i-1]
+            for j, transform in enumerate(self._transforms):
+                transform._xfftn[i](arrayB[j], arrayA[j], **kw)
+            self._transfer[i](arrayA, self._arraysB[i])
+        arrayB = input_array if n == 0 else self._arraysB[-1]
+        for j, transform in enumerate(self._transforms):
+            transform._xfftn[-1](arrayB[j], output_array[j], **kw)
+        return output_array
+
+
+def get_vector_transform(transforms, batched=False):
+    """Return transform for all components of a mixed space
+
+    Parameters
+    ----------
+    transforms : sequence of transforms
+        The transforms of each component
+    batched : bool, optional
+        Return a :class:`.BatchedTransform` if possible
+    """
+    transforms = VectorTransform(transforms)._transforms
+    if batched and is_batchable(transforms):
+        return BatchedTransform(transforms)
+    return VectorTransform(transforms)
+
+def is_batchable(transforms):
+    """Return whether a list of transforms can be executed by a
+    :class:`.BatchedTransform`
+
+    Parameters
+    ----------
+    transforms : sequence of :class:`mpi4py_fft.mpifft.Transform`
+
+    Note
+    ----
+    The transforms must share the same decomposition, and the same shape
+    and type of all intermediate arrays.
+    """
+    t0 = transforms[0]
+    if not hasattr(t0, '_transfer'):
+        return False
+    for t in transforms[1:]:
+        if t is t0:
+            continue
+        if not len(t._xfftn) == len(t0._xfftn):
+            return False
+        for x0, x1 in zip(t0._xfftn, t._xfftn):
+            for a0, a1 in ((x0.input_array, x1.input_array),
+                           (x0.output_array, x1.output_array)):
+                if not (a0.shape == a1.shape and a0.dtype == a1.dtype):
+                    return False
+        for tr0, tr1 in zip(t0._transfer, t._transfer):
+            if not tr0.__name__ == tr1.__name__:
+                return False
+            tr0, tr1 = tr0.__self__, tr1.__self__
+            if not (tr0.comm == tr1.comm and
+                    tr0.subshapeA == tr1.subshapeA and tr0.axisA == tr1.axisA and
+                    tr0.subshapeB == tr1.subshapeB and tr0.axisB == tr1.axisB):
+                return False
+    return True
+
+
 class Convolve(object):
     r"""Class for convolving without truncation.
 
@@ -1083,9 +2057,21 @@ class BoundaryValues(object):
         self.bcs_final = list((0,)*len(bc)) # Data. May differ from bcs only for TensorProductSpaces
         self.axis = 0
         self.bc_time = 0
+        self._lambdified = {}   # Compiled sympy.Exprs
+        self._planes = None     # Boundary data evaluated on boundary planes of TensorProductSpace
+        self._plane_transforms = None   # Forward transforms of the boundary planes
         self.update_bcs(bc=bc)
 
+    def __getstate__(self):
+        # Compiled sympy.Exprs and data of a TensorProductSpace are set up
+        # again when needed
+        state = self.__dict__.copy()
+        state.update(tensorproductspace=None, bcs_final=list(self.bcs),
+                     _lambdified={}, _planes=None, _plane_transforms=None)
+        return state
+
     def update_bcs(self, bc=None):
+        import sympy
         if bc is not None:
             assert isinstance(bc, (list, tuple))
             assert len(bc) in (2, 4)
@@ -1097,20 +2083,57 @@ class BoundaryValues(object):
                     raise NotImplementedError
 
             self.bcs_final[:] = self.bcs
+            self._lambdified.clear()
+            self._planes = None
+
+    def _lambdify(self, j):
+        """Return bc j compiled to a function of its spatial coordinates and time
+
+        Returns
+        -------
+        2-tuple
+            The function and the spatial sympy symbols it takes as arguments,
+            in the order x, y, z. The time is always the last argument.
+        """
+        if j not in self._lambdified:
+            import sympy
+            x, y, z, tt = sympy.symbols("x,y,z,t")
+            bci = self.bc[j]
+            sym0 = [sym for sym in (x, y, z) if sym in bci.free_symbols]
+            self._lambdified[j] = (sympy.lambdify(sym0+[tt], bci, 'numpy'), sym0)
+        return self._lambdified[j]
 
     def update_bcs_time(self, time):
+        """Update boundary conditions that depend on time
+
+        The sympy.Exprs of the boundary conditions are compiled only once.
+        In a TensorProductSpace the boundary values are then evaluated and
+        transformed on the boundary planes only, without allocating any new
+        arrays. For a distributed space the forward transform of the full
+        space is used, since the boundary planes may be spread across
+        processors.
+
+        Parameters
+        ----------
+        time : number
+            The new time
+        """
+        import sympy
         tt = sympy.symbols('t')
-        update_time = False
-        for i, bci in enumerate(self.bc):
-            if isinstance(bci, sympy.Expr):
-                if tt in bci.free_symbols:
-                    self.bc_time = time
-                    self.bcs[i] = bci.subs({'t': time})
-                    update_time = True
-        if update_time:
-            self.bcs_final[:] = self.bcs
-            if self.tensorproductspace is not None:
-                self.set_tensor_bcs(self.base, self.tensorproductspace)
+        time_dependent = [j for j, bci in enumerate(self.bc)
+                          if isinstance(bci, sympy.Expr) and tt in bci.free_symbols]
+        if len(time_dependent) == 0:
+            return
+        self.bc_time = time
+        T = self.tensorproductspace
+        if T is None or isinstance(T, SpectralBase):
+            for j in time_dependent:
+                f = self._lambdify(j)[0]
+                self.bcs[j] = self.bcs_final[j] = f(time)
+        elif self._planes is None:
+            self.set_tensor_bcs(self.base, T)
+        else:
+            self._update_tensor_bcs(inplace=True)
 
     def set_tensor_bcs(self, this_base, T):
         """Set correct boundary values for tensor, using values in self.bc
@@ -1121,6 +2144,8 @@ class BoundaryValues(object):
         self.axis = this_base.axis
         self.base = this_base
         self.tensorproductspace = T
+        self._planes = None
+        self._plane_transforms = None
 
         if isinstance(T, SpectralBase):
             pass
@@ -1149,82 +2174,126 @@ class BoundaryValues(object):
                     self.bcs[i] = self.bcs_final[i] = 0
                 return
 
-            # Set boundary values
-            # These are values set at the end of a transform in Dirichlet space,
-            # but before any other transforms
-            # Shape is like real space, since Dirichlet does not alter shape
-            b = Array(T)
+            # Store the mesh of the boundary planes, such that boundary values
+            # can be evaluated later, for any time, without sympy
+            import sympy
             s = T.local_slice(False)[self.axis]
-
+            self._owner = s.stop == int(this_base.N*this_base.padding_factor)
+            planes = []
             for j, bci in enumerate(self.bc):
                 if isinstance(bci, sympy.Expr):
                     X = T.local_mesh(True)
-                    x, y, z, tt = sympy.symbols("x,y,z,t")
-                    sym0 = [sym for sym in (x, y, z) if sym in bci.free_symbols]
-                    if tt in bci.free_symbols:
-                        bci = bci.subs({'t': self.bc_time})
-                    lbci = sympy.lambdify(sym0, bci, 'numpy')
+                    f, sym0 = self._lambdify(j)
                     Yi = []
-                    for i, ax in enumerate((x, y, z)):
-                        if ax in bci.free_symbols:
+                    for i, ax in enumerate(sympy.symbols("x,y,z")):
+                        if ax in sym0:
                             Yi.append(X[i][this_base.si[j]])
-                    f_bci = lbci(*Yi)
-                    # Put the Dirichlet value in the position of the bc dofs
-                    if s.stop == int(this_base.N*this_base.padding_factor):
-                        b[this_base.si[-(len(self.bc))+j]] = f_bci
+                    planes.append((j, f, Yi))
 
                 elif isinstance(bci, (Number, np.ndarray)):
-                    if s.stop == int(this_base.N*this_base.padding_factor):
-                        b[this_base.si[-(len(self.bc))+j]] = bci
+                    planes.append((j, None, bci))
 
                 else:
                     raise NotImplementedError
 
-            if number_of_bases_after_this == 0:
-                # Dirichlet base is the first to be transformed
-                b_hat = b
-
-            elif number_of_bases_after_this == 1:
-                T.forward._xfftn[0].input_array[...] = b
+            self._planes = planes
+            self._plane_transforms = self._plan_planes(T)
+            self._update_tensor_bcs(inplace=False)
 
-                T.forward._xfftn[0]()
-                arrayA = T.forward._xfftn[0].output_array
-                arrayB = T.forward._xfftn[1].input_array
-                T.forward._transfer[0](arrayA, arrayB)
-                b_hat = arrayB.copy()
+    def _plan_planes(self, T):
+        """Return forward transforms of the boundary planes only
 
-            elif number_of_bases_after_this == 2:
-                T.forward._xfftn[0].input_array[...] = b
+        The bases of T, except the Dirichlet base, are copied and planned for
+        an array holding only the M boundary planes, in the order of the
+        forward transform of T. The Dirichlet base does not change the
+        boundary values, and is represented by None.
 
-                T.forward._xfftn[0]()
-                arrayA = T.forward._xfftn[0].output_array
-                arrayB = T.forward._xfftn[1].input_array
-                T.forward._transfer[0](arrayA, arrayB)
-
-                T.forward._xfftn[1]()
-                arrayA = T.forward._xfftn[1].output_array
-                arrayB = T.forward._xfftn[2].input_array
-                T.forward._transfer[1](arrayA, arrayB)
-                b_hat = arrayB.copy()
-
-            # Now b_hat contains the correct slices in slm1 and slm2
-            # These are the values to use on intermediate steps. If for example the Dirichlet space is squeezed between two Fourier spaces
-            for i in range(len(self.bc)):
-                self.bcs[i] = b_hat[this_base.si[-(len(self.bc))+i]].copy()
-
-            # Final (the values to set on fully transformed functions)
-            T.forward._xfftn[0].input_array[...] = b
-            for i in range(len(T.forward._transfer)):
+        Returns None if the boundary planes cannot be transformed on their
+        own, i.e., if T is distributed, or if other bases have nonhomogeneous
+        boundary conditions. The forward transform of T is then used.
+        """
+        if np.prod([c.Get_size() for c in T.subcomm]) > 1 or not hasattr(T, '_plan_jobs'):
+            return None
+        if any(base.has_nonhomogeneous_bcs for base in T.bases if base is not self.base):
+            return None
+        transforms = []
+        for xfftn, (shape, axes, dtype, _, _) in zip(T.xfftn, T._plan_jobs):
+            if xfftn is self.base:
+                transforms.append(None)
+                continue
+            shape = list(shape)
+            shape[self.axis] = len(self.bc)
+            base = deepcopy(xfftn)
+            base.plan(tuple(shape), axes, dtype, T._kw)
+            transforms.append(base.forward)
+        return transforms
+
+    def _update_tensor_bcs(self, inplace=True):
+        """Compute boundary values for a TensorProductSpace
+
+        The boundary values are set on the boundary planes of the input array
+        of the forward transform. These are values set at the end of a
+        transform in the Dirichlet space, but before any other transforms.
+        The data are transformed, and the values to use on intermediate steps
+        (self.bcs) are stored before the Dirichlet space is transformed. The
+        values to set on fully transformed Functions (self.bcs_final) are
+        stored at the end.
+
+        Only the boundary planes are transformed, see :meth:`_plan_planes`,
+        unless the space is distributed.
 
-                T.forward._xfftn[i]()
-                arrayA = T.forward._xfftn[i].output_array
-                arrayB = T.forward._xfftn[i+1].input_array
-                T.forward._transfer[i](arrayA, arrayB)
+        Parameters
+        ----------
+        inplace : bool, optional
+            Whether to copy the values into the already allocated arrays of
+            self.bcs and self.bcs_final
+        """
+        T = self.tensorproductspace
+        this_base = self.base
+        M = len(self.bc)
 
-            T.forward._xfftn[-1]()
-            b_hat = T.forward._xfftn[-1].output_array
-            for i in range(len(self.bc)):
-                self.bcs_final[i] = b_hat[this_base.si[-(len(self.bc))+i]].copy()
+        def set_bcs(bcs, b_hat):
+            for i in range(M):
+                if inplace:
+                    bcs[i][...] = b_hat[this_base.si[-M+i]]
+                else:
+                    bcs[i] = b_hat[this_base.si[-M+i]].copy()
+
+        if self._plane_transforms is not None:
+            transforms = self._plane_transforms
+            b = transforms[0].input_array if transforms[0] else transforms[1].input_array
+            for j, f, Yi in self._planes:
+                b[this_base.si[j]] = Yi if f is None else f(*(Yi+[self.bc_time]))
+            for transform in transforms:
+                if transform is None:
+                    set_bcs(self.bcs, b)
+                    continue
+                if transform.input_array is not b:
+                    transform.input_array[...] = b
+                b = transform()
+            set_bcs(self.bcs_final, b)
+            return
+
+        forward = T.forward
+        b = forward._xfftn[0].input_array
+        b.fill(0)
+        if self._owner:
+            for j, f, Yi in self._planes:
+                # Put the Dirichlet value in the position of the bc dofs
+                b[this_base.si[-M+j]] = Yi if f is None else f(*(Yi+[self.bc_time]))
+
+        for i in range(len(forward._transfer)):
+            if i == self.number_of_bases_after_this:
+                set_bcs(self.bcs, forward._xfftn[i].input_array)
+            forward._xfftn[i]()
+            arrayA = forward._xfftn[i].output_array
+            arrayB = forward._xfftn[i+1].input_array
+            forward._transfer[i](arrayA, arrayB)
+
+        if self.number_of_bases_after_this == len(forward._transfer):
+            set_bcs(self.bcs, forward._xfftn[-1].input_array)
+        forward._xfftn[-1]()
+        set_bcs(self.bcs_final, forward._xfftn[-1].output_array)
 
     def add_to_orthogonal(self, u, uh):
         """Add contribution from boundary functions to `u`
@@ -1287,6 +2356,7 @@ class BoundaryValues(object):
                 u[self.base.si[-(M)+i]] = self.bcs[i]
 
     def has_nonhomogeneous_bcs(self):
+        import sympy
         for bc in self.bc:
             if isinstance(bc, Number):
                 if not bc == 0:
@@ -1,17 +1,19 @@
 """
 Module for implementing helper functions.
 """
+import os
+import copy
 import types
+import weakref
 try:
     from collections.abc import MutableMapping
 except ImportError:
     from collections import MutableMapping
 import numpy as np
-from scipy.fftpack import dct
 from shenfun.optimization import optimizer
 
 __all__ = ['inheritdocstrings', 'dx', 'clenshaw_curtis1D', 'CachedArrayDict',
-           'outer', 'apply_mask']
+           'WorkArrayPool', 'outer', 'apply_mask']
 
 def inheritdocstrings(cls):
     """Method used for inheriting docstrings from parent class
@@ -69,6 +71,7 @@ def dx(u):
 
 def clenshaw_curtis1D(u, quad="GC"):  # pragma: no cover
     """Clenshaw-Curtis integration in 1D"""
+    from scipy.fftpack import dct
     assert u.ndim == 1
     N = u.shape[0]
     if quad == 'GL':
@@ -141,6 +144,156 @@ class CachedArrayDict(MutableMapping):
     def values(self):
         raise TypeError('Cached work arrays not iterable')
 
+class WorkArrayPool(CachedArrayDict):
+    """Pool of work arrays and planned transforms shared between spaces
+
+    Spaces with identical layouts (same basis, local shape, axis and dtype)
+    need identical work arrays for their transforms. With the pool enabled,
+    such spaces share both the work arrays and the planned (FFTW)
+    transforms, instead of each holding their own copies. This is safe,
+    since transforms are executed one at a time and the work arrays only
+    hold data during a transform. A transform of a space planned with the
+    pool, called with an input array but without an output array, returns
+    a copy of the result, such that the shared work memory is never handed
+    out. Called without any arrays, the transform works directly on the
+    (shared) planned arrays, e.g., ``T.forward.input_array``, and the
+    result in ``T.forward.output_array`` is overwritten by the next
+    transform of any space sharing the same layout.
+
+    The pool is disabled by default. Enable with :meth:`enable`, or by
+    setting the environment variable ``SHENFUN_SHARE_WORK_ARRAYS=1`` before
+    importing shenfun. Only spaces planned after enabling the pool share
+    memory.
+
+    Example
+    -------
+
+    >>> from shenfun import Basis
+    >>> from shenfun.spectralbase import work_pool
+    >>> work_pool.enable()
+    >>> C0 = Basis(8, 'C', bc=(0, 0))
+    >>> C1 = Basis(8, 'C', bc=(1, 0))
+    >>> C0.forward.input_array is C1.forward.input_array
+    True
+    >>> work_pool.enable(False)
+    """
+    def __init__(self):
+        CachedArrayDict.__init__(self)
+        self.enabled = os.environ.get('SHENFUN_SHARE_WORK_ARRAYS', '0') == '1'
+        self._plans = {}
+        self._planned = weakref.WeakValueDictionary()
+
+    def enable(self, enabled=True):
+        """Enable or disable sharing of work arrays for spaces planned later"""
+        self.enabled = enabled
+
+    def clear(self):
+        """Drop all arrays and plans held by the pool
+
+        Spaces already planned keep their arrays.
+        """
+        self._data.clear()
+        self._plans.clear()
+
+    @staticmethod
+    def __keytransform__(key):
+        assert len(key) == 3
+        return (tuple(np.atleast_1d(key[0]).tolist()), np.dtype(key[1]).char,
+                key[2]), False
+
+    def aligned(self, shape, dtype, tag=None):
+        """Return aligned work array, shared if pool is enabled
+
+        Parameters
+        ----------
+        shape : sequence of ints
+            Shape of array
+        dtype : Numpy dtype
+            Type of array
+        tag : hashable, optional
+            Arrays of same shape and dtype with different tags are not shared
+        """
+        from mpi4py_fft import fftw
+        if not self.enabled:
+            return fftw.aligned(shape, dtype=dtype)
+        newkey = self.__keytransform__((shape, dtype, tag))[0]
+        if newkey not in self._data:
+            self._data[newkey] = fftw.aligned(shape, dtype=dtype)
+            self._data[newkey].fill(0)
+        return self._data[newkey]
+
+    @staticmethod
+    def plan_key(base, shape, axis, dtype, options):
+        """Return key identifying the transforms planned by base"""
+        axis = tuple(np.atleast_1d(axis).tolist())
+        return (base.__class__, base.N, base.quad, base.padding_factor,
+                getattr(base, 'dealias_direct', False),
+                tuple(np.atleast_1d(shape).tolist()), axis,
+                np.dtype(dtype).char, repr(sorted(options.items())))
+
+    def plan_like(self, base, shape, axis, dtype, options):
+        """Plan base by reusing transforms of identical planned base
+
+        Returns True if an identical planned base was found in the pool, and
+        False if base must be planned as usual (and then be added to the
+        pool with :meth:`add_plan`).
+        """
+        if not self.enabled:
+            return False
+        other = self._plans.get(self.plan_key(base, shape, axis, dtype, options))
+        if other is None:
+            return False
+        base.plan_like(other)
+        self._planned[id(base)] = base
+        return True
+
+    def add_plan(self, base, shape, axis, dtype, options):
+        """Add planned base to pool, such that identical bases may share"""
+        self._planned[id(base)] = base
+        if self.enabled:
+            for name in ('forward', 'backward', 'backward_uniform', 'scalar_product'):
+                transform = getattr(base, name, None)
+                if hasattr(transform, 'share'):
+                    transform.share()
+            # Store a shallow copy, since base may later be planned again
+            # for a different layout
+            self._plans[self.plan_key(base, shape, axis, dtype, options)] = copy.copy(base)
+
+    def register(self, space):
+        """Register space (e.g., a TensorProductSpace) for :meth:`nbytes`"""
+        self._planned[id(space)] = space
+
+    def nbytes(self, spaces=None):
+        """Return total number of bytes held in work arrays by planned spaces
+
+        Memory shared between spaces is counted only once.
+
+        Parameters
+        ----------
+        spaces : sequence of spaces, optional
+            Bases or TensorProductSpaces. If None, use all live spaces
+            that have been planned.
+        """
+        if spaces is None:
+            spaces = list(self._planned.values())
+        arrays = {}
+        def add(a):
+            if isinstance(a, np.ndarray):
+                arrays[(a.__array_interface__['data'][0], a.nbytes)] = a.nbytes
+        for space in spaces:
+            bases = getattr(space, 'bases', [space])
+            for base in bases:
+                for name in ('forward', 'backward', 'backward_uniform',
+                             'scalar_product'):
+                    t = getattr(base, name, None)
+                    for a in ('input_array', 'tmp_array', 'output_array'):
+                        add(getattr(t, a, None))
+                    xfftn = getattr(t, 'xfftn', None)
+                    for obj in (xfftn, getattr(xfftn, 'dct', None)):
+                        add(getattr(obj, 'input_array', None))
+                        add(getattr(obj, 'output_array', None))
+        return int(sum(arrays.values()))
+
 def outer(a, b, c):
     r"""Return outer product $c_{i,j} = a_i b_j$
 
@@ -195,3 +348,44 @@ def apply_mask(u_hat, mask):
     if mask is not None:
         u_hat *= mask
     return u_hat
+
+@optimizer
+def derivative_recurrence(input_array, output_array, A, B, C, axis=0):
+    r"""Compute coefficients of derivative from three-term recurrence
+
+    For orthogonal polynomials :math:`p_n` that satisfy
+
+    .. math::
+
+        p_n = A_n p'_{n-1} + B_n p'_n + C_n p'_{n+1},
+
+    the coefficients :math:`c` of the derivative of the series with
+    coefficients :math:`a` are found in O(N) operations from
+
+    .. math::
+
+        c_{j-1} = (a_j - B_j c_j - A_{j+1} c_{j+1}) / C_{j-1}, \quad j=N-1, \ldots, 1
+
+    with :math:`c_{N-1} = c_N = 0`.
+
+    Parameters
+    ----------
+    input_array : array
+        Coefficients :math:`a`
+    output_array : array
+        Coefficients :math:`c`. Must be different from input_array
+    A, B, C : arrays
+        1D arrays of recurrence coefficients. A has length N+1, whereas
+        B and C have length N.
+    axis : int, optional
+        The axis along which to take the derivative
+    """
+    a = np.moveaxis(input_array, axis, 0)
+    c = np.moveaxis(output_array, axis, 0)
+    N = a.shape[0]
+    c[N-1] = 0
+    if N > 1:
+        c[N-2] = a[N-1]/C[N-2]
+    for j in range(N-2, 0, -1):
+        c[j-1] = (a[j] - B[j]*c[j] - A[j+1]*c[j+1])/C[j-1]
+    return output_array
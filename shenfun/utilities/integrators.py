@@ -28,6 +28,18 @@ __all__ = ('RK4', 'ETDRK4', 'ETD')
 
 #pylint: disable=unused-variable
 
+def _astype_precision(a, dtype):
+    """Return array ``a`` with the floating point precision of ``dtype``
+
+    The coefficients of the integrators are computed in double precision,
+    and then stored with the precision of the solution, such that a single
+    precision solution is not upcast in the time loop.
+    """
+    real = np.finfo(dtype).dtype
+    if np.iscomplexobj(a):
+        return a.astype(np.promote_types(real, np.complex64), copy=False)
+    return a.astype(real, copy=False)
+
 class IntegratorBase(object):
     """Abstract base class for integrators
 
@@ -126,6 +138,8 @@ class ETD(IntegratorBase):
             psi += ((np.exp(ll)-1.)/ll).real
 
         psi /= M
+        self.ehL = _astype_precision(self.ehL, self.dU.dtype)
+        self.psi = _astype_precision(psi, self.dU.dtype)
 
     def solve(self, u, u_hat, dt, trange):
         """Integrate forward in time
@@ -216,7 +230,11 @@ class ETDRK4(IntegratorBase):
         a.append(2*psi[1]-4*psi[2])
         a.append(2*psi[1]-4*psi[2])
         a.append(-psi[1]+4*psi[2])
-        self.a = a
+        dtype = self.dU.dtype
+        self.a = [_astype_precision(ai, dtype) for ai in a]
+        self.psi = _astype_precision(psi, dtype)
+        self.ehL = _astype_precision(self.ehL, dtype)
+        self.ehL_h = _astype_precision(self.ehL_h, dtype)
 
     def solve(self, u, u_hat, dt, trange):
         """Integrate forward in time
@@ -0,0 +1,367 @@
+r"""
+Module for computing Gauss quadrature points and weights in O(N) operations
+
+The points of Gauss quadrature rules are the zeros of orthogonal polynomials,
+that all satisfy a second order differential equation
+
+.. math::
+
+    p(x) u'' + q(x) u' + r(x) u = 0,
+
+with polynomial coefficients p, q and r of at most second degree. The points
+are found with the algorithm of Glaser, Liu and Rokhlin [1]_, that marches
+from one zero to the next. A good initial guess for the next zero is found by
+integrating the Prüfer transform of the differential equation, and the guess
+is refined with Newton's method, where the function is evaluated with a
+Taylor series around the previous zero. The Taylor series is computed from a
+recurrence given by the differential equation. Each point, and its weight,
+is thus computed in a constant number of operations, independent of N, as
+opposed to the methods based on eigenvalues, that cost O(N^2) or O(N^3)
+operations.
+
+Small rules (N < :data:`min_size`) are computed by the regular numpy or scipy
+routines. All rules are cached, such that each rule is computed only once
+for each family, size and parameters.
+
+Example
+-------
+>>> from shenfun.utilities.quadrature import legendre_gauss
+>>> x, w = legendre_gauss(1000)
+>>> print('{:.12f}'.format(w.sum()))
+2.000000000000
+
+References
+----------
+.. [1] A. Glaser, X. Liu and V. Rokhlin, "A fast algorithm for the
+   calculation of the roots of special functions", SIAM J. Sci. Comput.,
+   29(4), 1420-1438, 2007
+
+"""
+import functools
+from math import sqrt, atan, log, lgamma, pi, sin, cos
+import numpy as np
+from shenfun.optimization import optimizer
+
+__all__ = ('legendre_gauss', 'legendre_lobatto', 'jacobi_gauss',
+           'hermite_gauss', 'laguerre_gauss', 'min_size')
+
+#: Smallest number of points computed with the O(N) algorithm
+min_size = 100
+
+def legendre_gauss(N):
+    """Return points and weights for Legendre-Gauss quadrature
+
+    Parameters
+    ----------
+    N : int
+        Number of quadrature points
+    """
+    return jacobi_gauss(N, 0, 0)
+
+def legendre_lobatto(N):
+    """Return points and weights for Legendre-Gauss-Lobatto quadrature
+
+    The interior points are the points of Jacobi-Gauss quadrature with
+    alpha = beta = 1.
+
+    Parameters
+    ----------
+    N : int
+        Number of quadrature points, including the two end points
+    """
+    return _copy(_legendre_lobatto(N))
+
+def jacobi_gauss(N, alpha, beta):
+    """Return points and weights for Jacobi-Gauss quadrature
+
+    The weights are for the weight function
+    :math:`(1-x)^{\\alpha}(1+x)^{\\beta}`.
+
+    Parameters
+    ----------
+    N : int
+        Number of quadrature points
+    alpha, beta : numbers
+        Parameters of Jacobi polynomials, larger than -1
+    """
+    return _copy(_jacobi_gauss(N, float(alpha), float(beta)))
+
+def hermite_gauss(N, scaled=False):
+    """Return points and weights for Hermite-Gauss quadrature
+
+    The weights are for the weight function :math:`\\exp(-x^2)`.
+
+    Parameters
+    ----------
+    N : int
+        Number of quadrature points
+    scaled : bool, optional
+        Whether to return the weights multiplied by :math:`\\exp(x^2)`,
+        computed without overflow.
+    """
+    x, lw = _hermite_gauss(N)
+    return x.copy(), np.exp(lw + x**2 if scaled else lw)
+
+def laguerre_gauss(N, alpha=0, scaled=False):
+    """Return points and weights for Laguerre-Gauss quadrature
+
+    The weights are for the weight function :math:`x^{\\alpha}\\exp(-x)`.
+
+    Parameters
+    ----------
+    N : int
+        Number of quadrature points
+    alpha : number, optional
+        Parameter of generalized Laguerre polynomials, larger than -1
+    scaled : bool, optional
+        Whether to return the weights multiplied by :math:`\\exp(x)`,
+        computed without overflow.
+    """
+    x, lw = _laguerre_gauss(N, float(alpha))
+    return x.copy(), np.exp(lw + x if scaled else lw)
+
+def _copy(xw):
+    return xw[0].copy(), xw[1].copy()
+
+@functools.lru_cache(maxsize=None)
+def _jacobi_gauss(N, alpha, beta):
+    if N < min_size:
+        if alpha == 0 and beta == 0:
+            from numpy.polynomial import legendre
+            return legendre.leggauss(N)
+        from scipy.special import roots_jacobi
+        return roots_jacobi(N, alpha, beta)
+    # P_N^{(alpha, beta)}(x) is found from (1-x^2)u'' + (b-a-(a+b+2)x)u' + N(N+a+b+1)u = 0
+    coef = np.array([[1, 0, -1], [beta-alpha, -(alpha+beta+2), 0],
+                     [N*(N+alpha+beta+1), 0, 0]], dtype=float)
+    if alpha == beta:
+        x, ld = _symmetric_zeros(N, coef)
+    else:
+        u0, du0, nright = _jacobi_at_zero(N, alpha, beta)
+        x, ld = _zeros(N, coef, 0., u0, du0, nright)
+    lw = -np.log(1-x**2) - 2*ld
+    lmu = (alpha+beta+1)*log(2) + lgamma(alpha+1) + lgamma(beta+1) - lgamma(alpha+beta+2)
+    return x, _normalize(lw, lmu, False)
+
+@functools.lru_cache(maxsize=None)
+def _legendre_lobatto(N):
+    x = np.zeros(N)
+    w = np.zeros(N)
+    x[0], x[-1] = -1, 1
+    w[0] = w[-1] = 2./(N*(N-1))
+    if N > 2:
+        xi, wi = _jacobi_gauss(N-2, 1., 1.)
+        x[1:-1] = xi
+        w[1:-1] = wi/(1-xi**2)
+    return x, w
+
+@functools.lru_cache(maxsize=None)
+def _hermite_gauss(N):
+    if N < min_size:
+        from numpy.polynomial import hermite
+        x, w = hermite.hermgauss(N)
+        return x, np.log(w)
+    # Hermite function u = exp(-x^2/2)H_N(x) is found from u'' + (2N+1-x^2)u = 0
+    coef = np.array([[1, 0, 0], [0, 0, 0], [2*N+1, 0, -1]], dtype=float)
+    x, ld = _symmetric_zeros(N, coef)
+    lw = -x**2 - 2*ld
+    return x, _normalize(lw, 0.5*log(pi), True)
+
+@functools.lru_cache(maxsize=None)
+def _laguerre_gauss(N, alpha):
+    if N < min_size:
+        from scipy.special import roots_genlaguerre
+        x, w = roots_genlaguerre(N, alpha)
+        return x, np.log(w)
+    # Laguerre function u = exp(-x/2)x^((a+1)/2)L_N^(a)(x) is found from
+    # 4x^2u'' + (-x^2 + 2(2N+a+1)x + 1-a^2)u = 0
+    coef = np.array([[0, 0, 4], [0, 0, 0], [1-alpha**2, 2*(2*N+alpha+1), -1]],
+                    dtype=float)
+    x0 = 2*N+alpha+1
+    u0, du0, nright = _laguerre_at(N, alpha, x0)
+    x, ld = _zeros(N, coef, x0, u0, du0, nright)
+    lw = -x + alpha*np.log(x) - 2*ld
+    return x, _normalize(lw, lgamma(alpha+1), True)
+
+def _normalize(lw, lmu, logarithmic):
+    """Return weights, or logarithm of weights, with sum exp(lmu)"""
+    lw = lw - lw.max()
+    lw += lmu - log(np.exp(lw).sum())
+    return lw if logarithmic else np.exp(lw)
+
+def _symmetric_zeros(N, coef):
+    """Return zeros and log|u'| at zeros of a solution with parity (-1)^N"""
+    M = N//2
+    u0, du0 = (0., 1.) if N % 2 else (1., 0.)
+    xr, ldr = _zeros(M, coef, 0., u0, du0, M)
+    x = np.zeros(N)
+    ld = np.zeros(N)
+    x[N-M:] = xr
+    x[:M] = -xr[::-1]
+    ld[N-M:] = ldr
+    ld[:M] = ldr[::-1]
+    return x, ld
+
+def _zeros(N, coef, x0, u0, du0, nright):
+    """Return zeros and log|u'| at zeros of the solution through (x0, u0, du0)
+
+    The solution is assumed to have nright zeros to the right of x0, and
+    N-nright zeros to the left of x0. If u0 is zero, then x0 is not counted.
+    """
+    x = np.zeros(N)
+    ld = np.zeros(N)
+    nleft = N-nright
+    if nright > 0:
+        glr_march(coef, x0, u0, du0, 1., x[nleft:], ld[nleft:])
+    if nleft > 0:
+        glr_march(coef, x0, u0, du0, -1., x[nleft-1::-1], ld[nleft-1::-1])
+    return x, ld
+
+def _jacobi_at_zero(N, alpha, beta):
+    """Return P_N(0), P_N'(0) of Jacobi polynomial, scaled by the same
+    arbitrary factor, and the number of zeros larger than 0"""
+    ab = alpha+beta
+    p0, p1 = 1., (alpha-beta)/2.
+    changes = int(p1 < 0)
+    for k in range(2, N+1):
+        c = 2*k+ab
+        p0, p1 = p1, ((c-1)*(alpha**2-beta**2)*p1 - 2*(k+alpha-1)*(k+beta-1)*c*p0) / (2*k*(k+ab)*(c-2))
+        changes += (p1 < 0) != (p0 < 0)
+        s = abs(p1)
+        if s > 1e100 or 0 < s < 1e-100:
+            p0, p1 = p0/s, p1/s
+    dp = (N*(alpha-beta)*p1 + 2*(N+alpha)*(N+beta)*p0)/(2*N+ab)
+    return p1, dp, changes
+
+def _laguerre_at(N, alpha, x0):
+    """Return Laguerre function u(x0), u'(x0), scaled by the same arbitrary
+    factor, and the number of zeros larger than x0"""
+    l0, l1 = 1., 1+alpha-x0
+    # Sign changes of (-1)^k L_k, that have positive leading coefficients
+    changes = int(-l1 < 0)
+    for k in range(2, N+1):
+        l0, l1 = l1, ((2*k-1+alpha-x0)*l1 - (k-1+alpha)*l0)/k
+        changes += ((-1)**k*l1 < 0) != ((-1)**(k-1)*l0 < 0)
+        s = abs(l1)
+        if s > 1e100 or 0 < s < 1e-100:
+            l0, l1 = l0/s, l1/s
+    dl = (N*l1 - (N+alpha)*l0)/x0
+    return l1, (alpha+1-x0)/(2*x0)*l1 + dl, changes
+
+@optimizer
+def glr_march(coef, x0, u0, du0, direction, x, ld):
+    """Find consecutive zeros of solution to p u'' + q u' + r u = 0
+
+    Parameters
+    ----------
+    coef : array of shape (3, 3)
+        Coefficients of the polynomials p, q and r, in increasing order
+    x0, u0, du0 : numbers
+        Starting point, and the solution and its derivative at x0
+    direction : number
+        1 or -1 for marching to the right or to the left of x0
+    x : array
+        The consecutive zeros on exit
+    ld : array
+        Logarithm of the absolute value of the derivative at the zeros on
+        exit, for the solution through (x0, u0, du0)
+    """
+    M = 200
+    b = np.zeros(M)
+    c, u, du = x0, u0, du0
+    s = sqrt(u*u+du*du)
+    u, du = u/s, du/s
+    lscale = log(s)
+    for j in range(x.shape[0]):
+        # Initial guess from the Prüfer transform, where the zeros of u are
+        # at theta = k*pi. Integrate dx/dtheta with RK4.
+        pc = coef[0, 0]+(coef[0, 1]+coef[0, 2]*c)*c
+        rc = coef[2, 0]+(coef[2, 1]+coef[2, 2]*c)*c
+        sc = sqrt(rc/pc)
+        th0 = atan(sc*u/du) if du != 0 else pi/2
+        if j > 0 or u == 0:
+            # Starting from a zero
+            th1 = th0 + direction*pi
+        elif direction*th0 > 0:
+            th1 = direction*pi
+        else:
+            th1 = 0.
+        xg = c
+        K = 10
+        h = (th1-th0)/K
+        th = th0
+        for k in range(K):
+            k1 = h*_dxdth(coef, xg, th)
+            k2 = h*_dxdth(coef, xg+k1/2, th+h/2)
+            k3 = h*_dxdth(coef, xg+k2/2, th+h/2)
+            k4 = h*_dxdth(coef, xg+k3, th+h)
+            xg += (k1+2*k2+2*k3+k4)/6
+            th += h
+        # Taylor series around c, scaled such that the guess is at t=1
+        H = xg-c
+        m = _taylor(coef, c, u, du, H, b)
+        # Newton iterations
+        t = 1.
+        for it in range(20):
+            f, df = _horner(b, m, t)
+            dt = f/df
+            t -= dt
+            if abs(dt) < 1e-15:
+                break
+        f, df = _horner(b, m, t)
+        c = c + t*H
+        u, du = f, df/H
+        s = abs(du)
+        u, du = u/s, du/s
+        lscale += log(s)
+        x[j] = c
+        ld[j] = lscale
+
+def _horner(b, m, t):
+    """Return polynomial with coefficients b[:m], and its derivative, at t"""
+    f = b[m-1]
+    df = 0.
+    for k in range(m-2, -1, -1):
+        df = df*t + f
+        f = f*t + b[k]
+    return f, df
+
+def _dxdth(coef, x, th):
+    p = coef[0, 0]+(coef[0, 1]+coef[0, 2]*x)*x
+    dp = coef[0, 1]+2*coef[0, 2]*x
+    q = coef[1, 0]+coef[1, 1]*x
+    r = coef[2, 0]+(coef[2, 1]+coef[2, 2]*x)*x
+    dr = coef[2, 1]+2*coef[2, 2]*x
+    s = sqrt(r/p)
+    w = (dr/r - dp/p)/2 + q/p
+    return 1/(s + w*sin(th)*cos(th))
+
+def _taylor(coef, c, u, du, H, b):
+    """Compute scaled Taylor coefficients b_k = u^(k)(c) H^k/k! of solution
+
+    Returns the number of coefficients needed for machine precision.
+    """
+    p = coef[0, 0]+(coef[0, 1]+coef[0, 2]*c)*c
+    dp = coef[0, 1]+2*coef[0, 2]*c
+    ddp = 2*coef[0, 2]
+    q = coef[1, 0]+coef[1, 1]*c
+    dq = coef[1, 1]
+    r = coef[2, 0]+(coef[2, 1]+coef[2, 2]*c)*c
+    dr = coef[2, 1]+2*coef[2, 2]*c
+    ddr = 2*coef[2, 2]
+    M = b.shape[0]
+    b[0] = u
+    b[1] = du*H
+    bmax = max(abs(b[0]), abs(b[1]))
+    m = M
+    for k in range(M-2):
+        bk2 = b[k-2] if k > 1 else 0.
+        bk1 = b[k-1] if k > 0 else 0.
+        b[k+2] = -((k*dp+q)*(k+1)*b[k+1]*H
+                   + (k*(k-1)/2*ddp+k*dq+r)*b[k]*H*H
+                   + dr*bk1*H**3 + ddr/2*bk2*H**4) / (p*(k+2)*(k+1))
+        bmax = max(bmax, abs(b[k+2]))
+        if k > 2 and abs(b[k+2])+abs(b[k+1])+abs(b[k]) < 1e-18*bmax:
+            m = k+3
+            break
+    return m
@@ -0,0 +1,193 @@
+r"""
+Module for running parameter sweeps in a pool of processes.
+
+Many problems are solved for a large number of independent cases, like
+different Reynolds numbers or wavenumbers. Such sweeps are embarrassingly
+parallel, and may be run in a pool of worker processes with
+:func:`parameter_sweep`. The bases, spaces, matrices and solvers that are
+needed by all cases are sent once to each worker, either directly (they are
+picklable, and plan their transforms again on unpickling), or through a
+:class:`Descriptor` that describes how to create them. Each worker creates
+the setup only once and reuses it for all the cases it is given.
+
+Example
+-------
+>>> import numpy as np
+>>> from shenfun import Basis, TestFunction, TrialFunction, inner, \
+...     div, grad, Function, Array
+>>> from shenfun.legendre.la import Helmholtz
+>>> from shenfun.utilities.sweep import Descriptor, parameter_sweep
+>>> def setup(N):
+...     SD = Basis(N, 'L', bc=(0, 0))
+...     u = TrialFunction(SD)
+...     v = TestFunction(SD)
+...     return SD, inner(v, -div(grad(u))), inner(v, u)
+>>> def solve(alpha, setup):
+...     SD, A, B = setup
+...     f_hat = inner(TestFunction(SD), Array(SD, val=1))
+...     u_hat = Helmholtz(A, B, 1, alpha)(Function(SD), f_hat)
+...     return u_hat[0]
+>>> u0 = parameter_sweep(solve, np.linspace(0, 1, 10), Descriptor(setup, 24),
+...                      max_workers=0)
+>>> u0.shape
+(10,)
+
+With ``max_workers=0`` the cases are run in the calling process. The
+functions must be defined on module level for the process pool to be able
+to pickle them.
+
+"""
+import os
+import functools
+import itertools
+import numpy as np
+
+__all__ = ('Descriptor', 'parameter_sweep')
+
+# Objects created from Descriptors in this process
+_created = {}
+
+# Setup of the cases run by this (worker) process
+_worker_setup = [None]
+
+
+class Descriptor(object):
+    """Picklable description of an object that is created on demand
+
+    The object is created by calling ``func(*args, **kwargs)``, where any
+    Descriptor among the arguments is created first. The object is created
+    only once in each process, and later calls return the same object, also
+    for copies of the Descriptor that have been pickled and sent to another
+    process.
+
+    Parameters
+    ----------
+    func : callable
+        Picklable (module level) function or class that creates the object
+    args : positional arguments to func
+    kwargs : keyword arguments to func
+
+    Example
+    -------
+    >>> from mpi4py import MPI
+    >>> from shenfun import Basis, TensorProductSpace
+    >>> from shenfun.utilities.sweep import Descriptor
+    >>> def space(N):
+    ...     return TensorProductSpace(MPI.COMM_SELF, (Basis(N, 'C', bc=(0, 0)),
+    ...                                               Basis(N, 'F', dtype='d')))
+    >>> T = Descriptor(space, 16)
+    >>> T() is T()
+    True
+    """
+    _count = itertools.count()
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = (os.getpid(), next(Descriptor._count))
+
+    def __call__(self):
+        if self.key not in _created:
+            args = create(self.args)
+            kwargs = create(self.kwargs)
+            _created[self.key] = self.func(*args, **kwargs)
+        return _created[self.key]
+
+
+def create(obj):
+    """Return obj with all :class:`Descriptor` in it replaced by their objects
+
+    Parameters
+    ----------
+    obj : Descriptor, or list, tuple or dict possibly containing Descriptors
+    """
+    if isinstance(obj, Descriptor):
+        return obj()
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(create(o) for o in obj)
+    if isinstance(obj, dict):
+        return {key: create(val) for key, val in obj.items()}
+    return obj
+
+
+def _init_worker(setup):
+    _worker_setup[0] = create(setup)
+
+def _run_case(func, has_setup, case):
+    if has_setup:
+        return func(case, _worker_setup[0])
+    return func(case)
+
+def _gather(results):
+    if results and isinstance(results[0], tuple):
+        return tuple(np.array(r) for r in zip(*results))
+    return np.array(results)
+
+
+def parameter_sweep(func, cases, setup=None, max_workers=None, chunksize=1,
+                    mp_context='spawn'):
+    """Return the results of ``func`` for all cases, computed by a pool of
+    processes
+
+    Parameters
+    ----------
+    func : callable
+        Picklable (module level) function called as ``func(case, setup)``,
+        or as ``func(case)`` if setup is None. Returns a number, an array, or
+        a tuple of numbers and arrays.
+    cases : iterable
+        The cases (parameters) of the sweep. Must be picklable.
+    setup : object, optional
+        Picklable object shared by all cases, for example the spaces and
+        solvers of the problem, or a :class:`Descriptor` (or a list, tuple
+        or dict of Descriptors) that describes how to create them. The setup
+        is sent to, and created in, each worker process only once.
+    max_workers : int or None, optional
+        Number of worker processes. Defaults to the number of processors.
+        If 0, then all cases are run in the calling process.
+    chunksize : int, optional
+        Number of cases sent to a worker at the time
+    mp_context : str, optional
+        The multiprocessing start method, 'spawn', 'fork' or 'forkserver'.
+        Defaults to 'spawn', since forking a process that has initialized
+        MPI, or started threads, may deadlock.
+
+    Returns
+    -------
+    array or tuple of arrays
+        The results of all cases, stacked along the first axis, in the order
+        of ``cases``. If func returns a tuple, then each item of the tuple is
+        stacked into one array.
+
+    Note
+    ----
+    Spaces are unpickled on ``MPI.COMM_SELF``, so each worker computes a
+    case serially. The process pool is meant for jobs that are not started
+    with mpirun, where the spawned workers cannot initialize MPI. Within an
+    MPI job, distribute the cases over the processors instead, see, e.g.,
+    :func:`.eigen_sweep`.
+    """
+    cases = list(cases)
+    has_setup = setup is not None
+    if max_workers == 0:
+        created = set(_created)
+        try:
+            _init_worker(setup)
+            results = [_run_case(func, has_setup, case) for case in cases]
+        finally:
+            # Release the objects created for this sweep
+            for key in set(_created) - created:
+                del _created[key]
+            _worker_setup[0] = None
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if isinstance(mp_context, str):
+            mp_context = multiprocessing.get_context(mp_context)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                 initializer=_init_worker,
+                                 initargs=(setup,)) as pool:
+            results = list(pool.map(functools.partial(_run_case, func, has_setup),
+                                    cases, chunksize=chunksize))
+    return _gather(results)
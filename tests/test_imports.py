@@ -0,0 +1,27 @@
+import sys
+import subprocess
+
+def test_lazy_imports():
+    # A Fourier-only job should not import the other families, sympy or io
+    code = """
+import sys
+from shenfun import Basis, TensorProductSpace, Array, TestFunction, TrialFunction, inner, comm
+T = TensorProductSpace(comm, (Basis(8, 'F', dtype='D'), Basis(8, 'F', dtype='d')))
+u = Array(T)
+u_hat = u.forward()
+A = inner(TestFunction(T), TrialFunction(T))
+lazy = ('sympy', 'scipy.sparse', 'shenfun.chebyshev', 'shenfun.legendre',
+        'shenfun.jacobi', 'shenfun.la', 'shenfun.io', 'shenfun.utilities.integrators')
+print(','.join(m for m in lazy if m in sys.modules))
+"""
+    out = subprocess.check_output([sys.executable, '-c', code]).decode()
+    assert out.strip() == ''
+
+def test_lazy_attributes():
+    import shenfun
+    from shenfun import chebyshev, ETDRK4, HDF5File
+    assert shenfun.chebyshev is chebyshev
+    assert shenfun.ETDRK4 is ETDRK4
+    assert 'legendre' in shenfun.__all__
+    assert 'la' in dir(shenfun)
+    assert shenfun.la.TDMA is not None
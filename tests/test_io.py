@@ -45,6 +45,32 @@ def test_regular_2D(backend, forward_output):
     read.read(u0, 'u', forward_output=forward_output, step=1)
     assert np.allclose(u0, u)
 
+@pytest.mark.parametrize('forward_output', (True, False))
+@pytest.mark.parametrize('backend', ('hdf5', 'netcdf4'))
+def test_single_precision_2D(backend, forward_output):
+    if (backend == 'netcdf4' and forward_output is True) or skip[backend]:
+        return
+    K0 = Basis(N[0], 'F', dtype='D')
+    K1 = Basis(N[1], 'F', dtype='f')
+    T = TensorProductSpace(comm, (K0, K1), dtype='f')
+    filename = 'test2Ds_{}'.format(ex[forward_output])
+    hfile = writer(filename, T, backend=backend)
+    u = Function(T) if forward_output else Array(T)
+    u[:] = np.random.random(u.shape)
+    hfile.write(0, {'u': [u]}, forward_output=forward_output)
+    hfile.open('r')
+    if backend == 'hdf5':
+        assert hfile.f['u/2D/0'].dtype == u.dtype
+    else:
+        assert hfile.f.variables['u'].dtype == u.dtype
+    hfile.close()
+
+    u0 = Function(T) if forward_output else Array(T)
+    read = reader(filename, T, backend=backend)
+    read.read(u0, 'u', forward_output=forward_output, step=0)
+    assert u0.dtype == u.dtype
+    assert np.array_equal(u0, u)
+
 @pytest.mark.parametrize('forward_output', (True, False))
 @pytest.mark.parametrize('backend', ('hdf5', 'netcdf4'))
 @pytest.mark.parametrize('as_scalar', (True, False))
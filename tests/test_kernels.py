@@ -0,0 +1,108 @@
+import time
+import json
+import pytest
+import numpy as np
+from shenfun.optimization import kernels, Kernel, set_kernel_backend, \
+    register_variant, clear_kernel_cache, optimized_module, is_double
+from shenfun.la import TDMA
+
+def slow_add(a, b):
+    time.sleep(0.01)
+    a += b
+
+def fast_add(a, b):
+    a += b
+
+def wrong_add(a, b):
+    a -= b
+
+def failing_add(a, b):
+    raise TypeError('unsupported')
+
+def test_kernel_autotune(monkeypatch, tmpdir):
+    filename = str(tmpdir.join('kernels.json'))
+    monkeypatch.setenv('SHENFUN_OPTIMIZATION', 'autotune')
+    monkeypatch.setenv('SHENFUN_KERNELS_CACHE', filename)
+    monkeypatch.setenv('SHENFUN_KERNELS_REPEATS', '1')
+    clear_kernel_cache()
+    kernel = Kernel(slow_add, name='test_add')
+    kernel.add_variant('fast', fast_add)
+    kernels[kernel.name] = kernel
+    try:
+        a = np.zeros((4, 5))
+        kernel(a, 1)
+        # Benchmarking works on copies, so a is only modified once
+        assert np.allclose(a, 1)
+        key = kernel.key((a, 1), {})
+        assert key == 'test_add|3x3|d'
+        assert kernel.tuned[key] is fast_add
+        with open(filename) as f:
+            assert json.load(f)[key] == 'fast'
+
+        # Winner is read from disk cache without tuning
+        clear_kernel_cache()
+        kernel.variants['fast'] = lambda a, b: None
+        kernel(a, 1)
+        assert np.allclose(a, 1)
+
+        # Override
+        set_kernel_backend('test_add', 'python')
+        kernel(a, 1)
+        assert np.allclose(a, 2)
+        set_kernel_backend('test_add', None)
+        assert kernel.fixed is None
+
+        # Variants with a wrong result, or that fail, never win
+        kernel.add_variant('fast', fast_add)
+        kernel.add_variant('wrong', wrong_add)
+        kernel.add_variant('failing', failing_add)
+        with pytest.warns(RuntimeWarning) as record:
+            timings = kernel.benchmark(a, 1)
+        assert sorted(timings) == ['fast', 'python']
+        messages = ' '.join(str(r.message) for r in record)
+        assert 'variant wrong skipped' in messages
+        assert 'variant failing skipped' in messages
+        assert np.allclose(a, 2)
+    finally:
+        kernels.pop(kernel.name)
+        clear_kernel_cache()
+
+def test_kernel_override(monkeypatch):
+    kernel = TDMA.TDMA_SymSolve.kernel
+    assert kernel.shortname == 'TDMA_SymSolve'
+    monkeypatch.setenv('SHENFUN_KERNELS', 'TDMA_SymSolve=python')
+    kernel.reset()
+    assert kernel.fixed is kernel.func
+    monkeypatch.delenv('SHENFUN_KERNELS')
+    kernel.reset()
+    register_variant('shenfun.la.TDMA.TDMA_SymSolve', 'test', fast_add)
+    assert 'test' in kernel.variants
+    kernel.variants.pop('test')
+
+def test_single_precision_dispatch():
+    pytest.importorskip('numba')
+    N = 12
+    d = np.random.random(N)+2
+    a = np.random.random(N-2)
+    b = np.random.random((N, 4))
+    x = []
+    for dtype in ('d', 'f'):
+        u = b.astype(dtype)
+        set_kernel_backend('TDMA_SymSolve', 'cython')
+        TDMA.TDMA_SymSolve(d, a, a, u, 0)
+        set_kernel_backend('TDMA_SymSolve', None)
+        x.append(u)
+    assert x[1].dtype == np.float32
+    assert np.allclose(x[0], x[1], rtol=1e-4)
+    la = optimized_module('la')
+    x = []
+    for dtype in ('D', 'F'):
+        u = (b+1j*b).astype(dtype)
+        la.TDMA_SymSolve(d, a, a, u, 0)
+        x.append(u)
+    assert np.allclose(x[0], x[1], rtol=1e-4)
+    assert is_double((d, a, x[0]), {})
+    assert not is_double((d, a), {'u': x[1]})
+
+if __name__ == '__main__':
+    pytest.main([__file__])
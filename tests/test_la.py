@@ -2,8 +2,10 @@ import numpy as np
 from scipy.linalg import solve
 import pytest
 from shenfun.chebyshev.la import PDMA
+from shenfun.chebyshev import la
+from shenfun.optimization import set_num_threads, get_num_threads
 from shenfun import inner, TestFunction, TrialFunction, div, grad, \
-    SparseMatrix, Basis, Function, Array
+    Dx, SparseMatrix, Basis, Function, Array, TensorProductSpace
 np.warnings.filterwarnings('ignore')
 
 N = 32
@@ -60,6 +62,291 @@ def test_solve(quad):
     ww = B.solve(bb, ww, axis=1)
     assert np.all(abs(ww-u_hat[:-2].repeat(N-2).reshape((N-2, N-2)).transpose()) < 1e-8)
 
+@pytest.mark.parametrize('axis', (0, 1, 2))
+@pytest.mark.parametrize('bc', ((0, 0), 'Biharmonic'))
+def test_threads(bc, axis):
+    from mpi4py import MPI
+    axes = {0: (0, 1, 2), 1: (1, 0, 2), 2: (2, 0, 1)}[axis]
+    N = (14, 16, 18)
+    bases = [0]*3
+    bases[axes[0]] = Basis(N[axes[0]], 'C', bc=bc)
+    bases[axes[1]] = Basis(N[axes[1]], 'F', dtype='D')
+    bases[axes[2]] = Basis(N[axes[2]], 'F', dtype='d')
+    T = TensorProductSpace(MPI.COMM_WORLD, bases, axes=axes)
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    if bc == 'Biharmonic':
+        H = la.Biharmonic(*inner(v, div(grad(div(grad(u))))))
+    else:
+        H = la.Helmholtz(*inner(v, div(grad(u))))
+    B = inner(v, u)
+    u_hat = Function(T)
+    s = bases[axes[0]].sl[bases[axes[0]].slice()]
+    u_hat[s] = np.random.random(u_hat[s].shape) + 1j*np.random.random(u_hat[s].shape)
+    nthreads = get_num_threads()
+    results = []
+    for n in (1, 3):
+        set_num_threads(n)
+        f_hat = H.matvec(u_hat, Function(T))
+        g_hat = H(Function(T), f_hat)
+        b_hat = B.solve(f_hat.copy())
+        results.append((f_hat, g_hat, b_hat))
+    set_num_threads(nthreads)
+    for a, b in zip(*results):
+        assert np.allclose(a, b)
+    T.destroy()
+
+def test_num_threads_without_cython(monkeypatch):
+    import sys
+    from shenfun import optimization
+    monkeypatch.setitem(sys.modules, 'shenfun.optimization.cython', None)
+    set_num_threads(2)
+    assert get_num_threads() == 1
+    assert optimization.openmp_enabled() is False
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+@pytest.mark.parametrize('bc', ((0, 0), 'Biharmonic'))
+def test_single_precision(bc, family):
+    from mpi4py import MPI
+    from shenfun import chebyshev, legendre
+    mod = {'C': chebyshev.la, 'L': legendre.la}[family]
+    results = []
+    for dtype in ('d', 'f'):
+        bases = (Basis(14, family, bc=bc), Basis(16, 'F', dtype=dtype.upper()),
+                 Basis(18, 'F', dtype=dtype))
+        T = TensorProductSpace(MPI.COMM_WORLD, bases, dtype=dtype)
+        u = TrialFunction(T)
+        v = TestFunction(T)
+        if bc == 'Biharmonic':
+            H = mod.Biharmonic(*inner(v, div(grad(div(grad(u))))))
+        else:
+            H = mod.Helmholtz(*inner(v, div(grad(u))))
+        B = inner(v, u)
+        np.random.seed(1)
+        u_hat = Function(T)
+        s = bases[0].sl[bases[0].slice()]
+        u_hat[s] = np.random.random(u_hat[s].shape) + 1j*np.random.random(u_hat[s].shape)
+        f_hat = H.matvec(u_hat, Function(T))
+        g_hat = H(Function(T), f_hat)
+        b_hat = B.solve(f_hat.copy())
+        for a in (f_hat, g_hat, b_hat):
+            assert a.dtype == T.forward.output_array.dtype
+        results.append((f_hat, g_hat, b_hat))
+        T.destroy()
+    for a, b in zip(*results):
+        assert np.linalg.norm(a-b) < 1e-5*np.linalg.norm(a)
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+@pytest.mark.parametrize('bases', (('D', 'F'), ('D', 'D'), ('D', 'F', 'F')))
+def test_krylov(bases, family):
+    from mpi4py import MPI
+    import inspect
+    from scipy.sparse.linalg import gmres
+    from shenfun import VectorTensorProductSpace
+    from shenfun.la import LinearOperator, CG, GMRES, BiCGStab
+    sizes = (12, 14, 10)
+    B = [Basis(sizes[i], family, bc=(0, 0)) if b == 'D' else
+         Basis(sizes[i], 'F', dtype='d' if i == len(bases)-1 else 'D')
+         for i, b in enumerate(bases)]
+    T = TensorProductSpace(MPI.COMM_WORLD, B)
+    spaces = [T]
+    if len(bases) == 3:
+        spaces.append(VectorTensorProductSpace(T))
+    for space in spaces:
+        u = TrialFunction(space)
+        v = TestFunction(space)
+        A = LinearOperator(inner(v, u-div(grad(u))))
+        np.random.seed(1)
+        u_hat = Function(space)
+        u_hat[:] = np.random.random(u_hat.shape)
+        u_hat = u_hat.backward().forward()
+        b = A.matvec(u_hat, Function(space))
+        solvers = [GMRES(A, tol=1e-12), BiCGStab(A, tol=1e-12)]
+        if family == 'L':
+            solvers.append(CG(A, tol=1e-12))
+        for sol in solvers:
+            x = sol(b, Function(space))
+            assert sol.residual < 1e-10
+            assert np.allclose(A.matvec(x, Function(space)), b)
+            assert np.allclose(x, u_hat)
+        if MPI.COMM_WORLD.Get_size() == 1:
+            # The relative tolerance was renamed from tol to rtol in scipy 1.12
+            rtol = 'rtol' if 'rtol' in inspect.signature(gmres).parameters else 'tol'
+            x, info = gmres(A, b.ravel(), atol=0, restart=100, **{rtol: 1e-12})
+            assert info == 0
+            assert np.allclose(x.reshape(u_hat.shape), u_hat)
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+@pytest.mark.parametrize('bases', (('D', 'F'), ('D', 'D')))
+def test_preconditioners(bases, family):
+    from mpi4py import MPI
+    from shenfun import VectorTensorProductSpace
+    from shenfun.la import LinearOperator, GMRES, FastDiagonalization, \
+        PMultigrid
+    if bases[1] == 'D' and MPI.COMM_WORLD.Get_size() > 1:
+        # Both non-periodic axes cannot be aligned
+        T = TensorProductSpace(MPI.COMM_WORLD, [Basis(8, family, bc=(0, 0))]*2)
+        u = TrialFunction(T)
+        with pytest.raises(NotImplementedError):
+            FastDiagonalization(inner(TestFunction(T), div(grad(u))))
+        T.destroy()
+        return
+    iterations = []
+    for N in (16, 32, 64):
+        B = [Basis(N, family, bc=(0, 0)) if b == 'D' else Basis(8, 'F', dtype='d')
+             for b in bases]
+        T = TensorProductSpace(MPI.COMM_WORLD, B)
+        u = TrialFunction(T)
+        v = TestFunction(T)
+        helmholtz = inner(v, u-div(grad(u)))
+        A = LinearOperator(inner(v, u-div(grad(u))+10*Dx(u, 0, 1)))
+        np.random.seed(1)
+        u_hat = Function(T)
+        u_hat[:] = np.random.random(u_hat.shape)
+        u_hat = u_hat.backward().forward()
+        b = A.matvec(u_hat, Function(T))
+
+        # Exact for separable forms
+        FD = FastDiagonalization(helmholtz)
+        bh = LinearOperator(helmholtz).matvec(u_hat, Function(T))
+        assert np.allclose(FD(bh, Function(T)), u_hat)
+        with pytest.raises(NotImplementedError):
+            FastDiagonalization(A)
+
+        smoother = 'jacobi'
+        if bases[1] == 'D':
+            smoother = lambda mats: FastDiagonalization(mats, approximate=True)
+        its = []
+        for M in (FastDiagonalization(A, approximate=True),
+                  PMultigrid(A, smoother=smoother)):
+            sol = GMRES(A, M=M, tol=1e-10, restart=50)
+            x = sol(b, Function(T))
+            assert np.allclose(x, u_hat)
+            its.append(sol.iterations)
+        iterations.append(its)
+        if N < 64:
+            T.destroy()
+    iterations = np.array(iterations)
+    assert np.all(iterations.max(axis=0) <= iterations.min(axis=0)+4)
+
+    # Block diagonal preconditioner for vector form
+    TV = VectorTensorProductSpace(T)
+    u = TrialFunction(TV)
+    v = TestFunction(TV)
+    A = LinearOperator(inner(v, u-div(grad(u))))
+    u_hat = Function(TV)
+    u_hat[:] = np.random.random(u_hat.shape)
+    u_hat = u_hat.backward().forward()
+    b = A.matvec(u_hat, Function(TV))
+    for M in (FastDiagonalization(A), PMultigrid(A, levels=2)):
+        sol = GMRES(A, M=M, tol=1e-12)
+        x = sol(b, Function(TV))
+        assert np.allclose(x, u_hat)
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_eigen(family):
+    import sympy as sp
+    from mpi4py import MPI
+    from shenfun.la import EigenSolver, eigen_sweep
+    SD = Basis(32, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    A = inner(v, -div(grad(u)))
+    B = inner(v, u)
+    E = EigenSolver(A, B, k=3, sigma=1)
+    lmbda = E()
+    assert np.allclose(lmbda.real, (np.pi/2)**2*np.array([1, 4, 9]))
+    # Only the most recent factorization is kept, and reused without assembly
+    lu = E._lu[-1]
+    E.assemble = None
+    assert np.allclose(E(), lmbda)
+    assert E._lu[-1] is lu
+    del E.assemble
+    assert np.allclose(E(sigma=2).real, lmbda.real)
+    assert E._lu[0] == (None, 2) and E._lu[-1] is not lu
+    lmbda, V = EigenSolver(A, B, k=None)(return_eigenvectors=True)
+    assert np.allclose(lmbda[:3].real, (np.pi/2)**2*np.array([1, 4, 9]))
+    A, B = [sum(m.diags().toarray() for m in (M if isinstance(M, list) else [M]))
+            for M in (A, B)]
+    assert np.allclose(A.dot(V), B.dot(V)*lmbda)
+
+    # Orr-Sommerfeld for plane Poiseuille flow
+    x, y = sp.symbols('x,y')
+    def orr_sommerfeld(alfa, Re):
+        SB = Basis(64, family, bc='Biharmonic')
+        u = TrialFunction(SB)
+        v = TestFunction(SB)
+        L = lambda: div(grad(u)) - alfa**2*u
+        A = inner(v, div(grad(L())) - alfa**2*L() - 1j*alfa*Re*((1-x**2)*L() + 2*u))
+        B = inner(v, -1j*alfa*Re*L())
+        return A, B
+    c = eigen_sweep(orr_sommerfeld, [(1., 10000.), (1.02056, 5772.22)], k=2,
+                    sigma=0.25+0.001j)
+    assert abs(c[0][0]-(0.23752649+0.00373967j)) < 1e-7
+    assert abs(c[1][0].imag) < 1e-6
+
+    # Batch over the wavenumbers of a tensor product space
+    SB = Basis(64, family, bc='Biharmonic')
+    F = Basis(8, 'F', dtype='D')
+    T = TensorProductSpace(MPI.COMM_WORLD, (SB, F))
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    Re = 10000.
+    lap = lambda: div(grad(u))
+    A = inner(v, (1/Re)*div(grad(lap())) - (1-x**2)*Dx(lap(), 1, 1) - 2*Dx(u, 1, 1))
+    B = inner(v, lap())
+    lmbda = EigenSolver(A, B, k=2, sigma=0.0037-0.2375j).sweep()
+    assert lmbda.shape == (2, T.shape(True)[1])
+    s = T.local_slice(True)[1]
+    if s.start <= 1 < s.stop:
+        assert abs(lmbda[0, 1-s.start]-(0.00373967-0.23752649j)) < 1e-7
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+@pytest.mark.parametrize('bases', (('E', 'D'), ('E', 'D', 'F')))
+def test_ensemble(bases, family):
+    from mpi4py import MPI
+    import sympy as sp
+    from shenfun import legendre
+    x, y, z = sp.symbols('x,y,z')
+    M = 6
+    values = np.linspace(1, 2, M)
+    B0 = {'E': lambda: Basis(M, 'E', values=values),
+          'D': lambda: Basis(20, family, bc=(0, 0)),
+          'F': lambda: Basis(8, 'F', dtype='d')}
+    T = TensorProductSpace(MPI.COMM_WORLD, [B0[b]() for b in bases])
+    assert 0 not in np.hstack(T.axes)
+    E = Basis(M, 'E', values=values[::-1])
+    assert np.allclose(E.eval(values[[4, 0]], np.arange(M)), [1, 5])
+    with pytest.raises(ValueError):
+        E.eval(1.05, np.arange(M))
+    with pytest.raises(TypeError):
+        Basis(M, 'E', values=values, scale=2)
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    ue = (1-y**2)*(1+x*y)*(sp.cos(2*z) if len(bases) == 3 else 1)
+    ua = Array(T, buffer=ue)
+    u_hat = ua.forward()
+    assert np.allclose(u_hat.backward(), ua)
+    solver = la if family == 'C' else legendre.la
+    H = solver.Helmholtz(*inner(v, x*u - div(grad(u))))
+    f_hat = inner(v, Array(T, buffer=x*ue - ue.diff(y, 2) - ue.diff(z, 2)))
+    u_hat = H(Function(T), f_hat)
+    assert np.allclose(u_hat.backward(), ua)
+
+    # Compare with the solution of each member
+    if len(bases) == 2:
+        SD = Basis(20, family, bc=(0, 0))
+        u1 = TrialFunction(SD)
+        v1 = TestFunction(SD)
+        for j, m in enumerate(values[T.local_slice(True)[0]]):
+            H1 = solver.Helmholtz(*inner(v1, float(m)*u1 - div(grad(u1))))
+            b = Function(SD, buffer=f_hat[j])
+            assert np.allclose(H1(Function(SD), b), u_hat[j])
+    T.destroy()
+
 if __name__ == "__main__":
     #test_solve('GC')
     test_PDMA('GC')
@@ -49,7 +49,7 @@ lquads = ('LG', 'GL')
 lagquads = ('LG',)
 hquads = ('HG',)
 jquads = ('JG',)
-formats = ('dia', 'cython', 'python', 'self')
+formats = ('dia', 'cython', 'python', 'self', 'banded')
 
 N = 12
 k = np.arange(N).astype(float)
@@ -578,6 +578,253 @@ def test_biharmonic2D(family, axis):
     assert np.linalg.norm(f-(g0+g1+g2)) < 1e-8
 
 
+@pytest.mark.parametrize('family', ('C', 'L', 'La', 'H', 'J'))
+@pytest.mark.parametrize('bc', (None, (0, 0), 'Neumann', 'Biharmonic'))
+@pytest.mark.parametrize('k', ((0, 0), (0, 1), (0, 2), (1, 1)))
+def test_banded_matrix(family, bc, k):
+    import sympy as sp
+    x = sp.Symbol('x')
+    N = 16
+    supported = {'La': (None, (0, 0)), 'H': (None,), 'J': (None, (0, 0), 'Biharmonic')}
+    if bc not in supported.get(family, (bc,)):
+        return
+    if bc is None:
+        B = Basis(N, family)
+    elif bc == 'Neumann':
+        B = Basis(N, family, bc='Neumann')
+    elif bc == 'Biharmonic':
+        B = Basis(N, family, bc='Biharmonic')
+    else:
+        B = Basis(N, family, bc=bc)
+    if family == 'C' and k[0] > 0:
+        return
+    # Polynomial coefficients for the Laguerre and Hermite functions
+    measures = (x, x**2) if family in ('La', 'H') else (1+x**2, sp.exp(x))
+    for f in measures:
+        mat = inner_product((B, k[0]), (B, k[1]), measure=f)
+        assert isinstance(mat, shenfun.SpectralMatrix)
+        # Reference computed with an overresolved dense quadrature
+        xj, wj = B.points_and_weights(3*N)
+        V = B.evaluate_basis_derivative_all(xj, k[0])[:, :B.dim()]
+        U = B.evaluate_basis_derivative_all(xj, k[1])[:, :B.dim()]
+        fj = sp.lambdify(x, f)(xj)
+        D = (V*(wj*fj)[:, None]).T.dot(U)
+        A = np.zeros_like(D)
+        for key, val in mat.items():
+            A += np.diag(np.broadcast_to(val, (A.diagonal(key).shape[0],)), key)
+        assert np.allclose(A, D, atol=1e-10*abs(D).max())
+        uh = np.random.random(B.dim())
+        c = mat.matvec(uh, np.zeros_like(uh))
+        s = slice(1, None) if bc == 'Neumann' else slice(None) # constant mode neglected
+        assert np.allclose(c[s], D[s].dot(uh), atol=1e-8*abs(D).max())
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_variable_coefficients(family):
+    import sympy as sp
+    from shenfun.la import LinearOperator
+    x, y = sp.symbols('x,y')
+    D0 = Basis(12, family, bc=(0, 0))
+    D1 = Basis(12, family, bc=(0, 0))
+    F1 = Basis(8, 'F', dtype='d')
+    ue = (1-x**2)*(1-y**2)*(1+x*y)
+    ve = (1-x**2)*(1+x*sp.sin(y))
+    for T, f, mtype, uj in ((TensorProductSpace(MPI.COMM_WORLD, (D0, D1)), (1+x)*(2+y**2), shenfun.TPMatrix, ue),
+                            (TensorProductSpace(MPI.COMM_WORLD, (D0, D1)), 2+x*y**2, shenfun.CoefficientOperator, ue),
+                            (TensorProductSpace(MPI.COMM_WORLD, (D0, F1)), 2+x*sp.cos(y), shenfun.CoefficientOperator, ve)):
+        u = TrialFunction(T)
+        v = TestFunction(T)
+        mats = inner(v, f*shenfun.Dx(u, 0, 1) + u)
+        assert any(isinstance(m, mtype) for m in mats)
+        uh = shenfun.Array(T, buffer=uj).forward()
+        c = LinearOperator(mats).matvec(uh, Function(T))
+        X = T.local_mesh(True)
+        fa = sp.lambdify((x, y), f)(*X)
+        du = shenfun.project(shenfun.Dx(uh, 0, 1), T.get_orthogonal()).backward()
+        ref = inner(v, shenfun.Array(T, buffer=fa*du + uh.backward()))
+        assert np.allclose(c, ref, atol=1e-10)
+        T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_product_rule(family):
+    import sympy as sp
+    from shenfun.la import LinearOperator
+    x, y = sp.symbols('x,y')
+    SD = Basis(12, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    def dense(mats):
+        mats = mats if isinstance(mats, list) else [mats]
+        return sum(m.diags().toarray() for m in mats)
+    A = inner(v, shenfun.Dx(x*u, 0, 1))
+    B = inner(v, u + x*shenfun.Dx(u, 0, 1))
+    assert np.allclose(dense(A), dense(B))
+    assert not np.allclose(dense(A), dense(inner(v, x*shenfun.Dx(u, 0, 1))))
+    A = inner(v, shenfun.Dx((1+x**2)*shenfun.Dx(u, 0, 1), 0, 1))
+    B = inner(v, 2*x*shenfun.Dx(u, 0, 1) + (1+x**2)*shenfun.Dx(u, 0, 2))
+    assert np.allclose(dense(A), dense(B))
+    T = TensorProductSpace(MPI.COMM_WORLD, (Basis(12, family, bc=(0, 0)),
+                                            Basis(12, family, bc=(0, 0))))
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    A = inner(v, div((1+x)*grad(u)))
+    B = inner(v, shenfun.Dx(u, 0, 1) + (1+x)*div(grad(u)))
+    uh = Function(T)
+    uh[:4, :4] = np.random.random(uh[:4, :4].shape)
+    assert np.allclose(LinearOperator(A).matvec(uh, Function(T)),
+                       LinearOperator(B).matvec(uh, Function(T)))
+    T.destroy()
+
+
+@pytest.mark.parametrize('family', ('chebyshev', 'legendre'))
+@pytest.mark.parametrize('dtype', ('d', 'D'))
+def test_banded(family, dtype):
+    SD = Basis(N, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    M = N-2
+    for mat in (inner(v, u), inner(v, div(grad(u))), inner(v, shenfun.Dx(u, 0, 1))):
+        A = SparseMatrix(dict(mat), mat.shape, scale=1.5)
+        D = A.diags('csr').toarray()
+        ab, kl, ku = A.banded()
+        assert ab.shape == (kl+ku+1, M)
+        for shape, axis in (((M,), 0), ((M, 3), 0), ((3, M), 1), ((2, M, 3), 1), ((2, 3, M), 2)):
+            x = np.random.random(shape).astype(dtype)
+            if dtype == 'D':
+                x.imag = np.random.random(shape)
+            b = np.zeros_like(x)
+            b = A.matvec(x, b, format='banded', axis=axis)
+            ref = np.moveaxis(np.tensordot(D, np.moveaxis(x, axis, 0), axes=1), 0, axis)
+            assert np.allclose(b, ref)
+            y = A.solve(b.copy(), axis=axis)
+            assert np.allclose(y, x)
+
+
+@pytest.mark.parametrize('family', ('chebyshev', 'legendre'))
+def test_banded_cache(family):
+    SD = Basis(N, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    A = SparseMatrix(dict(inner(v, u)), (N-2, N-2))
+    x = np.random.random(N-2)
+    b = A.matvec(x, np.zeros_like(x), format='banded')
+    assert np.allclose(A.solve(b.copy()), x)
+    for mod in (lambda A: A[0].__setitem__(slice(None), 1.5*A[0]),
+                lambda A: A[2].__imul__(0.5),
+                lambda A: A.__imul__(2)):
+        mod(A)
+        D = SparseMatrix(dict(A), A.shape, A.scale).diags('csr').toarray()
+        for format in ('banded', 'csr', 'dia', 'python'):
+            b = A.matvec(x, np.zeros_like(x), format=format)
+            assert np.allclose(b, D.dot(x))
+        assert np.allclose(A.solve(D.dot(x)), x)
+
+
+@pytest.mark.parametrize('family', ('chebyshev', 'legendre'))
+def test_matrixsum(family):
+    SD = Basis(N, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    B = inner(v, u)
+    A = inner(v, div(grad(u)))
+    Bd = B.diags('csr').toarray()
+    Ad = A.diags('csr').toarray()
+    x = np.random.random((N-2, 3))
+    for dt in (0.1, 0.2):
+        H = B - dt*shenfun.MatrixSum((A,))
+        assert isinstance(H, shenfun.MatrixSum)
+        Hd = Bd-dt*Ad
+        assert np.allclose(H.diags('csr').toarray(), Hd)
+        assert np.allclose(H.matvec(x, np.zeros_like(x)), Hd.dot(x))
+        assert np.allclose(H.solve(Hd.dot(x)), x)
+    # Coefficients may be modified, and matrices are left untouched
+    H.coefficients[1] = -0.3
+    assert np.allclose(H.diags('csr').toarray(), Bd-0.3*Ad)
+    assert H.evaluate() is H.evaluate()
+    assert np.allclose(B.diags('csr').toarray(), Bd)
+    assert np.allclose((2*B+A).diags('csr').toarray(), 2*Bd+Ad)
+    C = 3*B
+    C -= A
+    assert np.allclose(C.diags('csr').toarray(), 3*Bd-Ad)
+
+    F1 = Basis(8, 'F', dtype='d')
+    T = TensorProductSpace(MPI.COMM_WORLD, (Basis(N, family, bc=(0, 0)), F1))
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    M = inner(v, u)
+    L = inner(v, div(grad(u)))
+    S = M - 0.1*shenfun.MatrixSum(L)
+    mats = S.evaluate()
+    assert len(mats) == 2
+    uh = Function(T)
+    uh[:] = np.random.random(uh.shape)
+    c0 = S.matvec(uh, Function(T))
+    c1 = M.matvec(uh, Function(T))
+    for m in L:
+        c1 -= 0.1*m.matvec(uh, Function(T))
+    assert np.allclose(c0, c1)
+    T.destroy()
+
+
+@pytest.mark.parametrize('family', ('chebyshev', 'legendre'))
+def test_copy_on_write(family):
+    SD = Basis(N, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    A = inner(v, div(grad(u)))
+    Ad = A.diags('csr').toarray()
+    for B in (inner(v, u), SparseMatrix(dict(inner(v, u)), (N-2, N-2))):
+        Bd = B.diags('csr').toarray()
+        Bdiag = np.diag(np.diag(Bd))
+        C = B*2
+        C[0] *= 3
+        assert np.allclose(B.diags('csr').toarray(), Bd)
+        assert np.allclose(C.diags('csr').toarray(), 2*Bd+4*Bdiag)
+        B[0] *= 2
+        assert np.allclose(C.diags('csr').toarray(), 2*Bd+4*Bdiag)
+        B[0] /= 2
+        for C in (B+A, B-A, B/2, B+B, -(B*1)):
+            for key in C:
+                C[key] *= 0
+        assert np.allclose(B.diags('csr').toarray(), Bd)
+        assert np.allclose(A.diags('csr').toarray(), Ad)
+        C = B*1
+        C += A
+        C[2] += 1
+        assert np.allclose(B.diags('csr').toarray(), Bd)
+        assert np.allclose(A.diags('csr').toarray(), Ad)
+
+
+@pytest.mark.parametrize('family', ('chebyshev', 'legendre'))
+def test_matrixsum_array_scale(family):
+    SD = Basis(N, family, bc=(0, 0))
+    u = TrialFunction(SD)
+    v = TestFunction(SD)
+    s0 = np.random.random((1, 4))+1
+    s1 = np.random.random((1, 4))+1
+    B = SparseMatrix(dict(inner(v, u)), (N-2, N-2), scale=s0)
+    A = SparseMatrix(dict(inner(v, div(grad(u)))), (N-2, N-2), scale=s0)
+    Bd = SparseMatrix(dict(B), B.shape).diags('csr').toarray()
+    Ad = SparseMatrix(dict(A), A.shape).diags('csr').toarray()
+    x = np.random.random((N-2, 4))
+    ref = s0*(Bd-0.5*Ad).dot(x)
+    H = shenfun.MatrixSum((B, A), (1, -0.5))
+    assert np.allclose(H.matvec(x, np.zeros_like(x)), ref)
+    assert np.allclose(H.solve(ref.copy()), x)
+    C = B - A
+    assert isinstance(C, SparseMatrix)
+    ref = s0*(Bd-Ad).dot(x)
+    assert np.allclose(C.matvec(x, np.zeros_like(x)), ref)
+    assert np.allclose(C.solve(ref.copy()), x)
+    A.scale = s1
+    ref = s0*Bd.dot(x)-0.5*s1*Ad.dot(x)
+    assert np.allclose(H.matvec(x, np.zeros_like(x)), ref)
+    with pytest.raises(ValueError):
+        H.evaluate()
+    C = B - 0.5*A
+    assert isinstance(C, shenfun.MatrixSum)
+    assert np.allclose(C.matvec(x, np.zeros_like(x)), ref)
+
+
 if __name__ == '__main__':
     #test_mat(((lBasis[0], 0), (lBasis[1], 1)), lmatrices.CLDmat, 'LG')
     #test_cmatvec(cBasis[3], cBasis[1], 'GC', 'cython', 3, 0)
@@ -0,0 +1,231 @@
+import pytest
+import numpy as np
+from shenfun import Basis
+from shenfun.optimization.cython import Matvec, Cheb, convolve, evaluate, la
+
+nb = pytest.importorskip('numba')
+from shenfun.optimization.numba import Matvec as nMatvec, Cheb as nCheb, \
+    convolve as nconvolve, evaluate as nevaluate, la as nla
+
+# Lengths of diagonals relative to the size N of the axis. None is a scalar
+matvecs = {
+    'CDN': (0, 0),
+    'BDN': (0, 0, None),
+    'CDD': (-3, -3),
+    'SBB': (-4,),
+    'ADD': (-2,),
+    'Tridiagonal': (-2, 0, -2),
+    'Pentadiagonal': (-4, -2, 0, -2, -4),
+    'CBD': (-3, -3, -4),
+    'CDB': (-4, -2, -4),
+    'BBD': (None, -2, -2, -4)
+    }
+
+matvecs1D = {
+    'CDN': 'CDN_matvec1D_ptr',
+    'BDN': 'BDN_matvec1D_ptr',
+    'CDD': 'CDD_matvec1D_ptr',
+    'SBB': 'SBBmat_matvec',
+    'ADD': 'ADD_matvec',
+    'Tridiagonal': 'Tridiagonal_matvec',
+    'Pentadiagonal': 'Pentadiagonal_matvec',
+    'CBD': 'CBD_matvec',
+    'CDB': 'CDB_matvec',
+    'BBD': 'BBD_matvec1D_ptr'
+    }
+
+def get_diags(mat, N):
+    diags = []
+    for d in matvecs[mat]:
+        if d is None:
+            diags.append(np.random.random())
+        else:
+            diags.append(np.random.random(N+d))
+    return diags
+
+@pytest.mark.parametrize('mat', matvecs.keys())
+@pytest.mark.parametrize('dtype', 'dD')
+def test_matvec1D(mat, dtype):
+    N = 16
+    diags = get_diags(mat, N)
+    v = np.random.random(N).astype(dtype)
+    b0 = np.zeros_like(v)
+    b1 = np.zeros_like(v)
+    if mat == 'SBB':
+        v[-4:] = 0
+        diags = [np.random.random(N-4)]
+    getattr(Matvec, matvecs1D[mat])(v, b0, *diags)
+    getattr(nMatvec, matvecs1D[mat])(v, b1, *diags)
+    assert np.allclose(b0, b1)
+
+@pytest.mark.parametrize('mat', matvecs.keys())
+@pytest.mark.parametrize('dim,axis', [(2, 0), (2, 1), (3, 0), (3, 1), (3, 2)])
+def test_matvec(mat, dim, axis):
+    shape = (14, 16, 18)[:dim]
+    N = shape[axis]
+    diags = get_diags(mat, N)
+    v = np.random.random(shape)+np.random.random(shape)*1j
+    b0 = np.zeros_like(v)
+    b1 = np.zeros_like(v)
+    name = '{}_matvec{}D_ptr'.format(mat, dim)
+    getattr(Matvec, name)(v, b0, *(diags+[axis]))
+    getattr(nMatvec, name)(v, b1, *(diags+[axis]))
+    assert np.allclose(b0, b1)
+
+@pytest.mark.parametrize('dim,axis', [(2, 0), (2, 1), (3, 0), (3, 1), (3, 2)])
+def test_helmholtz_biharmonic_matvec(dim, axis):
+    shape = (18, 20, 22)[:dim]
+    N = shape[axis]
+    v = np.random.random(shape)+np.random.random(shape)*1j
+    sc = list(shape)
+    sc[axis] = 1
+    alfa = np.random.random(sc)
+    beta = np.random.random(sc)
+    b0 = np.zeros_like(v)
+    b1 = np.zeros_like(v)
+    dd, ud, bd = [np.random.random(N) for _ in range(3)]
+    Matvec.Helmholtz_matvec(v, b0, alfa, beta, dd, ud, bd, axis)
+    nMatvec.Helmholtz_matvec(v, b1, alfa, beta, dd, ud, bd, axis)
+    assert np.allclose(b0, b1)
+
+    diags = [np.random.random(N) for _ in range(11)]
+    Matvec.Biharmonic_matvec(v, b0, 0.5, alfa, beta, *(diags+[axis]))
+    nMatvec.Biharmonic_matvec(v, b1, 0.5, alfa, beta, *(diags+[axis]))
+    assert np.allclose(b0, b1)
+
+def test_imult():
+    a = np.random.random((4, 5, 6))+np.random.random((4, 5, 6))*1j
+    assert np.allclose(Matvec.imult(a.copy(), 2.), nMatvec.imult(a.copy(), 2.))
+
+@pytest.mark.parametrize('dtype', 'dD')
+def test_cheb(dtype):
+    fk = np.random.random((12, 4, 5)).astype(dtype)
+    ck0 = np.zeros_like(fk)
+    ck1 = np.zeros_like(fk)
+    Cheb.derivative_coefficients_3D(fk, ck0)
+    nCheb.derivative_coefficients_3D(fk, ck1)
+    assert np.allclose(ck0, ck1)
+    Cheb.derivative_coefficients(fk[:, 0, 0].copy(), ck0[:, 0, 0])
+    nCheb.derivative_coefficients(fk[:, 0, 0].copy(), ck1[:, 0, 0])
+    assert np.allclose(ck0, ck1)
+
+@pytest.mark.parametrize('N', (8, 9))
+def test_convolve(N):
+    u = np.random.random(N)+np.random.random(N)*1j
+    v = np.random.random(N)+np.random.random(N)*1j
+    Np = N if not N % 2 == 0 else N+1
+    k = np.fft.fftfreq(Np, 1./Np).astype(int)
+    uv0 = np.zeros(2*N, dtype=complex)
+    uv1 = np.zeros(2*N, dtype=complex)
+    convolve.convolve_1D(u, v, uv0, k)
+    nconvolve.convolve_1D(u, v, uv1, k)
+    assert np.allclose(uv0, uv1)
+    uv0 = np.zeros(N+1, dtype=complex)
+    uv1 = np.zeros(N+1, dtype=complex)
+    convolve.convolve_real_1D(u, v, uv0, k)
+    nconvolve.convolve_real_1D(u, v, uv1, k)
+    assert np.allclose(uv0, uv1)
+
+# Bases for evaluate tests. F is complex Fourier, R is real-to-complex
+# Fourier (only last axis), C is Chebyshev. The Cython kernels with two
+# non-Fourier bases are only implemented for real-to-complex
+families = ('FF', 'CF', 'FC', 'FR', 'CR', 'FFF', 'CFF', 'FCF', 'FFC', 'FFR',
+            'CFR', 'FCR', 'CCR')
+
+def get_bases(family):
+    N = (6, 7, 8)
+    bases = []
+    for i, f in enumerate(family):
+        if f == 'C':
+            bases.append(Basis(N[i], 'C'))
+        else:
+            bases.append(Basis(N[i], 'F', dtype='d' if f == 'R' else 'D'))
+    return bases
+
+def get_r2c(family):
+    r2c, M, start = -1, -1, -1
+    if family[-1] == 'R':
+        r2c = len(family)-1
+        M = 4 # N//2 for even N = 8, 6 and odd N = 7
+        start = 0
+    return r2c, M, start
+
+@pytest.mark.parametrize('family', families)
+def test_evaluate(family):
+    bases = get_bases(family)
+    dim = len(bases)
+    r2c, M, start = get_r2c(family)
+    x = [np.random.random(10) for _ in range(dim)]
+    P = [base.evaluate_basis_all(x=x[i]) for i, base in enumerate(bases)]
+    u = np.random.random([p.shape[1] for p in P])+np.random.random([p.shape[1] for p in P])*1j
+    dtype = float if r2c >= 0 else complex
+    b0 = np.zeros(10, dtype=dtype)
+    b1 = np.zeros(10, dtype=dtype)
+    if dim == 2:
+        b0 = evaluate.evaluate_2D(b0, u, P, r2c, M, start)
+        b1 = nevaluate.evaluate_2D(b1, u, P, r2c, M, start)
+    else:
+        b0 = evaluate.evaluate_3D(b0, u, P, r2c, M, start)
+        b1 = nevaluate.evaluate_3D(b1, u, P, r2c, M, start)
+    assert np.allclose(b0, b1)
+
+@pytest.mark.parametrize('family', [f for f in families if f.count('C') < 2])
+def test_evaluate_lm(family):
+    bases = get_bases(family)
+    dim = len(bases)
+    r2c, M, start = get_r2c(family)
+    x = [np.random.random(10) for _ in range(dim)]
+    w = [base.wavenumbers(bcast=False).astype(float) for base in bases]
+    u = np.random.random([len(wi) for wi in w])+np.random.random([len(wi) for wi in w])*1j
+    dtype = float if r2c >= 0 else complex
+    b0 = np.zeros(10, dtype=dtype)
+    b1 = np.zeros(10, dtype=dtype)
+    if dim == 2:
+        b0 = evaluate.evaluate_lm_2D(bases, b0, u, x[0], x[1], w[0], w[1], r2c, M, start)
+        b1 = nevaluate.evaluate_lm_2D(bases, b1, u, x[0], x[1], w[0], w[1], r2c, M, start)
+    else:
+        b0 = evaluate.evaluate_lm_3D(bases, b0, u, x[0], x[1], x[2], w[0], w[1],
+                                     w[2], r2c, M, start)
+        b1 = nevaluate.evaluate_lm_3D(bases, b1, u, x[0], x[1], x[2], w[0], w[1],
+                                      w[2], r2c, M, start)
+    assert np.allclose(b0, b1)
+
+def test_helmholtz_biharmonic_la():
+    N = 20
+    A = {0: np.random.random(N), 2: np.random.random(N-2), -2: np.random.random(N-2)}
+    B = {0: np.random.random(N), 2: np.random.random(N-2), -2: np.random.random(N-2),
+         4: np.random.random(N-4), -4: np.random.random(N-4)}
+    A[0] += 10
+    arrays = []
+    for mod in (la, nla):
+        d, u1, u2, l1, l2 = (np.zeros(N), np.zeros(N-2), np.zeros(N-4),
+                             np.zeros(N-2), np.zeros(N-4))
+        mod.LU_Helmholtz_Biharmonic_1D(A, B, 1.0, 0.5, l2, l1, d, u1, u2)
+        arrays.append((d, u1, u2, l1, l2))
+    for a0, a1 in zip(*arrays):
+        assert np.allclose(a0, a1)
+
+    f = np.random.random(N+4)+np.random.random(N+4)*1j
+    u0 = np.zeros_like(f)
+    u1 = np.zeros_like(f)
+    d, u1_, u2_, l1, l2 = arrays[0]
+    la.Solve_Helmholtz_Biharmonic_1D_p(f, u0, l2, l1, d, u1_, u2_)
+    nla.Solve_Helmholtz_Biharmonic_1D_p(f, u1, l2, l1, d, u1_, u2_)
+    assert np.allclose(u0, u1)
+
+@pytest.mark.parametrize('dim,axis', [(2, 0), (2, 1), (3, 0), (3, 1), (3, 2)])
+def test_helmholtz_biharmonic_solve(dim, axis):
+    shape = (14, 16, 18)[:dim]
+    f = np.random.random(shape)+np.random.random(shape)*1j
+    d, u1, u2, l1, l2 = [np.random.random(shape) for _ in range(5)]
+    d += 10
+    u0 = np.zeros_like(f)
+    u1_ = np.zeros_like(f)
+    name = 'Solve_Helmholtz_Biharmonic_{}D_ptr'.format(dim)
+    getattr(la, name)(axis, f, u0, l2, l1, d, u1, u2)
+    getattr(nla, name)(axis, f, u1_, l2, l1, d, u1, u2)
+    assert np.allclose(u0, u1_)
+
+if __name__ == '__main__':
+    test_matvec('SBB', 3, 1)
+    test_evaluate_lm('FCR')
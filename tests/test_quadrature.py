@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+from numpy.polynomial import legendre, hermite
+from scipy.special import roots_jacobi, roots_genlaguerre
+from shenfun.optimization import cython, numba
+from shenfun.utilities import quadrature
+
+sizes = (100, 101, 300)
+
+@pytest.mark.parametrize('N', sizes)
+def test_legendre_gauss(N):
+    x, w = quadrature.legendre_gauss(N)
+    xr, wr = legendre.leggauss(N)
+    assert np.allclose(x, xr, rtol=0, atol=1e-14)
+    assert np.allclose(w, wr, rtol=1e-8, atol=0)
+    assert abs(w.sum()-2) < 1e-13
+
+@pytest.mark.parametrize('N', sizes)
+def test_legendre_lobatto(N):
+    x, w = quadrature.legendre_lobatto(N)
+    # Interior nodes are the roots of P'_{N-1}. Newton from the
+    # Chebyshev-Lobatto points (np.roots is inaccurate for large N)
+    Ln = legendre.Legendre.basis(N-1)
+    Ld, Ld2 = Ln.deriv(1), Ln.deriv(2)
+    y = -np.cos(np.pi*np.arange(1, N-1)/(N-1))
+    for i in range(10):
+        y -= Ld(y)/Ld2(y)
+    xr = np.hstack((-1, y, 1))
+    wr = 2/(N*(N-1)*Ln(xr)**2)
+    assert np.allclose(x, xr, rtol=0, atol=1e-14)
+    assert np.allclose(w, wr, rtol=1e-8, atol=0)
+
+@pytest.mark.parametrize('N', sizes)
+@pytest.mark.parametrize('alpha,beta', ((0.5, -0.3), (1, 1), (-0.5, -0.5), (2, 0)))
+def test_jacobi_gauss(N, alpha, beta):
+    x, w = quadrature.jacobi_gauss(N, alpha, beta)
+    xr, wr = roots_jacobi(N, alpha, beta)
+    assert np.allclose(x, xr, rtol=0, atol=1e-14)
+    assert np.allclose(w, wr, rtol=1e-7, atol=0)
+
+@pytest.mark.parametrize('N', sizes)
+def test_hermite_gauss(N):
+    x, w = quadrature.hermite_gauss(N)
+    xr, wr = hermite.hermgauss(N)
+    assert np.allclose(x, xr, rtol=0, atol=1e-12)
+    assert np.allclose(w, wr, rtol=1e-7, atol=1e-300)
+    xs, ws = quadrature.hermite_gauss(N, scaled=True)
+    assert np.allclose(ws[N//2-5:N//2+5], (wr*np.exp(xr**2))[N//2-5:N//2+5])
+    assert np.isfinite(ws).all()
+
+@pytest.mark.parametrize('N', sizes)
+@pytest.mark.parametrize('alpha', (0, 0.5))
+def test_laguerre_gauss(N, alpha):
+    x, w = quadrature.laguerre_gauss(N, alpha)
+    xr, wr = roots_genlaguerre(N, alpha)
+    assert np.allclose(x, xr, rtol=1e-13, atol=1e-14)
+    i = wr > 1e-200
+    assert np.allclose(w[i], wr[i], rtol=1e-7, atol=0)
+    xs, ws = quadrature.laguerre_gauss(N, alpha, scaled=True)
+    assert np.isfinite(ws).all()
+
+def test_cache():
+    x, w = quadrature.legendre_gauss(200)
+    x[:] = 0
+    x2, w2 = quadrature.legendre_gauss(200)
+    assert x2 is not x
+    assert np.allclose(x2, legendre.leggauss(200)[0])
+
+@pytest.mark.parametrize('mod', (cython, numba))
+def test_glr_march(mod):
+    N = 201
+    coef = np.array([[1, 0, -1], [0, -2, 0], [N*(N+1), 0, 0]], dtype=float)
+    x = np.zeros(N//2)
+    ld = np.zeros(N//2)
+    mod.glr_march(coef, 0., 0., 1., 1., x, ld)
+    xr, ldr = np.zeros_like(x), np.zeros_like(ld)
+    quadrature.glr_march.kernel.func(coef, 0., 0., 1., 1., xr, ldr)
+    assert np.allclose(x, xr, rtol=0, atol=1e-15)
+    assert np.allclose(ld, ldr)
+    assert np.allclose(x, legendre.leggauss(N)[0][N//2+1:], rtol=0, atol=1e-14)
+
+if __name__ == '__main__':
+    test_legendre_gauss(100)
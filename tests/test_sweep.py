@@ -0,0 +1,81 @@
+import pickle
+import importlib
+import pytest
+import numpy as np
+import sympy as sp
+from mpi4py import MPI
+from shenfun import Basis, TensorProductSpace, VectorTensorProductSpace, \
+    TestFunction, TrialFunction, Function, Array, inner, div, grad
+from shenfun.utilities import sweep
+from shenfun.utilities.sweep import Descriptor, parameter_sweep
+
+x, y = sp.symbols('x,y')
+
+def space(family):
+    return TensorProductSpace(MPI.COMM_SELF, (Basis(16, family, bc=(0, 0)),
+                                              Basis(8, 'F', dtype='d')))
+
+def helmholtz(T):
+    la = importlib.import_module('shenfun.{}.la'.format(T.bases[0].family()))
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    return la.Helmholtz(*inner(v, u - div(grad(u))))
+
+def solve(alpha, setup):
+    T, H, solvers = setup
+    solvers.add(id(H))
+    ue = (1-x**2)*(1+sp.cos(y)/float(alpha))
+    f_hat = inner(TestFunction(T), Array(T, buffer=ue - ue.diff(x, 2) - ue.diff(y, 2)))
+    u_hat = H(Function(T), f_hat)
+    return np.abs(u_hat.backward() - Array(T, buffer=ue)).max(), len(solvers)
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_pickle(family):
+    SD = Basis(16, family, bc=(0, 1))
+    T = TensorProductSpace(MPI.COMM_WORLD, (Basis(16, family, bc=(0, 1)),
+                                            Basis(8, 'F', dtype='d')))
+    ue = 1-x**2+(1+x)/2
+    for S, ue in ((SD, ue), (T, ue+(1-x**2)*sp.sin(y))):
+        S2 = pickle.loads(pickle.dumps(S))
+        u = Array(S2, buffer=ue)
+        assert np.allclose(u.forward().backward(), u)
+    V = pickle.loads(pickle.dumps(VectorTensorProductSpace(T)))
+    assert V.shape(True) == (2,)+T.global_shape(True)
+    T.destroy()
+
+class _DistributedComm(object):
+    def Get_size(self):
+        return 2
+
+def test_pickle_distributed():
+    T = space('C')
+    comm, T.comm = T.comm, _DistributedComm()
+    with pytest.warns(RuntimeWarning):
+        pickle.dumps(T)
+    with pytest.warns(RuntimeWarning):
+        pickle.dumps(VectorTensorProductSpace(T))
+    T.comm = comm
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+@pytest.mark.parametrize('max_workers', (0, 2))
+@pytest.mark.parametrize('pickled', (False, True))
+def test_parameter_sweep(pickled, max_workers, family):
+    if max_workers and MPI.COMM_WORLD.Get_size() > 1:
+        pytest.skip('Process pool requires a job not started with mpirun')
+    if pickled:
+        T = space(family)
+        setup = (T, helmholtz(T), set())
+    else:
+        T = Descriptor(space, family)
+        setup = (T, Descriptor(helmholtz, T), set())
+    alpha = np.linspace(1, 2, 6)
+    error, solvers = parameter_sweep(solve, alpha, setup, max_workers=max_workers,
+                                     chunksize=2)
+    assert error.shape == (6,)
+    assert np.all(error < 1e-10)
+    # Each process creates the setup only once
+    assert np.all(solvers == 1)
+    # and releases it after the sweep
+    assert len(sweep._created) == 0
+    assert sweep._worker_setup[0] is None
@@ -12,7 +12,7 @@ from shenfun.laguerre import bases as lagbases
 from shenfun.hermite import bases as hbases
 from shenfun.jacobi import bases as jbases
 from shenfun import Function, project, Dx, Array, Basis, TensorProductSpace, \
-   VectorTensorProductSpace, MixedTensorProductSpace, inner
+   VectorTensorProductSpace, MixedTensorProductSpace, inner, Derivative, Projector
 
 comm = MPI.COMM_WORLD
 
@@ -567,6 +567,23 @@ def test_eval_fourier(typecode, dim):
     print('method=1', t_1)
     print('method=2', t_2)
 
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_eval_middle_nonperiodic(family):
+    # Nonperiodic basis in the middle of two Fourier bases of different size
+    x, y, z = symbols("x,y,z")
+    ue = (1-y**2)*(sin(2*x)+cos(x))*(1+cos(5*z)+sin(z))
+    bases = (Basis(8, 'F', dtype='D'), Basis(6, family, bc=(0, 0)), Basis(16, 'F', dtype='d'))
+    T = TensorProductSpace(comm, bases)
+    u_hat = Array(T, buffer=ue).forward()
+    points = None
+    if comm.Get_rank() == 0:
+        points = np.random.random((3, 6))
+    points = comm.bcast(points)
+    uq = lambdify((x, y, z), ue, 'numpy')(*points)
+    for method in (0, 1, 2):
+        assert allclose(uq, T.eval(points, u_hat, method=method))
+    T.destroy()
+
 @pytest.mark.parametrize('f0,f1', product(*([('C', 'L', 'F')])*2))
 def test_inner(f0, f1):
     if f0 == 'F' and f1 == 'F':
@@ -652,6 +669,311 @@ def test_refine():
     assert up_hat.commsizes == u_hat.commsizes
     u3 = u_hat.refine(2*np.array(N))
 
+@pytest.mark.parametrize('fam', ('F', 'C', 'L'))
+def test_batched_transform(fam):
+    F0 = Basis(8, 'F', dtype='D')
+    F1 = Basis(9, 'F', dtype='d')
+    B0 = Basis(10, fam, dtype='D') if fam == 'F' else Basis(10, fam, bc=(0, 0))
+    T = TensorProductSpace(comm, (B0, F0, F1))
+    for TT in (T, T.get_dealiased(1.5)):
+        V = VectorTensorProductSpace(TT)
+        Vb = VectorTensorProductSpace(TT, batched=True)
+        assert Vb.is_batched
+        u = Array(V)
+        u[:] = np.random.random(u.shape)
+        u_hat = V.forward(u, Function(V))
+        ub_hat = Vb.forward(u, Function(Vb))
+        assert np.allclose(u_hat, ub_hat)
+        assert np.allclose(V.backward(u_hat, Array(V)), Vb.backward(ub_hat, Array(Vb)))
+    Vb = VectorTensorProductSpace(T, batched=True)
+    u = Array(Vb)
+    u[:] = np.random.random(u.shape)
+    u_hat = VectorTensorProductSpace(T).scalar_product(u, Function(Vb))
+    assert np.allclose(u_hat, Vb.scalar_product(u, Function(Vb)))
+    M = MixedTensorProductSpace([Vb, T], batched=True)
+    assert M.is_batched
+    up = Array(M)
+    up[:] = np.random.random(up.shape)
+    up_hat = M.forward(up, Function(M))
+    assert np.allclose(up_hat[:3], Vb.forward(up[:3], Function(Vb)))
+
+@pytest.mark.parametrize('fam', ('F', 'C', 'L'))
+@pytest.mark.parametrize('chunks', (3, 'auto'))
+def test_pipelined_transform(fam, chunks):
+    F0 = Basis(8, 'F', dtype='D')
+    F1 = Basis(9, 'F', dtype='d')
+    B0 = Basis(10, fam, dtype='D') if fam == 'F' else Basis(10, fam, bc=(0, 0))
+    T = TensorProductSpace(comm, (B0, F0, F1))
+    B1 = B0.get_refined(B0.N)
+    Tp = TensorProductSpace(comm, (B1, F0.get_refined(8), F1.get_refined(9)),
+                            pipeline=chunks)
+    u = Array(T)
+    u[:] = np.random.random(u.shape)
+    u_hat = T.forward(u, Function(T))
+    up_hat = Tp.forward(u, Function(Tp))
+    assert np.allclose(u_hat, up_hat)
+    assert np.allclose(T.backward(u_hat, Array(T)), Tp.backward(up_hat, Array(Tp)))
+    assert np.allclose(T.scalar_product(u, Function(T)),
+                       Tp.scalar_product(u, Function(Tp)))
+    TT = T.get_dealiased(1.5)
+    TTp = Tp.get_dealiased(1.5)
+    assert np.allclose(TT.backward(u_hat, Array(TT)), TTp.backward(u_hat, Array(TTp)))
+    Tp.destroy()
+
+@pytest.mark.parametrize('fam', ('F', 'C'))
+def test_autotune(fam, tmp_path):
+    import json
+    from shenfun import autotune_configuration
+    cache = comm.bcast(str(tmp_path / 'test_autotune_{}.json'.format(fam)), root=0)
+    B0 = Basis(10, fam, dtype='D') if fam == 'F' else Basis(10, fam, bc=(0, 0))
+    bases = (B0, Basis(8, 'F', dtype='D'), Basis(9, 'F', dtype='d'))
+    T0 = TensorProductSpace(comm, bases)
+    T = TensorProductSpace(comm, [base.get_refined(base.N) for base in bases],
+                           autotune=cache)
+    assert T.axes[-1] == (2,) or T.axes[-1][-1] == 2
+    assert tuple(T.autotune['grid']) == tuple([c.Get_size() for c in T.subcomm])
+    f = lambda X: (1-X[0]**2)*np.sin(X[1])*np.cos(2*X[2]) if fam != 'F' else np.cos(X[0])*np.sin(X[1])*np.cos(2*X[2])
+    u0 = Array(T0, buffer=f(T0.local_mesh(True)))
+    u = Array(T, buffer=f(T.local_mesh(True)))
+    u0_hat = u0.forward()
+    u_hat = u.forward()
+    assert np.allclose(u_hat.backward(), u)
+    assert np.allclose(comm.allreduce(np.linalg.norm(u_hat)**2),
+                       comm.allreduce(np.linalg.norm(u0_hat)**2))
+    T2 = TensorProductSpace(comm, [base.get_refined(base.N) for base in bases],
+                            autotune=cache)
+    assert T2.autotune == T.autotune
+    # Planning options are part of the key
+    autotune_configuration(comm, bases, cache=cache, repeats=1,
+                           planner_effort='FFTW_ESTIMATE')
+    if comm.Get_rank() == 0:
+        with open(cache) as f:
+            keys = sorted(json.load(f))
+        assert len(keys) == 2
+        assert keys[1].endswith(':planner_effort=FFTW_ESTIMATE')
+    T.destroy()
+    T2.destroy()
+
+@pytest.mark.parametrize('pipeline', (False, 2))
+def test_profile(pipeline, tmp_path):
+    import json
+    B0 = Basis(10, 'C', bc=(0, 0))
+    T = TensorProductSpace(comm, (B0, Basis(8, 'F', dtype='D'), Basis(9, 'F', dtype='d')),
+                           pipeline=pipeline)
+    u = Array(T)
+    u[:] = np.random.random(u.shape)
+    u_hat = T.forward(u)
+    T.profile()
+    for i in range(2):
+        u_hat = T.forward(u)
+        T.backward(u_hat)
+    timings = T.timings()
+    assert sorted(timings.keys()) == ['backward', 'forward', 'padding', 'truncation']
+    for name in ('forward', 'backward'):
+        assert sum([stage['calls'] for stage in timings[name].values()]) >= 2*3
+    if pipeline is False:
+        assert timings['forward']['axis 0']['calls'] == 2
+        assert timings['forward']['transfer 2->1']['bytes'] == 2*T.forward._xfftn[0].output_array.nbytes
+    reduced = T.timings(reduce=True)
+    for stage in reduced['forward'].values():
+        assert stage['time']['min'] <= stage['time']['avg'] <= stage['time']['max']
+    filename = comm.bcast(str(tmp_path / 'test_profile.json'), root=0)
+    T.dump_timings(filename)
+    if comm.Get_rank() == 0:
+        with open(filename) as f:
+            assert json.load(f) == reduced
+    T.profile(False)
+    assert T.timer is None
+    assert np.allclose(T.forward(u), u_hat)
+    T.destroy()
+
+@pytest.mark.parametrize('fam', ('C', 'L'))
+def test_work_pool(fam):
+    from shenfun.spectralbase import work_pool
+    def spaces():
+        F0 = lambda: Basis(8, 'F', dtype='D')
+        F1 = lambda: Basis(9, 'F', dtype='d')
+        return [TensorProductSpace(comm, (B, F0(), F1()))
+                for B in (Basis(10, fam), Basis(10, fam, bc=(0, 0)),
+                          Basis(10, fam, bc='Biharmonic'))]
+    enabled = work_pool.enabled
+    try:
+        work_pool.enable(False)
+        T0 = spaces()
+        work_pool.enable()
+        work_pool.clear()
+        T1 = spaces()
+    finally:
+        work_pool.enable(enabled)
+        work_pool.clear()
+    nbytes = work_pool.nbytes(T0)
+    assert work_pool.nbytes(T1) < nbytes
+    assert T1[0].bases[1].forward.input_array is T1[1].bases[1].forward.input_array
+    assert work_pool.nbytes(T0+T1) == nbytes + work_pool.nbytes(T1)
+    for S0, S1 in zip(T0, T1):
+        u = Array(S0)
+        u[:] = np.random.random(u.shape)
+        u_hat0 = S0.forward(u, Function(S0))
+        u_hat1 = S1.forward(u, Function(S1))
+        assert allclose(u_hat0, u_hat1)
+        assert allclose(S0.backward(u_hat0, Array(S0)), S1.backward(u_hat1, Array(S1)))
+    # Shared work memory is not returned
+    S0, S1 = T1[:2]
+    u = Array(S0)
+    u[:] = np.random.random(u.shape)
+    u_hat = S0.forward(u)
+    assert u_hat is not S0.forward.output_array
+    S1.forward(Array(S1, val=1))
+    assert allclose(u_hat, S0.forward(u, Function(S0)))
+    B = S0.bases[1]
+    v_hat = B.forward(B.forward.input_array.copy())
+    assert v_hat is not B.forward.output_array
+    assert S0.forward() is S0.forward.output_array
+    for S in T0+T1:
+        S.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_lazy_planning(family):
+    def bases():
+        return (Basis(8, family), Basis(9, 'F', dtype='D'),
+                Basis(10, 'F', dtype='d'))
+    T0 = TensorProductSpace(comm, bases())
+    T1 = TensorProductSpace(comm, bases(), lazy=True)
+    assert T0.is_planned
+    assert not T1.is_planned
+    for S0, S1 in ((T0, T1), (T0.get_dealiased(), T1.get_dealiased())):
+        for forward_output in (True, False):
+            assert S0.shape(forward_output) == S1.shape(forward_output)
+            assert S0.local_slice(forward_output) == S1.local_slice(forward_output)
+            assert S0.dtype(forward_output) == S1.dtype(forward_output)
+        u = Array(S1)
+        u_hat = Function(S1)
+        assert not S1.is_planned
+        u[:] = np.random.random(u.shape)
+        assert allclose(S0.forward(u, Function(S0)), S1.forward(u, u_hat))
+        assert S1.is_planned
+        assert S0.shape(True) == S1.forward.output_array.shape
+    V = VectorTensorProductSpace(T1.get_refined(12))
+    uv = Array(V)
+    assert not V.spaces[0].is_planned
+    V.plan()
+    assert V.spaces[0].is_planned
+    assert uv.shape[1:] == V.backward.output_array.shape
+    for S in (T0, T1):
+        S.destroy()
+
+@pytest.mark.parametrize('bases', [('C', 'F'), ('CD', 'LD', 'F'), ('F', 'LB', 'F'),
+                                   ('L', 'CD', 'F')])
+def test_derivative(bases):
+    xyz = symbols('x,y,z')
+    B = {'C': (lambda N: Basis(N, 'C'), lambda s: s**3+s),
+         'L': (lambda N: Basis(N, 'L'), lambda s: s**3+s),
+         'CD': (lambda N: Basis(N, 'C', bc=(0, 0)), lambda s: (1-s**2)*s),
+         'LD': (lambda N: Basis(N, 'L', bc=(0, 0)), lambda s: (1-s**2)*s),
+         'LB': (lambda N: Basis(N, 'L', bc='Biharmonic'), lambda s: (1-s**2)**2)}
+    sizes = (12, 10, 8)
+    spaces = []
+    ue = 1
+    for i, b in enumerate(bases):
+        if b in B:
+            spaces.append(B[b][0](sizes[i]))
+            ue *= B[b][1](xyz[i])
+        else:
+            spaces.append(Basis(sizes[i], 'F', dtype='d' if i == len(bases)-1 else 'D'))
+            ue *= cos(xyz[i])+sin(2*xyz[i])
+    T = TensorProductSpace(comm, spaces)
+    u_hat = Array(T, buffer=ue).forward(Function(T))
+    for axis in range(len(bases)):
+        D = Derivative(T, axis)
+        due = Array(D.output_space, buffer=ue.diff(xyz[axis], 1))
+        du = D(u_hat)
+        assert np.allclose(du.backward(Array(D.output_space)), due)
+        du = D(u_hat, du)
+        assert np.allclose(du.backward(Array(D.output_space)), due)
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L', 'F'))
+def test_single_precision(family):
+    bases = (Basis(12, family, bc=None if family == 'F' else (0, 0), dtype='F'),
+             Basis(10, 'F', dtype='f'))
+    T = TensorProductSpace(comm, bases, dtype='f')
+    u = Array(T)
+    assert u.dtype == np.float32
+    u_hat = Function(T)
+    assert u_hat.dtype == np.complex64
+    u_hat[:] = np.random.random(u_hat.shape)+1j*np.random.random(u_hat.shape)
+    u = u_hat.backward(u)
+    u_hat = u.forward(u_hat)
+    uc = u_hat.copy()
+    u = u_hat.backward(u)
+    u_hat = u.forward(u_hat)
+    assert u.dtype == np.float32
+    assert u_hat.dtype == np.complex64
+    assert np.linalg.norm(u_hat-uc) < 1e-5*np.linalg.norm(uc)
+    TP = T.get_dealiased()
+    up = TP.backward(uc, Array(TP))
+    assert up.dtype == np.float32
+    assert np.linalg.norm(TP.forward(up, Function(TP))-uc) < 1e-5*np.linalg.norm(uc)
+    T.destroy()
+
+@pytest.mark.parametrize('integrator', ('ETD', 'ETDRK4'))
+def test_single_precision_integrator(integrator):
+    import shenfun
+    from shenfun import TrialFunction, TestFunction, div, grad
+    bases = (Basis(8, 'F', dtype='D'), Basis(10, 'F', dtype='f'))
+    T = TensorProductSpace(comm, bases, dtype='f')
+    u = TrialFunction(T)
+    v = TestFunction(T)
+    X = T.local_mesh(True)
+    U = Array(T)
+    U[:] = np.sin(X[0])*np.cos(2*X[1])
+    U_hat = U.forward()
+    def LinearRHS(self, **params):
+        return inner(div(grad(u)), v)
+    def NonlinearRHS(self, U, U_hat, dU, **params):
+        dU.fill(0)
+        return dU
+    solver = getattr(shenfun, integrator)(T, L=LinearRHS, N=NonlinearRHS)
+    U_hat = solver.solve(U, U_hat, 0.01, (0, 0.1))
+    assert U_hat.dtype == np.complex64
+    assert solver.psi.dtype == np.float32
+    U = U_hat.backward(U)
+    assert U.dtype == np.float32
+    assert np.allclose(U, np.exp(-0.5)*np.sin(X[0])*np.cos(2*X[1]), atol=1e-5)
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'F'))
+def test_fftw_plan_registry(family):
+    from shenfun.spectralbase import fftw_plans
+    B = Basis(12, family, dtype='D')
+    T = TensorProductSpace(comm, (B, Basis(10, 'F', dtype='d')))
+    T0 = T.get_dealiased()
+    T0.plan()
+    hits = fftw_plans.hits
+    T1 = T.get_dealiased()
+    T1.plan()
+    assert fftw_plans.hits > hits
+    assert T1.bases[1].forward.xfftn.func is T0.bases[1].forward.xfftn.func
+    assert T1.bases[1].forward.xfftn.input_array is not T0.bases[1].forward.xfftn.input_array
+    fftw_plans.enable(False)
+    try:
+        T2 = T.get_dealiased()
+        T2.plan()
+    finally:
+        fftw_plans.enable()
+    assert T2.bases[1].forward.xfftn.func is not T0.bases[1].forward.xfftn.func
+    u_hat = Function(T)
+    u_hat[:] = np.random.random(u_hat.shape) + 1j*np.random.random(u_hat.shape)
+    u_hat = T.forward(T.backward(u_hat))
+    u0 = T0.backward(u_hat, Array(T0))
+    u1 = T1.backward(u_hat, Array(T1))
+    u2 = T2.backward(u_hat, Array(T2))
+    assert allclose(u0, u2)
+    assert allclose(u1, u2)
+    assert allclose(T1.forward(u1, Function(T1)), u_hat)
+    for S in (T, T0, T1, T2):
+        S.destroy()
+
 def test_eval_expression():
     import sympy as sp
     from shenfun import div, grad
@@ -678,6 +1000,115 @@ def test_eval_expression():
     assert np.allclose(f0, f1, 1e-7)
     assert np.allclose(f1, f2, 1e-7)
 
+@pytest.mark.parametrize('bases', [('C', 'F'), ('CD', 'LD'), ('F', 'F', 'F')])
+def test_projector(bases):
+    from shenfun import div, grad, curl
+    import sympy as sp
+    B = {'C': lambda N: Basis(N, 'C'),
+         'CD': lambda N: Basis(N, 'C', bc=(0, 0)),
+         'LD': lambda N: Basis(N, 'L', bc=(0, 0))}
+    sizes = (12, 10, 8)
+    B = [B[b](sizes[i]) if b in B else
+         Basis(sizes[i], 'F', dtype='d' if i == len(bases)-1 else 'D')
+         for i, b in enumerate(bases)]
+    T = TensorProductSpace(comm, B)
+    u_hat = Function(T)
+    w_hat = Function(T)
+    exprs = [div(grad(u_hat)), Dx(u_hat, 0, 1)]
+    if len(T) == 3:
+        TV = VectorTensorProductSpace(T)
+        u_hat = Function(TV)
+        w_hat = Function(TV)
+        exprs = [curl(u_hat)]
+        T = TV
+    for e in exprs:
+        P = Projector(e, T)
+        for _ in range(2):
+            u_hat[:] = random_like(u_hat)
+            u_hat[:] = u_hat.backward().forward()
+            p0 = project(e, T)
+            p1 = P(output_array=Function(T))
+            assert np.allclose(p0, p1)
+        w_hat[:] = u_hat
+        u_hat.fill(0)
+        assert np.allclose(P(w_hat), p0)
+
+    # Sympy functions and to_ortho
+    if T.rank == 0:
+        x, y = sp.symbols('x,y', real=True)
+        f = sp.sin(x)*sp.cos(y)
+        assert np.allclose(Projector(f, T)(), project(f, T))
+        if not T.is_orthogonal:
+            T0 = T.get_orthogonal()
+            assert np.allclose(Projector(u_hat, T0)(w_hat), project(w_hat, T0))
+
+def test_project_no_to_ortho():
+    # The Jacobi 6th order basis does not implement to_ortho
+    import sympy as sp
+    x = sp.Symbol('x')
+    N = 24
+    SD = Basis(N, 'J', bc='6th order')
+    u_hat = project((1-x**2)**3*sp.sin(x), SD)
+    B0 = Basis(N, 'J')
+    assert Projector(u_hat, B0).method == 'inner'
+    u_b = project(u_hat, B0)
+    xj = np.linspace(-1, 1, 10)
+    assert np.allclose(u_b.eval(xj), u_hat.eval(xj))
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+@pytest.mark.parametrize('dim,axis', ((2, 0), (2, 1), (3, 0), (3, 1)))
+def test_bcs_time(family, dim, axis):
+    # Dirichlet base is transformed first if axis = 1 in 2D
+    import sympy as sp
+    x, y, z, tt = sp.symbols('x,y,z,t')
+    ys = (y, x)[axis]
+    bc = (sp.sin(2*ys-tt)+sp.cos(tt)*z**(dim-2), 1+tt**2)
+    bct = lambda t: tuple(sp.sympify(b).subs(tt, t) for b in bc)
+    def space(bc):
+        bases = [Basis(10, 'F', dtype='D') for i in range(dim)]
+        if axis < dim-1:
+            bases[-1] = Basis(10, 'F', dtype='d')
+        bases[axis] = Basis(10, family, bc=bc)
+        return TensorProductSpace(comm, bases, dtype='d' if axis < dim-1 else 'D',
+                                  axes=tuple(range(dim)))
+    T = space(bc)
+    bcs = T.bases[axis].bc
+    if comm.Get_size() == 1:
+        assert bcs._plane_transforms is not None
+    for t in (0.3, 0.7):
+        bcs.update_bcs_time(t)
+        Te = space(bct(t))
+        bcse = Te.bases[axis].bc
+        # Reference values from the forward transform of the full space
+        bcse._plane_transforms = None
+        bcse._update_tensor_bcs()
+        for i in range(2):
+            assert np.allclose(bcs.bcs[i], bcse.bcs[i])
+            assert np.allclose(bcs.bcs_final[i], bcse.bcs_final[i])
+        u = Array(T)
+        u[:] = random_like(u)
+        assert np.allclose(u.forward(), Te.forward(u))
+        Te.destroy()
+    T.destroy()
+
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_bcs_subcomm(family):
+    import sympy as sp
+    from mpi4py_fft.pencil import Subcomm
+    x, y, z = sp.symbols('x,y,z')
+    a, b = -1, 2
+    ue = a*(1-y)/2 + b*(1+y)/2 + (1-y**2)*sp.sin(x)*sp.cos(z)
+    subcomms = Subcomm(comm, [0, 0, 1])
+    K1 = Basis(8, 'F', dtype='D')
+    SD = Basis(10, family, bc=(a, b))
+    K2 = Basis(8, 'F', dtype='d')
+    T = TensorProductSpace(subcomms, (K1, SD, K2), axes=(1, 0, 2))
+    if comm.Get_size() == 1:
+        assert SD.bc._plane_transforms is not None
+    ua = Array(T, buffer=ue)
+    assert np.allclose(ua.forward().backward(), ua)
+    T.destroy()
+
 if __name__ == '__main__':
     #test_transform('f', 3)
     #test_transform('d', 2)
@@ -177,6 +177,35 @@ def test_to_ortho(basis, quad):
     assert np.linalg.norm(b0_hat-b1_hat) < 1e-10
 
 
+@pytest.mark.parametrize('family, kw', [('C', {}), ('C', dict(bc=(0, 0))),
+                                         ('C', dict(bc='Biharmonic', domain=(0, 2))),
+                                         ('L', {}), ('L', dict(bc=(1, 2))),
+                                         ('J', dict(alpha=0.5, beta=-0.25)),
+                                         ('La', {}), ('La', dict(bc=(0, 0))),
+                                         ('H', {}), ('F', dict(dtype='D')),
+                                         ('F', dict(dtype='d'))])
+def test_derivative(family, kw):
+    B = shenfun.Basis(12, family, **kw)
+    u = shenfun.Function(B)
+    u[B.slice()] = np.random.random(u[B.slice()].shape)
+    if family == 'F':
+        u[:] += 1j*np.random.random(u.shape)
+        u[0] = u[0].real
+        u.mask_nyquist()
+    for k in (1, 2):
+        D = shenfun.Derivative(B, k=k)
+        du = D(u)
+        if family == 'H' and k == 2:
+            # Gauss quadrature is not exact for projection of second derivative
+            continue
+        dp = shenfun.project(shenfun.Dx(u, 0, k), D.output_space)
+        assert np.allclose(du, dp)
+    if B.is_orthogonal:
+        # In place
+        du = D(u)
+        u = D(u, u)
+        assert np.allclose(u, du)
+
 @pytest.mark.parametrize('test, trial, quad', cbases2+lbases2)
 def test_massmatrices(test, trial, quad):
     test = test(N, quad=quad)
@@ -233,6 +262,18 @@ def test_project_1D(basis):
     u_2 = shenfun.project(ue, T)
     assert np.allclose(u_2, u_p)
 
+def test_projector_method():
+    C = shenfun.Basis(12, 'C', bc=(0, 0))
+    u = shenfun.Function(C)
+    u[:4] = np.random.random(4)
+    for T, method in ((shenfun.Basis(16, 'C', bc=(0, 0)), 'assign'),
+                      (shenfun.Basis(12, 'C'), 'to_ortho'),
+                      (shenfun.Basis(10, 'C'), 'inner')):
+        P = shenfun.Projector(u, T)
+        assert P.method == method
+        X = T.mesh()
+        assert np.allclose(P().backward(), u.eval(X))
+
 @pytest.mark.parametrize('ST,quad', all_bases_and_quads)
 @pytest.mark.parametrize('dim', (2, 3))
 def test_transforms(ST, quad, dim):